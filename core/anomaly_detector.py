@@ -0,0 +1,254 @@
+# core/anomaly_detector.py
+# Phát hiện bất thường trực tuyến trên luồng snapshot của MetricsSampler: ngưỡng có trễ (hysteresis),
+# độ lệch so với đường nền EWMA/EWMV và tốc độ thay đổi; mỗi mẫu chi phí O(1)
+import abc
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+SEVERITY_INFO = "info"
+SEVERITY_WARNING = "warning"
+SEVERITY_CRITICAL = "critical"
+
+EVENT_RAISED = "raised"
+EVENT_CLEARED = "cleared"
+
+DEFAULT_REARM_S = 300.0 # Sau khi cảnh báo được xóa, không phát lại cùng cảnh báo trong khoảng này
+MAX_PENDING_EVENTS = 200
+
+
+class EwmaBaseline:
+    """
+    Trung bình và phương sai trượt có trọng số mũ (EWMA/EWMV), cập nhật O(1).
+    alpha lớn -> bám nhanh; warmup = số mẫu tối thiểu trước khi zscore() có nghĩa.
+    """
+    def __init__(self, alpha=0.05, warmup=20):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.count = 0
+        self.mean = None
+        self.variance = 0.0
+
+    def update(self, value):
+        self.count += 1
+        if self.mean is None:
+            self.mean = value
+            return
+        delta = value - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + delta * increment)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.variance > 0 else 0.0
+
+    def zscore(self, value, min_std=1e-6):
+        if self.mean is None or self.count < self.warmup:
+            return 0.0
+        return (value - self.mean) / max(self.std, min_std)
+
+
+class AlertRule(abc.ABC):
+    """
+    Lớp cơ sở của một luật. evaluate(value, timestamp) trả về True khi điều kiện bất thường đang đúng,
+    False khi đã trở về bình thường (đủ để xóa), None khi ở vùng trễ (giữ nguyên trạng thái).
+    Luật giữ trạng thái riêng nên mỗi instance chỉ dùng cho một AnomalyDetector.
+    """
+    def __init__(self, rule_id, field, message, severity=SEVERITY_WARNING, min_duration_s=0.0):
+        self.rule_id = rule_id
+        self.field = field
+        self.message = message # Có thể chứa {value}
+        self.severity = severity
+        self.min_duration_s = min_duration_s # Điều kiện phải đúng liên tục trong khoảng này mới phát cảnh báo
+
+    def value_from(self, snapshot):
+        return snapshot.get(self.field)
+
+    @abc.abstractmethod
+    def evaluate(self, value, timestamp):
+        """Cài đặt ở lớp con; lớp con thiếu hàm này không tạo được instance."""
+
+
+class ThresholdRule(AlertRule):
+    """Giá trị >= raise_at thì bất thường; chỉ trở về bình thường khi < clear_at (clear_at < raise_at)."""
+    def __init__(self, rule_id, field, raise_at, clear_at, message, **kwargs):
+        super().__init__(rule_id, field, message, **kwargs)
+        if clear_at > raise_at:
+            raise ValueError("clear_at phải <= raise_at")
+        self.raise_at = raise_at
+        self.clear_at = clear_at
+
+    def evaluate(self, value, timestamp):
+        if value >= self.raise_at:
+            return True
+        if value < self.clear_at:
+            return False
+        return None
+
+
+class DeviationRule(AlertRule):
+    """
+    Bất thường khi giá trị vượt đường nền EWMA quá `sigma` độ lệch chuẩn và không thấp hơn `floor`
+    (tránh báo động cho dao động nhỏ ở vùng an toàn). Đường nền chỉ học từ mẫu bình thường để
+    một đợt tăng kéo dài không tự biến thành "bình thường mới".
+    """
+    def __init__(self, rule_id, field, sigma, floor, message, alpha=0.05, warmup=30, clear_sigma=None, **kwargs):
+        super().__init__(rule_id, field, message, **kwargs)
+        self.sigma = sigma
+        self.clear_sigma = clear_sigma if clear_sigma is not None else sigma / 2
+        self.floor = floor
+        self.baseline = EwmaBaseline(alpha, warmup)
+
+    def evaluate(self, value, timestamp):
+        z = self.baseline.zscore(value, min_std=1.0)
+        if value >= self.floor and z >= self.sigma:
+            return True
+        self.baseline.update(value)
+        if value < self.floor or z < self.clear_sigma:
+            return False
+        return None
+
+
+class RateOfChangeRule(AlertRule):
+    """Bất thường khi giá trị tăng nhanh hơn `rate_per_s` (đơn vị/giây) so với mẫu trước và không thấp hơn `floor`."""
+    def __init__(self, rule_id, field, rate_per_s, floor, message, clear_rate_per_s=0.0, **kwargs):
+        super().__init__(rule_id, field, message, **kwargs)
+        self.rate_per_s = rate_per_s
+        self.clear_rate_per_s = clear_rate_per_s
+        self.floor = floor
+        self._previous = None # (timestamp, value)
+
+    def evaluate(self, value, timestamp):
+        previous, self._previous = self._previous, (timestamp, value)
+        if previous is None or timestamp <= previous[0]:
+            return None
+        rate = (value - previous[1]) / (timestamp - previous[0])
+        if value >= self.floor and rate >= self.rate_per_s:
+            return True
+        if value < self.floor or rate <= self.clear_rate_per_s:
+            return False
+        return None
+
+
+def default_rules():
+    """Các luật mặc định cho bảng cảnh báo hệ thống (FR-001)."""
+    return [
+        ThresholdRule("cpu_pegged", "cpu_percent", 95.0, 80.0,
+                      "CPU liên tục ở mức {value:.0f}%", severity=SEVERITY_WARNING, min_duration_s=30.0),
+        ThresholdRule("memory_pressure", "ram_percent", 92.0, 85.0,
+                      "Bộ nhớ RAM gần đầy ({value:.0f}%)", severity=SEVERITY_WARNING, min_duration_s=10.0),
+        ThresholdRule("swap_pressure", "swap_percent", 80.0, 60.0,
+                      "Bộ nhớ ảo (pagefile) dùng nhiều ({value:.0f}%)", severity=SEVERITY_INFO, min_duration_s=60.0),
+        ThresholdRule("disk_nearly_full", "disk_usage_percent", 90.0, 88.0,
+                      "Ổ hệ thống gần đầy ({value:.0f}%)", severity=SEVERITY_WARNING),
+        ThresholdRule("gpu_overheat", "gpu_temperature_c", 88.0, 80.0,
+                      "GPU quá nóng ({value:.0f}°C)", severity=SEVERITY_CRITICAL, min_duration_s=10.0),
+        DeviationRule("gpu_thermal_spike", "gpu_temperature_c", sigma=4.0, floor=70.0,
+                      message="Nhiệt độ GPU tăng đột biến ({value:.0f}°C)", severity=SEVERITY_WARNING),
+        RateOfChangeRule("gpu_thermal_ramp", "gpu_temperature_c", rate_per_s=1.5, floor=75.0,
+                         message="Nhiệt độ GPU tăng nhanh ({value:.0f}°C)", severity=SEVERITY_WARNING),
+        ThresholdRule("gpu_vram_exhaustion", "gpu_memory_percent", 95.0, 90.0,
+                      "VRAM GPU gần cạn ({value:.0f}%)", severity=SEVERITY_WARNING, min_duration_s=10.0),
+    ]
+
+
+class AnomalyDetector:
+    """
+    Chạy các luật trên từng snapshot (process() gọi được trực tiếp từ snapshot listener của MetricsSampler).
+
+    Mỗi luật có tối đa một cảnh báo đang hoạt động (khử trùng lặp theo rule_id); cảnh báo lặp lại khi đang
+    hoạt động chỉ tăng bộ đếm. Sau khi xóa, cùng luật không phát lại trong rearm_s giây.
+    Sự kiện (raised/cleared) được xếp hàng để luồng GUI lấy ra bằng drain_events().
+    """
+    def __init__(self, rules=None, rearm_s=DEFAULT_REARM_S):
+        self.rules = list(rules) if rules is not None else default_rules()
+        self.rearm_s = rearm_s
+        self._lock = threading.Lock()
+        self._condition_since = {} # rule_id -> thời điểm điều kiện bắt đầu đúng
+        self._active = {} # rule_id -> dict cảnh báo
+        self._cleared_at = {} # rule_id -> thời điểm xóa gần nhất
+        self._events = deque(maxlen=MAX_PENDING_EVENTS)
+
+    def process(self, snapshot):
+        """Đánh giá một snapshot; trả về list sự kiện mới (EVENT_*, dict cảnh báo)."""
+        timestamp = snapshot.get("timestamp") or time.time()
+        events = []
+        for rule in self.rules:
+            value = rule.value_from(snapshot)
+            if value is None or value != value: # Thiếu dữ liệu / NaN: giữ nguyên trạng thái
+                continue
+            try:
+                state = rule.evaluate(value, timestamp)
+            except Exception as e:
+                logging.error(f"AnomalyDetector: lỗi khi đánh giá luật {rule.rule_id}: {e}")
+                continue
+            event = self._apply_state(rule, state, value, timestamp)
+            if event is not None:
+                events.append(event)
+        if events:
+            with self._lock:
+                self._events.extend(events)
+        return events
+
+    def _apply_state(self, rule, state, value, timestamp):
+        rule_id = rule.rule_id
+        with self._lock:
+            alert = self._active.get(rule_id)
+            if state is True:
+                since = self._condition_since.setdefault(rule_id, timestamp)
+                if alert is not None:
+                    alert["last_seen"] = timestamp
+                    alert["value"] = value
+                    alert["count"] += 1
+                    return None
+                if timestamp - since < rule.min_duration_s:
+                    return None
+                cleared_at = self._cleared_at.get(rule_id)
+                if cleared_at is not None and timestamp - cleared_at < self.rearm_s:
+                    return None
+                alert = {
+                    "id": rule_id,
+                    "severity": rule.severity,
+                    "message": rule.message.format(value=value),
+                    "value": value,
+                    "started_at": since,
+                    "last_seen": timestamp,
+                    "count": 1,
+                }
+                self._active[rule_id] = alert
+                logging.warning(f"Cảnh báo hệ thống [{rule.severity}]: {alert['message']}")
+                return (EVENT_RAISED, dict(alert))
+            if state is False:
+                self._condition_since.pop(rule_id, None)
+                if alert is None:
+                    return None
+                del self._active[rule_id]
+                self._cleared_at[rule_id] = timestamp
+                alert = dict(alert, cleared_at=timestamp)
+                logging.info(f"Cảnh báo hệ thống đã hết: {alert['message']}")
+                return (EVENT_CLEARED, alert)
+            return None # Vùng trễ: giữ nguyên
+
+    def active_alerts(self):
+        """Bản sao các cảnh báo đang hoạt động, nghiêm trọng nhất trước."""
+        order = {SEVERITY_CRITICAL: 0, SEVERITY_WARNING: 1, SEVERITY_INFO: 2}
+        with self._lock:
+            alerts = [dict(alert) for alert in self._active.values()]
+        return sorted(alerts, key=lambda a: (order.get(a["severity"], 3), a["started_at"]))
+
+    def drain_events(self):
+        """Lấy và xóa các sự kiện chưa đọc (gọi từ luồng GUI)."""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def reset(self):
+        with self._lock:
+            self._condition_since.clear()
+            self._active.clear()
+            self._cleared_at.clear()
+            self._events.clear()
@@ -0,0 +1,20 @@
+# core/app_paths.py
+# Thư mục dữ liệu cục bộ của ứng dụng (lịch sử số liệu, kho lưu trữ...)
+import os
+
+APP_DATA_DIR_NAME = "InfoPCTools"
+
+
+def get_app_data_dir(*subdirs, create=True):
+    """
+    Trả về thư mục dữ liệu của ứng dụng: %LOCALAPPDATA%\\InfoPCTools trên Windows,
+    ~/.infopctools trên hệ khác. Các thư mục con được tạo nếu create=True.
+    """
+    base_dir = os.environ.get("LOCALAPPDATA")
+    if base_dir:
+        path = os.path.join(base_dir, APP_DATA_DIR_NAME, *subdirs)
+    else:
+        path = os.path.join(os.path.expanduser("~"), "." + APP_DATA_DIR_NAME.lower(), *subdirs)
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
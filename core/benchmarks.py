@@ -0,0 +1,334 @@
+# core/benchmarks.py
+# Bộ đánh giá CPU tái lập được: khối lượng việc cố định, dữ liệu sinh từ seed cố định,
+# chạy đơn nhân và đa nhân (process pool), có khởi động (warm-up), lặp nhiều lần và chấm điểm chuẩn hóa
+import hashlib
+import logging
+import lzma
+import math
+import os
+import platform
+import random
+import statistics
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from core.task_control import StepProgress, check_cancelled
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not found. The NumPy CPU benchmark workload will be skipped. Install with 'pip install numpy'.")
+
+# Tăng phiên bản mỗi khi thay đổi khối lượng việc, seed hoặc thời gian tham chiếu:
+# chỉ so sánh điểm giữa các máy có cùng phiên bản bộ đánh giá
+BENCHMARK_VERSION = 1
+BENCHMARK_SEED = 20240601
+REFERENCE_SCORE = 1000 # Điểm của máy tham chiếu cho mỗi bài (và điểm tổng hợp)
+
+DEFAULT_ITERATIONS = 5
+DEFAULT_WARMUP = 1
+
+WORKLOAD_INTEGER = "integer"
+WORKLOAD_FLOAT = "float"
+WORKLOAD_NUMPY = "numpy"
+WORKLOAD_COMPRESSION = "compression"
+WORKLOAD_HASHING = "hashing"
+
+PAYLOAD_BYTES = 1 << 20 # Khối dữ liệu chung của bài nén và bài băm
+
+# Biến môi trường giới hạn số luồng BLAS trong tiến trình con của chế độ đa nhân (tránh N tiến trình x N luồng)
+BLAS_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+MODE_SINGLE = "single"
+MODE_MULTI = "multi"
+
+
+# --- Khối lượng việc ---
+# Mỗi hàm làm một lượng việc cố định và trả về checksum xác định: checksum sai nghĩa là kết quả
+# không hợp lệ (ví dụ phần cứng lỗi), đồng thời ngăn việc tính toán bị bỏ qua.
+
+def _workload_integer():
+    """Sàng Eratosthenes + trộn bit số nguyên (xorshift) trong Python thuần."""
+    limit = 800_000
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    prime_count = sum(sieve)
+
+    state = BENCHMARK_SEED
+    for _ in range(300_000):
+        state ^= (state << 13) & 0xFFFFFFFF
+        state ^= state >> 17
+        state ^= (state << 5) & 0xFFFFFFFF
+    return prime_count ^ state
+
+
+def _workload_float():
+    """Tập Mandelbrot trên lưới cố định (số thực dấu phẩy động trong Python thuần)."""
+    width, height, max_iter = 160, 120, 100
+    inside = 0
+    for row in range(height):
+        ci = -1.2 + 2.4 * row / height
+        for col in range(width):
+            cr = -2.1 + 3.0 * col / width
+            zr = zi = 0.0
+            for _ in range(max_iter):
+                zr2, zi2 = zr * zr, zi * zi
+                if zr2 + zi2 > 4.0:
+                    break
+                zi = 2.0 * zr * zi + ci
+                zr = zr2 - zi2 + cr
+            else:
+                inside += 1
+    return inside
+
+
+def _workload_numpy():
+    """Nhân ma trận, FFT và hàm siêu việt trên mảng sinh từ seed (dùng BLAS/SIMD qua NumPy)."""
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    a = rng.standard_normal((256, 256))
+    b = rng.standard_normal((256, 256))
+    checksum = 0.0
+    for _ in range(16):
+        a = np.tanh(a @ b / 16.0)
+        checksum += float(np.abs(np.fft.rfft(a, axis=0)).sum())
+    signal = rng.standard_normal(1 << 20)
+    checksum += float(np.sqrt(np.abs(np.sin(signal) * np.exp(-signal * signal))).sum())
+    return checksum
+
+
+def _benchmark_payload(size, seed):
+    """Dữ liệu nén được vừa phải (văn bản giả từ từ điển nhỏ), xác định hoàn toàn từ seed."""
+    rng = random.Random(seed)
+    words = [bytes(rng.choice(b"abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9))) for _ in range(512)]
+    chunks, total = [], 0
+    while total < size:
+        word = rng.choice(words)
+        chunks.append(word)
+        chunks.append(b" " if rng.random() < 0.9 else b"\n")
+        total += len(word) + 1
+    return b"".join(chunks)[:size]
+
+
+_payload_cache = {}
+
+
+def _cached_payload(size):
+    payload = _payload_cache.get(size)
+    if payload is None:
+        payload = _payload_cache[size] = _benchmark_payload(size, BENCHMARK_SEED)
+    return payload
+
+
+def _prepare_payloads():
+    """
+    Dựng sẵn khối dữ liệu trước lần đo đầu tiên (cũng là initializer của process pool): nếu dựng lười trong lần
+    chạy đầu, thời gian sinh dữ liệu bị tính vào mẫu đo, nhất là ở chế độ đa nhân nơi mỗi tiến trình con dựng lại.
+    """
+    _cached_payload(PAYLOAD_BYTES)
+
+
+def _workload_compression():
+    """Nén/giải nén zlib (mức 6) và lzma (preset 1) trên cùng một khối dữ liệu."""
+    payload = _cached_payload(PAYLOAD_BYTES)
+    packed_zlib = zlib.compress(payload, 6)
+    packed_lzma = lzma.compress(payload[: 1 << 18], preset=1)
+    if zlib.decompress(packed_zlib) != payload or lzma.decompress(packed_lzma) != payload[: 1 << 18]:
+        raise ValueError("Dữ liệu giải nén không khớp")
+    return len(packed_zlib) ^ len(packed_lzma)
+
+
+def _workload_hashing():
+    """SHA-256, SHA-1 và BLAKE2b trên cùng một khối dữ liệu."""
+    payload = _cached_payload(PAYLOAD_BYTES)
+    digest = b""
+    for _ in range(24):
+        digest = hashlib.sha256(payload + digest).digest()
+        digest = hashlib.blake2b(payload + digest, digest_size=32).digest()
+    digest = hashlib.sha1(payload + digest).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+# name -> (hàm, mô tả, thời gian một lần chạy trên máy tham chiếu (giây))
+WORKLOADS = {
+    WORKLOAD_INTEGER: (_workload_integer, "Số nguyên", 0.060),
+    WORKLOAD_FLOAT: (_workload_float, "Số thực", 0.040),
+    WORKLOAD_NUMPY: (_workload_numpy, "NumPy (ma trận/FFT)", 0.050),
+    WORKLOAD_COMPRESSION: (_workload_compression, "Nén (zlib/lzma)", 0.040),
+    WORKLOAD_HASHING: (_workload_hashing, "Băm (SHA/BLAKE2)", 0.045),
+}
+
+
+def available_workloads():
+    return [name for name in WORKLOADS if name != WORKLOAD_NUMPY or HAS_NUMPY]
+
+
+def _timed_workload(name):
+    """Chạy một bài và trả về (thời gian, checksum). Hàm cấp module để gửi được sang process pool."""
+    func = WORKLOADS[name][0]
+    start = time.perf_counter()
+    checksum = func()
+    return time.perf_counter() - start, checksum
+
+
+def _verify_checksum(checksums, name, checksum):
+    """Mọi lần chạy của cùng một bài phải cho cùng checksum (số thực: sai số làm tròn của BLAS được chấp nhận)."""
+    expected = checksums.setdefault(name, checksum)
+    if isinstance(checksum, float):
+        matches = math.isclose(checksum, expected, rel_tol=1e-6)
+    else:
+        matches = checksum == expected
+    if not matches:
+        raise ValueError(f"Checksum của bài {WORKLOADS[name][1]} không ổn định giữa các lần chạy ({expected} != {checksum})")
+
+
+def _summarize(samples, reference_s, parallel=1):
+    """Trung vị, độ lệch chuẩn, hệ số biến thiên và điểm (điểm tỉ lệ với thông lượng so với máy tham chiếu)."""
+    median = statistics.median(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    return {
+        "median_s": median,
+        "stdev_s": stdev,
+        "cv_percent": 100.0 * stdev / median if median > 0 else 0.0,
+        "min_s": min(samples),
+        "samples": list(samples),
+        "score": REFERENCE_SCORE * reference_s * parallel / median if median > 0 else 0.0,
+    }
+
+
+def _geometric_mean(values):
+    values = [v for v in values if v > 0]
+    if not values:
+        return 0.0
+    return math.exp(sum(math.log(v) for v in values) / len(values))
+
+
+def _run_single(names, iterations, warmup, checksums, cancel_token, progress):
+    results = {}
+    for name in names:
+        _, label, reference_s = WORKLOADS[name]
+        samples = []
+        for i in range(warmup + iterations):
+            check_cancelled(cancel_token)
+            elapsed, checksum = _timed_workload(name)
+            _verify_checksum(checksums, name, checksum)
+            if i >= warmup:
+                samples.append(elapsed)
+            progress.step(f"Đơn nhân: {label} ({i + 1}/{warmup + iterations})")
+        results[name] = _summarize(samples, reference_s)
+    return results
+
+
+def _run_multi(names, iterations, warmup, workers, checksums, cancel_token, progress):
+    """
+    Mỗi lần lặp gửi cùng lúc `workers` bản của một bài vào process pool (tránh GIL) và đo thời gian
+    thực (wall time) của cả lô. Hủy được kiểm tra mỗi khi có một bản chạy xong; các bản còn chờ bị hủy.
+    """
+    results = {}
+    # Tiến trình con (spawn) kế thừa môi trường lúc được tạo: đặt tạm 1 luồng BLAS cho mỗi tiến trình
+    saved_env = {var: os.environ.get(var) for var in BLAS_THREAD_ENV_VARS}
+    os.environ.update({var: "1" for var in BLAS_THREAD_ENV_VARS})
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_prepare_payloads)
+    try:
+        # Khởi động đủ `workers` tiến trình con (cùng dữ liệu của chúng) trước khi bắt đầu đo
+        for future in [executor.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+        for name in names:
+            _, label, reference_s = WORKLOADS[name]
+            samples = []
+            for i in range(warmup + iterations):
+                check_cancelled(cancel_token)
+                start = time.perf_counter()
+                pending = {executor.submit(_timed_workload, name) for _ in range(workers)}
+                while pending:
+                    done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                    check_cancelled(cancel_token)
+                    for future in done:
+                        _verify_checksum(checksums, name, future.result()[1])
+                elapsed = time.perf_counter() - start
+                if i >= warmup:
+                    samples.append(elapsed)
+                progress.step(f"Đa nhân ({workers} tiến trình): {label} ({i + 1}/{warmup + iterations})")
+            results[name] = _summarize(samples, reference_s, parallel=workers)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+    return results
+
+
+def run_cpu_benchmark_suite(iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP, workers=None,
+                            workloads=None, include_multi=True, cancel_token=None, progress_callback=None):
+    """
+    Chạy bộ đánh giá CPU. Trả về dict:
+      {"version", "workers", "iterations", "warmup", "machine", "single": {bài: thống kê}, "multi": {...},
+       "single_score", "multi_score", "scaling"}
+    Điểm mỗi bài = REFERENCE_SCORE * thời gian tham chiếu / trung vị (nhân số tiến trình với chế độ đa nhân);
+    điểm tổng hợp là trung bình nhân các bài. Ném TaskCancelled nếu bị hủy.
+    """
+    iterations = max(1, int(iterations))
+    warmup = max(0, int(warmup))
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    names = [name for name in (workloads or available_workloads()) if name in available_workloads()]
+    if not names:
+        raise ValueError("Không có bài đánh giá nào khả dụng")
+
+    runs_per_mode = len(names) * (warmup + iterations)
+    progress = StepProgress(progress_callback, runs_per_mode * (2 if include_multi else 1))
+    checksums = {}
+    logging.info(f"Bắt đầu đánh giá CPU v{BENCHMARK_VERSION}: bài={names}, lặp={iterations}, warm-up={warmup}, tiến trình={workers}")
+
+    _prepare_payloads()
+    single = _run_single(names, iterations, warmup, checksums, cancel_token, progress)
+    multi = _run_multi(names, iterations, warmup, workers, checksums, cancel_token, progress) if include_multi else {}
+
+    single_score = _geometric_mean([r["score"] for r in single.values()])
+    multi_score = _geometric_mean([r["score"] for r in multi.values()]) if multi else None
+    result = {
+        "version": BENCHMARK_VERSION,
+        "workers": workers,
+        "iterations": iterations,
+        "warmup": warmup,
+        "machine": {"processor": platform.processor() or platform.machine(), "logical_cpus": os.cpu_count(),
+                    "python": platform.python_version(), "numpy": np.__version__ if HAS_NUMPY else None},
+        "single": single,
+        "multi": multi,
+        "single_score": single_score,
+        "multi_score": multi_score,
+        "scaling": multi_score / single_score if multi_score and single_score else None,
+    }
+    logging.info(f"Đánh giá CPU xong: đơn nhân={single_score:.0f}, đa nhân={multi_score or 0:.0f}")
+    return result
+
+
+def format_benchmark_rows(result):
+    """Chuyển kết quả run_cpu_benchmark_suite thành các dòng bảng (key tiếng Việt) cho giao diện/báo cáo."""
+    rows = []
+    modes = ((MODE_SINGLE, "Đơn nhân"), (MODE_MULTI, f"Đa nhân ({result['workers']} tiến trình)"))
+    for mode, mode_label in modes:
+        for name, stats in result[mode].items():
+            rows.append({
+                "Bài kiểm tra": WORKLOADS[name][1],
+                "Chế độ": mode_label,
+                "Trung vị (ms)": round(stats["median_s"] * 1000, 1),
+                "Độ lệch chuẩn (ms)": round(stats["stdev_s"] * 1000, 2),
+                "Biến thiên (%)": round(stats["cv_percent"], 1),
+                "Điểm": round(stats["score"]),
+            })
+    rows.append({"Bài kiểm tra": "Điểm tổng hợp", "Chế độ": "Đơn nhân", "Điểm": round(result["single_score"])})
+    if result["multi_score"]:
+        rows.append({"Bài kiểm tra": "Điểm tổng hợp", "Chế độ": modes[1][1], "Điểm": round(result["multi_score"])})
+        rows.append({"Bài kiểm tra": "Hệ số mở rộng đa nhân", "Chế độ": modes[1][1], "Điểm": round(result["scaling"], 2)})
+    machine = result["machine"]
+    rows.append({"Bài kiểm tra": "Thông tin", "Chế độ": machine["processor"],
+                 "Ghi chú": f"Bộ đánh giá v{result['version']}, {result['iterations']} lần lặp + {result['warmup']} warm-up, "
+                            f"{machine['logical_cpus']} CPU logic, Python {machine['python']}"})
+    return rows
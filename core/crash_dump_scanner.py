@@ -0,0 +1,448 @@
+# core/crash_dump_scanner.py
+# Phân tích nhanh lịch sử sự cố (màn hình xanh, ứng dụng bị crash) từ file dump mà không đọc toàn bộ file:
+# chỉ header và bảng chỉ mục (stream directory của minidump ứng dụng MDMP, bảng offset TRIAGE_DUMP của
+# kernel minidump PAGEDU64) được đọc qua mmap. Lấy mã bugcheck/exception, tham số, thời điểm và module gây lỗi.
+# Kết quả được cache theo (đường dẫn, kích thước, mtime) nên các lần quét sau gần như tức thì.
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+
+from core.app_paths import get_app_data_dir
+from core.task_control import check_cancelled, report_progress
+
+PARSER_VERSION = 1 # Tăng khi đổi cách phân tích để bỏ qua kết quả cache cũ
+MAX_MAP_BYTES = 256 * 1024 * 1024 # MEMORY.DMP có thể vài chục GB; mọi dữ liệu cần đọc nằm ở đầu file
+DUMP_EXTENSIONS = (".dmp", ".mdmp", ".hdmp")
+
+KIND_KERNEL = "kernel"
+KIND_USER = "user"
+
+# Kernel dump: DUMP_HEADER32/64 ("PAGE" + "DUMP"/"DU64"), theo sau là TRIAGE_DUMP với minidump kernel
+KERNEL_SIGNATURE = b"PAGE"
+KERNEL_VALID_32 = b"DUMP"
+KERNEL_VALID_64 = b"DU64"
+DUMP_TYPE_TRIAGE = 4
+DUMP_TYPE_NAMES = {1: "Toàn bộ bộ nhớ", 2: "Bộ nhớ kernel", 3: "Chỉ header", 4: "Minidump",
+                   5: "Toàn bộ bộ nhớ (bitmap)", 6: "Bộ nhớ kernel (bitmap)"}
+_KERNEL_LAYOUTS = {
+    # offset trong DUMP_HEADER; driver_* là bố cục DUMP_DRIVER_ENTRY (DriverNameOffset + KLDR_DATA_TABLE_ENTRY)
+    64: {"bugcheck": 0x38, "params": 0x40, "word": "Q", "exception_address": 0xF00 + 0x10, "dump_type": 0xF98,
+         "system_time": 0xFA8, "triage": 0x2000, "driver_stride": 0x90, "driver_base": 0x38, "driver_size": 0x48},
+    32: {"bugcheck": 0x28, "params": 0x2C, "word": "I", "exception_address": 0x7D0 + 0x0C, "dump_type": 0xF88,
+         "system_time": 0xFC0, "triage": 0x1000, "driver_stride": 0x4C, "driver_base": 0x1C, "driver_size": 0x24},
+}
+_TRIAGE_FIELDS = struct.Struct("<18I") # ServicePackBuild ... TriageOptions (các offset tính từ đầu file)
+
+# Minidump ứng dụng (MINIDUMP_HEADER "MDMP"): chỉ dùng stream danh sách module và exception
+USER_SIGNATURE = b"MDMP"
+STREAM_MODULE_LIST = 4
+STREAM_EXCEPTION = 6
+_MINIDUMP_HEADER = struct.Struct("<4sIIIIIQ")
+_MINIDUMP_DIRECTORY = struct.Struct("<III")
+_MINIDUMP_MODULE_SIZE = 108
+_MINIDUMP_EXCEPTION = struct.Struct("<IIIIQQII") # ThreadId, căn lề, Code, Flags, Record, Address, NumberParameters, căn lề
+
+# Module lõi: lỗi "trong ntoskrnl" thường do driver khác gây ra, nên ưu tiên module không thuộc nhóm này
+CORE_MODULES = frozenset({"ntoskrnl.exe", "ntkrnlmp.exe", "ntkrnlpa.exe", "ntkrpamp.exe", "hal.dll", "halmacpi.dll",
+                          "halacpi.dll", "ntdll.dll", "kernelbase.dll", "kernel32.dll"})
+# Tham số bugcheck chứa địa chỉ lệnh gây lỗi (chỉ số 0-based), dùng trước khi quét ngăn xếp
+FAULT_ADDRESS_PARAMS = {0x0A: 3, 0xD1: 3, 0x1E: 1, 0x1000001E: 1, 0x3B: 1, 0x7E: 1, 0x1000007E: 1, 0x8E: 1,
+                        0x1000008E: 1, 0x50: 2, 0xD5: 2, 0x135: 1}
+
+BUGCHECK_NAMES = {
+    0x0A: "IRQL_NOT_LESS_OR_EQUAL", 0x19: "BAD_POOL_HEADER", 0x1A: "MEMORY_MANAGEMENT",
+    0x1E: "KMODE_EXCEPTION_NOT_HANDLED", 0x24: "NTFS_FILE_SYSTEM", 0x3B: "SYSTEM_SERVICE_EXCEPTION",
+    0x50: "PAGE_FAULT_IN_NONPAGED_AREA", 0x77: "KERNEL_STACK_INPAGE_ERROR", 0x7A: "KERNEL_DATA_INPAGE_ERROR",
+    0x7E: "SYSTEM_THREAD_EXCEPTION_NOT_HANDLED", 0x7F: "UNEXPECTED_KERNEL_MODE_TRAP",
+    0x8E: "KERNEL_MODE_EXCEPTION_NOT_HANDLED", 0x9C: "MACHINE_CHECK_EXCEPTION", 0x9F: "DRIVER_POWER_STATE_FAILURE",
+    0xA0: "INTERNAL_POWER_ERROR", 0xBE: "ATTEMPTED_WRITE_TO_READONLY_MEMORY", 0xC2: "BAD_POOL_CALLER",
+    0xC4: "DRIVER_VERIFIER_DETECTED_VIOLATION", 0xC5: "DRIVER_CORRUPTED_EXPOOL",
+    0xD1: "DRIVER_IRQL_NOT_LESS_OR_EQUAL", 0xD5: "DRIVER_PAGE_FAULT_IN_FREED_SPECIAL_POOL",
+    0xE2: "MANUALLY_INITIATED_CRASH", 0xEF: "CRITICAL_PROCESS_DIED", 0xF4: "CRITICAL_OBJECT_TERMINATION",
+    0xFC: "ATTEMPTED_EXECUTE_OF_NOEXECUTE_MEMORY", 0x101: "CLOCK_WATCHDOG_TIMEOUT",
+    0x109: "CRITICAL_STRUCTURE_CORRUPTION", 0x116: "VIDEO_TDR_FAILURE", 0x117: "VIDEO_TDR_TIMEOUT_DETECTED",
+    0x124: "WHEA_UNCORRECTABLE_ERROR", 0x133: "DPC_WATCHDOG_VIOLATION", 0x135: "REGISTRY_FILTER_DRIVER_EXCEPTION",
+    0x139: "KERNEL_SECURITY_CHECK_FAILURE", 0x141: "VIDEO_ENGINE_TIMEOUT_DETECTED",
+    0x154: "UNEXPECTED_STORE_EXCEPTION", 0x1000007E: "SYSTEM_THREAD_EXCEPTION_NOT_HANDLED_M",
+    0x1000008E: "KERNEL_MODE_EXCEPTION_NOT_HANDLED_M", 0xC000021A: "STATUS_SYSTEM_PROCESS_TERMINATED",
+}
+EXCEPTION_NAMES = {
+    0x80000003: "BREAKPOINT", 0xC0000005: "ACCESS_VIOLATION", 0xC000001D: "ILLEGAL_INSTRUCTION",
+    0xC0000094: "INTEGER_DIVIDE_BY_ZERO", 0xC00000FD: "STACK_OVERFLOW", 0xC0000374: "HEAP_CORRUPTION",
+    0xC0000409: "STACK_BUFFER_OVERRUN", 0xC0000602: "FAIL_FAST_EXCEPTION", 0xE06D7363: "C++ EXCEPTION",
+    0xE0434352: ".NET EXCEPTION",
+}
+
+
+def code_name(kind, code):
+    """Tên mã bugcheck (kernel) hoặc mã exception (ứng dụng)."""
+    names = BUGCHECK_NAMES if kind == KIND_KERNEL else EXCEPTION_NAMES
+    return names.get(code, "Không rõ")
+
+
+class CrashDumpError(Exception):
+    """File không phải dump được hỗ trợ hoặc header hỏng."""
+
+
+class CrashDump:
+    """Thông tin đã trích xuất từ một file dump; error khác None nếu không phân tích được."""
+    __slots__ = ("path", "size", "mtime_ns", "kind", "dump_type", "timestamp", "code", "parameters",
+                 "fault_address", "faulting_module", "process_name", "error")
+
+    def __init__(self, path, size, mtime_ns, kind=None, dump_type=None, timestamp=None, code=None, parameters=(),
+                 fault_address=None, faulting_module=None, process_name=None, error=None):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.kind = kind
+        self.dump_type = dump_type
+        self.timestamp = timestamp # datetime UTC
+        self.code = code           # Mã bugcheck (kernel) hoặc mã exception (ứng dụng)
+        self.parameters = tuple(parameters)
+        self.fault_address = fault_address
+        self.faulting_module = faulting_module
+        self.process_name = process_name
+        self.error = error
+
+    @property
+    def code_name(self):
+        return code_name(self.kind, self.code) if self.code is not None else None
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["timestamp"] = self.timestamp.timestamp() if self.timestamp else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        if data.get("timestamp") is not None:
+            data["timestamp"] = datetime.fromtimestamp(data["timestamp"], timezone.utc)
+        return cls(**data)
+
+
+class ModuleMap:
+    """Tra module chứa một địa chỉ (các vùng [base, base + size) sắp theo base, tìm nhị phân)."""
+    def __init__(self, modules):
+        self._modules = sorted((base, size, name) for base, size, name in modules if size)
+        self._bases = [base for base, _, _ in self._modules]
+
+    def __len__(self):
+        return len(self._modules)
+
+    def lookup(self, address):
+        index = bisect_right(self._bases, address) - 1
+        if index >= 0:
+            base, size, name = self._modules[index]
+            if address < base + size:
+                return name
+        return None
+
+    def pick_faulting(self, addresses):
+        """Module của địa chỉ đầu tiên không thuộc CORE_MODULES; nếu không có thì của địa chỉ đầu tiên tra được."""
+        fallback = None
+        for address in addresses:
+            name = self.lookup(address)
+            if name is None:
+                continue
+            if name.lower() not in CORE_MODULES:
+                return name
+            fallback = fallback or name
+        return fallback
+
+
+def _filetime_to_datetime(value):
+    if not value:
+        return None
+    return datetime(1601, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=value // 10)
+
+
+def _unpack(data, fmt, offset):
+    """struct.unpack_from có kiểm tra biên (mmap có thể chỉ ánh xạ phần đầu file)."""
+    size = struct.calcsize(fmt)
+    if offset < 0 or offset + size > len(data):
+        raise CrashDumpError(f"Dữ liệu ngoài phạm vi file tại {offset:#x}.")
+    return struct.unpack_from(fmt, data, offset)
+
+
+def _read_dump_string(data, offset, end):
+    """DUMP_STRING / MINIDUMP_STRING: độ dài (ULONG) + UTF-16; cắt tại ký tự NUL đầu tiên."""
+    length = _unpack(data, "<I", offset)[0]
+    start = offset + 4
+    raw = bytes(data[start:min(end, start + length * 2)])
+    return raw[:len(raw) & ~1].decode("utf-16-le", "replace").split("\x00", 1)[0]
+
+
+def _parse_kernel(data, dump):
+    bits = 64 if data[4:8] == KERNEL_VALID_64 else 32
+    layout = _KERNEL_LAYOUTS[bits]
+    word = layout["word"]
+    dump.kind = KIND_KERNEL
+    dump.code = _unpack(data, "<I", layout["bugcheck"])[0]
+    dump.parameters = _unpack(data, "<4" + word, layout["params"])
+    dump.dump_type = _unpack(data, "<I", layout["dump_type"])[0]
+    dump.timestamp = _filetime_to_datetime(_unpack(data, "<Q", layout["system_time"])[0])
+    exception_address = _unpack(data, "<" + word, layout["exception_address"])[0]
+    dump.fault_address = exception_address or None
+    if dump.dump_type != DUMP_TYPE_TRIAGE:
+        return # Dump đầy đủ/kernel: danh sách driver nằm trong bộ nhớ ảo, cần dịch địa chỉ -> bỏ qua
+    triage = _TRIAGE_FIELDS.unpack_from(data, layout["triage"]) if layout["triage"] + _TRIAGE_FIELDS.size <= len(data) else None
+    if triage is None:
+        return
+    call_stack_offset, call_stack_size = triage[10], triage[11]
+    driver_list_offset, driver_count = triage[12], triage[13]
+    pool_offset, pool_size = triage[14], triage[15]
+    modules = ModuleMap(_triage_drivers(data, layout, driver_list_offset, driver_count, pool_offset, pool_offset + pool_size))
+    if not len(modules):
+        return
+    candidates = []
+    if exception_address:
+        candidates.append(exception_address)
+    param_index = FAULT_ADDRESS_PARAMS.get(dump.code)
+    if param_index is not None:
+        candidates.append(dump.parameters[param_index])
+        dump.fault_address = dump.fault_address or dump.parameters[param_index] or None
+    end = min(len(data), call_stack_offset + call_stack_size)
+    if call_stack_offset and call_stack_offset < end:
+        step = struct.calcsize(word)
+        candidates.extend(struct.unpack_from(f"<{(end - call_stack_offset) // step}{word}", data, call_stack_offset))
+    dump.faulting_module = modules.pick_faulting(candidates)
+
+
+def _triage_drivers(data, layout, list_offset, count, pool_start, pool_end):
+    """(base, size, tên) của các driver trong TRIAGE_DUMP. Thử các kích thước entry khác nếu bố cục mặc định không khớp."""
+    if not list_offset or not count or count > 4096:
+        return []
+    word = layout["word"]
+    strides = [layout["driver_stride"]] + [s for s in (0x88, 0x98, 0xA0, 0xA8, 0x48, 0x50) if s != layout["driver_stride"]]
+    for stride in strides:
+        if list_offset + count * stride > len(data):
+            continue
+        name_offsets = [struct.unpack_from("<I", data, list_offset + i * stride)[0] for i in range(count)]
+        if not all(pool_start <= offset < pool_end for offset in name_offsets):
+            continue
+        drivers = []
+        for i, name_offset in enumerate(name_offsets):
+            entry = list_offset + i * stride
+            base = struct.unpack_from("<" + word, data, entry + layout["driver_base"])[0]
+            size = struct.unpack_from("<I", data, entry + layout["driver_size"])[0]
+            drivers.append((base, size, _read_dump_string(data, name_offset, pool_end)))
+        return drivers
+    logging.debug("Không nhận ra bố cục danh sách driver trong triage dump.")
+    return []
+
+
+def _parse_user(data, dump):
+    _, _, stream_count, directory_rva, _, time_date_stamp, _ = _unpack(data, _MINIDUMP_HEADER.format, 0)
+    dump.kind = KIND_USER
+    dump.timestamp = datetime.fromtimestamp(time_date_stamp, timezone.utc) if time_date_stamp else None
+    streams = {}
+    for index in range(min(stream_count, 1024)):
+        stream_type, size, rva = _unpack(data, _MINIDUMP_DIRECTORY.format, directory_rva + index * _MINIDUMP_DIRECTORY.size)
+        streams.setdefault(stream_type, (rva, size))
+    modules = []
+    if STREAM_MODULE_LIST in streams:
+        rva, _ = streams[STREAM_MODULE_LIST]
+        count = min(_unpack(data, "<I", rva)[0], 65536)
+        for index in range(count):
+            base, size, _, _, name_rva = _unpack(data, "<QIIII", rva + 4 + index * _MINIDUMP_MODULE_SIZE)
+            name = _read_dump_string_bytes(data, name_rva)
+            modules.append((base, size, os.path.basename(name.replace("\\", "/"))))
+    if modules:
+        dump.process_name = modules[0][2] # Module đầu tiên là file thực thi của tiến trình
+    if STREAM_EXCEPTION in streams:
+        rva, _ = streams[STREAM_EXCEPTION]
+        _, _, code, _, _, address, param_count, _ = _unpack(data, _MINIDUMP_EXCEPTION.format, rva)
+        dump.code = code
+        dump.fault_address = address
+        dump.parameters = _unpack(data, f"<{min(param_count, 15)}Q", rva + _MINIDUMP_EXCEPTION.size)
+        dump.faulting_module = ModuleMap(modules).pick_faulting([address])
+
+
+def _read_dump_string_bytes(data, rva):
+    """MINIDUMP_STRING: Length tính theo byte (khác DUMP_STRING của kernel tính theo ký tự)."""
+    length = _unpack(data, "<I", rva)[0]
+    raw = bytes(data[rva + 4:min(len(data), rva + 4 + length)])
+    return raw[:len(raw) & ~1].decode("utf-16-le", "replace")
+
+
+def parse_dump(path):
+    """Phân tích một file dump; lỗi được ghi vào CrashDump.error thay vì ném ra."""
+    try:
+        stat_result = os.stat(path)
+    except OSError as e:
+        return CrashDump(path, None, None, error=str(e))
+    dump = CrashDump(path, stat_result.st_size, stat_result.st_mtime_ns)
+    try:
+        with open(path, "rb") as file:
+            if stat_result.st_size < 32:
+                raise CrashDumpError("File quá nhỏ.")
+            with mmap.mmap(file.fileno(), min(stat_result.st_size, MAX_MAP_BYTES), access=mmap.ACCESS_READ) as data:
+                signature = data[:4]
+                if signature == KERNEL_SIGNATURE and data[4:8] in (KERNEL_VALID_32, KERNEL_VALID_64):
+                    _parse_kernel(data, dump)
+                elif signature == USER_SIGNATURE:
+                    _parse_user(data, dump)
+                else:
+                    raise CrashDumpError("Không phải file dump được hỗ trợ.")
+    except OSError as e: # Không mở được (thiếu quyền, đang bị khóa): size=None để không bị cache
+        dump.size = None
+        dump.error = str(e)
+    except (ValueError, struct.error, CrashDumpError) as e:
+        dump.error = str(e)
+        logging.debug(f"Không phân tích được {path}: {e}")
+    return dump
+
+
+class CrashDumpCache:
+    """Cache kết quả phân tích trong SQLite; chỉ dùng lại khi kích thước, mtime và PARSER_VERSION đều khớp."""
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_app_data_dir(), "crash_dump_cache.sqlite3")
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS dumps (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "version INTEGER, data TEXT)")
+
+    def lookup(self, path, size, mtime_ns):
+        row = self.connection.execute("SELECT size, mtime_ns, version, data FROM dumps WHERE path = ?", (path,)).fetchone()
+        if row and row[:3] == (size, mtime_ns, PARSER_VERSION):
+            return CrashDump.from_dict(json.loads(row[3]))
+        return None
+
+    def store(self, dumps):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO dumps (path, size, mtime_ns, version, data) VALUES (?, ?, ?, ?, ?)",
+                [(d.path, d.size, d.mtime_ns, PARSER_VERSION, json.dumps(d.to_dict())) for d in dumps])
+
+    def prune(self, keep_paths):
+        """Xóa bản ghi của file không còn tồn tại (không nằm trong keep_paths và không còn trên đĩa)."""
+        stale = [(path,) for (path,) in self.connection.execute("SELECT path FROM dumps")
+                 if path not in keep_paths and not os.path.exists(path)]
+        if stale:
+            with self.connection:
+                self.connection.executemany("DELETE FROM dumps WHERE path = ?", stale)
+
+    def close(self):
+        self.connection.close()
+
+
+class CrashReport:
+    """Kết quả quét: danh sách CrashDump (mới nhất trước), lỗi truy cập thư mục và số liệu cache."""
+    def __init__(self):
+        self.dumps = []
+        self.access_errors = []
+        self.cache_hits = 0
+        self.parsed = 0
+        self.seconds = 0.0
+
+    @property
+    def crashes(self):
+        return [dump for dump in self.dumps if dump.error is None]
+
+    def by_code(self):
+        """
+        list (kind, code, số lần, lần gần nhất, {module: số lần}) sắp theo số lần giảm dần. Dump không có mã lỗi
+        (dump treo ứng dụng, dump tạo thủ công/procdump không có exception stream) không được tổng hợp.
+        """
+        groups = {}
+        for dump in self.crashes:
+            if dump.code is None:
+                continue
+            group = groups.setdefault((dump.kind, dump.code), [0, None, {}])
+            group[0] += 1
+            if dump.timestamp and (group[1] is None or dump.timestamp > group[1]):
+                group[1] = dump.timestamp
+            module = dump.faulting_module or "Không xác định"
+            group[2][module] = group[2].get(module, 0) + 1
+        return sorted(((kind, code, count, last, modules) for (kind, code), (count, last, modules) in groups.items()),
+                      key=lambda item: -item[2])
+
+    def by_module(self):
+        """
+        list (module, số lần, lần gần nhất, {mã lỗi: số lần}) của các module gây lỗi, sắp theo số lần giảm dần.
+        Mã lỗi là None với dump không có exception.
+        """
+        groups = {}
+        for dump in self.crashes:
+            if not dump.faulting_module:
+                continue
+            group = groups.setdefault(dump.faulting_module.lower(), [dump.faulting_module, 0, None, {}])
+            group[1] += 1
+            if dump.timestamp and (group[2] is None or dump.timestamp > group[2]):
+                group[2] = dump.timestamp
+            group[3][dump.code] = group[3].get(dump.code, 0) + 1
+        return sorted((tuple(group) for group in groups.values()), key=lambda item: -item[1])
+
+
+def default_dump_locations():
+    """Minidump kernel, MEMORY.DMP, LiveKernelReports và thư mục CrashDumps của WER (LocalDumps) cho ứng dụng."""
+    system_root = os.environ.get("SystemRoot", "C:\\Windows")
+    locations = [os.path.join(system_root, "Minidump"), os.path.join(system_root, "MEMORY.DMP"),
+                 os.path.join(system_root, "LiveKernelReports")]
+    local_app_data = os.environ.get("LOCALAPPDATA")
+    if local_app_data:
+        locations.append(os.path.join(local_app_data, "CrashDumps"))
+    return locations
+
+
+def find_dump_files(locations, errors=None):
+    """Đường dẫn các file dump trong locations (file hoặc thư mục, duyệt đệ quy)."""
+    found = []
+    for location in locations:
+        if os.path.isfile(location):
+            found.append(location)
+            continue
+        if not os.path.isdir(location):
+            continue
+        for directory, _, files in os.walk(location, onerror=(errors.append if errors is not None else None)):
+            found.extend(os.path.join(directory, name) for name in files if name.lower().endswith(DUMP_EXTENSIONS))
+    return found
+
+
+def scan_crash_dumps(locations=None, use_cache=True, cache_path=None, cancel_token=None, progress_callback=None):
+    """Tìm và phân tích các file dump (mặc định default_dump_locations()); trả về CrashReport."""
+    started = time.perf_counter()
+    report = CrashReport()
+    access_errors = []
+    paths = find_dump_files(locations or default_dump_locations(), access_errors)
+    report.access_errors = [str(error) for error in access_errors]
+    cache = CrashDumpCache(cache_path) if use_cache else None
+    try:
+        fresh = []
+        for index, path in enumerate(paths):
+            check_cancelled(cancel_token)
+            report_progress(progress_callback, index * 100 / max(1, len(paths)), f"Đang phân tích {os.path.basename(path)}...")
+            dump = None
+            if cache is not None:
+                try:
+                    stat_result = os.stat(path)
+                    dump = cache.lookup(path, stat_result.st_size, stat_result.st_mtime_ns)
+                except OSError:
+                    pass
+            if dump is not None:
+                report.cache_hits += 1
+            else:
+                dump = parse_dump(path)
+                report.parsed += 1
+                if dump.size is not None:
+                    fresh.append(dump)
+            report.dumps.append(dump)
+        if cache is not None:
+            cache.store(fresh)
+            cache.prune(set(paths))
+    finally:
+        if cache is not None:
+            cache.close()
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    report.dumps.sort(key=lambda d: d.timestamp or epoch, reverse=True)
+    report.seconds = time.perf_counter() - started
+    report_progress(progress_callback, 100, "Đã phân tích xong các file dump.")
+    return report
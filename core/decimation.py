@@ -0,0 +1,257 @@
+# core/decimation.py
+# Giảm số điểm của chuỗi thời gian trước khi vẽ: LTTB (Largest-Triangle-Three-Buckets) và bao min/max theo bucket
+import bisect
+import logging
+import math
+from collections import OrderedDict
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not found. Chart decimation will be slow on long histories. Install with 'pip install numpy'.")
+
+METHOD_MINMAX = "minmax"
+METHOD_LTTB = "lttb"
+LTTB_CACHE_SIZE = 8 # Số khung nhìn LTTB gần nhất được giữ lại
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: chọn n_out điểm giữ được hình dạng của chuỗi (x tăng dần).
+    Điểm đầu và cuối luôn được giữ; NaN bị bỏ qua. Trả về (x, y) cùng kiểu với đầu vào (numpy hoặc list).
+    """
+    if not HAS_NUMPY:
+        return _lttb_python(list(x), list(y), n_out)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x.copy(), y.copy()
+
+    # Biên của n_out - 2 bucket ở giữa (điểm đầu, điểm cuối nằm riêng)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    # Trung bình của bucket kế tiếp (tính trước cho mọi bucket bằng cumsum)
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    next_start = edges[1:-1]
+    next_end = np.maximum(edges[2:], next_start + 1)
+    next_count = next_end - next_start
+    # Bucket cuối: "bucket kế tiếp" chính là điểm cuối
+    avg_x = np.append((cum_x[next_end] - cum_x[next_start]) / next_count, x[-1])
+    avg_y = np.append((cum_y[next_end] - cum_y[next_start]) / next_count, y[-1])
+
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        px, py = x[previous], y[previous]
+        # Diện tích tam giác (nhân 2) tạo bởi điểm đã chọn trước, ứng viên và trung bình bucket kế tiếp
+        areas = np.abs((px - avg_x[bucket]) * (y[start:end] - py) - (px - x[start:end]) * (avg_y[bucket] - py))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+
+def _lttb_python(x, y, n_out):
+    points = [(a, b) for a, b in zip(x, y) if b is not None and b == b]
+    n = len(points)
+    if n_out >= n or n_out < 3:
+        return [p[0] for p in points], [p[1] for p in points]
+    every = (n - 2) / (n_out - 2)
+    selected = [points[0]]
+    previous = points[0]
+    for bucket in range(n_out - 2):
+        start = int(math.floor(bucket * every)) + 1
+        end = max(int(math.floor((bucket + 1) * every)) + 1, start + 1)
+        next_end = min(int(math.floor((bucket + 2) * every)) + 1, n)
+        next_points = points[end:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_points) / len(next_points)
+        avg_y = sum(p[1] for p in next_points) / len(next_points)
+        best, best_area = points[start], -1.0
+        for candidate in points[start:end]:
+            area = abs((previous[0] - avg_x) * (candidate[1] - previous[1]) - (previous[0] - candidate[0]) * (avg_y - previous[1]))
+            if area > best_area:
+                best, best_area = candidate, area
+        selected.append(best)
+        previous = best
+    selected.append(points[-1])
+    return [p[0] for p in selected], [p[1] for p in selected]
+
+
+def minmax_envelope(x, y, bucket_width, origin=0.0):
+    """
+    Chia trục x thành các bucket rộng bucket_width (căn theo origin) và trả về (bucket_index, min, max)
+    của mỗi bucket có dữ liệu. Chỉ dùng numpy (reduceat), NaN bị bỏ qua.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) == 0:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty
+    buckets = np.floor((x - origin) / bucket_width).astype(np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    with np.errstate(invalid="ignore"):
+        mins = np.fmin.reduceat(y, starts)
+        maxs = np.fmax.reduceat(y, starts)
+    return buckets[starts], mins, maxs
+
+
+class _EnvelopeLevel:
+    """Bao min/max của toàn chuỗi ở một độ rộng bucket; được mở rộng dần khi có dữ liệu mới."""
+    def __init__(self, bucket_width):
+        self.bucket_width = bucket_width
+        self.processed = 0 # Số điểm gốc đã được gộp vào level
+        self.indices = np.empty(0, dtype=np.int64)
+        self.mins = np.empty(0)
+        self.maxs = np.empty(0)
+
+    def extend(self, x, y, count):
+        """Gộp các điểm [processed, count) vào level; bucket cuối (có thể chưa đủ) được tính lại."""
+        if count <= self.processed:
+            return
+        start = self.processed
+        if len(self.indices):
+            # Lùi về điểm đầu tiên của bucket cuối để gộp lại bucket đó với dữ liệu mới
+            last_bucket_start_x = self.indices[-1] * self.bucket_width
+            start = int(np.searchsorted(x[:self.processed], last_bucket_start_x, side="left"))
+            self.indices, self.mins, self.maxs = self.indices[:-1], self.mins[:-1], self.maxs[:-1]
+        indices, mins, maxs = minmax_envelope(x[start:count], y[start:count], self.bucket_width)
+        self.indices = np.concatenate((self.indices, indices))
+        self.mins = np.concatenate((self.mins, mins))
+        self.maxs = np.concatenate((self.maxs, maxs))
+        self.processed = count
+
+
+class DecimatedSeries:
+    """
+    Chuỗi thời gian (x tăng dần) có thể thêm điểm liên tục và trả về bản giảm điểm cho một khung nhìn.
+
+    - minmax: dùng kim tự tháp bao min/max với độ rộng bucket là lũy thừa của 2 (giây). Mỗi mức zoom
+      được cache; thêm dữ liệu mới chỉ gộp phần đuôi (không tính lại toàn chuỗi).
+    - lttb: chạy LTTB trên phần dữ liệu trong khung nhìn, cache theo (khung nhìn, độ rộng, số điểm).
+    Cần numpy; không có numpy thì chỉ hỗ trợ lttb bản Python (chậm, phù hợp chuỗi ngắn).
+    """
+    def __init__(self, initial_capacity=4096):
+        self._count = 0
+        if HAS_NUMPY:
+            self._x = np.empty(initial_capacity)
+            self._y = np.empty(initial_capacity)
+        else:
+            self._x, self._y = [], []
+        self._levels = {}
+        self._lttb_cache = OrderedDict()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def x(self):
+        return self._x[:self._count]
+
+    @property
+    def y(self):
+        return self._y[:self._count]
+
+    def clear(self):
+        self._count = 0
+        if not HAS_NUMPY:
+            self._x, self._y = [], []
+        self._levels.clear()
+        self._lttb_cache.clear()
+
+    def set_data(self, x, y):
+        self.clear()
+        self.append(x, y)
+
+    def append(self, x, y):
+        """Thêm một điểm hoặc một mảng điểm (x tăng dần). Điểm không mới hơn điểm cuối hiện có bị bỏ qua."""
+        if HAS_NUMPY:
+            xs = np.atleast_1d(np.asarray(x, dtype=np.float64))
+            ys = np.atleast_1d(np.asarray(y, dtype=np.float64))
+            if self._count and len(xs):
+                keep = xs > self._x[self._count - 1]
+                xs, ys = xs[keep], ys[keep]
+            n = len(xs)
+            if n == 0:
+                return
+            needed = self._count + n
+            if needed > len(self._x): # Tăng gấp đôi: chi phí thêm điểm trung bình O(1)
+                capacity = max(needed, 2 * len(self._x))
+                self._x = np.concatenate((self._x[:self._count], np.empty(capacity - self._count)))
+                self._y = np.concatenate((self._y[:self._count], np.empty(capacity - self._count)))
+            self._x[self._count:needed] = xs
+            self._y[self._count:needed] = ys
+            self._count = needed
+        else:
+            xs = list(x) if isinstance(x, (list, tuple)) else [x]
+            ys = list(y) if isinstance(y, (list, tuple)) else [y]
+            for a, b in zip(xs, ys):
+                if self._x and a <= self._x[-1]:
+                    continue
+                self._x.append(float(a))
+                self._y.append(float("nan") if b is None else float(b))
+            self._count = len(self._x)
+        self._lttb_cache.clear() # Các level minmax được mở rộng khi được dùng lại
+
+    def range(self):
+        """(x đầu, x cuối) hoặc None nếu rỗng."""
+        if not self._count:
+            return None
+        return float(self._x[0]), float(self._x[self._count - 1])
+
+    @staticmethod
+    def bucket_width_for(span, pixel_width):
+        """Độ rộng bucket (lũy thừa của 2, giây) để mỗi pixel có khoảng một bucket."""
+        if span <= 0 or pixel_width <= 0:
+            return 1.0
+        return 2.0 ** math.ceil(math.log2(max(span / pixel_width, 1e-3)))
+
+    def view(self, x_start, x_end, pixel_width, method=METHOD_MINMAX):
+        """
+        Trả về (xs, ys) để vẽ khung nhìn [x_start, x_end] trên pixel_width pixel.
+        Nếu số điểm trong khung nhìn không vượt quá 2 * pixel_width thì trả về dữ liệu gốc.
+        """
+        if not HAS_NUMPY:
+            first = bisect.bisect_left(self._x, x_start)
+            last = bisect.bisect_right(self._x, x_end)
+            return _lttb_python(self._x[first:last], self._y[first:last], max(3, int(pixel_width)))
+
+        x, y = self.x, self.y
+        first = int(np.searchsorted(x, x_start, side="left"))
+        last = int(np.searchsorted(x, x_end, side="right"))
+        # Giữ thêm một điểm mỗi bên để đường nối chạm tới mép khung nhìn
+        first, last = max(0, first - 1), min(self._count, last + 1)
+        if last - first <= 2 * max(1, pixel_width):
+            return x[first:last].copy(), y[first:last].copy()
+
+        if method == METHOD_LTTB:
+            key = (x_start, x_end, int(pixel_width), self._count)
+            cached = self._lttb_cache.get(key)
+            if cached is None:
+                cached = lttb(x[first:last], y[first:last], int(pixel_width))
+                self._lttb_cache[key] = cached
+                if len(self._lttb_cache) > LTTB_CACHE_SIZE:
+                    self._lttb_cache.popitem(last=False)
+            return cached
+
+        width = self.bucket_width_for(x_end - x_start, pixel_width)
+        level = self._levels.get(width)
+        if level is None:
+            level = self._levels[width] = _EnvelopeLevel(width)
+        level.extend(self._x, self._y, self._count)
+        lo = int(np.searchsorted(level.indices, math.floor(x_start / width), side="left"))
+        hi = int(np.searchsorted(level.indices, math.floor(x_end / width), side="right"))
+        indices, mins, maxs = level.indices[lo:hi], level.mins[lo:hi], level.maxs[lo:hi]
+        # Mỗi bucket thành hai điểm (min, max) cùng tọa độ x: vẽ thành đoạn thẳng đứng của bao
+        xs = np.repeat((indices + 0.5) * width, 2)
+        ys = np.empty(2 * len(indices))
+        ys[0::2] = mins
+        ys[1::2] = maxs
+        return xs, ys
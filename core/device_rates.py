@@ -0,0 +1,240 @@
+# core/device_rates.py
+# Tính tốc độ theo từng lõi CPU / ổ đĩa vật lý / card mạng từ hai lần đọc bộ đếm tích lũy liên tiếp
+import logging
+import os
+
+import psutil
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not found. Per-device rates will be computed with pure Python loops. Install with 'pip install numpy'.")
+
+COUNTER_32BIT_LIMIT = 2 ** 32 # Bộ đếm mạng 32-bit (một số driver Windows) quay vòng ở giá trị này
+_WRAP_THRESHOLD = COUNTER_32BIT_LIMIT // 2 # Chỉ coi là quay vòng nếu giá trị trước đã ở nửa trên phạm vi
+
+DISK_FIELDS = ("read_bytes", "write_bytes", "read_count", "write_count")
+NIC_FIELDS = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv")
+# Tên khóa trong kết quả, cùng thứ tự với *_FIELDS
+DISK_RATE_KEYS = ("read_bps", "write_bps", "read_iops", "write_iops")
+NIC_RATE_KEYS = ("sent_bps", "recv_bps", "packets_sent_ps", "packets_recv_ps")
+
+_LOOPBACK_NIC_NAMES = ("lo",)
+_LOOPBACK_NIC_PREFIXES = ("Loopback",) # Windows: "Loopback Pseudo-Interface 1"
+_IGNORED_LINUX_BLOCK_PREFIXES = ("loop", "ram", "zram", "dm-", "md")
+
+
+def _counter_deltas(current, previous):
+    """
+    Hiệu giữa hai mảng bộ đếm (numpy). Giá trị âm: nếu giá trị trước ở nửa trên phạm vi 32-bit và giá trị
+    sau nằm trong phạm vi đó thì coi là quay vòng và cộng 2^32; ngược lại bộ đếm đã bị reset
+    (driver nạp lại, thiết bị cắm lại...) -> NaN cho mẫu này.
+    """
+    deltas = current - previous
+    negative = deltas < 0
+    if negative.any():
+        wrapped = negative & (previous >= _WRAP_THRESHOLD) & (previous < COUNTER_32BIT_LIMIT) & (current < COUNTER_32BIT_LIMIT)
+        deltas = np.where(wrapped, deltas + COUNTER_32BIT_LIMIT, deltas)
+        deltas = np.where(negative & ~wrapped, np.nan, deltas)
+    return deltas
+
+
+def _counter_delta_py(current, previous):
+    delta = current - previous
+    if delta >= 0:
+        return delta
+    if _WRAP_THRESHOLD <= previous < COUNTER_32BIT_LIMIT and current < COUNTER_32BIT_LIMIT:
+        return delta + COUNTER_32BIT_LIMIT
+    return None
+
+
+class CounterRateTracker:
+    """
+    Theo dõi bộ đếm tích lũy của nhiều thiết bị (dict tên -> namedtuple của psutil) và trả về tốc độ/giây.
+
+    Các bộ đếm được lưu thành ma trận (thiết bị x trường) để mỗi lần cập nhật chỉ là một phép trừ mảng.
+    Thiết bị mới cắm vào có tốc độ None ở lần đầu; thiết bị bị rút ra bị loại khỏi kết quả.
+    """
+    def __init__(self, fields, rate_keys=None):
+        self.fields = tuple(fields)
+        self.rate_keys = tuple(rate_keys or fields)
+        self._names = None
+        self._values = None
+        self._time = None
+
+    def reset(self):
+        self._names = None
+        self._values = None
+        self._time = None
+
+    def update(self, counters, timestamp):
+        """counters: dict tên -> đối tượng có các thuộc tính trong fields. Trả về dict tên -> dict rate_key -> float/None."""
+        names = list(counters)
+        rows = [tuple(getattr(counters[name], field) for field in self.fields) for name in names]
+        elapsed = (timestamp - self._time) if self._time is not None else 0.0
+        if HAS_NUMPY:
+            result = self._update_numpy(names, rows, elapsed)
+        else:
+            result = self._update_python(names, rows, elapsed)
+        self._time = timestamp
+        return result
+
+    def _update_numpy(self, names, rows, elapsed):
+        current = np.array(rows, dtype=np.float64).reshape(len(names), len(self.fields))
+        previous_names, previous = self._names, self._values
+        self._names, self._values = names, current
+        if previous is None or elapsed <= 0:
+            return {name: dict.fromkeys(self.rate_keys) for name in names}
+
+        if names == previous_names:
+            aligned = previous
+        else: # Thiết bị được thêm/bớt: sắp lại hàng của lần đọc trước theo tên
+            aligned = np.full_like(current, np.nan)
+            previous_index = {name: i for i, name in enumerate(previous_names)}
+            for row, name in enumerate(names):
+                if name in previous_index:
+                    aligned[row] = previous[previous_index[name]]
+        with np.errstate(invalid="ignore"):
+            rates = _counter_deltas(current, aligned) / elapsed
+
+        result = {}
+        for row, name in enumerate(names):
+            result[name] = {key: (None if value != value else float(value)) # NaN -> None
+                            for key, value in zip(self.rate_keys, rates[row].tolist())}
+        return result
+
+    def _update_python(self, names, rows, elapsed):
+        previous = dict(zip(self._names, self._values)) if self._names is not None else {}
+        self._names, self._values = names, rows
+        result = {}
+        for name, row in zip(names, rows):
+            previous_row = previous.get(name)
+            if previous_row is None or elapsed <= 0:
+                result[name] = dict.fromkeys(self.rate_keys)
+                continue
+            rates = {}
+            for key, value, previous_value in zip(self.rate_keys, row, previous_row):
+                delta = _counter_delta_py(value, previous_value)
+                rates[key] = None if delta is None else delta / elapsed
+            result[name] = rates
+        return result
+
+
+class PerCoreCpuTracker:
+    """
+    Phần trăm sử dụng từng lõi từ psutil.cpu_times(percpu=True): (Δtổng - Δidle - Δiowait) / Δtổng.
+    Một lần đọc /proc/stat (hoặc NtQuerySystemInformation) cho mọi lõi, tính trên ma trận lõi x trường.
+    Số lõi thay đổi (CPU hot-plug) -> bắt đầu lại từ mẫu hiện tại.
+    """
+    def __init__(self):
+        self._previous = None
+        self._idle_columns = None
+        self._guest_columns = None
+
+    def reset(self):
+        self._previous = None
+
+    def update(self, per_cpu_times=None):
+        """Trả về list phần trăm (float) theo lõi, hoặc None ở lần gọi đầu / khi số lõi vừa đổi."""
+        if per_cpu_times is None:
+            per_cpu_times = psutil.cpu_times(percpu=True)
+        if not per_cpu_times:
+            return None
+        if self._idle_columns is None:
+            fields = per_cpu_times[0]._fields
+            self._idle_columns = [fields.index(name) for name in ("idle", "iowait") if name in fields]
+            self._guest_columns = [fields.index(name) for name in ("guest", "guest_nice") if name in fields]
+
+        if HAS_NUMPY:
+            current = np.array(per_cpu_times, dtype=np.float64)
+            if self._guest_columns: # Linux: guest đã được tính trong user/nice
+                current[:, self._guest_columns] = 0.0
+            previous, self._previous = self._previous, current
+            if previous is None or previous.shape != current.shape:
+                return None
+            deltas = np.maximum(current - previous, 0.0)
+            total = deltas.sum(axis=1)
+            idle = deltas[:, self._idle_columns].sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                percent = np.where(total > 0, 100.0 * (total - idle) / total, 0.0)
+            return np.clip(percent, 0.0, 100.0).tolist()
+
+        current = [[0.0 if i in self._guest_columns else float(v) for i, v in enumerate(times)] for times in per_cpu_times]
+        previous, self._previous = self._previous, current
+        if previous is None or len(previous) != len(current):
+            return None
+        percents = []
+        for row, previous_row in zip(current, previous):
+            deltas = [max(a - b, 0.0) for a, b in zip(row, previous_row)]
+            total = sum(deltas)
+            idle = sum(deltas[i] for i in self._idle_columns)
+            percents.append(min(100.0, max(0.0, 100.0 * (total - idle) / total)) if total > 0 else 0.0)
+        return percents
+
+
+def _linux_physical_disks():
+    """Tên thiết bị khối vật lý trên Linux (/sys/block, bỏ loop/ram/dm); None nếu không đọc được."""
+    try:
+        return {name for name in os.listdir("/sys/block") if not name.startswith(_IGNORED_LINUX_BLOCK_PREFIXES)}
+    except OSError:
+        return None
+
+
+class DeviceRateSampler:
+    """
+    Gom ba bộ theo dõi: từng lõi CPU, từng ổ đĩa vật lý (byte/s và IOPS), từng card mạng (byte/s, gói/s).
+    sample() trả về dict {"cpu_per_core": list|None, "disks": {...}, "nics": {...}}.
+
+    psutil mặc định bật nowrap cho disk_io_counters/net_io_counters nên phần lớn trường hợp quay vòng
+    đã được xử lý; CounterRateTracker vẫn kiểm tra để an toàn khi bộ đếm bị reset.
+    """
+    def __init__(self, include_loopback=False):
+        self.include_loopback = include_loopback
+        self.cpu = PerCoreCpuTracker()
+        self.disks = CounterRateTracker(DISK_FIELDS, DISK_RATE_KEYS)
+        self.nics = CounterRateTracker(NIC_FIELDS, NIC_RATE_KEYS)
+        self._physical_disks = _linux_physical_disks() if psutil.LINUX else None
+        self._physical_disks_checked_at = 0.0
+
+    def _filter_disks(self, counters, timestamp):
+        if not psutil.LINUX:
+            return counters # Windows: perdisk đã là PhysicalDriveN
+        if timestamp - self._physical_disks_checked_at > 60.0: # Làm mới danh sách để nhận ổ mới cắm
+            self._physical_disks = _linux_physical_disks()
+            self._physical_disks_checked_at = timestamp
+        if not self._physical_disks:
+            return counters
+        return {name: value for name, value in counters.items() if name in self._physical_disks}
+
+    def sample(self, timestamp):
+        try:
+            cpu_per_core = self.cpu.update()
+        except Exception as e:
+            logging.debug(f"DeviceRateSampler: không đọc được cpu_times: {e}")
+            cpu_per_core = None
+
+        try:
+            disk_counters = psutil.disk_io_counters(perdisk=True) or {}
+        except Exception as e: # Một số hệ thống không có bộ đếm IO đĩa
+            logging.debug(f"DeviceRateSampler: không đọc được disk_io_counters: {e}")
+            disk_counters = {}
+        disks = self.disks.update(self._filter_disks(disk_counters, timestamp), timestamp)
+
+        try:
+            nic_counters = psutil.net_io_counters(pernic=True) or {}
+        except Exception as e:
+            logging.debug(f"DeviceRateSampler: không đọc được net_io_counters: {e}")
+            nic_counters = {}
+        if not self.include_loopback:
+            nic_counters = {name: value for name, value in nic_counters.items() if name not in _LOOPBACK_NIC_NAMES and not name.startswith(_LOOPBACK_NIC_PREFIXES)}
+        nics = self.nics.update(nic_counters, timestamp)
+
+        return {"cpu_per_core": cpu_per_core, "disks": disks, "nics": nics}
+
+
+def sum_rates(devices, key):
+    """Tổng một tốc độ qua mọi thiết bị, bỏ qua giá trị None; None nếu không thiết bị nào có giá trị."""
+    values = [rates[key] for rates in devices.values() if rates.get(key) is not None]
+    return sum(values) if values else None
@@ -0,0 +1,373 @@
+# core/disk_analyzer.py
+# Phân tích dung lượng ổ đĩa: cây kích thước thư mục dạng mảng (không dùng dict cho từng nút),
+# quét song song bằng os.scandir, lưu chỉ mục ra đĩa và làm mới tăng dần theo mtime của thư mục
+# (trên NTFS có USN journal: quét lại cả thư mục có file bị sửa nội dung, xem core/usn_journal.py)
+import hashlib
+import heapq
+import json
+import logging
+import os
+import stat
+import struct
+import threading
+import time
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from core.app_paths import get_app_data_dir
+from core.task_control import check_cancelled, report_progress
+from core.usn_journal import JournalResetRequired, collect_changed_directories, open_volume_journal
+
+INDEX_FORMAT_VERSION = 2
+INDEX_MAGIC = b"IPCDISK1"
+TOP_FILES_PER_DIR = 32     # Số file lớn nhất giữ lại cho mỗi thư mục (truy vấn top-N file chính xác với N <= giá trị này)
+DEFAULT_MAX_WORKERS = 8
+NO_PARENT = -1
+FILE_ID_MASK = (1 << 64) - 1 # ReFS/Dev Drive trả file id 128 bit (Python 3.12+ trên Windows): giữ 64 bit thấp
+
+# Các cột của bảng nút: tên -> mã kiểu của array
+_COLUMNS = (
+    ("parent", "q"),       # Chỉ số nút cha (NO_PARENT với gốc)
+    ("depth", "q"),
+    ("mtime", "d"),        # mtime của thư mục lúc quét (để biết cần quét lại hay không)
+    ("own_bytes", "q"),    # Tổng kích thước các file nằm trực tiếp trong thư mục
+    ("own_files", "q"),
+    ("total_bytes", "q"),  # Cả cây con (tính lại sau mỗi lần quét)
+    ("total_files", "q"),
+    ("file_id", "Q"),      # inode / file reference NTFS của thư mục (khớp với tham chiếu cha trong bản ghi USN)
+)
+
+
+class DiskIndex:
+    """
+    Bảng nút thư mục: mỗi cột là một array (8 byte/nút/cột) và tên là list chuỗi; nút i có cha parent[i].
+    File không được lưu thành nút: mỗi thư mục chỉ giữ tổng dung lượng file trực tiếp và TOP_FILES_PER_DIR file lớn nhất.
+    """
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.names = []
+        self.top_files = [] # Mỗi nút: list (size, tên file) giảm dần hoặc None
+        for column, typecode in _COLUMNS:
+            setattr(self, column, array(typecode))
+        self.scanned_at = None
+        self.scan_seconds = 0.0
+        self.rescanned_dirs = 0
+        self.scan_errors = 0
+        self.journal_id = None # Điểm mốc USN journal lúc bắt đầu quét (None nếu không có journal)
+        self.next_usn = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def _append(self, parent, depth, name):
+        """Thêm một nút rỗng; trả về chỉ số. Chỉ gọi khi đang giữ khóa của bộ quét."""
+        self.names.append(name)
+        self.top_files.append(None)
+        self.parent.append(parent)
+        self.depth.append(depth)
+        for column in ("mtime", "own_bytes", "own_files", "total_bytes", "total_files", "file_id"):
+            getattr(self, column).append(0)
+        return len(self.names) - 1
+
+    def children_map(self):
+        """parent -> list chỉ số con."""
+        children = {}
+        for index, parent in enumerate(self.parent):
+            if parent != NO_PARENT:
+                children.setdefault(parent, []).append(index)
+        return children
+
+    def path_of(self, index):
+        parts = []
+        while index != NO_PARENT:
+            parts.append(self.names[index])
+            index = self.parent[index]
+        parts.reverse()
+        return os.path.join(self.root, *parts[1:]) if len(parts) > 1 else self.root
+
+    def compute_totals(self):
+        """Cộng dồn dung lượng từ lá lên gốc: duyệt các nút theo độ sâu giảm dần, O(số nút)."""
+        total_bytes = array("q", self.own_bytes)
+        total_files = array("q", self.own_files)
+        parent = self.parent
+        for index in sorted(range(len(self.names)), key=self.depth.__getitem__, reverse=True):
+            up = parent[index]
+            if up != NO_PARENT:
+                total_bytes[up] += total_bytes[index]
+                total_files[up] += total_files[index]
+        self.total_bytes, self.total_files = total_bytes, total_files
+
+    # --- Truy vấn ---
+    def largest_folders(self, n=20, min_depth=1):
+        """n thư mục có tổng dung lượng lớn nhất: list (path, total_bytes, total_files)."""
+        depth, total = self.depth, self.total_bytes
+        candidates = (i for i in range(len(self.names)) if depth[i] >= min_depth)
+        best = heapq.nlargest(n, candidates, key=total.__getitem__)
+        return [(self.path_of(i), total[i], self.total_files[i]) for i in best]
+
+    def largest_files(self, n=20):
+        """n file lớn nhất (chính xác khi n <= TOP_FILES_PER_DIR): list (path, size)."""
+        candidates = ((size, index, name) for index, files in enumerate(self.top_files) if files for size, name in files)
+        best = heapq.nlargest(n, candidates, key=lambda item: item[0])
+        return [(os.path.join(self.path_of(index), name), size) for size, index, name in best]
+
+    def subfolders(self, path=None):
+        """Thư mục con trực tiếp của path (mặc định gốc), lớn nhất trước, kèm tỉ lệ so với thư mục cha."""
+        target = os.path.normcase(os.path.abspath(path or self.root))
+        index = next((i for i in range(len(self.names)) if os.path.normcase(self.path_of(i)) == target), None)
+        if index is None:
+            return []
+        parent_total = self.total_bytes[index] or 1
+        children = [i for i, p in enumerate(self.parent) if p == index]
+        children.sort(key=self.total_bytes.__getitem__, reverse=True)
+        return [(self.path_of(i), self.total_bytes[i], 100.0 * self.total_bytes[i] / parent_total) for i in children]
+
+    # --- Lưu/đọc ---
+    def save(self, path):
+        """
+        Định dạng: MAGIC | độ dài header (4 byte) | header JSON | các cột array (bytes thô) | zlib(tên + top file).
+        Ghi ra file tạm rồi thay thế để không làm hỏng chỉ mục cũ nếu bị ngắt giữa chừng.
+        """
+        extras = zlib.compress(json.dumps({"names": self.names, "top_files": self.top_files}, ensure_ascii=False).encode("utf-8"))
+        header = json.dumps({
+            "version": INDEX_FORMAT_VERSION, "root": self.root, "count": len(self.names),
+            "scanned_at": self.scanned_at, "journal_id": self.journal_id, "next_usn": self.next_usn,
+            "columns": [[name, code] for name, code in _COLUMNS],
+            "extras_bytes": len(extras),
+        }).encode("utf-8")
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for column, _ in _COLUMNS:
+                getattr(self, column).tofile(f)
+            f.write(extras)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Đọc chỉ mục đã lưu; trả về None nếu không có file hoặc sai định dạng/phiên bản."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    return None
+                header = json.loads(f.read(struct.unpack("<I", f.read(4))[0]).decode("utf-8"))
+                if header.get("version") != INDEX_FORMAT_VERSION or [list(c) for c in _COLUMNS] != header["columns"]:
+                    return None
+                index = cls(header["root"])
+                count = header["count"]
+                for column, typecode in _COLUMNS:
+                    values = array(typecode)
+                    values.fromfile(f, count)
+                    setattr(index, column, values)
+                extras = json.loads(zlib.decompress(f.read(header["extras_bytes"])).decode("utf-8"))
+        except (OSError, ValueError, EOFError, KeyError, struct.error, zlib.error) as e:
+            logging.warning(f"Không đọc được chỉ mục dung lượng {path}: {e}")
+            return None
+        index.names = extras["names"]
+        index.top_files = [[tuple(item) for item in files] if files else None for files in extras["top_files"]]
+        index.scanned_at = header.get("scanned_at")
+        index.journal_id = header.get("journal_id")
+        index.next_usn = header.get("next_usn")
+        return index
+
+
+class _Scanner:
+    """
+    Quét song song: mỗi thư mục là một tác vụ trong thread pool. Thư mục có trong chỉ mục cũ với mtime không đổi
+    được sao chép nguyên (không gọi scandir), chỉ duyệt tiếp các thư mục con đã biết; thư mục mới hoặc mtime đổi
+    thì được scandir lại. Lưu ý: sửa nội dung một file có sẵn không đổi mtime thư mục, nên kích thước file đó chỉ
+    được cập nhật khi thư mục chứa nó thay đổi hoặc khi quét lại toàn bộ (full=True), trừ khi có `dirty`:
+    tập file id của các thư mục có thay đổi theo USN journal, luôn được scandir lại.
+    """
+    def __init__(self, root, previous, max_workers, cancel_token, progress_callback, dirty=None):
+        self.index = DiskIndex(root)
+        self.previous = previous
+        self.dirty = dirty or ()
+        self.previous_children = previous.children_map() if previous is not None else {}
+        self.cancel_token = cancel_token
+        self.progress_callback = progress_callback
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.done_event = threading.Event()
+        self.error = None
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="disk-scan")
+
+    def run(self):
+        started = time.perf_counter()
+        root_stat = os.stat(self.index.root)
+        with self.lock:
+            root_index = self.index._append(NO_PARENT, 0, os.path.basename(self.index.root.rstrip("\\/")) or self.index.root)
+        self.index.file_id[root_index] = root_stat.st_ino & FILE_ID_MASK
+        self._submit(self.index.root, root_index, 0 if self.previous is not None else None, root_stat.st_mtime)
+        try:
+            while not self.done_event.wait(0.25):
+                if self.cancel_token is not None and self.cancel_token.is_cancelled:
+                    break
+                report_progress(self.progress_callback, None, f"Đã quét {len(self.index)} thư mục...")
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        check_cancelled(self.cancel_token)
+        if self.error is not None:
+            raise self.error
+        self.index.compute_totals()
+        self.index.scanned_at = time.time()
+        self.index.scan_seconds = time.perf_counter() - started
+        return self.index
+
+    def _submit(self, path, node, old_node, mtime):
+        with self.lock:
+            self.pending += 1
+        self.executor.submit(self._task, path, node, old_node, mtime)
+
+    def _task(self, path, node, old_node, mtime):
+        try:
+            if self.cancel_token is None or not self.cancel_token.is_cancelled:
+                self._process(path, node, old_node, mtime)
+        except Exception as e: # Lỗi bất ngờ: dừng cả lần quét
+            self.error = e
+            self.done_event.set()
+        finally:
+            with self.lock:
+                self.pending -= 1
+                finished = self.pending == 0
+            if finished:
+                self.done_event.set()
+
+    def _process(self, path, node, old_node, mtime):
+        index, previous = self.index, self.previous
+        if old_node is not None and previous.mtime[old_node] == mtime and previous.file_id[old_node] not in self.dirty:
+            # Không đổi: sao chép dữ liệu file trực tiếp, duyệt tiếp thư mục con đã biết (vẫn phải stat để kiểm tra mtime)
+            index.mtime[node] = mtime
+            index.own_bytes[node] = previous.own_bytes[old_node]
+            index.own_files[node] = previous.own_files[old_node]
+            index.top_files[node] = previous.top_files[old_node]
+            for old_child in self.previous_children.get(old_node, ()):
+                name = previous.names[old_child]
+                child_path = os.path.join(path, name)
+                try:
+                    child_stat = os.stat(child_path, follow_symlinks=False)
+                except OSError:
+                    continue # Đã bị xóa (nếu vậy mtime thư mục này lẽ ra đã đổi, nhưng vẫn an toàn)
+                self._add_child(child_path, node, name, old_child, child_stat.st_mtime, child_stat.st_ino)
+            return
+
+        old_children = {}
+        if old_node is not None:
+            old_children = {previous.names[c]: c for c in self.previous_children.get(old_node, ())}
+        own_bytes = own_files = 0
+        top = []
+        subdirs = []
+        try:
+            with os.scandir(path) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not _is_reparse_point(entry):
+                                subdirs.append((entry.name, entry.stat(follow_symlinks=False).st_mtime, entry.inode()))
+                            continue
+                        info = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        with self.lock:
+                            index.scan_errors += 1
+                        continue
+                    if not stat.S_ISREG(info.st_mode):
+                        continue
+                    size = info.st_size
+                    own_bytes += size
+                    own_files += 1
+                    if len(top) < TOP_FILES_PER_DIR:
+                        heapq.heappush(top, (size, entry.name))
+                    elif size > top[0][0]:
+                        heapq.heapreplace(top, (size, entry.name))
+        except OSError as e:
+            with self.lock:
+                index.scan_errors += 1
+            logging.debug(f"Không thể quét {path}: {e}")
+        index.mtime[node] = mtime
+        index.own_bytes[node] = own_bytes
+        index.own_files[node] = own_files
+        index.top_files[node] = sorted(top, reverse=True) or None
+        with self.lock:
+            index.rescanned_dirs += 1
+        for name, child_mtime, child_id in subdirs:
+            self._add_child(os.path.join(path, name), node, name, old_children.get(name), child_mtime, child_id)
+
+    def _add_child(self, child_path, parent, name, old_child, mtime, file_id):
+        with self.lock:
+            child = self.index._append(parent, self.index.depth[parent] + 1, name)
+            self.index.file_id[child] = file_id & FILE_ID_MASK
+        self._submit(child_path, child, old_child, mtime)
+
+
+def _is_reparse_point(entry):
+    """Junction/symlink thư mục: không đi theo (tránh đếm trùng và vòng lặp)."""
+    if entry.is_symlink():
+        return True
+    is_junction = getattr(entry, "is_junction", None) # Python 3.12+
+    if is_junction is not None:
+        return is_junction()
+    attributes = getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+    return bool(attributes & getattr(stat, "FILE_ATTRIBUTE_REPARSE_POINT", 0))
+
+
+def default_index_path(root):
+    """File chỉ mục cho một thư mục gốc, trong thư mục dữ liệu của ứng dụng."""
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_app_data_dir("disk_index"), f"{digest}.idx")
+
+
+def _journal_changes(source, previous, root, cancel_token):
+    """
+    (điểm mốc mới (journal_id, next_usn) hoặc None, tập file id thư mục thay đổi hoặc None).
+    Điểm mốc được lấy trước khi quét để thay đổi xảy ra trong lúc quét được áp dụng ở lần sau.
+    """
+    try:
+        info = source.query()
+    except (JournalResetRequired, OSError) as e:
+        logging.info(f"Phân tích dung lượng {root}: không đọc được USN journal ({e})")
+        return None, None
+    checkpoint = (info.journal_id, info.next_usn)
+    if previous is None or previous.journal_id is None:
+        return checkpoint, None
+    try:
+        dirty, summary = collect_changed_directories(source, previous.journal_id, previous.next_usn, cancel_token)
+    except (JournalResetRequired, OSError) as e:
+        logging.info(f"Phân tích dung lượng {root}: bỏ qua USN journal, chỉ so mtime ({e})")
+        return checkpoint, None
+    logging.info(f"Phân tích dung lượng {root}: {summary.records} bản ghi USN, {len(dirty)} thư mục thay đổi")
+    return checkpoint, dirty
+
+
+def build_disk_index(root, index_path=None, full=False, max_workers=DEFAULT_MAX_WORKERS,
+                     cancel_token=None, progress_callback=None, journal_source=None):
+    """
+    Tạo hoặc làm mới chỉ mục dung lượng của root rồi lưu lại. Lần đầu (hoặc full=True) quét toàn bộ;
+    các lần sau chỉ scandir lại những thư mục có mtime thay đổi hoặc có file thay đổi theo USN journal
+    (journal_source: nguồn của core/usn_journal.py; mặc định journal của volume chứa root nếu đọc được). Trả về DiskIndex.
+    """
+    index_path = index_path or default_index_path(root)
+    previous = None if full else DiskIndex.load(index_path)
+    if previous is not None and os.path.normcase(previous.root) != os.path.normcase(os.path.abspath(root)):
+        previous = None
+    checkpoint = dirty = None
+    source = journal_source or open_volume_journal(root)
+    if source is not None:
+        checkpoint, dirty = _journal_changes(source, previous, root, cancel_token)
+    mode = "làm mới" if previous is not None else "quét toàn bộ"
+    logging.info(f"Phân tích dung lượng {root}: {mode}")
+    index = _Scanner(root, previous, max(1, max_workers), cancel_token, progress_callback, dirty).run()
+    if checkpoint is not None:
+        index.journal_id, index.next_usn = checkpoint
+    try:
+        index.save(index_path)
+    except OSError as e:
+        logging.warning(f"Không lưu được chỉ mục dung lượng {index_path}: {e}")
+    logging.info(f"Phân tích dung lượng {root}: {len(index)} thư mục, quét lại {index.rescanned_dirs}, "
+                 f"{index.scan_seconds:.2f}s")
+    report_progress(progress_callback, 100, f"Đã phân tích {len(index)} thư mục.")
+    return index
@@ -0,0 +1,316 @@
+# core/duplicate_finder.py
+# Tìm file trùng lặp theo từng bước lọc: nhóm theo kích thước -> băm 64 KiB đầu + 64 KiB cuối -> băm toàn bộ
+# các file còn trùng. Băm bằng mmap trên thread pool; digest được cache bền vững theo (path, size, mtime, file id).
+# Danh sách file được đệm trong bảng SQLite tạm (trên đĩa) nên bộ nhớ bị chặn kể cả với hàng triệu file.
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.app_paths import get_app_data_dir
+from core.task_control import check_cancelled, report_progress
+
+PARTIAL_CHUNK_BYTES = 64 * 1024
+FULL_HASH_CHUNK_BYTES = 8 * 1024 * 1024 # Mỗi lần update() trên một lát mmap (hashlib nhả GIL với dữ liệu lớn)
+DIGEST_SIZE = 20
+DEFAULT_MAX_WORKERS = 4
+INSERT_BATCH = 10_000
+HASH_BATCH_FILES = 4_000         # Số file ứng viên xử lý mỗi lô (chặn bộ nhớ theo lô thay vì theo tổng)
+CACHE_RETENTION_S = 90 * 86400   # Xóa digest không được dùng lại trong khoảng này
+STAGE_PARTIAL = "partial"
+STAGE_FULL = "full"
+CACHE_SCHEMA_VERSION = 1         # 1: file_id lưu dạng TEXT (file id 128-bit của ReFS vượt INTEGER 64-bit của SQLite)
+
+
+def _hash_region(mapped, start, end):
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    view = memoryview(mapped)
+    try:
+        for offset in range(start, end, FULL_HASH_CHUNK_BYTES):
+            digest.update(view[offset:min(end, offset + FULL_HASH_CHUNK_BYTES)])
+    finally:
+        view.release()
+    return digest
+
+
+def hash_file(path, size, stage):
+    """
+    STAGE_PARTIAL: băm 64 KiB đầu + 64 KiB cuối (cả file nếu nhỏ hơn 128 KiB); STAGE_FULL: băm cả file.
+    Đọc qua mmap để không sao chép dữ liệu sang bộ đệm Python. Trả về digest (bytes).
+    """
+    if size == 0:
+        return hashlib.blake2b(b"", digest_size=DIGEST_SIZE).digest()
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError): # Ví dụ file trên một số hệ thống file mạng: đọc thường
+            return _hash_file_buffered(f, size, stage)
+        with mapped:
+            if stage == STAGE_FULL or size <= 2 * PARTIAL_CHUNK_BYTES:
+                return _hash_region(mapped, 0, len(mapped)).digest()
+            digest = _hash_region(mapped, 0, PARTIAL_CHUNK_BYTES)
+            digest.update(mapped[len(mapped) - PARTIAL_CHUNK_BYTES:])
+            return digest.digest()
+
+
+def _hash_file_buffered(f, size, stage):
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    if stage == STAGE_PARTIAL and size > 2 * PARTIAL_CHUNK_BYTES:
+        digest.update(f.read(PARTIAL_CHUNK_BYTES))
+        f.seek(size - PARTIAL_CHUNK_BYTES)
+        digest.update(f.read(PARTIAL_CHUNK_BYTES))
+        return digest.digest()
+    for chunk in iter(lambda: f.read(FULL_HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    return digest.digest()
+
+
+def is_partial_hash_complete(size):
+    """File <= 128 KiB: digest bước băm một phần đã bao trùm toàn bộ nội dung."""
+    return size <= 2 * PARTIAL_CHUNK_BYTES
+
+
+class HashCache:
+    """
+    Cache digest trong SQLite. Một bản ghi chỉ được dùng lại khi size, mtime_ns và file id (inode/file index)
+    đều khớp, nên file bị sửa hoặc bị thay bằng file khác cùng tên sẽ được băm lại.
+    """
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_app_data_dir(), "hash_cache.sqlite3")
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+                # Cache bản cũ (file_id INTEGER): bỏ đi, các digest sẽ được băm lại
+                self.connection.execute("DROP TABLE IF EXISTS hashes")
+                self.connection.execute(f"PRAGMA user_version={CACHE_SCHEMA_VERSION}")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                "file_id TEXT, partial BLOB, full BLOB, last_seen REAL)")
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, records, stage):
+        """records: list (path, size, mtime_ns, file_id). Trả về {path: digest} của các bản ghi còn hợp lệ."""
+        column = "partial" if stage == STAGE_PARTIAL else "full"
+        found = {}
+        for start in range(0, len(records), 500): # Giới hạn số tham số của SQLite
+            chunk = records[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT path, size, mtime_ns, file_id, {column} FROM hashes WHERE path IN ({placeholders})",
+                [r[0] for r in chunk]).fetchall()
+            expected = {r[0]: (r[1], r[2], r[3]) for r in chunk}
+            for path, size, mtime_ns, file_id, digest in rows:
+                if digest is not None and expected.get(path) == (size, mtime_ns, file_id):
+                    found[path] = digest
+        self.hits += len(found)
+        self.misses += len(records) - len(found)
+        return found
+
+    def store(self, entries, stage):
+        """entries: list (path, size, mtime_ns, file_id, digest). Bản ghi cũ không khớp bị thay thế."""
+        if not entries:
+            return
+        now = time.time()
+        column = "partial" if stage == STAGE_PARTIAL else "full"
+        other = "full" if stage == STAGE_PARTIAL else "partial"
+        # Giữ digest của bước kia nếu file không đổi; nếu đổi thì xóa nó
+        self.connection.executemany(
+            f"INSERT INTO hashes (path, size, mtime_ns, file_id, {column}, last_seen) VALUES (?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(path) DO UPDATE SET {column}=excluded.{column}, last_seen=excluded.last_seen, "
+            f"{other}=CASE WHEN size=excluded.size AND mtime_ns=excluded.mtime_ns AND file_id=excluded.file_id "
+            f"THEN {other} ELSE NULL END, size=excluded.size, mtime_ns=excluded.mtime_ns, file_id=excluded.file_id",
+            [(path, size, mtime_ns, file_id, digest, now) for path, size, mtime_ns, file_id, digest in entries])
+        self.connection.commit()
+
+    def prune(self, max_age_s=CACHE_RETENTION_S):
+        self.connection.execute("DELETE FROM hashes WHERE last_seen < ?", (time.time() - max_age_s,))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class DuplicateReport:
+    """Kết quả: các nhóm (size, digest, [path...]) và số liệu của từng bước lọc."""
+    def __init__(self):
+        self.groups = []
+        self.files_scanned = 0
+        self.size_candidates = 0
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    @property
+    def wasted_bytes(self):
+        return sum(size * (len(paths) - 1) for size, _, paths in self.groups)
+
+
+def _walk(roots, min_size, cancel_token):
+    """
+    Sinh (path, size, mtime_ns, file_id, dev) cho mọi file thường >= min_size; không đi theo liên kết.
+    file_id và dev là chuỗi thập phân: file id 128-bit (ReFS) và số serial ổ 64-bit không dấu không vừa cột
+    INTEGER của SQLite.
+    """
+    stack = list(roots)
+    while stack:
+        check_cancelled(cancel_token)
+        directory = stack.pop()
+        directory_dev = None
+        try:
+            with os.scandir(directory) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.is_symlink():
+                                stack.append(entry.path)
+                            continue
+                        info = entry.stat(follow_symlinks=False)
+                        if not stat.S_ISREG(info.st_mode) or info.st_size < min_size:
+                            continue
+                        file_id = str(info.st_ino or entry.inode()) # st_ino từ scandir trên Windows bằng 0
+                        dev = info.st_dev
+                        if not dev:
+                            # scandir trên Windows cũng để st_dev = 0: lấy số serial ổ đĩa từ os.stat của thư mục
+                            # (một lần mỗi thư mục) để file id trùng nhau trên hai ổ khác nhau không bị gộp làm hard link
+                            if directory_dev is None:
+                                directory_dev = os.stat(directory).st_dev
+                            dev = directory_dev
+                        yield entry.path, info.st_size, info.st_mtime_ns, file_id, str(dev)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.debug(f"Không thể quét {directory}: {e}")
+
+
+def _group_by(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+class DuplicateFinder:
+    def __init__(self, cache=None, max_workers=DEFAULT_MAX_WORKERS):
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+
+    def _digests(self, executor, records, stage, report):
+        """Digest của từng record (path, size, mtime_ns, file_id); lấy từ cache nếu có, còn lại băm song song."""
+        keys = [r[:4] for r in records]
+        cached = self.cache.lookup(keys, stage) if self.cache is not None else {}
+        report.cache_hits += len(cached)
+        missing = [r for r in keys if r[0] not in cached]
+
+        def _safe_hash(record):
+            try:
+                return hash_file(record[0], record[1], stage)
+            except OSError:
+                return None
+
+        fresh = list(executor.map(_safe_hash, missing))
+        new_entries = [(*record, digest) for record, digest in zip(missing, fresh) if digest is not None]
+        report.errors += sum(1 for digest in fresh if digest is None)
+        if stage == STAGE_PARTIAL:
+            report.partial_hashed += len(missing)
+        else:
+            report.full_hashed += len(missing)
+        if self.cache is not None:
+            self.cache.store(new_entries, stage)
+        digests = dict(cached)
+        digests.update((entry[0], entry[4]) for entry in new_entries)
+        return digests
+
+    def _process_batch(self, executor, batch, report):
+        """batch: list record của các nhóm cùng kích thước. Thêm các nhóm trùng thực sự vào report."""
+        partial = self._digests(executor, batch, STAGE_PARTIAL, report)
+        survivors = [r for r in batch if r[0] in partial]
+        for group in _group_by(survivors, lambda r: (r[1], partial[r[0]])):
+            size = group[0][1]
+            if is_partial_hash_complete(size):
+                report.groups.append((size, partial[group[0][0]], [r[0] for r in group]))
+                continue
+            full = self._digests(executor, group, STAGE_FULL, report)
+            for same in _group_by([r for r in group if r[0] in full], lambda r: full[r[0]]):
+                report.groups.append((size, full[same[0][0]], [r[0] for r in same]))
+
+    def find(self, roots, min_size=1, cancel_token=None, progress_callback=None):
+        started = time.perf_counter()
+        report = DuplicateReport()
+        temp_dir = tempfile.mkdtemp(prefix="dupfind_")
+        db_path = os.path.join(temp_dir, "files.sqlite3")
+        db = sqlite3.connect(db_path)
+        try:
+            db.execute("PRAGMA journal_mode=OFF")
+            db.execute("PRAGMA synchronous=OFF")
+            db.execute("CREATE TABLE files (path TEXT, size INTEGER, mtime_ns INTEGER, file_id TEXT, dev TEXT)")
+            # Bước 0: liệt kê file vào bảng tạm trên đĩa
+            pending = []
+            for record in _walk(roots, max(0, min_size), cancel_token):
+                pending.append(record)
+                if len(pending) >= INSERT_BATCH:
+                    db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", pending)
+                    report.files_scanned += len(pending)
+                    pending.clear()
+                    report_progress(progress_callback, None, f"Đã liệt kê {report.files_scanned} file...")
+            db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", pending)
+            report.files_scanned += len(pending)
+            db.execute("CREATE INDEX files_size ON files(size)")
+
+            # Bước 1: chỉ giữ kích thước xuất hiện >= 2 lần; hard link (cùng dev + file id) tính là một file.
+            # file id 0 (một số hệ thống file / ổ mạng không cung cấp) không nhận diện được hard link: giữ từng file
+            db.execute("CREATE TABLE candidates AS SELECT MIN(path) AS path, size, mtime_ns, file_id, dev FROM files "
+                       "WHERE size IN (SELECT size FROM files GROUP BY size HAVING COUNT(*) > 1) "
+                       "GROUP BY dev, CASE WHEN file_id = '0' THEN path ELSE file_id END, size")
+            db.execute("DELETE FROM candidates WHERE size IN (SELECT size FROM candidates GROUP BY size HAVING COUNT(*) = 1)")
+            report.size_candidates = db.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+            logging.info(f"Tìm file trùng: {report.files_scanned} file, {report.size_candidates} ứng viên sau khi lọc theo kích thước")
+
+            # Bước 2-3: xử lý theo lô gồm các nhóm kích thước trọn vẹn
+            processed = 0
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dup-hash") as executor:
+                batch, current_size = [], None
+                cursor = db.execute("SELECT path, size, mtime_ns, file_id FROM candidates ORDER BY size DESC")
+                for record in cursor:
+                    if record[1] != current_size and len(batch) >= HASH_BATCH_FILES:
+                        check_cancelled(cancel_token)
+                        self._process_batch(executor, batch, report)
+                        processed += len(batch)
+                        report_progress(progress_callback, 100.0 * processed / max(1, report.size_candidates),
+                                        f"Đang so sánh nội dung... {processed}/{report.size_candidates}")
+                        batch = []
+                    current_size = record[1]
+                    batch.append(record)
+                check_cancelled(cancel_token)
+                if batch:
+                    self._process_batch(executor, batch, report)
+        finally:
+            db.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        if self.cache is not None:
+            self.cache.prune()
+        report.groups.sort(key=lambda g: g[0] * (len(g[2]) - 1), reverse=True)
+        report.seconds = time.perf_counter() - started
+        report_progress(progress_callback, 100, f"Tìm thấy {len(report.groups)} nhóm file trùng.")
+        return report
+
+
+def find_duplicates(roots, min_size=1, use_cache=True, cache_path=None, max_workers=DEFAULT_MAX_WORKERS,
+                    cancel_token=None, progress_callback=None):
+    """Tiện ích: chạy DuplicateFinder với cache mặc định và trả về DuplicateReport."""
+    cache = HashCache(cache_path) if use_cache else None
+    try:
+        return DuplicateFinder(cache, max_workers).find(roots, min_size, cancel_token, progress_callback)
+    finally:
+        if cache is not None:
+            cache.close()
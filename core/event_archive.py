@@ -0,0 +1,244 @@
+# core/event_archive.py
+# Kho lưu trữ sự kiện cục bộ (SQLite + FTS5) để tra cứu toàn văn nhiều tháng nhật ký: "disk", "0x80070005",
+# tên driver... Dữ liệu được nạp dần từ file .evtx (core/evtx_parser.py): mỗi log lưu mốc (thời gian, record id)
+# đã nạp, lần sau chỉ đọc phần mới. Ghi theo lô trong transaction, giới hạn theo số ngày và số sự kiện.
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from core.app_paths import get_app_data_dir
+from core.evtx_parser import EvtxError, EvtxFile, EvtxFilter
+from core.task_control import check_cancelled, report_progress
+
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_MAX_EVENTS = 1_000_000
+INSERT_BATCH = 2_000
+DEFAULT_SEARCH_LIMIT = 500
+SYNC_OVERLAP = timedelta(hours=1) # Đọc lùi một chút trước mốc để không sót bản ghi ghi trễ/lệch giờ (trùng sẽ bị bỏ qua)
+SCHEMA_VERSION = 2 # 2: cột event_data (EventData thô, trước là message) + message (thông điệp đã định dạng)
+
+# event_data: các cặp tên/giá trị EventData đọc từ file .evtx (luôn có); message: thông điệp đã định dạng theo
+# ngôn ngữ hệ thống (Win32_NTLogEvent.Message), chỉ có khi đã tra được qua WMI (xem set_messages)
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, log TEXT NOT NULL, record_id INTEGER NOT NULL, "
+    "ts REAL NOT NULL, provider TEXT, level INTEGER, event_id INTEGER, computer TEXT, event_data TEXT, message TEXT, "
+    "UNIQUE (log, record_id, ts))",
+    "CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts)",
+    "CREATE INDEX IF NOT EXISTS idx_events_provider_ts ON events (provider COLLATE NOCASE, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_events_level_ts ON events (level, ts)",
+    # Bảng FTS dạng external content: chỉ lưu chỉ mục, nội dung đọc từ events; trigger giữ hai bảng đồng bộ
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(event_data, message, provider, content='events', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS events_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts (rowid, event_data, message, provider) VALUES (new.id, new.event_data, new.message, new.provider); END",
+    "CREATE TRIGGER IF NOT EXISTS events_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts (events_fts, rowid, event_data, message, provider) "
+    "VALUES ('delete', old.id, old.event_data, old.message, old.provider); END",
+    "CREATE TRIGGER IF NOT EXISTS events_au AFTER UPDATE OF message ON events BEGIN "
+    "INSERT INTO events_fts (events_fts, rowid, event_data, message, provider) "
+    "VALUES ('delete', old.id, old.event_data, old.message, old.provider); "
+    "INSERT INTO events_fts (rowid, event_data, message, provider) VALUES (new.id, new.event_data, new.message, new.provider); END",
+    "CREATE TABLE IF NOT EXISTS sync_state (log TEXT PRIMARY KEY, path TEXT, last_ts REAL, last_record_id INTEGER, "
+    "synced_at REAL)",
+)
+
+
+def to_fts_query(text):
+    """
+    Chuyển chuỗi người dùng nhập thành biểu thức FTS5 an toàn: mỗi từ thành một cụm trong ngoặc kép (các từ
+    được AND với nhau), nên dấu chấm/gạch/hai chấm trong "nvlddmkm.sys" hay "0x80070005" không gây lỗi cú pháp.
+    Từ kết thúc bằng * được tìm theo tiền tố.
+    """
+    terms = []
+    for word in (text or "").split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def format_event_data(event):
+    """
+    Các cặp tên/giá trị EventData nối thành chuỗi (không cắt ngắn) để lưu và tìm kiếm. Đây không phải thông điệp
+    Windows hiển thị: văn bản đó cần DLL thông điệp của nhà cung cấp, chỉ lấy được qua WMI (xem set_messages).
+    """
+    return "; ".join(f"{name}: {value}" if name else value for name, value in event.data() if value)
+
+
+class ArchiveSyncSummary:
+    """Số liệu một lần đồng bộ: số sự kiện mới theo log, số bị xóa do hết hạn, lỗi đọc từng log."""
+    def __init__(self):
+        self.added = {}
+        self.pruned = 0
+        self.errors = {}
+
+    @property
+    def total_added(self):
+        return sum(self.added.values())
+
+
+class EventArchive:
+    """Kho sự kiện SQLite (WAL). Mặc định nằm trong thư mục dữ liệu ứng dụng: event_archive.sqlite3."""
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_app_data_dir(), "event_archive.sqlite3")
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version == 1:
+                self._upgrade_from_v1()
+            for statement in _SCHEMA:
+                self.connection.execute(statement)
+            if version == 1:
+                self.connection.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+            self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _upgrade_from_v1(self):
+        """Bản 1 lưu EventData trong cột message: đổi tên thành event_data, thêm message; chỉ mục FTS dựng lại."""
+        for statement in ("DROP TRIGGER IF EXISTS events_ai", "DROP TRIGGER IF EXISTS events_ad",
+                          "DROP TABLE IF EXISTS events_fts", "ALTER TABLE events RENAME COLUMN message TO event_data",
+                          "ALTER TABLE events ADD COLUMN message TEXT"):
+            self.connection.execute(statement)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sync_state(self, log_name):
+        """(last_ts, last_record_id) đã nạp của log, hoặc None nếu log chưa từng được đồng bộ."""
+        row = self.connection.execute("SELECT last_ts, last_record_id FROM sync_state WHERE log = ?", (log_name,)).fetchone()
+        return row if row and row[0] is not None else None
+
+    def ingest(self, log_name, events, path=None, cancel_token=None):
+        """
+        Nạp các EvtxEvent (sắp xếp cũ -> mới) vào kho theo lô INSERT_BATCH; mỗi lô là một transaction và cập nhật
+        luôn mốc đồng bộ của log, nên bị hủy giữa chừng thì lần sau tiếp tục từ lô cuối đã ghi.
+        Sự kiện đã có (trùng log, record id, thời gian) được bỏ qua. Trả về số sự kiện mới.
+        """
+        added = 0
+        batch = []
+        for event in events:
+            batch.append((log_name, event.record_id, event.timestamp.timestamp(), event.provider, event.level,
+                          event.event_id, event.computer, format_event_data(event)))
+            if len(batch) >= INSERT_BATCH:
+                added += self._write_batch(log_name, path, batch)
+                batch = []
+                check_cancelled(cancel_token)
+        if batch:
+            added += self._write_batch(log_name, path, batch)
+        return added
+
+    def _write_batch(self, log_name, path, batch):
+        last = max(batch, key=lambda row: (row[2], row[1]))
+        with self.connection:
+            added = self.connection.executemany(
+                "INSERT OR IGNORE INTO events (log, record_id, ts, provider, level, event_id, computer, event_data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch).rowcount
+            self.connection.execute(
+                "INSERT INTO sync_state (log, path, last_ts, last_record_id, synced_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(log) DO UPDATE SET path=excluded.path, synced_at=excluded.synced_at, "
+                "last_record_id=CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_record_id ELSE last_record_id END, "
+                "last_ts=MAX(last_ts, excluded.last_ts)",
+                (log_name, path, last[2], last[1], datetime.now(timezone.utc).timestamp()))
+        return added
+
+    def set_messages(self, log_name, messages):
+        """
+        Lưu thông điệp đã định dạng cho các sự kiện đã có. messages: list (record id, thời điểm, thông điệp);
+        thời điểm phải khớp để không gán nhầm sau khi log bị xóa và record id bắt đầu lại. Trả về số sự kiện cập nhật.
+        """
+        with self.connection:
+            return self.connection.executemany(
+                "UPDATE events SET message = ? WHERE log = ? AND record_id = ? AND ts = ? AND message IS NULL",
+                [(message, log_name, record_id, timestamp.timestamp()) for record_id, timestamp, message in messages
+                 if message]).rowcount
+
+    def prune(self, retention_days=DEFAULT_RETENTION_DAYS, max_events=DEFAULT_MAX_EVENTS):
+        """Xóa sự kiện cũ hơn retention_days và phần cũ nhất vượt quá max_events. Trả về số sự kiện đã xóa."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).timestamp()
+        with self.connection:
+            deleted = self.connection.execute("DELETE FROM events WHERE ts < ?", (cutoff,)).rowcount
+            if max_events is not None:
+                count = self.connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+                if count > max_events:
+                    deleted += self.connection.execute(
+                        "DELETE FROM events WHERE id IN (SELECT id FROM events ORDER BY ts LIMIT ?)",
+                        (count - max_events,)).rowcount
+        return deleted
+
+    def search(self, query=None, logs=None, providers=None, levels=None, event_ids=None, since=None, until=None,
+               limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Tìm sự kiện, mới nhất trước. query là chuỗi tìm toàn văn (xem to_fts_query); các bộ lọc log/nguồn/mức độ/
+        Event ID/khoảng thời gian dùng chỉ mục trên bảng events. Trả về list dict ("event_data" là EventData thô,
+        "message" là thông điệp đã định dạng hoặc None nếu chưa tra được).
+        """
+        clauses, params = [], []
+        source = "events e"
+        fts_query = to_fts_query(query)
+        if fts_query:
+            source = "events_fts f JOIN events e ON e.id = f.rowid"
+            clauses.append("events_fts MATCH ?")
+            params.append(fts_query)
+        for column, values, collate in (("e.log", logs, " COLLATE NOCASE"), ("e.provider", providers, " COLLATE NOCASE"),
+                                        ("e.level", levels, ""), ("e.event_id", event_ids, "")):
+            if values:
+                values = list(values)
+                clauses.append(f"{column}{collate} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if since is not None:
+            clauses.append("e.ts >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("e.ts <= ?")
+            params.append(until.timestamp())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        rows = self.connection.execute(
+            f"SELECT e.log, e.record_id, e.ts, e.provider, e.level, e.event_id, e.computer, e.event_data, e.message "
+            f"FROM {source} {where} ORDER BY e.ts DESC LIMIT ?", params).fetchall()
+        return [{"log": log, "record_id": record_id, "timestamp": datetime.fromtimestamp(ts, timezone.utc),
+                 "provider": provider, "level": level, "event_id": event_id, "computer": computer,
+                 "event_data": event_data, "message": message}
+                for log, record_id, ts, provider, level, event_id, computer, event_data, message in rows]
+
+    def stats(self):
+        """(số sự kiện, thời điểm cũ nhất, mới nhất) trong kho."""
+        count, oldest, newest = self.connection.execute("SELECT COUNT(*), MIN(ts), MAX(ts) FROM events").fetchone()
+        to_dt = lambda ts: datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+        return count, to_dt(oldest), to_dt(newest)
+
+
+def sync_event_archive(archive, sources, retention_days=DEFAULT_RETENTION_DAYS, max_events=DEFAULT_MAX_EVENTS,
+                       levels=None, cancel_token=None, progress_callback=None):
+    """
+    Nạp phần mới của từng log vào kho. sources: list (tên log, đường dẫn .evtx). Lần đầu nạp retention_days gần
+    nhất; các lần sau đọc từ mốc thời gian đã lưu trừ SYNC_OVERLAP (bản ghi đã có được bỏ qua nhờ ràng buộc UNIQUE).
+    Lỗi đọc một log không dừng các log khác. Trả về ArchiveSyncSummary.
+    """
+    summary = ArchiveSyncSummary()
+    retention_start = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    for index, (log_name, path) in enumerate(sources):
+        check_cancelled(cancel_token)
+        report_progress(progress_callback, index * 90 / max(1, len(sources)), f"Đang nạp Event Log '{log_name}' vào kho lưu trữ...")
+        state = archive.sync_state(log_name)
+        since = max(retention_start, datetime.fromtimestamp(state[0], timezone.utc) - SYNC_OVERLAP) if state else retention_start
+        try:
+            with EvtxFile(path) as evtx: # Đọc dạng luồng, cũ -> mới: bộ nhớ chỉ giữ một lô
+                events = evtx.events(EvtxFilter(levels=levels, since=since), newest_first=False, cancel_token=cancel_token)
+                summary.added[log_name] = archive.ingest(log_name, events, path, cancel_token)
+        except (OSError, EvtxError) as e:
+            summary.errors[log_name] = str(e)
+            logging.warning(f"Không thể nạp {path} vào kho lưu trữ sự kiện: {e}")
+    report_progress(progress_callback, 90, "Đang dọn sự kiện quá hạn lưu trữ...")
+    summary.pruned = archive.prune(retention_days, max_events)
+    report_progress(progress_callback, 100, "Đã cập nhật kho lưu trữ sự kiện.")
+    return summary
@@ -0,0 +1,592 @@
+# core/evtx_parser.py
+# Đọc trực tiếp file nhật ký sự kiện .evtx (định dạng chunk / record / BinXML) qua mmap, không cần WMI:
+# đọc được cả log đang dùng, log đã lưu trữ/xuất ra và file sao chép sang máy khác (kể cả Linux).
+# Mỗi template BinXML được biên dịch một lần (cache theo GUID) thành cây có chỗ trống thay thế; các trường
+# System (Level, Provider, EventID, ...) được tra trực tiếp trong bảng giá trị để lọc trước khi giải mã toàn bộ.
+import logging
+import mmap
+import os
+import struct
+import uuid
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+from core.task_control import check_cancelled
+
+FILE_MAGIC = b"ElfFile\x00"
+CHUNK_MAGIC = b"ElfChnk\x00"
+RECORD_MAGIC = b"\x2a\x2a\x00\x00"
+FILE_HEADER_SIZE = 4096
+CHUNK_SIZE = 64 * 1024
+CHUNK_HEADER_SIZE = 512
+RECORD_HEADER_SIZE = 24
+
+# Token BinXML (4 bit thấp; bit 0x40 = "có thêm thuộc tính/dữ liệu")
+TOKEN_EOF = 0x00
+TOKEN_OPEN_START_ELEMENT = 0x01
+TOKEN_CLOSE_START_ELEMENT = 0x02
+TOKEN_CLOSE_EMPTY_ELEMENT = 0x03
+TOKEN_END_ELEMENT = 0x04
+TOKEN_VALUE = 0x05
+TOKEN_ATTRIBUTE = 0x06
+TOKEN_CDATA = 0x07
+TOKEN_CHAR_REF = 0x08
+TOKEN_ENTITY_REF = 0x09
+TOKEN_PI_TARGET = 0x0A
+TOKEN_PI_DATA = 0x0B
+TOKEN_TEMPLATE_INSTANCE = 0x0C
+TOKEN_NORMAL_SUBSTITUTION = 0x0D
+TOKEN_OPTIONAL_SUBSTITUTION = 0x0E
+TOKEN_FRAGMENT_HEADER = 0x0F
+TOKEN_HAS_MORE = 0x40
+
+# Kiểu giá trị BinXML
+TYPE_NULL = 0x00
+TYPE_STRING = 0x01
+TYPE_ANSI_STRING = 0x02
+TYPE_BINARY = 0x0E
+TYPE_GUID = 0x0F
+TYPE_SIZE_T = 0x10
+TYPE_FILETIME = 0x11
+TYPE_SYSTEMTIME = 0x12
+TYPE_SID = 0x13
+TYPE_HEX_INT32 = 0x14
+TYPE_HEX_INT64 = 0x15
+TYPE_BINXML = 0x21
+TYPE_ARRAY_FLAG = 0x80
+_FIXED_TYPES = { # Kiểu -> định dạng struct
+    0x03: "<b", 0x04: "<B", 0x05: "<h", 0x06: "<H", 0x07: "<i", 0x08: "<I", 0x09: "<q", 0x0A: "<Q",
+    0x0B: "<f", 0x0C: "<d", 0x0D: "<I", TYPE_HEX_INT32: "<I", TYPE_HEX_INT64: "<Q",
+}
+_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+LEVEL_NAMES = {0: "Thông tin", 1: "Nghiêm trọng", 2: "Lỗi", 3: "Cảnh báo", 4: "Thông tin", 5: "Chi tiết"}
+_FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+_SHARED_TEMPLATE_CACHE = {} # (GUID, kích thước) -> CompiledTemplate, dùng chung giữa các file và lần đọc
+SYSTEM_FIELDS = ("Provider", "EventID", "Level", "TimeCreated", "EventRecordID", "Channel", "Computer")
+
+
+class EvtxError(Exception):
+    """File không phải EVTX hoặc dữ liệu BinXML hỏng."""
+
+
+def filetime_to_datetime(value):
+    return _FILETIME_EPOCH + timedelta(microseconds=value // 10)
+
+
+def datetime_to_filetime(value):
+    return int((value - _FILETIME_EPOCH) / timedelta(microseconds=1)) * 10
+
+
+class Substitution:
+    """Chỗ trống trong template: được thay bằng giá trị thứ index của bản ghi."""
+    __slots__ = ("index", "value_type", "optional")
+
+    def __init__(self, index, value_type, optional):
+        self.index = index
+        self.value_type = value_type
+        self.optional = optional
+
+
+class Element:
+    __slots__ = ("name", "attributes", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.attributes = [] # (tên, list phần tử: str | Substitution)
+        self.children = []   # str | Substitution | Element | list node (BinXML lồng)
+
+    def child(self, name):
+        return next((c for c in self.children if isinstance(c, Element) and c.name == name), None)
+
+    def attribute(self, name):
+        return next((parts for attr_name, parts in self.attributes if attr_name == name), None)
+
+
+class CompiledTemplate:
+    """Template đã biên dịch + vị trí của các trường System (danh sách phần: literal hoặc Substitution)."""
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.fields = {}
+        root = next((n for n in nodes if isinstance(n, Element)), None)
+        system = root.child("System") if root is not None else None
+        if system is None:
+            return
+        for name in SYSTEM_FIELDS:
+            element = system.child(name)
+            if element is None:
+                continue
+            if name == "Provider":
+                parts = element.attribute("Name")
+            elif name == "TimeCreated":
+                parts = element.attribute("SystemTime")
+            else:
+                parts = element.children
+            if parts is not None:
+                self.fields[name] = parts
+
+
+class _Chunk:
+    """Một chunk 64 KiB (data bắt đầu tại base): offset trong BinXML (tên, template) tính từ đầu chunk."""
+    def __init__(self, data, base, template_cache):
+        self.data = data
+        self.base = base
+        self.template_cache = template_cache
+        self._names = {}
+        self._templates = {} # offset định nghĩa -> CompiledTemplate (trong chunk này)
+
+    def _u8(self, pos):
+        return self.data[pos]
+
+    def _u16(self, pos):
+        return struct.unpack_from("<H", self.data, pos)[0]
+
+    def _u32(self, pos):
+        return struct.unpack_from("<I", self.data, pos)[0]
+
+    def _utf16(self, pos, chars):
+        return bytes(self.data[pos:pos + 2 * chars]).decode("utf-16-le", "replace")
+
+    def name_at(self, offset):
+        name = self._names.get(offset)
+        if name is None:
+            pos = self.base + offset
+            name = self._utf16(pos + 8, self._u16(pos + 6))
+            self._names[offset] = name
+        return name
+
+    def _read_name(self, pos):
+        """Tham chiếu tên 4 byte tại pos; nếu tên được khai báo ngay sau đó (inline) thì bỏ qua phần khai báo."""
+        offset = self._u32(pos)
+        pos += 4
+        if self.base + offset == pos:
+            pos += 8 + 2 * self._u16(pos + 6) + 2
+        return self.name_at(offset), pos
+
+    # --- Biên dịch BinXML thành cây node ---
+    def parse_fragment(self, pos, end):
+        """Phân tích một chuỗi token tới EOF / end. Trả về (list node, vị trí kế tiếp)."""
+        nodes = []
+        while pos < end:
+            token = self._u8(pos)
+            kind = token & 0x0F
+            if kind == TOKEN_EOF:
+                return nodes, pos + 1
+            if kind == TOKEN_FRAGMENT_HEADER:
+                pos += 4
+            elif kind == TOKEN_OPEN_START_ELEMENT:
+                element, pos = self._parse_element(pos, end)
+                nodes.append(element)
+            elif kind == TOKEN_TEMPLATE_INSTANCE:
+                instance, pos = self.parse_template_instance(pos)
+                nodes.append(instance)
+            elif kind in (TOKEN_VALUE, TOKEN_NORMAL_SUBSTITUTION, TOKEN_OPTIONAL_SUBSTITUTION, TOKEN_CHAR_REF,
+                          TOKEN_ENTITY_REF, TOKEN_CDATA):
+                part, pos = self._parse_content(pos)
+                nodes.append(part)
+            else:
+                raise EvtxError(f"Token BinXML không hỗ trợ {token:#x} tại {pos - self.base:#x}")
+        return nodes, pos
+
+    def _parse_content(self, pos):
+        token = self._u8(pos)
+        kind = token & 0x0F
+        if kind == TOKEN_VALUE:
+            value_type = self._u8(pos + 1)
+            if value_type != TYPE_STRING:
+                raise EvtxError(f"Value token kiểu {value_type:#x} không hỗ trợ")
+            chars = self._u16(pos + 2)
+            return self._utf16(pos + 4, chars), pos + 4 + 2 * chars
+        if kind in (TOKEN_NORMAL_SUBSTITUTION, TOKEN_OPTIONAL_SUBSTITUTION):
+            return Substitution(self._u16(pos + 1), self._u8(pos + 3), kind == TOKEN_OPTIONAL_SUBSTITUTION), pos + 4
+        if kind == TOKEN_CHAR_REF:
+            return chr(self._u16(pos + 1)), pos + 3
+        if kind == TOKEN_ENTITY_REF:
+            name, pos = self._read_name(pos + 1)
+            return _ENTITIES.get(name, f"&{name};"), pos
+        if kind == TOKEN_CDATA:
+            chars = self._u16(pos + 1)
+            return self._utf16(pos + 3, chars), pos + 3 + 2 * chars
+        raise EvtxError(f"Token nội dung không hợp lệ {token:#x}")
+
+    def _parse_element(self, pos, end):
+        token = self._u8(pos)
+        # token | dependency id (2) | kích thước dữ liệu (4) | tham chiếu tên (4)
+        name, pos = self._read_name(pos + 7)
+        element = Element(name)
+        if token & TOKEN_HAS_MORE:
+            pos += 4 # Kích thước danh sách thuộc tính
+            while self._u8(pos) & 0x0F == TOKEN_ATTRIBUTE:
+                attribute_name, pos = self._read_name(pos + 1)
+                parts = []
+                while self._u8(pos) & 0x0F in (TOKEN_VALUE, TOKEN_NORMAL_SUBSTITUTION, TOKEN_OPTIONAL_SUBSTITUTION,
+                                               TOKEN_CHAR_REF, TOKEN_ENTITY_REF):
+                    part, pos = self._parse_content(pos)
+                    parts.append(part)
+                element.attributes.append((attribute_name, parts))
+        token = self._u8(pos) & 0x0F
+        pos += 1
+        if token == TOKEN_CLOSE_EMPTY_ELEMENT:
+            return element, pos
+        if token != TOKEN_CLOSE_START_ELEMENT:
+            raise EvtxError(f"Thiếu token đóng thẻ mở <{name}> ({token:#x})")
+        while pos < end:
+            kind = self._u8(pos) & 0x0F
+            if kind == TOKEN_END_ELEMENT:
+                return element, pos + 1
+            if kind == TOKEN_OPEN_START_ELEMENT:
+                child, pos = self._parse_element(pos, end)
+            elif kind == TOKEN_TEMPLATE_INSTANCE:
+                child, pos = self.parse_template_instance(pos)
+            elif kind in (TOKEN_PI_TARGET, TOKEN_PI_DATA):
+                raise EvtxError("Processing instruction trong BinXML không được hỗ trợ")
+            else:
+                child, pos = self._parse_content(pos)
+            element.children.append(child)
+        raise EvtxError(f"Thẻ <{name}> không được đóng")
+
+    def template_at(self, offset):
+        """Template định nghĩa tại offset (trong chunk); cache theo GUID dùng chung mọi chunk/file."""
+        template = self._templates.get(offset)
+        if template is not None:
+            return template
+        pos = self.base + offset
+        guid = bytes(self.data[pos + 4:pos + 20])
+        data_size = self._u32(pos + 20)
+        key = (guid, data_size)
+        template = self.template_cache.get(key)
+        if template is None:
+            nodes, _ = self.parse_fragment(pos + 24, pos + 24 + data_size)
+            template = CompiledTemplate(nodes)
+            self.template_cache[key] = template
+        self._templates[offset] = template
+        return template
+
+    def parse_template_instance(self, pos):
+        """Trả về (TemplateInstance, vị trí kế tiếp) với giá trị CHƯA giải mã (chỉ có bảng vị trí)."""
+        definition_offset = self._u32(pos + 6)
+        pos += 10
+        if self.base + definition_offset == pos: # Định nghĩa nằm ngay đây: bỏ qua
+            pos += 24 + self._u32(pos + 20)
+        template = self.template_at(definition_offset)
+        count = self._u32(pos)
+        pos += 4
+        descriptors = []
+        value_pos = pos + 4 * count
+        for index in range(count):
+            size, value_type = struct.unpack_from("<HB", self.data, pos + 4 * index)
+            descriptors.append((value_pos, size, value_type))
+            value_pos += size
+        return TemplateInstance(self, template, descriptors), value_pos
+
+    # --- Giải mã giá trị ---
+    def decode_value(self, pos, size, value_type):
+        data = self.data
+        if value_type == TYPE_NULL or (size == 0 and value_type != TYPE_BINXML):
+            return None
+        if value_type == TYPE_STRING:
+            return bytes(data[pos:pos + size]).decode("utf-16-le", "replace").rstrip("\x00")
+        if value_type == TYPE_ANSI_STRING:
+            return bytes(data[pos:pos + size]).decode("latin-1").rstrip("\x00")
+        fmt = _FIXED_TYPES.get(value_type)
+        if fmt is not None:
+            value = struct.unpack_from(fmt, data, pos)[0]
+            if value_type == TYPE_HEX_INT32:
+                return f"0x{value:08x}"
+            if value_type == TYPE_HEX_INT64:
+                return f"0x{value:016x}"
+            return bool(value) if value_type == 0x0D else value
+        if value_type == TYPE_BINARY:
+            return bytes(data[pos:pos + size]).hex().upper()
+        if value_type == TYPE_GUID:
+            return "{" + str(uuid.UUID(bytes_le=bytes(data[pos:pos + 16]))).upper() + "}"
+        if value_type == TYPE_SIZE_T:
+            return f"0x{struct.unpack_from('<Q' if size == 8 else '<I', data, pos)[0]:0{2 * size}x}"
+        if value_type == TYPE_FILETIME:
+            return filetime_to_datetime(struct.unpack_from("<Q", data, pos)[0])
+        if value_type == TYPE_SYSTEMTIME:
+            year, month, _, day, hour, minute, second, millis = struct.unpack_from("<8H", data, pos)
+            return datetime(year, month, day, hour, minute, second, millis * 1000, tzinfo=timezone.utc)
+        if value_type == TYPE_SID:
+            revision, sub_count = data[pos], data[pos + 1]
+            authority = int.from_bytes(data[pos + 2:pos + 8], "big")
+            subs = struct.unpack_from(f"<{sub_count}I", data, pos + 8)
+            return f"S-{revision}-{authority}" + "".join(f"-{sub}" for sub in subs)
+        if value_type == TYPE_BINXML:
+            nodes, _ = self.parse_fragment(pos, pos + size)
+            return nodes
+        if value_type & TYPE_ARRAY_FLAG:
+            return self._decode_array(pos, size, value_type & ~TYPE_ARRAY_FLAG)
+        return bytes(data[pos:pos + size]).hex().upper() # Kiểu lạ: giữ dạng hex
+
+    def _decode_array(self, pos, size, item_type):
+        if item_type == TYPE_STRING:
+            text = bytes(self.data[pos:pos + size]).decode("utf-16-le", "replace")
+            return [item for item in text.split("\x00") if item]
+        fmt = _FIXED_TYPES.get(item_type)
+        item_size = struct.calcsize(fmt) if fmt else {TYPE_GUID: 16, TYPE_FILETIME: 8, TYPE_SYSTEMTIME: 16}.get(item_type)
+        if not item_size:
+            return bytes(self.data[pos:pos + size]).hex().upper()
+        return [self.decode_value(pos + offset, item_size, item_type) for offset in range(0, size - item_size + 1, item_size)]
+
+
+class TemplateInstance:
+    """Template + bảng (vị trí, kích thước, kiểu) của các giá trị; giá trị chỉ được giải mã khi cần."""
+    __slots__ = ("chunk", "template", "descriptors", "_cache")
+
+    def __init__(self, chunk, template, descriptors):
+        self.chunk = chunk
+        self.template = template
+        self.descriptors = descriptors
+        self._cache = {}
+
+    def value(self, index):
+        if index >= len(self.descriptors):
+            return None
+        if index not in self._cache:
+            self._cache[index] = self.chunk.decode_value(*self.descriptors[index])
+        return self._cache[index]
+
+    def field(self, name):
+        """Giá trị một trường System mà không dựng cả cây XML."""
+        parts = self.template.fields.get(name)
+        if parts is None:
+            return None
+        values = [self.value(part.index) if isinstance(part, Substitution) else part for part in parts]
+        values = [value for value in values if value is not None]
+        if len(values) == 1:
+            return values[0]
+        return "".join(_to_text(value) for value in values) if values else None
+
+
+def _to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return " ".join(_to_text(item) for item in value)
+    return str(value)
+
+
+def _render(nodes, instance, out, text_only=False):
+    """
+    Xuất cây node ra list chuỗi, thay Substitution bằng giá trị của instance. text_only: chỉ lấy nội dung
+    văn bản (không thẻ, không escape) để hiển thị.
+    """
+    quote = (lambda text: text) if text_only else escape
+    for node in nodes:
+        if isinstance(node, str):
+            out.append(quote(node))
+        elif isinstance(node, Substitution):
+            value = instance.value(node.index) if instance is not None else None
+            if isinstance(value, list) and value and not isinstance(value[0], (str, int, float, datetime)):
+                _render(value, None, out, text_only) # BinXML lồng
+            elif value is not None:
+                out.append(quote(_to_text(value)))
+        elif isinstance(node, TemplateInstance):
+            _render(node.template.nodes, node, out, text_only)
+        elif isinstance(node, Element):
+            if text_only:
+                _render(node.children, instance, out, text_only)
+                continue
+            out.append(f"<{node.name}")
+            for name, parts in node.attributes:
+                values = [instance.value(p.index) if isinstance(p, Substitution) and instance is not None else p
+                          for p in parts if not isinstance(p, Substitution) or instance is not None]
+                if all(v is None for v in values) and any(isinstance(p, Substitution) and p.optional for p in parts):
+                    continue # Thuộc tính tùy chọn không có giá trị
+                out.append(f" {name}={quoteattr(''.join(_to_text(v) for v in values))}")
+            if not node.children:
+                out.append("/>")
+                continue
+            out.append(">")
+            _render(node.children, instance, out)
+            out.append(f"</{node.name}>")
+        elif isinstance(node, list):
+            _render(node, instance, out, text_only)
+
+
+class EvtxEvent:
+    """Một sự kiện: trường System đã trích xuất + dữ liệu EventData/UserData; xml() dựng XML đầy đủ khi cần."""
+    def __init__(self, record_id, timestamp, instance, nodes):
+        self.record_id = record_id
+        self.timestamp = timestamp
+        self._instance = instance
+        self._nodes = nodes
+        field = instance.field if instance is not None else (lambda name: None)
+        self.provider = _to_text(field("Provider")) or None
+        self.event_id = _as_int(field("EventID"))
+        self.level = _as_int(field("Level"))
+        self.channel = _to_text(field("Channel")) or None
+        self.computer = _to_text(field("Computer")) or None
+
+    @property
+    def level_name(self):
+        return LEVEL_NAMES.get(self.level, str(self.level))
+
+    def data(self):
+        """list (tên, giá trị dạng chuỗi) của EventData/Data (tên rỗng nếu không có) hoặc UserData."""
+        instance = self._instance
+        if instance is None:
+            return []
+        root = next((n for n in instance.template.nodes if isinstance(n, Element)), None)
+        if root is None:
+            return []
+        section = root.child("EventData") or root.child("UserData")
+        if section is None:
+            return []
+        items = []
+        for child in section.children:
+            out = []
+            _render([child], instance, out, text_only=True)
+            if isinstance(child, Element):
+                name_parts = child.attribute("Name") or []
+                name = "".join(_to_text(instance.value(p.index) if isinstance(p, Substitution) else p) for p in name_parts)
+                items.append((name or child.name, "".join(out)))
+            elif "".join(out).strip():
+                items.append(("", "".join(out)))
+        return items
+
+    def xml(self):
+        out = []
+        _render(self._nodes, self._instance, out)
+        return "".join(out)
+
+
+def _as_int(value):
+    if value is None:
+        return None
+    try:
+        return int(value, 0) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class EvtxFilter:
+    """Điều kiện lọc; các trường rẻ (thời gian từ header bản ghi) được kiểm trước, rồi tới Level/Provider/EventID."""
+    def __init__(self, levels=None, providers=None, event_ids=None, since=None, until=None):
+        self.levels = set(levels) if levels else None
+        self.providers = {p.casefold() for p in providers} if providers else None
+        self.event_ids = set(event_ids) if event_ids else None
+        self.since = datetime_to_filetime(since) if since else None
+        self.until = datetime_to_filetime(until) if until else None
+
+    def accepts_time(self, filetime):
+        return (self.since is None or filetime >= self.since) and (self.until is None or filetime <= self.until)
+
+    def accepts_instance(self, instance):
+        if instance is None:
+            return self.levels is None and self.providers is None and self.event_ids is None
+        if self.levels is not None and _as_int(instance.field("Level")) not in self.levels:
+            return False
+        if self.event_ids is not None and _as_int(instance.field("EventID")) not in self.event_ids:
+            return False
+        if self.providers is not None and _to_text(instance.field("Provider")).casefold() not in self.providers:
+            return False
+        return True
+
+
+class EvtxFile:
+    """File .evtx mở bằng mmap; mặc định dùng template cache chung của module."""
+    def __init__(self, path, template_cache=None):
+        self.path = path
+        self.template_cache = _SHARED_TEMPLATE_CACHE if template_cache is None else template_cache
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # File rỗng
+            self._file.close()
+            raise EvtxError(f"{path} rỗng.")
+        if self._map[:8] != FILE_MAGIC:
+            self.close()
+            raise EvtxError(f"{path} không phải file EVTX.")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def chunk_offsets(self):
+        """Offset các chunk hợp lệ, sắp theo số bản ghi đầu tiên (chunk vòng tròn khi log bị ghi đè)."""
+        data = self._map
+        chunks = []
+        for offset in range(FILE_HEADER_SIZE, len(data) - CHUNK_HEADER_SIZE + 1, CHUNK_SIZE):
+            if data[offset:offset + 8] == CHUNK_MAGIC:
+                first_record = struct.unpack_from("<Q", data, offset + 24)[0]
+                chunks.append((first_record, offset))
+        return [offset for _, offset in sorted(chunks)]
+
+    def _chunk_records(self, offset):
+        """(vị trí, record id, filetime, kích thước) của các bản ghi trong chunk."""
+        data = self._map
+        free_space = struct.unpack_from("<I", data, offset + 48)[0]
+        end = offset + min(CHUNK_SIZE, max(CHUNK_HEADER_SIZE, free_space))
+        pos = offset + CHUNK_HEADER_SIZE
+        while pos + RECORD_HEADER_SIZE <= end and data[pos:pos + 4] == RECORD_MAGIC:
+            size, record_id, filetime = struct.unpack_from("<IQQ", data, pos + 4)
+            if size < RECORD_HEADER_SIZE + 4 or pos + size > end:
+                break
+            yield pos, record_id, filetime, size
+            pos += size
+
+    def events(self, event_filter=None, newest_first=False, cancel_token=None):
+        """Sinh EvtxEvent thỏa event_filter. Bản ghi hỏng được bỏ qua (ghi log debug)."""
+        offsets = self.chunk_offsets()
+        if newest_first:
+            offsets.reverse()
+        for offset in offsets:
+            check_cancelled(cancel_token)
+            records = list(self._chunk_records(offset))
+            if not records:
+                continue
+            if event_filter is not None and event_filter.since is not None and max(r[2] for r in records) < event_filter.since:
+                if newest_first:
+                    break # Các chunk còn lại còn cũ hơn
+                continue
+            chunk = None
+            if newest_first:
+                records.reverse()
+            for pos, record_id, filetime, size in records:
+                if event_filter is not None and not event_filter.accepts_time(filetime):
+                    continue
+                if chunk is None: # Sao chép chunk (64 KiB) để sự kiện trả về vẫn dùng được sau khi đóng file
+                    chunk = _Chunk(self._map[offset:offset + CHUNK_SIZE], 0, self.template_cache)
+                pos -= offset
+                try:
+                    nodes, _ = chunk.parse_fragment(pos + RECORD_HEADER_SIZE, pos + size - 4)
+                except (EvtxError, struct.error, IndexError, ValueError, UnicodeDecodeError) as e:
+                    logging.debug(f"Bỏ qua bản ghi {record_id} trong {self.path}: {e}")
+                    continue
+                instance = next((n for n in nodes if isinstance(n, TemplateInstance)), None)
+                if event_filter is not None and not event_filter.accepts_instance(instance):
+                    continue
+                yield EvtxEvent(record_id, filetime_to_datetime(filetime), instance, nodes)
+
+
+def read_evtx(path, levels=None, providers=None, event_ids=None, since=None, until=None, limit=None,
+              newest_first=True, template_cache=None, cancel_token=None):
+    """Đọc sự kiện từ một file .evtx theo bộ lọc; trả về list EvtxEvent (tối đa limit)."""
+    event_filter = EvtxFilter(levels, providers, event_ids, since, until)
+    results = []
+    with EvtxFile(path, template_cache) as evtx:
+        for event in evtx.events(event_filter, newest_first, cancel_token):
+            results.append(event)
+            if limit is not None and len(results) >= limit:
+                break
+    return results
+
+
+def default_log_path(log_name):
+    """Đường dẫn file .evtx của một log hệ thống ('System' -> %SystemRoot%\\System32\\winevt\\Logs\\System.evtx)."""
+    system_root = os.environ.get("SystemRoot", "C:\\Windows")
+    return os.path.join(system_root, "System32", "winevt", "Logs", f"{log_name.replace('/', '%4')}.evtx")
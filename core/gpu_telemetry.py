@@ -0,0 +1,263 @@
+# core/gpu_telemetry.py
+# Thu thập số liệu GPU theo thời gian thực: provider dùng lâu dài (NVML) + luồng lấy mẫu nền
+import logging
+import threading
+import time
+
+# Try to import pynvml for NVIDIA GPU monitoring
+try:
+    import pynvml
+    HAS_PYNVML = True
+except ImportError:
+    HAS_PYNVML = False
+    logging.warning("pynvml not found. Real-time NVIDIA GPU monitoring will be unavailable. Install with 'pip install pynvml'.")
+
+DEFAULT_SAMPLE_INTERVAL_S = 2.0
+MAX_BACKOFF_S = 60.0 # Khoảng chờ tối đa giữa các lần thử lại khi không có GPU/driver lỗi
+
+
+def _empty_device_sample(index, name):
+    """Mẫu của một GPU; trường nào driver không hỗ trợ sẽ là None."""
+    return {
+        "index": index,
+        "name": name,
+        "load_percent": None,
+        "memory_used_mb": None,
+        "memory_total_mb": None,
+        "temperature_c": None,
+        "power_w": None,
+        "clock_graphics_mhz": None,
+        "clock_memory_mhz": None,
+    }
+
+
+class GpuTelemetryProvider:
+    """
+    Giao diện chung cho nguồn số liệu GPU.
+    open() được gọi một lần (trả về True nếu có ít nhất một thiết bị), sample() gọi lặp lại,
+    close() khi dừng. Lớp con dùng cho kiểm thử chỉ cần cài đặt ba hàm này.
+    """
+    name = "base"
+
+    def open(self):
+        return False
+
+    def device_count(self):
+        return 0
+
+    def sample(self):
+        """Trả về list dict (mỗi GPU một dict, xem _empty_device_sample)."""
+        return []
+
+    def close(self):
+        pass
+
+
+class NullGpuTelemetryProvider(GpuTelemetryProvider):
+    """Không có GPU hỗ trợ (ví dụ thiếu pynvml): luôn rỗng."""
+    name = "none"
+
+
+class NvmlGpuTelemetryProvider(GpuTelemetryProvider):
+    """
+    NVML giữ phiên làm việc lâu dài: nvmlInit() một lần, handle của các thiết bị được lưu lại,
+    nvmlShutdown() chỉ khi close(). Trường không được hỗ trợ (NVMLError_NotSupported) trả về None.
+    """
+    name = "nvml"
+
+    def __init__(self):
+        self._initialized = False
+        self._devices = [] # list (index, handle, name)
+
+    def open(self):
+        if not HAS_PYNVML:
+            return False
+        if not self._initialized:
+            pynvml.nvmlInit()
+            self._initialized = True
+        self._devices = []
+        for index in range(pynvml.nvmlDeviceGetCount()):
+            handle = pynvml.nvmlDeviceGetHandleByIndex(index)
+            name = self._safe(pynvml.nvmlDeviceGetName, handle) or f"GPU {index}"
+            if isinstance(name, bytes): # pynvml cũ trả về bytes
+                name = name.decode("utf-8", errors="ignore")
+            self._devices.append((index, handle, name))
+        logging.info(f"NVML: đã khởi tạo, {len(self._devices)} thiết bị.")
+        return bool(self._devices)
+
+    def device_count(self):
+        return len(self._devices)
+
+    @staticmethod
+    def _safe(func, *args):
+        try:
+            return func(*args)
+        except pynvml.NVMLError as e:
+            if isinstance(e, getattr(pynvml, "NVMLError_NotSupported", ())):
+                return None
+            if isinstance(e, getattr(pynvml, "NVMLError_GpuIsLost", ())):
+                raise # Thiết bị bị mất: để sampler mở lại phiên
+            logging.debug(f"NVML: {getattr(func, '__name__', func)} thất bại: {e}")
+            return None
+
+    def sample(self):
+        samples = []
+        for index, handle, name in self._devices:
+            device = _empty_device_sample(index, name)
+            utilization = self._safe(pynvml.nvmlDeviceGetUtilizationRates, handle)
+            if utilization is not None:
+                device["load_percent"] = utilization.gpu
+            memory_info = self._safe(pynvml.nvmlDeviceGetMemoryInfo, handle)
+            if memory_info is not None:
+                device["memory_used_mb"] = memory_info.used // (1024 * 1024)
+                device["memory_total_mb"] = memory_info.total // (1024 * 1024)
+            device["temperature_c"] = self._safe(pynvml.nvmlDeviceGetTemperature, handle, pynvml.NVML_TEMPERATURE_GPU)
+            power_mw = self._safe(pynvml.nvmlDeviceGetPowerUsage, handle)
+            if power_mw is not None:
+                device["power_w"] = round(power_mw / 1000.0, 1)
+            device["clock_graphics_mhz"] = self._safe(pynvml.nvmlDeviceGetClockInfo, handle, pynvml.NVML_CLOCK_GRAPHICS)
+            device["clock_memory_mhz"] = self._safe(pynvml.nvmlDeviceGetClockInfo, handle, pynvml.NVML_CLOCK_MEM)
+            samples.append(device)
+        return samples
+
+    def close(self):
+        self._devices = []
+        if self._initialized:
+            try:
+                pynvml.nvmlShutdown()
+            except pynvml.NVMLError as e:
+                logging.debug(f"NVML shutdown: {e}")
+            self._initialized = False
+
+
+def create_default_gpu_provider():
+    """Provider phù hợp với môi trường hiện tại (NVML nếu có pynvml)."""
+    return NvmlGpuTelemetryProvider() if HAS_PYNVML else NullGpuTelemetryProvider()
+
+
+class GpuSampler:
+    """
+    Luồng nền lấy mẫu mọi GPU theo chu kỳ; luồng GUI chỉ đọc mẫu mới nhất qua latest().
+    Khi không có thiết bị hoặc provider lỗi, khoảng chờ trước lần thử lại tăng gấp đôi (tới MAX_BACKOFF_S).
+    """
+    def __init__(self, provider=None, interval=DEFAULT_SAMPLE_INTERVAL_S, max_backoff=MAX_BACKOFF_S, on_sample=None):
+        self.provider = provider or create_default_gpu_provider()
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.on_sample = on_sample # Gọi trên luồng nền với list mẫu mỗi lần lấy mẫu thành công
+        self._lock = threading.Lock()
+        self._latest = []
+        self._latest_time = None
+        self._available = False
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._paused = False
+        self._thread = None
+        self._opened = False
+        self._backoff = interval
+
+    # --- Điều khiển ---
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="GpuSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def set_interval(self, interval):
+        """Đổi chu kỳ lấy mẫu; khi chu kỳ ngắn lại, luồng được đánh thức để lấy mẫu ngay."""
+        interval = max(0.1, float(interval))
+        shorter = interval < self.interval
+        self.interval = interval
+        if shorter:
+            self._wake_event.set()
+
+    def pause(self):
+        """Tạm dừng lấy mẫu; phiên NVML vẫn được giữ để tiếp tục nhanh."""
+        self._paused = True
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            self._wake_event.set()
+
+    # --- Đọc từ luồng GUI ---
+    def latest(self):
+        """Trả về (list mẫu mới nhất, thời điểm time.monotonic() của mẫu hoặc None)."""
+        with self._lock:
+            return list(self._latest), self._latest_time
+
+    def latest_primary(self):
+        """Mẫu của GPU đầu tiên (dict) hoặc None."""
+        with self._lock:
+            return dict(self._latest[0]) if self._latest else None
+
+    @property
+    def available(self):
+        return self._available
+
+    # --- Vòng lặp nền ---
+    def sample_once(self):
+        """Lấy một mẫu (mở provider nếu cần). Trả về True nếu thành công. Dùng trực tiếp được trong kiểm thử."""
+        try:
+            if not self._opened:
+                if not self.provider.open():
+                    self._set_unavailable()
+                    return False
+                self._opened = True
+            samples = self.provider.sample()
+        except Exception as e:
+            logging.warning(f"GpuSampler ({self.provider.name}): lỗi khi lấy mẫu: {e}")
+            self._reset_provider()
+            self._set_unavailable()
+            return False
+
+        with self._lock:
+            self._latest = samples
+            self._latest_time = time.monotonic()
+        self._available = bool(samples)
+        self._backoff = self.interval
+        if self.on_sample and samples:
+            try:
+                self.on_sample(samples)
+            except Exception:
+                logging.exception("GpuSampler: lỗi trong on_sample:")
+        return bool(samples)
+
+    def _set_unavailable(self):
+        with self._lock:
+            self._latest = []
+            self._latest_time = time.monotonic()
+        self._available = False
+        self._backoff = min(self.max_backoff, max(self.interval, self._backoff * 2))
+
+    def _reset_provider(self):
+        if self._opened:
+            try:
+                self.provider.close()
+            except Exception as e:
+                logging.debug(f"GpuSampler: lỗi khi đóng provider: {e}")
+            self._opened = False
+
+    def next_delay(self):
+        return self.interval if self._available else self._backoff
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                if not self._paused:
+                    self.sample_once()
+                self._wake_event.wait(None if self._paused else self.next_delay())
+                self._wake_event.clear()
+        finally:
+            self._reset_provider()
@@ -0,0 +1,273 @@
+# core/health_rules.py
+# Điểm sức khỏe hệ thống theo luật khai báo dạng dữ liệu: luật được biên dịch một lần, đánh giá trên snapshot
+# hiện tại hoặc (vector hóa) trên toàn bộ lịch sử số liệu để vẽ xu hướng điểm sức khỏe
+import logging
+import math
+import operator
+import time
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not found. Health-score history trends will be unavailable. Install with 'pip install numpy'.")
+
+MAX_SCORE = 100
+
+SOURCE_METRICS = "metrics" # Trường của snapshot MetricsSampler / MetricsStore (có lịch sử)
+SOURCE_INFO = "info"       # Đường dẫn trong pc_info_dict (chỉ có giá trị hiện tại)
+
+AGGREGATES = ("latest", "mean", "max", "min")
+
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# Mỗi luật là một dict:
+#   id, source (metrics/info), path, op, threshold, weight (điểm bị trừ khi luật đúng), message ({value})
+#   metrics: window_s (0 = giá trị mới nhất) và aggregate (mean/max/min) trên cửa sổ đó
+#   info: path phân tách bằng "/", phần tử "[Khóa=Giá trị]" chọn phần tử đầu tiên của list khớp điều kiện
+#   group (tùy chọn, mặc định source + path): các luật cùng nhóm là các bậc loại trừ nhau, khi nhiều bậc cùng đúng
+#   chỉ bậc có trọng số lớn nhất bị trừ điểm và báo vấn đề (ổ đầy 95% chỉ trừ 15 điểm của "system_disk_full")
+DEFAULT_HEALTH_RULES = [
+    {"id": "cpu_sustained_load", "source": SOURCE_METRICS, "path": "cpu_percent", "op": ">=", "threshold": 90,
+     "weight": 10, "window_s": 300, "aggregate": "mean", "message": "CPU trung bình {value:.0f}% trong 5 phút qua"},
+    {"id": "memory_pressure", "source": SOURCE_METRICS, "path": "ram_percent", "op": ">=", "threshold": 90,
+     "weight": 10, "window_s": 300, "aggregate": "mean", "message": "RAM trung bình {value:.0f}% trong 5 phút qua"},
+    {"id": "swap_pressure", "source": SOURCE_METRICS, "path": "swap_percent", "op": ">=", "threshold": 80,
+     "weight": 5, "window_s": 600, "aggregate": "mean", "message": "Bộ nhớ ảo dùng {value:.0f}%"},
+    {"id": "system_disk_full", "source": SOURCE_METRICS, "path": "disk_usage_percent", "op": ">", "threshold": 90,
+     "weight": 15, "window_s": 0, "aggregate": "latest", "message": "Ổ hệ thống đã dùng {value:.0f}%"},
+    {"id": "system_disk_filling", "source": SOURCE_METRICS, "path": "disk_usage_percent", "op": ">", "threshold": 80,
+     "weight": 5, "window_s": 0, "aggregate": "latest", "message": "Ổ hệ thống đã dùng {value:.0f}% (nên dọn dẹp)"},
+    {"id": "gpu_hot", "source": SOURCE_METRICS, "path": "gpu_temperature_c", "op": ">=", "threshold": 85,
+     "weight": 10, "window_s": 300, "aggregate": "max", "message": "GPU đạt {value:.0f}°C trong 5 phút qua"},
+    {"id": "gpu_vram_full", "source": SOURCE_METRICS, "path": "gpu_memory_percent", "op": ">=", "threshold": 95,
+     "weight": 5, "window_s": 300, "aggregate": "mean", "message": "VRAM GPU trung bình {value:.0f}%"},
+    {"id": "system_event_errors", "source": SOURCE_INFO,
+     "path": "SystemCheckUtilities/Tóm tắt Event Log gần đây/System/Errors", "op": ">", "threshold": 10,
+     "weight": 5, "group": "event_log_errors", "message": "{value} lỗi trong System Event Log (24 giờ)"},
+    {"id": "application_event_errors", "source": SOURCE_INFO,
+     "path": "SystemCheckUtilities/Tóm tắt Event Log gần đây/Application/Errors", "op": ">", "threshold": 10,
+     "weight": 5, "group": "event_log_errors", "message": "{value} lỗi trong Application Event Log (24 giờ)"},
+]
+
+
+class CompiledHealthRule:
+    """Luật đã được kiểm tra và biên dịch: đường dẫn đã tách, toán tử đã tra, trọng số đã ép kiểu."""
+    def __init__(self, spec):
+        missing = [key for key in ("id", "source", "path", "op", "threshold", "weight") if key not in spec]
+        if missing:
+            raise ValueError(f"Luật sức khỏe thiếu khóa: {', '.join(missing)} ({spec})")
+        if spec["op"] not in _OPERATORS:
+            raise ValueError(f"Toán tử không hợp lệ trong luật {spec['id']}: {spec['op']}")
+        if spec["source"] not in (SOURCE_METRICS, SOURCE_INFO):
+            raise ValueError(f"Nguồn dữ liệu không hợp lệ trong luật {spec['id']}: {spec['source']}")
+        self.id = spec["id"]
+        self.source = spec["source"]
+        self.path = spec["path"]
+        self.op_name = spec["op"]
+        self.compare = _OPERATORS[spec["op"]]
+        self.threshold = spec["threshold"]
+        self.weight = float(spec["weight"])
+        self.window_s = float(spec.get("window_s", 0) or 0)
+        self.aggregate = spec.get("aggregate", "latest" if not self.window_s else "mean")
+        if self.aggregate not in AGGREGATES:
+            raise ValueError(f"Hàm tổng hợp không hợp lệ trong luật {self.id}: {self.aggregate}")
+        self.message = spec.get("message", f"{self.id}: {{value}}")
+        self.group = spec.get("group") or f"{self.source}:{self.path}"
+        self._steps = _compile_path(self.path) if self.source == SOURCE_INFO else None
+
+    def extract_info(self, pc_info):
+        """Giá trị của luật info trong pc_info_dict, None nếu không có."""
+        current = pc_info
+        for kind, key, expected in self._steps:
+            if kind == "key":
+                current = current.get(key) if isinstance(current, dict) else None
+            else: # Chọn phần tử list theo điều kiện
+                current = next((item for item in current if isinstance(item, dict) and str(item.get(key)) == expected), None) \
+                    if isinstance(current, list) else None
+            if current is None:
+                return None
+        return current
+
+    def issue(self, value):
+        try:
+            return self.message.format(value=value)
+        except (ValueError, TypeError):
+            return f"{self.message} ({value})"
+
+
+def _compile_path(path):
+    steps = []
+    for part in path.split("/"):
+        if part.startswith("[") and part.endswith("]") and "=" in part:
+            key, expected = part[1:-1].split("=", 1)
+            steps.append(("select", key, expected))
+        else:
+            steps.append(("key", part, None))
+    return steps
+
+
+def _aggregate_values(values, aggregate):
+    finite = [v for v in values if v is not None and not (isinstance(v, float) and math.isnan(v))]
+    if not finite:
+        return None
+    if aggregate == "latest":
+        return finite[-1]
+    if aggregate == "max":
+        return max(finite)
+    if aggregate == "min":
+        return min(finite)
+    return sum(finite) / len(finite)
+
+
+class HealthRuleEngine:
+    """
+    Tính điểm sức khỏe = 100 - tổng trọng số của các luật đang đúng (tối thiểu 0); trong mỗi nhóm luật
+    (group) chỉ tính bậc nặng nhất đang đúng.
+
+    - evaluate(): điểm hiện tại từ pc_info_dict, snapshot mới nhất và lịch sử gần đây (cho luật có cửa sổ).
+    - score_history(): điểm tại từng mốc thời gian trên lịch sử lưu trữ; mỗi luật metrics được tính
+      một lần cho cả chuỗi bằng numpy (gộp theo bucket + cửa sổ trượt). Luật info không có lịch sử nên
+      không tham gia xu hướng.
+    """
+    def __init__(self, rules=None):
+        self.rules = [CompiledHealthRule(spec) for spec in (rules if rules is not None else DEFAULT_HEALTH_RULES)]
+        self.metric_rules = [rule for rule in self.rules if rule.source == SOURCE_METRICS]
+        self.info_rules = [rule for rule in self.rules if rule.source == SOURCE_INFO]
+
+    def metric_fields(self):
+        return sorted({rule.path for rule in self.metric_rules})
+
+    def evaluate(self, pc_info=None, snapshot=None, history=None, now=None):
+        """
+        pc_info: pc_info_dict (có thể None); snapshot: dict của MetricsSampler (có thể None);
+        history: hàm (field, start_ts, end_ts) -> (timestamps, values) cho luật có cửa sổ.
+        Trả về {"score", "issues", "triggered"} (triggered: list id luật đang đúng).
+        """
+        now = now or (snapshot or {}).get("timestamp") or time.time()
+        tiers = {} # group -> (luật nặng nhất đang đúng, giá trị)
+        for rule in self.rules:
+            value = None
+            if rule.source == SOURCE_INFO:
+                if pc_info:
+                    value = rule.extract_info(pc_info)
+            elif rule.window_s and history is not None:
+                try:
+                    _, values = history(rule.path, now - rule.window_s, now)
+                    value = _aggregate_values(list(values), rule.aggregate)
+                except Exception as e:
+                    logging.debug(f"Luật sức khỏe {rule.id}: không đọc được lịch sử: {e}")
+            elif snapshot:
+                value = snapshot.get(rule.path)
+            if value is None or not isinstance(value, (int, float)) or (isinstance(value, float) and math.isnan(value)):
+                continue
+            if rule.compare(value, rule.threshold):
+                current = tiers.get(rule.group)
+                if current is None or rule.weight > current[0].weight:
+                    tiers[rule.group] = (rule, value)
+        penalty = 0.0
+        issues, triggered = [], []
+        for rule in self.rules: # Giữ thứ tự khai báo của luật
+            rule_value = tiers.get(rule.group)
+            if rule_value is not None and rule_value[0] is rule:
+                penalty += rule.weight
+                issues.append(rule.issue(rule_value[1]))
+                triggered.append(rule.id)
+        return {"score": int(max(0, round(MAX_SCORE - penalty))), "issues": issues, "triggered": triggered}
+
+    def score_history(self, query, start_ts, end_ts, step_s):
+        """
+        Điểm sức khỏe tại các mốc start_ts + k*step_s. query(field, start, end) -> dict có "timestamps",
+        "avg", "max", "min" (như MetricsStore.query). Trả về (mốc thời gian, điểm) dạng mảng numpy.
+        """
+        if not HAS_NUMPY:
+            raise RuntimeError("Cần numpy để tính xu hướng điểm sức khỏe.")
+        step_s = max(1.0, float(step_s))
+        grid = np.arange(start_ts + step_s, end_ts + step_s / 2, step_s)
+        tier_penalty = {} # group -> trọng số bậc nặng nhất đang đúng tại mỗi mốc
+        cache = {}
+        for rule in self.metric_rules:
+            lookback = math.ceil(max(rule.window_s, step_s) / step_s) * step_s # Cửa sổ làm tròn lên bội số của bước
+            key = (rule.path, lookback)
+            if key not in cache:
+                cache[key] = query(rule.path, start_ts - lookback, end_ts)
+            data = cache[key]
+            column = {"mean": "avg", "latest": "avg"}.get(rule.aggregate, rule.aggregate)
+            values = _windowed_aggregate(np.asarray(data["timestamps"], dtype=np.float64),
+                                         np.asarray(data[column], dtype=np.float64),
+                                         grid, step_s, lookback, rule.aggregate)
+            with np.errstate(invalid="ignore"):
+                hit = rule.compare(values, rule.threshold) & ~np.isnan(values)
+            tier_penalty[rule.group] = np.maximum(tier_penalty.get(rule.group, 0.0), rule.weight * hit)
+        penalty = sum(tier_penalty.values(), np.zeros(len(grid)))
+        return grid, np.clip(MAX_SCORE - penalty, 0, MAX_SCORE)
+
+
+def _windowed_aggregate(timestamps, values, grid, step, window_s, aggregate):
+    """
+    Giá trị tổng hợp trên cửa sổ (t - window_s, t] cho mỗi mốc t của grid (grid cách đều `step`).
+    Dữ liệu được gộp vào các bucket rộng `step` một lần, rồi trượt cửa sổ trên các bucket
+    (window_s được làm tròn lên bội số của step).
+    """
+    result = np.full(len(grid), np.nan)
+    if len(grid) == 0 or len(timestamps) == 0:
+        return result
+    origin = grid[0] - step
+    valid = ~np.isnan(values)
+    timestamps, values = timestamps[valid], values[valid]
+    bucket = np.ceil((timestamps - origin) / step).astype(np.int64) - 1 # bucket i phủ (origin + i*step, origin + (i+1)*step]
+    window_buckets = max(1, int(math.ceil(window_s / step)))
+    # Các bucket trước grid[0] (cửa sổ của mốc đầu) được dời chỉ số thêm window_buckets
+    bucket += window_buckets - 1
+    n_buckets = len(grid) + window_buckets - 1
+    inside = (bucket >= 0) & (bucket < n_buckets)
+    bucket, values = bucket[inside], values[inside]
+    if aggregate == "latest":
+        last = np.full(n_buckets, np.nan)
+        last[bucket] = values # Dữ liệu tăng dần theo thời gian: giá trị gán sau cùng là mới nhất
+        # Mang giá trị mới nhất về phía trước trong phạm vi cửa sổ
+        index = np.where(~np.isnan(last), np.arange(n_buckets), -1)
+        index = np.maximum.accumulate(index)
+        positions = np.arange(window_buckets - 1, n_buckets)
+        source = index[positions]
+        fresh = (source >= 0) & (positions - source < window_buckets)
+        result[fresh] = last[source[fresh]]
+        return result
+    if aggregate == "mean":
+        sums = np.bincount(bucket, weights=values, minlength=n_buckets)
+        counts = np.bincount(bucket, minlength=n_buckets).astype(np.float64)
+        cum_sums = np.concatenate(([0.0], np.cumsum(sums)))
+        cum_counts = np.concatenate(([0.0], np.cumsum(counts)))
+        window_sums = cum_sums[window_buckets:] - cum_sums[:-window_buckets]
+        window_counts = cum_counts[window_buckets:] - cum_counts[:-window_buckets]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[:] = np.where(window_counts > 0, window_sums / window_counts, np.nan)
+        return result
+    # max / min
+    fill = -np.inf if aggregate == "max" else np.inf
+    reducer = np.maximum if aggregate == "max" else np.minimum
+    per_bucket = np.full(n_buckets, fill)
+    reducer.at(per_bucket, bucket, values)
+    windows = np.lib.stride_tricks.sliding_window_view(per_bucket, window_buckets)
+    reduced = windows.max(axis=1) if aggregate == "max" else windows.min(axis=1)
+    result[:] = np.where(np.isinf(reduced), np.nan, reduced)
+    return result
+
+
+_default_engine = None
+
+
+def get_default_engine():
+    """Engine dùng chung với bộ luật mặc định (biên dịch một lần)."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = HealthRuleEngine()
+    return _default_engine
@@ -0,0 +1,356 @@
+# core/leftover_detector.py
+# Phát hiện phần còn sót sau khi gỡ cài đặt: lập chỉ mục vị trí cài đặt, nhà sản xuất và tên sản phẩm từ
+# danh sách phần mềm vào cây tiền tố (trie), rồi quét Program Files, ProgramData, AppData và các khóa
+# Registry SOFTWARE một lượt; mỗi thư mục/khóa chỉ cần một lần tra trie thay vì so với từng phần mềm.
+import logging
+import os
+import re
+import time
+
+from core.task_control import check_cancelled, report_progress
+
+try:
+    import winreg
+    HAS_WINREG = True
+except ImportError: # Không phải Windows: chỉ quét thư mục
+    HAS_WINREG = False
+
+MIN_KEY_LENGTH = 3         # Tên/nhà sản xuất chuẩn hóa ngắn hơn sẽ không được lập chỉ mục (tránh khớp nhầm)
+MIN_PREFIX_MATCH = 4       # Tên thư mục phải dài ít nhất chừng này mới được coi là tiền tố của một tên sản phẩm
+MAX_SIZE_SCAN_ENTRIES = 20_000 # Giới hạn số mục khi tính dung lượng một thư mục bị đánh dấu
+
+UNINSTALL_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+KIND_DIRECTORY = "Thư mục"
+KIND_REGISTRY = "Registry"
+
+# Thư mục/khóa của hệ điều hành hoặc dùng chung: không bao giờ coi là phần còn sót
+SYSTEM_NAMES = frozenset(name.casefold() for name in (
+    "Microsoft", "Windows", "WindowsApps", "Windows Defender", "Windows NT", "Windows Mail", "Windows Media Player",
+    "Windows Photo Viewer", "Windows Portable Devices", "Windows Sidebar", "Windows Security", "WindowsPowerShell",
+    "Common Files", "Internet Explorer", "Microsoft.NET", "dotnet", "Reference Assemblies", "ModifiableWindowsApps",
+    "Packages", "Temp", "Package Cache", "Application Data", "Desktop", "Documents", "Start Menu", "Templates",
+    "Comms", "ConnectedDevicesPlatform", "D3DSCache", "CrashDumps", "History", "Programs", "Publishers",
+    "ssh", "regid.1991-06.com.microsoft", "USOPrivate", "USOShared", "SoftwareDistribution", "Intel", "NVIDIA Corporation",
+    "AMD", "Realtek", "Classes", "Clients", "Policies", "RegisteredApplications", "WOW6432Node", "ODBC", "Wow6432Node",
+    "Partner", "Khronos", "Wintel", "Setup", "Default",
+    "Description", "Hardware", "SAM", "Security", "System", "VirtualStore", "AppDataLow", "Unknown",
+))
+
+_NON_ALNUM = re.compile(r"[\W_]+", re.UNICODE)
+_VERSION_SUFFIX = re.compile(r"(\s*[\(\[]?(x64|x86|64-bit|32-bit|v?\d+([.\-]\d+)*)[\)\]]?)+\s*$", re.IGNORECASE)
+_CORPORATE_SUFFIX = re.compile(r"[,.\s]+(inc|ltd|llc|gmbh|corp|corporation|co|company|limited|s\.?a|ag)\.?$", re.IGNORECASE)
+
+
+def normalize_name(text):
+    """'Notepad++ 8.6 (x64)' -> 'notepad'; 'Mozilla Corporation' -> 'mozilla'. Trả về '' nếu không còn gì."""
+    if not text:
+        return ""
+    text = _VERSION_SUFFIX.sub("", text.strip())
+    previous = None
+    while previous != text: # 'Foo Co., Ltd.' có nhiều hậu tố
+        previous = text
+        text = _CORPORATE_SUFFIX.sub("", text)
+    return _NON_ALNUM.sub("", text.casefold())
+
+
+def normalize_path(path):
+    """Chuỗi thành phần đường dẫn đã casefold (để so khớp không phân biệt hoa thường như Windows)."""
+    parts = re.split(r"[\\/]+", path.strip().strip('"').rstrip("\\/").casefold())
+    return tuple(part for part in parts if part)
+
+
+class PrefixTrie:
+    """
+    Trie trên chuỗi ký hiệu (ký tự của tên, hoặc thành phần của đường dẫn). Nút là dict con;
+    khóa đặc biệt _END lưu nhãn của các sản phẩm kết thúc tại nút đó.
+    """
+    _END = None
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def insert(self, symbols, label):
+        node = self.root
+        for symbol in symbols:
+            node = node.setdefault(symbol, {})
+        labels = node.setdefault(self._END, [])
+        if label not in labels:
+            labels.append(label)
+            self.size += 1
+
+    def _walk(self, symbols):
+        """Đi theo symbols; trả về (nút cuối hoặc None, nhãn của khóa dài nhất là tiền tố của symbols)."""
+        node = self.root
+        best = None
+        for symbol in symbols:
+            node = node.get(symbol)
+            if node is None:
+                return None, best
+            if self._END in node:
+                best = node[self._END]
+        return node, best
+
+    def longest_prefix_of(self, symbols):
+        """Nhãn của khóa dài nhất là tiền tố của symbols (None nếu không có)."""
+        return self._walk(symbols)[1]
+
+    def first_label_below(self, symbols):
+        """Nhãn của một khóa bất kỳ bắt đầu bằng symbols (None nếu không có)."""
+        node = self._walk(symbols)[0]
+        stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            if self._END in node:
+                return node[self._END]
+            stack.extend(child for key, child in node.items() if key is not self._END)
+        return None
+
+
+class SoftwareIndex:
+    """Chỉ mục của danh sách phần mềm: trie tên + nhà sản xuất (theo ký tự) và trie vị trí cài đặt (theo thành phần)."""
+    def __init__(self, products):
+        self.names = PrefixTrie()
+        self.locations = PrefixTrie()
+        self.product_count = 0
+        for product in products:
+            self.add(product)
+
+    def add(self, product):
+        """product: dict với 'name', 'publisher', 'locations' (list đường dẫn, có thể rỗng)."""
+        self.product_count += 1
+        label = product.get("name") or product.get("publisher") or "?"
+        for text in (product.get("name"), product.get("publisher")):
+            key = normalize_name(text)
+            if len(key) >= MIN_KEY_LENGTH:
+                self.names.insert(key, label)
+        for location in product.get("locations") or ():
+            parts = normalize_path(location)
+            if len(parts) >= 2: # Bỏ qua vị trí là gốc ổ đĩa
+                self.locations.insert(parts, label)
+
+    def owner_of_path(self, path):
+        """
+        Phần mềm sở hữu thư mục: thư mục nằm trong một vị trí cài đặt, hoặc chứa một vị trí cài đặt
+        (ví dụ 'C:\\Program Files\\Vendor' chứa '...\\Vendor\\Product').
+        """
+        parts = normalize_path(path)
+        return self.locations.longest_prefix_of(parts) or self.locations.first_label_below(parts)
+
+    def owner_of_name(self, name):
+        """Phần mềm có tên/nhà sản xuất khớp tên thư mục hoặc khóa (hai chiều theo tiền tố)."""
+        key = normalize_name(name)
+        if len(key) < MIN_KEY_LENGTH:
+            return None
+        owner = self.names.longest_prefix_of(key) # 'notepadplusplus' -> 'notepad'
+        if owner is None and len(key) >= MIN_PREFIX_MATCH:
+            owner = self.names.first_label_below(key) # 'mozilla' -> 'mozillafirefox'
+        return owner
+
+
+class Leftover:
+    def __init__(self, kind, location, reason, size_bytes=None):
+        self.kind = kind
+        self.location = location
+        self.reason = reason
+        self.size_bytes = size_bytes
+
+
+class LeftoverReport:
+    def __init__(self):
+        self.leftovers = []
+        self.product_count = 0
+        self.checked_dirs = 0
+        self.checked_keys = 0
+        self.seconds = 0.0
+
+
+def _registry_values(key, names):
+    values = {}
+    for name in names:
+        try:
+            value, _ = winreg.QueryValueEx(key, name)
+            values[name] = str(value).strip() if value is not None else None
+        except OSError:
+            values[name] = None
+    return values
+
+
+def _location_from_command(command):
+    """'"C:\\App\\unins000.exe" /S' hoặc 'C:\\App\\app.exe,0' -> 'C:\\App'; lệnh MsiExec không cho biết vị trí."""
+    if not command or "msiexec" in command.casefold():
+        return None
+    command = command.strip()
+    path = command[1:command.find('"', 1)] if command.startswith('"') else command.split(",")[0]
+    lowered = path.casefold()
+    exe_end = lowered.find(".exe")
+    if exe_end != -1:
+        path = path[:exe_end + 4]
+    return os.path.dirname(path.strip()) or None
+
+
+def read_installed_products():
+    """
+    Đọc danh sách phần mềm từ các khóa Uninstall (HKLM 64/32-bit và HKCU). Vị trí cài đặt lấy từ
+    InstallLocation, và bổ sung từ thư mục của DisplayIcon / UninstallString khi có.
+    """
+    if not HAS_WINREG:
+        return []
+    sources = [(winreg.HKEY_LOCAL_MACHINE, 0), (winreg.HKEY_CURRENT_USER, 0)]
+    if os.environ.get("PROCESSOR_ARCHITEW6432") or os.environ.get("PROCESSOR_ARCHITECTURE", "").endswith("64"):
+        sources.append((winreg.HKEY_LOCAL_MACHINE, winreg.KEY_WOW64_32KEY))
+    products = []
+    for hive, view in sources:
+        try:
+            with winreg.OpenKey(hive, UNINSTALL_KEY, 0, winreg.KEY_READ | view) as root:
+                for index in range(winreg.QueryInfoKey(root)[0]):
+                    try:
+                        subkey_name = winreg.EnumKey(root, index)
+                        with winreg.OpenKey(root, subkey_name, 0, winreg.KEY_READ | view) as subkey:
+                            values = _registry_values(subkey, ("DisplayName", "Publisher", "InstallLocation", "DisplayIcon", "UninstallString"))
+                    except OSError:
+                        continue
+                    locations = [values["InstallLocation"], _location_from_command(values["DisplayIcon"]),
+                                 _location_from_command(values["UninstallString"])]
+                    products.append({"name": values["DisplayName"] or subkey_name, "publisher": values["Publisher"],
+                                     "locations": [location for location in locations if location]})
+        except OSError as e:
+            logging.debug(f"Không thể đọc {UNINSTALL_KEY} (view {view}): {e}")
+    return products
+
+
+def default_scan_roots():
+    """(tên nhóm, thư mục) cần quét: Program Files (cả x86), ProgramData, AppData Roaming/Local."""
+    candidates = [
+        ("Program Files", os.environ.get("ProgramFiles")),
+        ("Program Files (x86)", os.environ.get("ProgramFiles(x86)")),
+        ("ProgramData", os.environ.get("ProgramData")),
+        ("AppData Roaming", os.environ.get("APPDATA")),
+        ("AppData Local", os.environ.get("LOCALAPPDATA")),
+    ]
+    roots, seen = [], set()
+    for label, path in candidates:
+        if path and os.path.isdir(path) and os.path.normcase(path) not in seen:
+            seen.add(os.path.normcase(path))
+            roots.append((label, path))
+    return roots
+
+
+def _directory_size(path):
+    total, visited, stack = 0, 0, [path]
+    while stack and visited < MAX_SIZE_SCAN_ENTRIES:
+        try:
+            with os.scandir(stack.pop()) as iterator:
+                for entry in iterator:
+                    visited += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def _is_system_name(name):
+    folded = name.casefold()
+    return folded in SYSTEM_NAMES or folded.startswith(("microsoft", "windows", "{")) # '{GUID}' do MSI/Windows tạo
+
+
+class LeftoverDetector:
+    def __init__(self, index):
+        self.index = index
+
+    def _classify(self, path, name):
+        """Chủ sở hữu của một thư mục/khóa: theo vị trí cài đặt trước, rồi tới tên."""
+        return self.index.owner_of_path(path) if path else None, self.index.owner_of_name(name)
+
+    def sweep_directories(self, roots, report, cancel_token=None):
+        """
+        Cấp 1 của mỗi gốc: thư mục không thuộc phần mềm nào bị đánh dấu. Thư mục khớp nhà sản xuất hoặc chứa
+        vị trí cài đặt (ví dụ 'Adobe') thì xét tiếp cấp 2 theo tên sản phẩm và vị trí.
+        """
+        for label, root in roots:
+            check_cancelled(cancel_token)
+            for entry in self._subdirectories(root):
+                report.checked_dirs += 1
+                if _is_system_name(entry.name):
+                    continue
+                if self.index.locations.longest_prefix_of(normalize_path(entry.path)):
+                    continue # Chính là (hoặc nằm trong) một vị trí cài đặt
+                path_owner, name_owner = self._classify(entry.path, entry.name)
+                if path_owner or name_owner: # Thư mục nhà sản xuất: sản phẩm con có thể đã bị gỡ
+                    self._sweep_vendor_directory(label, entry, report)
+                    continue
+                report.leftovers.append(Leftover(KIND_DIRECTORY, entry.path, f"{label}: không thuộc phần mềm nào đã cài",
+                                                 _directory_size(entry.path)))
+
+    def _sweep_vendor_directory(self, label, vendor_entry, report):
+        children = list(self._subdirectories(vendor_entry.path))
+        owned = [self._classify(child.path, child.name) for child in children]
+        if not any(path_owner or name_owner for path_owner, name_owner in owned):
+            return # Không đủ thông tin để phán đoán sản phẩm con: coi cả thư mục thuộc nhà sản xuất
+        for child, (path_owner, name_owner) in zip(children, owned):
+            report.checked_dirs += 1
+            if not (path_owner or name_owner or _is_system_name(child.name)):
+                report.leftovers.append(Leftover(KIND_DIRECTORY, child.path,
+                                                 f"{label}: sản phẩm của '{vendor_entry.name}' đã gỡ",
+                                                 _directory_size(child.path)))
+
+    @staticmethod
+    def _subdirectories(path):
+        try:
+            with os.scandir(path) as iterator:
+                return [entry for entry in iterator if entry.is_dir(follow_symlinks=False)]
+        except OSError as e:
+            logging.debug(f"Không thể quét {path}: {e}")
+            return []
+
+    def sweep_registry(self, report, cancel_token=None):
+        """Khóa cấp 1 (nhà sản xuất/sản phẩm) dưới SOFTWARE của HKLM (64/32-bit) và HKCU."""
+        if not HAS_WINREG:
+            return
+        sources = [("HKLM\\SOFTWARE", winreg.HKEY_LOCAL_MACHINE, 0), ("HKCU\\SOFTWARE", winreg.HKEY_CURRENT_USER, 0)]
+        if os.environ.get("PROCESSOR_ARCHITEW6432") or os.environ.get("PROCESSOR_ARCHITECTURE", "").endswith("64"):
+            sources.append(("HKLM\\SOFTWARE\\WOW6432Node", winreg.HKEY_LOCAL_MACHINE, winreg.KEY_WOW64_32KEY))
+        for label, hive, view in sources:
+            check_cancelled(cancel_token)
+            try:
+                with winreg.OpenKey(hive, "SOFTWARE", 0, winreg.KEY_READ | view) as software:
+                    names = [winreg.EnumKey(software, i) for i in range(winreg.QueryInfoKey(software)[0])]
+            except OSError as e:
+                logging.debug(f"Không thể đọc {label}: {e}")
+                continue
+            for name in names:
+                report.checked_keys += 1
+                if _is_system_name(name) or self.index.owner_of_name(name):
+                    continue
+                report.leftovers.append(Leftover(KIND_REGISTRY, f"{label}\\{name}", "Khóa không thuộc phần mềm nào đã cài"))
+
+    def run(self, roots, include_registry=True, cancel_token=None, progress_callback=None):
+        started = time.perf_counter()
+        report = LeftoverReport()
+        report.product_count = self.index.product_count
+        report_progress(progress_callback, 30, "Đang quét thư mục cài đặt...")
+        self.sweep_directories(roots, report, cancel_token)
+        if include_registry:
+            report_progress(progress_callback, 80, "Đang quét khóa Registry...")
+            self.sweep_registry(report, cancel_token)
+        report.seconds = time.perf_counter() - started
+        report_progress(progress_callback, 100, f"Tìm thấy {len(report.leftovers)} mục còn sót.")
+        logging.info(f"Phát hiện phần còn sót: {report.checked_dirs} thư mục, {report.checked_keys} khóa, "
+                     f"{len(report.leftovers)} mục bị đánh dấu trong {report.seconds:.2f}s")
+        return report
+
+
+def detect_leftovers(products=None, roots=None, include_registry=True, cancel_token=None, progress_callback=None):
+    """products/roots mặc định: đọc từ Registry và default_scan_roots(). Trả về LeftoverReport."""
+    report_progress(progress_callback, 0, "Đang lập chỉ mục phần mềm đã cài...")
+    if products is None:
+        products = read_installed_products()
+    index = SoftwareIndex(products)
+    return LeftoverDetector(index).run(default_scan_roots() if roots is None else roots,
+                                       include_registry, cancel_token, progress_callback)
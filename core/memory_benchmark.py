@@ -0,0 +1,274 @@
+# core/memory_benchmark.py
+# Kiểm tra hệ thống bộ nhớ: băng thông kiểu STREAM (Copy/Scale/Add/Triad) trên mảng NumPy lớn với 1..N luồng
+# và độ trễ truy cập bằng chuỗi con trỏ ngẫu nhiên (pointer chasing) ở nhiều kích thước vùng nhớ
+import logging
+import os
+import statistics
+import threading
+import time
+
+import psutil
+
+from core.task_control import StepProgress, check_cancelled
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not found. Memory speed test is unavailable. Install with 'pip install numpy'.")
+
+KERNEL_COPY = "Copy"    # c = a
+KERNEL_SCALE = "Scale"  # b = q * c
+KERNEL_ADD = "Add"      # c = a + b
+KERNEL_TRIAD = "Triad"  # a = b + q * c
+KERNELS = (KERNEL_COPY, KERNEL_SCALE, KERNEL_ADD, KERNEL_TRIAD)
+# Số mảng được đọc + ghi mỗi phần tử (quy ước STREAM, không tính write-allocate)
+KERNEL_ARRAYS_TOUCHED = {KERNEL_COPY: 2, KERNEL_SCALE: 2, KERNEL_ADD: 3, KERNEL_TRIAD: 3}
+
+STREAM_SCALAR = 3.0
+DEFAULT_ARRAY_MB = 128           # Mỗi mảng; STREAM khuyến nghị >= 4 lần cache cấp cuối
+MIN_ARRAY_MB = 16
+MAX_MEMORY_FRACTION = 0.25       # Ba mảng không được vượt quá tỉ lệ này của RAM còn trống
+TRIAD_CHUNK_ELEMENTS = 1 << 15   # Triad tính theo khối nhỏ nằm trong cache để không sinh mảng tạm cỡ DRAM
+DEFAULT_ITERATIONS = 5
+
+CACHE_LINE_BYTES = 64
+# Kích thước vùng nhớ cho phép đo độ trễ: từ vừa L1 tới chắc chắn nằm ngoài L3
+DEFAULT_LATENCY_SIZES_KB = (16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+LATENCY_HOPS = 200_000
+LATENCY_SEED = 20240601
+
+
+def default_thread_counts(max_threads=None):
+    """1, 2, 4, ... và số luồng logic tối đa (luôn có mặt ở cuối)."""
+    max_threads = max(1, int(max_threads or os.cpu_count() or 1))
+    counts, n = [], 1
+    while n < max_threads:
+        counts.append(n)
+        n *= 2
+    counts.append(max_threads)
+    return counts
+
+
+def _choose_array_elements(array_mb):
+    """Số phần tử float64 mỗi mảng, thu nhỏ nếu RAM còn trống không đủ cho ba mảng."""
+    try:
+        budget_mb = psutil.virtual_memory().available * MAX_MEMORY_FRACTION / (3 * 1024 * 1024)
+    except Exception as e:
+        logging.debug(f"Không đọc được RAM còn trống, dùng kích thước mặc định: {e}")
+        budget_mb = array_mb
+    chosen_mb = max(MIN_ARRAY_MB, min(array_mb, budget_mb))
+    return int(chosen_mb * 1024 * 1024) // 8
+
+
+def _run_kernel(kernel, a, b, c):
+    if kernel == KERNEL_COPY:
+        np.copyto(c, a)
+    elif kernel == KERNEL_SCALE:
+        np.multiply(c, STREAM_SCALAR, out=b)
+    elif kernel == KERNEL_ADD:
+        np.add(a, b, out=c)
+    else:
+        scratch = np.empty(min(TRIAD_CHUNK_ELEMENTS, len(a)))
+        for start in range(0, len(a), TRIAD_CHUNK_ELEMENTS):
+            end = min(start + TRIAD_CHUNK_ELEMENTS, len(a))
+            tmp = scratch[:end - start]
+            np.multiply(c[start:end], STREAM_SCALAR, out=tmp)
+            np.add(b[start:end], tmp, out=a[start:end])
+
+
+def _timed_parallel_kernel(kernel, arrays, threads):
+    """
+    Chia ba mảng thành `threads` đoạn liên tiếp, mỗi luồng chạy kernel trên đoạn của mình
+    (ufunc NumPy nhả GIL nên các luồng chạy song song thật). Trả về thời gian thực từ lúc các luồng cùng xuất phát.
+    """
+    a, b, c = arrays
+    bounds = np.linspace(0, len(a), threads + 1).astype(np.int64)
+    barrier = threading.Barrier(threads + 1)
+    errors = []
+
+    def worker(lo, hi):
+        barrier.wait()
+        try:
+            _run_kernel(kernel, a[lo:hi], b[lo:hi], c[lo:hi])
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(int(bounds[i]), int(bounds[i + 1])), daemon=True) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return elapsed
+
+
+def _validate_stream_arrays(arrays, iterations_done):
+    """Kiểm tra kết quả như STREAM: sau mỗi vòng Copy/Scale/Add/Triad các giá trị có thể tính trước."""
+    if iterations_done > 200: # Giá trị tăng theo cấp số nhân và sẽ tràn float64
+        return
+    expected_a, expected_b, expected_c = 1.0, 2.0, 0.0
+    for _ in range(iterations_done):
+        expected_c = expected_a
+        expected_b = STREAM_SCALAR * expected_c
+        expected_c = expected_a + expected_b
+        expected_a = expected_b + STREAM_SCALAR * expected_c
+    for array, expected in zip(arrays, (expected_a, expected_b, expected_c)):
+        if not np.allclose(array[::4096], expected, rtol=1e-12):
+            raise ValueError("Kết quả kernel STREAM sai: có thể bộ nhớ không ổn định")
+
+
+def measure_bandwidth(array_mb=DEFAULT_ARRAY_MB, thread_counts=None, iterations=DEFAULT_ITERATIONS,
+                      cancel_token=None, progress=None):
+    """
+    Băng thông STREAM cho mỗi (số luồng, kernel). Trả về list dict:
+      {"kernel", "threads", "best_gbps", "median_gbps", "stdev_gbps", "array_mb"}
+    Vòng đầu tiên của mỗi số luồng là warm-up (chạm trang nhớ, khởi động luồng) và không được tính.
+    """
+    thread_counts = thread_counts or default_thread_counts()
+    n = _choose_array_elements(array_mb)
+    arrays = (np.full(n, 1.0), np.full(n, 2.0), np.zeros(n))
+    actual_mb = n * 8 / (1024 * 1024)
+    logging.info(f"STREAM: 3 mảng x {actual_mb:.0f} MB, luồng={thread_counts}, lặp={iterations}")
+
+    results = []
+    rounds_done = 0
+    for threads in thread_counts:
+        samples = {kernel: [] for kernel in KERNELS}
+        for i in range(iterations + 1):
+            for kernel in KERNELS:
+                check_cancelled(cancel_token)
+                elapsed = _timed_parallel_kernel(kernel, arrays, threads)
+                if i > 0:
+                    samples[kernel].append(KERNEL_ARRAYS_TOUCHED[kernel] * n * 8 / elapsed / 1e9)
+            rounds_done += 1
+            if progress is not None:
+                progress.step(f"Băng thông bộ nhớ: {threads} luồng ({i + 1}/{iterations + 1})")
+        for kernel in KERNELS:
+            values = samples[kernel]
+            results.append({
+                "kernel": kernel,
+                "threads": threads,
+                "best_gbps": max(values),
+                "median_gbps": statistics.median(values),
+                "stdev_gbps": statistics.stdev(values) if len(values) > 1 else 0.0,
+                "array_mb": actual_mb,
+            })
+    _validate_stream_arrays(arrays, rounds_done)
+    return results
+
+
+def _build_pointer_chain(size_bytes, rng):
+    """
+    Mảng int64 mà mỗi phần tử đầu dòng cache trỏ tới dòng cache kế tiếp của một chu trình ngẫu nhiên
+    đi qua mọi dòng (hoán vị vòng), nên bộ tiền nạp (prefetcher) không đoán được địa chỉ tiếp theo.
+    """
+    slots_per_line = CACHE_LINE_BYTES // 8
+    lines = max(2, size_bytes // CACHE_LINE_BYTES)
+    order = rng.permutation(lines)
+    chain = np.zeros(lines * slots_per_line, dtype=np.int64)
+    chain[order * slots_per_line] = np.roll(order, -1) * slots_per_line
+    return chain
+
+
+def _chase(chain_view, hops):
+    index = 0
+    start = time.perf_counter()
+    for _ in range(hops):
+        index = chain_view[index]
+    return time.perf_counter() - start, index
+
+
+def measure_latency(sizes_kb=DEFAULT_LATENCY_SIZES_KB, hops=LATENCY_HOPS, iterations=DEFAULT_ITERATIONS,
+                    cancel_token=None, progress=None):
+    """
+    Độ trễ truy cập ngẫu nhiên theo kích thước vùng nhớ. Trả về list dict:
+      {"size_kb", "ns_per_hop", "stdev_ns", "added_ns"}
+    Vòng lặp chạy trong Python nên mỗi bước có chi phí thông dịch cố định; "added_ns" là phần vượt trên vùng
+    nhớ nhỏ nhất (nằm trong L1), thể hiện các bậc L1 -> L2 -> L3 -> DRAM.
+    """
+    rng = np.random.default_rng(LATENCY_SEED)
+    try:
+        max_size_kb = psutil.virtual_memory().available * MAX_MEMORY_FRACTION / 1024
+    except Exception:
+        max_size_kb = max(sizes_kb)
+    results = []
+    for size_kb in sorted(sizes_kb):
+        check_cancelled(cancel_token)
+        if size_kb > max_size_kb:
+            logging.info(f"Bỏ qua đo độ trễ vùng {size_kb} KB: không đủ RAM trống")
+            if progress is not None:
+                progress.step(f"Độ trễ bộ nhớ: bỏ qua vùng {size_kb} KB")
+            continue
+        chain = _build_pointer_chain(size_kb * 1024, rng)
+        view = memoryview(chain) # Đọc phần tử qua memoryview: không tạo list object, chỉ chạm vào mảng gốc
+        _chase(view, min(hops, len(chain))) # Warm-up: đưa vùng nhớ vào cache/TLB ở mức có thể
+        samples = []
+        for _ in range(iterations):
+            check_cancelled(cancel_token)
+            elapsed, _ = _chase(view, hops)
+            samples.append(elapsed * 1e9 / hops)
+        view.release()
+        results.append({
+            "size_kb": size_kb,
+            "ns_per_hop": statistics.median(samples),
+            "stdev_ns": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        })
+        if progress is not None:
+            progress.step(f"Độ trễ bộ nhớ: vùng {size_kb} KB")
+    baseline = results[0]["ns_per_hop"] if results else 0.0
+    for row in results:
+        row["added_ns"] = max(0.0, row["ns_per_hop"] - baseline)
+    return results
+
+
+def run_memory_benchmark(array_mb=DEFAULT_ARRAY_MB, thread_counts=None, iterations=DEFAULT_ITERATIONS,
+                         latency_sizes_kb=DEFAULT_LATENCY_SIZES_KB, cancel_token=None, progress_callback=None):
+    """Chạy cả băng thông và độ trễ. Trả về {"bandwidth": [...], "latency": [...], "thread_counts": [...]}."""
+    if not HAS_NUMPY:
+        raise RuntimeError("Cần numpy để kiểm tra tốc độ bộ nhớ")
+    thread_counts = thread_counts or default_thread_counts()
+    progress = StepProgress(progress_callback, len(thread_counts) * (iterations + 1) + len(latency_sizes_kb))
+    bandwidth = measure_bandwidth(array_mb, thread_counts, iterations, cancel_token, progress)
+    latency = measure_latency(latency_sizes_kb, iterations=iterations, cancel_token=cancel_token, progress=progress)
+    return {"bandwidth": bandwidth, "latency": latency, "thread_counts": list(thread_counts)}
+
+
+def _format_size_kb(size_kb):
+    return f"{size_kb // 1024} MB" if size_kb >= 1024 else f"{size_kb} KB"
+
+
+def format_memory_benchmark_rows(result):
+    """Dòng bảng (key tiếng Việt): băng thông theo kernel và số luồng, rồi độ trễ theo kích thước vùng nhớ."""
+    rows = []
+    for item in result["bandwidth"]:
+        rows.append({
+            "Bài kiểm tra": f"Băng thông {item['kernel']}",
+            "Cấu hình": f"{item['threads']} luồng, mảng {item['array_mb']:.0f} MB",
+            "Tốt nhất (GB/s)": round(item["best_gbps"], 2),
+            "Trung vị (GB/s)": round(item["median_gbps"], 2),
+            "Độ lệch chuẩn (GB/s)": round(item["stdev_gbps"], 2),
+        })
+    for item in result["latency"]:
+        rows.append({
+            "Bài kiểm tra": "Độ trễ truy cập ngẫu nhiên",
+            "Cấu hình": f"Vùng nhớ {_format_size_kb(item['size_kb'])}",
+            "Độ trễ trung vị (ns)": round(item["ns_per_hop"], 1),
+            "Tăng thêm so với L1 (ns)": round(item["added_ns"], 1),
+            "Độ lệch chuẩn (ns)": round(item["stdev_ns"], 2),
+        })
+    triad = [item for item in result["bandwidth"] if item["kernel"] == KERNEL_TRIAD]
+    if len(triad) > 1 and triad[0]["best_gbps"] > 0:
+        rows.append({
+            "Bài kiểm tra": "Hệ số mở rộng Triad",
+            "Cấu hình": f"{triad[-1]['threads']} luồng so với 1 luồng",
+            "Tốt nhất (GB/s)": round(triad[-1]["best_gbps"], 2),
+            "Ghi chú": f"x{triad[-1]['best_gbps'] / triad[0]['best_gbps']:.2f}. Hệ số thấp (~1) trên máy nhiều nhân "
+                       "thường do RAM chạy một kênh hoặc thanh RAM cắm chưa chuẩn.",
+        })
+    return rows
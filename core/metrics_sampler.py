@@ -0,0 +1,284 @@
+# core/metrics_sampler.py
+# Luồng lấy mẫu số liệu hệ thống (CPU, RAM, swap, disk IO, network IO, GPU) + lịch sử dạng ring buffer
+import logging
+import threading
+import time
+
+import psutil
+
+from core.device_rates import DeviceRateSampler, sum_rates
+
+# NumPy dùng cho ring buffer (mảng cấp phát một lần); không có thì dùng list Python
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not found. Metrics history will use a slower pure-Python buffer. Install with 'pip install numpy'.")
+
+DEFAULT_SAMPLE_INTERVAL_S = 2.0
+DEFAULT_HISTORY_SIZE = 1800 # 1 giờ với chu kỳ 2 giây
+
+# Các cột vô hướng được lưu trong lịch sử (theo thứ tự cột của ring buffer)
+SCALAR_FIELDS = (
+    "cpu_percent",
+    "ram_percent",
+    "swap_percent",
+    "disk_usage_percent",
+    "disk_read_bps",
+    "disk_write_bps",
+    "net_sent_bps",
+    "net_recv_bps",
+    "gpu_load_percent",
+    "gpu_memory_percent",
+    "gpu_temperature_c",
+)
+_FIELD_INDEX = {name: i for i, name in enumerate(SCALAR_FIELDS)}
+
+
+class RingBuffer:
+    """
+    Bộ đệm vòng kích thước cố định: mỗi dòng gồm `width` giá trị float.
+    Ghi O(1), không cấp phát thêm bộ nhớ; đọc trả về bản sao theo thứ tự thời gian.
+    Giá trị thiếu được lưu là NaN.
+    """
+    def __init__(self, capacity, width=1):
+        if capacity < 1 or width < 1:
+            raise ValueError("capacity và width phải >= 1")
+        self.capacity = capacity
+        self.width = width
+        self._count = 0
+        self._head = 0 # vị trí ghi kế tiếp
+        if HAS_NUMPY:
+            self._data = np.full((capacity, width), np.nan, dtype=np.float64)
+        else:
+            self._data = [[float("nan")] * width for _ in range(capacity)]
+
+    def __len__(self):
+        return self._count
+
+    def append(self, row):
+        if HAS_NUMPY:
+            self._data[self._head, :] = row
+        else:
+            self._data[self._head] = [float(v) for v in row]
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def values(self, last_n=None):
+        """Bản sao các dòng (cũ -> mới); last_n giới hạn số dòng mới nhất."""
+        n = self._count if last_n is None else max(0, min(last_n, self._count))
+        if n == 0:
+            return np.empty((0, self.width)) if HAS_NUMPY else []
+        start = (self._head - n) % self.capacity
+        if HAS_NUMPY:
+            if start + n <= self.capacity:
+                return self._data[start:start + n].copy()
+            return np.concatenate((self._data[start:], self._data[:self._head]))
+        indices = [(start + i) % self.capacity for i in range(n)]
+        return [list(self._data[i]) for i in indices]
+
+    def column(self, index, last_n=None):
+        rows = self.values(last_n)
+        if HAS_NUMPY:
+            return rows[:, index].copy()
+        return [row[index] for row in rows]
+
+    def latest(self):
+        if self._count == 0:
+            return None
+        row = self._data[(self._head - 1) % self.capacity]
+        return row.copy() if HAS_NUMPY else list(row)
+
+    def clear(self):
+        self._count = 0
+        self._head = 0
+
+
+def _nan_if_none(value):
+    return float("nan") if value is None else float(value)
+
+
+class MetricsSampler:
+    """
+    Lấy mẫu số liệu hệ thống trên luồng nền, ghi vào ring buffer và công bố snapshot mới nhất.
+
+    Chuyển giao giữa hai luồng: mỗi chu kỳ tạo một dict snapshot mới rồi gán tham chiếu dưới lock;
+    luồng GUI chỉ đọc tham chiếu đó (latest_snapshot) và không bao giờ gọi psutil/NVML.
+    GPU được đọc từ GpuSampler (nếu truyền vào) thay vì truy vấn NVML lần nữa.
+    """
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL_S, history_size=DEFAULT_HISTORY_SIZE,
+                 gpu_sampler=None, disk_usage_path=None):
+        self.interval = interval
+        self.gpu_sampler = gpu_sampler
+        self.disk_usage_path = disk_usage_path or ("C:\\" if psutil.WINDOWS else "/")
+        self.core_count = psutil.cpu_count(logical=True) or 1
+
+        self._lock = threading.Lock()
+        self._timestamps = RingBuffer(history_size, 1)
+        self._scalars = RingBuffer(history_size, len(SCALAR_FIELDS))
+        self._per_core = RingBuffer(history_size, self.core_count)
+        self._snapshot = None
+        self._snapshot_listeners = []
+
+        self.device_rates = DeviceRateSampler() # Tốc độ theo lõi / ổ đĩa / card mạng
+        self.last_sample_cost_s = 0.0 # Thời gian CPU của lần lấy mẫu gần nhất
+
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._paused = False
+        self._thread = None
+
+    # --- Điều khiển ---
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.device_rates.sample(time.time()) # Mồi bộ đếm để lần đọc đầu có ý nghĩa
+        self._thread = threading.Thread(target=self._run, name="MetricsSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def set_interval(self, interval):
+        """Đổi chu kỳ lấy mẫu; khi chu kỳ ngắn lại, luồng được đánh thức để lấy mẫu ngay."""
+        interval = max(0.1, float(interval))
+        shorter = interval < self.interval
+        self.interval = interval
+        if shorter:
+            self._wake_event.set()
+
+    def pause(self):
+        """Tạm dừng lấy mẫu (luồng vẫn sống, chờ resume)."""
+        self._paused = True
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            self._wake_event.set() # Lấy mẫu ngay, không đợi hết chu kỳ
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def add_snapshot_listener(self, callback):
+        """callback(snapshot) được gọi trên luồng nền sau mỗi lần lấy mẫu (ví dụ để lưu xuống đĩa)."""
+        self._snapshot_listeners.append(callback)
+
+    # --- Đọc (an toàn từ mọi luồng) ---
+    def latest_snapshot(self):
+        """Dict snapshot mới nhất (không được sửa) hoặc None nếu chưa có mẫu nào."""
+        with self._lock:
+            return self._snapshot
+
+    def get_history(self, field, last_n=None):
+        """
+        Trả về (timestamps, values) của một trường trong SCALAR_FIELDS, hoặc 'cpu_per_core'
+        (values là ma trận số_mẫu x số_lõi). timestamps là time.time() (epoch giây).
+        """
+        with self._lock:
+            timestamps = self._timestamps.column(0, last_n)
+            if field == "cpu_per_core":
+                return timestamps, self._per_core.values(last_n)
+            if field not in _FIELD_INDEX:
+                raise KeyError(f"Trường không tồn tại: {field}")
+            return timestamps, self._scalars.column(_FIELD_INDEX[field], last_n)
+
+    def history_between(self, field, start_ts, end_ts=None):
+        """Như get_history nhưng chỉ lấy các mẫu có timestamp trong [start_ts, end_ts]."""
+        timestamps, values = self.get_history(field)
+        end_ts = end_ts if end_ts is not None else float("inf")
+        if HAS_NUMPY:
+            mask = (timestamps >= start_ts) & (timestamps <= end_ts)
+            return timestamps[mask], values[mask]
+        selected = [i for i, t in enumerate(timestamps) if start_ts <= t <= end_ts]
+        return [timestamps[i] for i in selected], [values[i] for i in selected]
+
+    def history_length(self):
+        with self._lock:
+            return len(self._timestamps)
+
+    # --- Lấy mẫu ---
+    def sample_once(self):
+        """Lấy một mẫu, ghi vào ring buffer và công bố snapshot. Trả về snapshot."""
+        cost_start = time.thread_time() if hasattr(time, "thread_time") else time.process_time()
+        now = time.time()
+
+        # Một lần đọc cpu_times/disk/net cho mọi thiết bị; tổng hợp được cộng từ các thiết bị
+        device_rates = self.device_rates.sample(now)
+        per_core = device_rates["cpu_per_core"] or []
+        cpu_percent = sum(per_core) / len(per_core) if per_core else psutil.cpu_percent(interval=None)
+        disks = device_rates["disks"]
+        nics = device_rates["nics"]
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        try:
+            disk_usage_percent = psutil.disk_usage(self.disk_usage_path).percent
+        except OSError:
+            disk_usage_percent = None
+
+        gpus = []
+        if self.gpu_sampler is not None:
+            gpus, _ = self.gpu_sampler.latest()
+        primary_gpu = gpus[0] if gpus else {}
+        gpu_memory_percent = None
+        if primary_gpu.get("memory_total_mb"):
+            gpu_memory_percent = 100.0 * (primary_gpu.get("memory_used_mb") or 0) / primary_gpu["memory_total_mb"]
+
+        snapshot = {
+            "timestamp": now,
+            "cpu_percent": cpu_percent,
+            "cpu_per_core": list(per_core),
+            "ram_percent": memory.percent,
+            "ram_used_gb": round(memory.used / (1024 ** 3), 2),
+            "ram_total_gb": round(memory.total / (1024 ** 3), 2),
+            "swap_percent": swap.percent,
+            "disk_usage_percent": disk_usage_percent,
+            "disk_read_bps": sum_rates(disks, "read_bps"),
+            "disk_write_bps": sum_rates(disks, "write_bps"),
+            "net_sent_bps": sum_rates(nics, "sent_bps"),
+            "net_recv_bps": sum_rates(nics, "recv_bps"),
+            "disks": disks, # tên ổ vật lý -> read_bps/write_bps/read_iops/write_iops
+            "nics": nics, # tên card mạng -> sent_bps/recv_bps/packets_sent_ps/packets_recv_ps
+            "gpu_load_percent": primary_gpu.get("load_percent"),
+            "gpu_memory_percent": gpu_memory_percent,
+            "gpu_temperature_c": primary_gpu.get("temperature_c"),
+            "gpus": gpus,
+        }
+        scalar_row = [_nan_if_none(snapshot[name]) for name in SCALAR_FIELDS]
+        core_row = (list(per_core) + [float("nan")] * self.core_count)[:self.core_count]
+
+        cost_end = time.thread_time() if hasattr(time, "thread_time") else time.process_time()
+        self.last_sample_cost_s = cost_end - cost_start
+        snapshot["sample_cost_s"] = self.last_sample_cost_s
+
+        with self._lock:
+            self._timestamps.append((now,))
+            self._scalars.append(scalar_row)
+            self._per_core.append(core_row)
+            self._snapshot = snapshot # Gán tham chiếu: luồng đọc luôn thấy snapshot đầy đủ
+
+        for listener in self._snapshot_listeners:
+            try:
+                listener(snapshot)
+            except Exception:
+                logging.exception("MetricsSampler: lỗi trong snapshot listener:")
+        return snapshot
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if not self._paused:
+                try:
+                    self.sample_once()
+                except Exception as e:
+                    logging.error(f"MetricsSampler: lỗi khi lấy mẫu: {e}", exc_info=True)
+            self._wake_event.wait(None if self._paused else self.interval)
+            self._wake_event.clear()
@@ -0,0 +1,400 @@
+# core/metrics_store.py
+# Lưu lịch sử số liệu hiệu năng xuống đĩa: file ring buffer ánh xạ bộ nhớ (mmap), bản ghi độ dài cố định,
+# tổng hợp nhiều mức phân giải (raw -> 1 phút -> 1 giờ, mỗi mức lưu min/avg/max)
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from core.app_paths import get_app_data_dir # type: ignore
+from core.metrics_sampler import SCALAR_FIELDS # type: ignore
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+FILE_MAGIC = b"PCMT"
+FILE_VERSION = 1
+HEADER = struct.Struct("<4sHHIIIId") # magic, version, field_count, record_size, capacity, start, count, resolution_s
+HEADER_SIZE = 64                     # Phần còn lại của header để trống cho phiên bản sau
+
+TIER_RAW = "raw"
+TIER_1M = "1m"
+TIER_1H = "1h"
+
+# (tên, độ phân giải giây (0 = theo chu kỳ lấy mẫu), thời gian lưu giữ giây, số bản ghi tối đa)
+# Dung lượng mỗi file cố định nên tổng dung lượng đĩa luôn bị chặn trên (~4 MB với 11 trường).
+DEFAULT_TIERS = (
+    (TIER_RAW, 0, 24 * 3600, 43200),         # 24 giờ với chu kỳ 2 giây
+    (TIER_1M, 60, 7 * 24 * 3600, 10080),     # 7 ngày
+    (TIER_1H, 3600, 90 * 24 * 3600, 2160),   # 90 ngày
+)
+# Khoảng thời gian tối đa của truy vấn được trả lời bằng từng mức (chọn mức mịn nhất còn phù hợp)
+TIER_MAX_QUERY_SPAN = {TIER_RAW: 6 * 3600, TIER_1M: 7 * 24 * 3600}
+COMPACT_EVERY_N_APPENDS = 300
+
+
+def _record_struct(field_count, aggregated):
+    # raw: timestamp + giá trị; tổng hợp: timestamp + số mẫu + (min, avg, max) cho mỗi trường
+    if aggregated:
+        return struct.Struct("<dI" + "fff" * field_count)
+    return struct.Struct("<d" + "f" * field_count)
+
+
+def _numpy_dtype(field_count, aggregated):
+    columns = [("timestamp", "<f8")]
+    if aggregated:
+        columns.append(("count", "<u4"))
+        columns.append(("values", "<f4", (field_count, 3)))
+    else:
+        columns.append(("values", "<f4", (field_count,)))
+    return np.dtype(columns)
+
+
+class RingFile:
+    """
+    Một file ring buffer ánh xạ bộ nhớ. Bản ghi được sắp theo thời gian (chỉ số logic 0 = cũ nhất).
+    Ghi và ghi đè bản ghi cuối đều O(1); tìm theo thời gian O(log n) bằng tìm kiếm nhị phân.
+    """
+    def __init__(self, path, field_count, capacity, resolution_s, aggregated):
+        self.path = path
+        self.field_count = field_count
+        self.capacity = capacity
+        self.resolution_s = resolution_s
+        self.aggregated = aggregated
+        self.record = _record_struct(field_count, aggregated)
+        self._timestamp = struct.Struct("<d")
+        self._file = None
+        self._mm = None
+        self.start = 0
+        self.count = 0
+        self._open()
+
+    def _file_size(self):
+        return HEADER_SIZE + self.record.size * self.capacity
+
+    def _open(self):
+        size = self._file_size()
+        reuse = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) == size:
+            with open(self.path, "rb") as f:
+                header = f.read(HEADER.size)
+            try:
+                magic, version, field_count, record_size, capacity, start, count, _ = HEADER.unpack(header)
+                reuse = (magic == FILE_MAGIC and version == FILE_VERSION and field_count == self.field_count
+                         and record_size == self.record.size and capacity == self.capacity
+                         and start < capacity and count <= capacity)
+            except struct.error:
+                reuse = False
+            if reuse:
+                self.start, self.count = start, count
+            else:
+                logging.warning(f"MetricsStore: định dạng file {self.path} không khớp, tạo lại.")
+
+        if not reuse:
+            with open(self.path, "wb") as f:
+                f.truncate(size)
+            self.start, self.count = 0, 0
+
+        self._file = open(self.path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_WRITE)
+        if not reuse:
+            self._write_header()
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, FILE_MAGIC, FILE_VERSION, self.field_count, self.record.size,
+                         self.capacity, self.start, self.count, float(self.resolution_s))
+
+    def _offset(self, logical_index):
+        return HEADER_SIZE + ((self.start + logical_index) % self.capacity) * self.record.size
+
+    # --- Ghi ---
+    def append(self, values):
+        if self.count < self.capacity:
+            offset = self._offset(self.count)
+            self.count += 1
+        else: # Đầy: ghi đè bản ghi cũ nhất
+            offset = self._offset(0)
+            self.start = (self.start + 1) % self.capacity
+        self.record.pack_into(self._mm, offset, *values)
+        self._write_header()
+
+    def replace_last(self, values):
+        if self.count == 0:
+            self.append(values)
+            return
+        self.record.pack_into(self._mm, self._offset(self.count - 1), *values)
+
+    def drop_before(self, timestamp):
+        """Bỏ các bản ghi cũ hơn timestamp (nén theo thời gian lưu giữ). Trả về số bản ghi đã bỏ."""
+        drop = self.index_at_or_after(timestamp)
+        if drop:
+            self.start = (self.start + drop) % self.capacity
+            self.count -= drop
+            self._write_header()
+        return drop
+
+    # --- Đọc ---
+    def timestamp_at(self, logical_index):
+        return self._timestamp.unpack_from(self._mm, self._offset(logical_index))[0]
+
+    def record_at(self, logical_index):
+        return self.record.unpack_from(self._mm, self._offset(logical_index))
+
+    def last(self):
+        return self.record_at(self.count - 1) if self.count else None
+
+    def index_at_or_after(self, timestamp):
+        """Chỉ số logic đầu tiên có timestamp >= timestamp."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read_range(self, first, last):
+        """
+        Các bản ghi có chỉ số logic trong [first, last).
+        Có numpy: mảng có cấu trúc (copy); không có: list tuple.
+        """
+        first, last = max(0, first), min(self.count, last)
+        if last <= first:
+            return np.empty(0, dtype=_numpy_dtype(self.field_count, self.aggregated)) if HAS_NUMPY else []
+        if HAS_NUMPY:
+            view = np.frombuffer(self._mm, dtype=_numpy_dtype(self.field_count, self.aggregated),
+                                 count=self.capacity, offset=HEADER_SIZE)
+            physical = (self.start + np.arange(first, last)) % self.capacity
+            result = view[physical] # Fancy indexing tạo bản sao, không giữ tham chiếu tới mmap
+            del view
+            return result
+        return [self.record_at(i) for i in range(first, last)]
+
+    def flush(self):
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _Bucket:
+    """Bộ tích lũy min/avg/max cho một khoảng thời gian của mức tổng hợp (bỏ qua NaN)."""
+    def __init__(self, start_ts, field_count):
+        self.start_ts = start_ts
+        self.count = 0
+        self.mins = [math.inf] * field_count
+        self.maxs = [-math.inf] * field_count
+        self.sums = [0.0] * field_count
+        self.weights = [0] * field_count
+        self.replace_last = False # True nếu bucket được nạp lại từ bản ghi cuối của file (ghi đè thay vì thêm)
+
+    @classmethod
+    def from_record(cls, record, field_count):
+        bucket = cls(record[0], field_count)
+        bucket.count = record[1]
+        for i in range(field_count):
+            mn, avg, mx = record[2 + 3 * i: 5 + 3 * i]
+            if not math.isnan(avg):
+                bucket.mins[i], bucket.maxs[i] = mn, mx
+                bucket.sums[i], bucket.weights[i] = avg * bucket.count, bucket.count
+        bucket.replace_last = True
+        return bucket
+
+    def add(self, values):
+        self.count += 1
+        for i, value in enumerate(values):
+            if value is None or math.isnan(value):
+                continue
+            if value < self.mins[i]: self.mins[i] = value
+            if value > self.maxs[i]: self.maxs[i] = value
+            self.sums[i] += value
+            self.weights[i] += 1
+
+    def to_record(self):
+        record = [self.start_ts, self.count]
+        for i in range(len(self.sums)):
+            if self.weights[i]:
+                record.extend((self.mins[i], self.sums[i] / self.weights[i], self.maxs[i]))
+            else:
+                record.extend((math.nan, math.nan, math.nan))
+        return record
+
+
+class MetricsStore:
+    """
+    Kho lịch sử số liệu gồm một file ring cho mỗi mức phân giải.
+    append() ghi mẫu raw và cộng dồn vào bucket đang mở của mỗi mức tổng hợp (chi phí hằng số mỗi mẫu);
+    bucket được ghi thành một bản ghi khi sang phút/giờ mới.
+    query() chỉ đọc mức phù hợp với khoảng thời gian được hỏi.
+    Dùng được làm snapshot listener của MetricsSampler (append_snapshot).
+    """
+    def __init__(self, directory=None, fields=SCALAR_FIELDS, tiers=DEFAULT_TIERS):
+        self.directory = directory or get_app_data_dir("metrics")
+        os.makedirs(self.directory, exist_ok=True)
+        self.fields = tuple(fields)
+        self._field_index = {name: i for i, name in enumerate(self.fields)}
+        self._lock = threading.Lock()
+        self._tiers = [] # list (name, resolution_s, retention_s, RingFile)
+        for name, resolution_s, retention_s, capacity in tiers:
+            ring = RingFile(os.path.join(self.directory, f"metrics_{name}.bin"), len(self.fields), capacity,
+                            resolution_s, aggregated=resolution_s > 0)
+            self._tiers.append((name, resolution_s, retention_s, ring))
+        self._buckets = {} # tên mức tổng hợp -> _Bucket đang tích lũy
+        self._appends_since_compact = 0
+        self._closed = False
+
+    def _tier(self, name):
+        for tier in self._tiers:
+            if tier[0] == name:
+                return tier
+        raise KeyError(f"Không có mức dữ liệu '{name}'")
+
+    # --- Ghi ---
+    def append_snapshot(self, snapshot):
+        values = [snapshot.get(name) for name in self.fields]
+        self.append(snapshot.get("timestamp") or time.time(), values)
+
+    def append(self, timestamp, values):
+        """Ghi một mẫu (values theo thứ tự self.fields; None/NaN = thiếu)."""
+        values = [math.nan if v is None else float(v) for v in values]
+        with self._lock:
+            if self._closed:
+                return
+            for name, resolution_s, _, ring in self._tiers:
+                if resolution_s == 0:
+                    ring.append([timestamp] + values)
+                    continue
+                bucket_start = timestamp - (timestamp % resolution_s)
+                bucket = self._buckets.get(name)
+                if bucket is None:
+                    bucket = self._load_or_new_bucket(ring, bucket_start)
+                elif bucket.start_ts != bucket_start:
+                    self._write_bucket(ring, bucket)
+                    bucket = _Bucket(bucket_start, len(self.fields))
+                bucket.add(values)
+                self._buckets[name] = bucket
+            self._appends_since_compact += 1
+            if self._appends_since_compact >= COMPACT_EVERY_N_APPENDS:
+                self._compact_locked(timestamp)
+
+    def _load_or_new_bucket(self, ring, bucket_start):
+        last = ring.last()
+        if last is not None and last[0] == bucket_start:
+            return _Bucket.from_record(last, len(self.fields)) # Tiếp tục bucket dở dang của phiên trước
+        return _Bucket(bucket_start, len(self.fields))
+
+    def _write_bucket(self, ring, bucket):
+        record = bucket.to_record()
+        if bucket.replace_last:
+            ring.replace_last(record)
+        else:
+            ring.append(record)
+
+    def _compact_locked(self, now):
+        self._appends_since_compact = 0
+        for name, _, retention_s, ring in self._tiers:
+            dropped = ring.drop_before(now - retention_s)
+            if dropped:
+                logging.debug(f"MetricsStore: đã bỏ {dropped} bản ghi hết hạn ở mức {name}.")
+
+    def compact(self, now=None):
+        with self._lock:
+            self._compact_locked(now or time.time())
+
+    def flush(self):
+        """Ghi các bucket dở dang xuống file (bucket vẫn tiếp tục được cập nhật sau đó)."""
+        with self._lock:
+            self._flush_buckets_locked()
+            for *_, ring in self._tiers:
+                ring.flush()
+
+    def _flush_buckets_locked(self):
+        for name, _, _, ring in self._tiers:
+            bucket = self._buckets.get(name)
+            if bucket is not None and bucket.count:
+                self._write_bucket(ring, bucket)
+                bucket.replace_last = True # Lần ghi sau của bucket này sẽ ghi đè bản ghi vừa tạo
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_buckets_locked()
+            for *_, ring in self._tiers:
+                ring.close()
+            self._closed = True
+
+    # --- Đọc ---
+    def choose_tier(self, start_ts, end_ts):
+        span = end_ts - start_ts
+        for name, resolution_s, retention_s, ring in self._tiers:
+            max_span = TIER_MAX_QUERY_SPAN.get(name)
+            if max_span is not None and span <= max_span and span <= retention_s:
+                return name
+        return self._tiers[-1][0]
+
+    def query(self, field, start_ts, end_ts=None, tier=None):
+        """
+        Trả về dict {"tier", "timestamps", "min", "avg", "max"} cho một trường trong khoảng [start_ts, end_ts].
+        Mức raw có min = avg = max. Có numpy: các giá trị là mảng numpy; không có: list.
+        """
+        end_ts = end_ts or time.time()
+        column = self._field_index[field]
+        with self._lock:
+            tier = tier or self.choose_tier(start_ts, end_ts)
+            name, resolution_s, _, ring = self._tier(tier)
+            if resolution_s:
+                self._flush_buckets_locked() # Bao gồm cả bucket đang tích lũy
+            # Bản ghi tổng hợp mang thời điểm đầu bucket: bucket chứa start_ts bắt đầu sau start_ts - resolution_s
+            first = ring.index_at_or_after(start_ts - resolution_s + 1e-6 if resolution_s else start_ts)
+            last = ring.index_at_or_after(end_ts + 1e-6)
+            records = ring.read_range(first, last)
+
+        if HAS_NUMPY:
+            timestamps = records["timestamp"].astype(np.float64)
+            if resolution_s:
+                triple = records["values"][:, column, :].astype(np.float64)
+                mins, avgs, maxs = triple[:, 0], triple[:, 1], triple[:, 2]
+            else:
+                mins = avgs = maxs = records["values"][:, column].astype(np.float64)
+        else:
+            timestamps = [r[0] for r in records]
+            if resolution_s:
+                mins = [r[2 + 3 * column] for r in records]
+                avgs = [r[3 + 3 * column] for r in records]
+                maxs = [r[4 + 3 * column] for r in records]
+            else:
+                mins = avgs = maxs = [r[1 + column] for r in records]
+        return {"tier": name, "timestamps": timestamps, "min": mins, "avg": avgs, "max": maxs}
+
+    def tier_info(self):
+        """Thông tin từng mức: số bản ghi, dung lượng file, khoảng thời gian có dữ liệu."""
+        info = []
+        with self._lock:
+            for name, resolution_s, retention_s, ring in self._tiers:
+                info.append({
+                    "Mức": name,
+                    "Độ phân giải (s)": resolution_s or "theo chu kỳ lấy mẫu",
+                    "Lưu giữ (giờ)": retention_s // 3600,
+                    "Số bản ghi": ring.count,
+                    "Dung lượng (KB)": round(ring._file_size() / 1024, 1),
+                    "Cũ nhất": time.strftime("%Y-%m-%d %H:%M", time.localtime(ring.timestamp_at(0))) if ring.count else "-",
+                })
+        return info
+
+    def disk_usage_bytes(self):
+        return sum(ring._file_size() for *_, ring in self._tiers)
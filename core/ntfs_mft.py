@@ -0,0 +1,431 @@
+# core/ntfs_mft.py
+# Đọc trực tiếp Master File Table (MFT) của NTFS từ volume thô (\\.\C:) hoặc từ file ảnh đĩa:
+# đọc tuần tự từng vùng lớn của $MFT, phân tích bản ghi FILE (tên, kích thước, tham chiếu cha) rồi dựng lại
+# cây đường dẫn trong bộ nhớ. Liệt kê cả volume trong vài giây thay vì duyệt thư mục hàng phút.
+import heapq
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from array import array
+
+from core.task_control import check_cancelled, report_progress
+
+NTFS_OEM_ID = b"NTFS    "
+FILE_SIGNATURE = b"FILE"
+ROOT_RECORD = 5
+MFT_RECORD = 0
+FIRST_USER_RECORD = 16    # Bản ghi 0-15 là metadata của hệ thống file ($MFT, $LogFile, ...)
+DEFAULT_READ_BYTES = 8 * 1024 * 1024
+BOOT_READ_BYTES = 4096    # Đủ cho cả ổ 4Kn (đọc volume thô phải căn theo sector)
+
+ATTR_FILE_NAME = 0x30
+ATTR_DATA = 0x80
+ATTR_END = 0xFFFFFFFF
+RECORD_IN_USE = 0x01
+RECORD_IS_DIRECTORY = 0x02
+REFERENCE_MASK = 0x0000FFFFFFFFFFFF
+
+NAMESPACE_POSIX = 0
+NAMESPACE_WIN32 = 1
+NAMESPACE_DOS = 2
+NAMESPACE_WIN32_AND_DOS = 3
+# Ưu tiên tên dài: tên 8.3 (DOS) chỉ dùng khi không có tên nào khác
+_NAMESPACE_RANK = {NAMESPACE_WIN32: 3, NAMESPACE_WIN32_AND_DOS: 3, NAMESPACE_POSIX: 2, NAMESPACE_DOS: 1}
+
+NO_PARENT = -1
+ORPHAN_PREFIX = "<mồ côi>" # Bản ghi có thư mục cha đã bị xóa/tái sử dụng
+
+FLAG_IN_USE = 0x01
+FLAG_DIRECTORY = 0x02
+FLAG_HAS_NAME = 0x04
+
+INDEX_FORMAT_VERSION = 1
+INDEX_MAGIC = b"IPCMFT01"
+# Các cột của MftIndex: tên -> (mã kiểu array, giá trị mặc định)
+_COLUMNS = (
+    ("parent", "q", NO_PARENT),
+    ("sequence", "H", 0),
+    ("parent_sequence", "H", 0),
+    ("size", "q", 0),
+    ("flags", "B", 0),
+    ("_name_rank", "B", 0),
+)
+
+
+class NtfsError(Exception):
+    """Nguồn không phải NTFS hoặc cấu trúc MFT hỏng."""
+
+
+class BootSector:
+    def __init__(self, data):
+        if data[3:11] != NTFS_OEM_ID:
+            raise NtfsError("Không phải volume NTFS (OEM ID không khớp).")
+        self.bytes_per_sector = struct.unpack_from("<H", data, 0x0B)[0]
+        sectors_per_cluster = data[0x0D]
+        if sectors_per_cluster > 0x80: # Cụm rất lớn: lưu dưới dạng số mũ âm
+            sectors_per_cluster = 1 << (256 - sectors_per_cluster)
+        self.cluster_size = self.bytes_per_sector * sectors_per_cluster
+        self.total_sectors, self.mft_lcn = struct.unpack_from("<QQ", data, 0x28)
+        clusters_per_record = struct.unpack_from("<b", data, 0x40)[0]
+        self.record_size = 1 << -clusters_per_record if clusters_per_record < 0 else clusters_per_record * self.cluster_size
+        if not self.bytes_per_sector or not self.cluster_size or self.record_size < 256 or self.record_size % self.bytes_per_sector:
+            raise NtfsError("Boot sector NTFS không hợp lệ.")
+
+
+def decode_data_runs(data, offset):
+    """Giải mã runlist của thuộc tính non-resident thành list (lcn hoặc None nếu sparse, số cluster)."""
+    runs = []
+    lcn = 0
+    while offset < len(data) and data[offset]:
+        header = data[offset]
+        length_size, offset_size = header & 0x0F, header >> 4
+        offset += 1
+        length = int.from_bytes(data[offset:offset + length_size], "little")
+        offset += length_size
+        if offset_size:
+            lcn += int.from_bytes(data[offset:offset + offset_size], "little", signed=True)
+            runs.append((lcn, length))
+        else:
+            runs.append((None, length))
+        offset += offset_size
+    return runs
+
+
+def apply_fixup(buffer, start, record_size, sector_size):
+    """
+    Áp dụng update sequence array tại chỗ: 2 byte cuối của mỗi sector được thay bằng giá trị gốc.
+    Trả về False nếu bản ghi bị ghi dở (chữ ký sector không khớp).
+    """
+    usa_offset, usa_count = struct.unpack_from("<HH", buffer, start + 4)
+    if usa_count == 0 or usa_offset + 2 * usa_count > record_size or (usa_count - 1) * sector_size > record_size:
+        return False
+    usn = buffer[start + usa_offset:start + usa_offset + 2]
+    for index in range(1, usa_count):
+        end = start + index * sector_size
+        if buffer[end - 2:end] != usn:
+            return False
+        entry = start + usa_offset + 2 * index
+        buffer[end - 2:end] = buffer[entry:entry + 2]
+    return True
+
+
+def parse_record(buffer, start, record_size):
+    """
+    Phân tích một bản ghi FILE (đã fixup). Trả về (flags, sequence, base_record, names, data_size, data_runs)
+    trong đó names là list (parent_record, parent_sequence, namespace, name); data_size/data_runs lấy từ
+    thuộc tính $DATA không tên (None nếu bản ghi này không chứa nó).
+    """
+    sequence, _, attribute_offset, flags = struct.unpack_from("<HHHH", buffer, start + 0x10)
+    base_record = struct.unpack_from("<Q", buffer, start + 0x20)[0] & REFERENCE_MASK
+    names = []
+    data_size = None
+    data_runs = None
+    offset = start + attribute_offset
+    end = start + record_size
+    while offset + 16 <= end:
+        attribute_type, length = struct.unpack_from("<II", buffer, offset)
+        if attribute_type == ATTR_END or length < 16 or offset + length > end:
+            break
+        non_resident, name_length = buffer[offset + 8], buffer[offset + 9]
+        if attribute_type == ATTR_FILE_NAME and not non_resident:
+            value_offset = offset + struct.unpack_from("<H", buffer, offset + 0x14)[0]
+            parent = struct.unpack_from("<Q", buffer, value_offset)[0]
+            char_count, namespace = buffer[value_offset + 0x40], buffer[value_offset + 0x41]
+            name = bytes(buffer[value_offset + 0x42:value_offset + 0x42 + 2 * char_count]).decode("utf-16-le", "replace")
+            names.append((parent & REFERENCE_MASK, parent >> 48, namespace, name))
+        elif attribute_type == ATTR_DATA and name_length == 0: # Chỉ luồng dữ liệu chính, bỏ qua ADS
+            if not non_resident:
+                data_size = struct.unpack_from("<I", buffer, offset + 0x10)[0]
+            else:
+                starting_vcn = struct.unpack_from("<Q", buffer, offset + 0x10)[0]
+                if starting_vcn == 0: # Chỉ extent đầu tiên mang kích thước thật
+                    data_size = struct.unpack_from("<Q", buffer, offset + 0x30)[0]
+                    runs_offset = struct.unpack_from("<H", buffer, offset + 0x20)[0]
+                    data_runs = decode_data_runs(buffer[offset + runs_offset:offset + length], 0)
+        offset += length
+    return flags, sequence, base_record, names, data_size, data_runs
+
+
+class MftIndex:
+    """
+    Bảng bản ghi MFT dạng cột (array), đánh chỉ số theo số bản ghi: cha, sequence, kích thước, cờ, tên.
+    Đường dẫn được dựng khi cần, cache theo thư mục.
+    """
+    def __init__(self, record_count=0, source=""):
+        self.source = source
+        for column, typecode, default in _COLUMNS:
+            setattr(self, column, array(typecode, [default]) * record_count)
+        self.names = [None] * record_count
+        self._dir_paths = {}
+        self.records_read = 0
+        self.seconds = 0.0
+        self.journal_id = None # Điểm mốc USN journal đã áp dụng (xem core/usn_journal.py)
+        self.next_usn = None
+
+    def __len__(self):
+        return len(self.flags)
+
+    def _grow(self, record):
+        extra = record + 1 - len(self.flags)
+        if extra > 0:
+            for column, typecode, default in _COLUMNS:
+                getattr(self, column).extend(array(typecode, [default]) * extra)
+            self.names.extend([None] * extra)
+
+    def add_record(self, record, flags, sequence, base_record, names, data_size):
+        """Gộp thông tin một bản ghi; bản ghi mở rộng (base_record != 0) được gộp vào bản ghi gốc."""
+        target = base_record if base_record else record
+        self._grow(target)
+        if not base_record:
+            self.sequence[target] = sequence
+            self.flags[target] |= FLAG_IN_USE | (FLAG_DIRECTORY if flags & RECORD_IS_DIRECTORY else 0)
+        for parent, parent_sequence, namespace, name in names:
+            rank = _NAMESPACE_RANK.get(namespace, 0)
+            if rank > self._name_rank[target]: # Hard link: giữ một tên (ưu tiên tên dài)
+                self._name_rank[target] = rank
+                self.parent[target] = parent
+                self.parent_sequence[target] = parent_sequence
+                self.names[target] = name
+                self.flags[target] |= FLAG_HAS_NAME
+        if data_size is not None:
+            self.size[target] = data_size
+
+    def set_entry(self, record, sequence, parent, parent_sequence, name, is_directory):
+        """Ghi đè tên/cha của một bản ghi (tạo mới hoặc đổi tên); dùng khi áp dụng thay đổi từ USN journal."""
+        self._grow(max(record, parent))
+        if self.flags[record] & FLAG_DIRECTORY or is_directory:
+            self._dir_paths.clear() # Đường dẫn của mọi thứ bên dưới có thể đã đổi
+        self.sequence[record] = sequence
+        self.parent[record] = parent
+        self.parent_sequence[record] = parent_sequence
+        self.names[record] = name
+        self._name_rank[record] = _NAMESPACE_RANK[NAMESPACE_WIN32]
+        self.flags[record] = FLAG_IN_USE | FLAG_HAS_NAME | (FLAG_DIRECTORY if is_directory else 0)
+
+    def remove(self, record):
+        if record >= len(self.flags) or not self.flags[record]:
+            return False
+        if self.flags[record] & FLAG_DIRECTORY:
+            self._dir_paths.clear()
+        self.flags[record] = 0
+        self.size[record] = 0
+        self.names[record] = None
+        self._name_rank[record] = 0
+        return True
+
+    def is_in_use(self, record):
+        return record < len(self.flags) and bool(self.flags[record] & FLAG_IN_USE)
+
+    def is_directory(self, record):
+        return bool(self.flags[record] & FLAG_DIRECTORY)
+
+    def _parent_valid(self, record):
+        parent = self.parent[record]
+        return (0 <= parent < len(self.flags) and self.flags[parent] & FLAG_IN_USE
+                and (not self.parent_sequence[record] or self.parent_sequence[record] == self.sequence[parent]))
+
+    def path_of(self, record):
+        """Đường dẫn tương đối so với gốc volume (gốc là ''), dùng '\\' như Windows."""
+        if record == ROOT_RECORD:
+            return ""
+        cached = self._dir_paths.get(record)
+        if cached is not None:
+            return cached
+        chain = []
+        current = record
+        prefix = None
+        while True:
+            if current == ROOT_RECORD:
+                prefix = ""
+                break
+            cached = self._dir_paths.get(current)
+            if cached is not None:
+                prefix = cached
+                break
+            if not (self.flags[current] & FLAG_HAS_NAME) or len(chain) > 1024:
+                prefix = ORPHAN_PREFIX
+                break
+            chain.append(current)
+            if not self._parent_valid(current):
+                prefix = ORPHAN_PREFIX
+                break
+            current = self.parent[current]
+        path = prefix
+        for node in reversed(chain):
+            path = f"{path}\\{self.names[node]}" if path else self.names[node]
+            if self.flags[node] & FLAG_DIRECTORY:
+                self._dir_paths[node] = path
+        return path
+
+    def iter_entries(self, include_metadata=False):
+        """Sinh (record, đường dẫn, kích thước, là thư mục) cho mọi bản ghi đang dùng có tên."""
+        start = 0 if include_metadata else FIRST_USER_RECORD
+        flags = self.flags
+        for record in range(start, len(flags)):
+            if flags[record] & (FLAG_IN_USE | FLAG_HAS_NAME) == (FLAG_IN_USE | FLAG_HAS_NAME) and record != ROOT_RECORD:
+                yield record, self.path_of(record), self.size[record], bool(flags[record] & FLAG_DIRECTORY)
+
+    def totals(self):
+        """(số file, số thư mục, tổng byte của file) trên các bản ghi người dùng."""
+        files = dirs = total = 0
+        for record in range(FIRST_USER_RECORD, len(self.flags)):
+            flags = self.flags[record]
+            if flags & FLAG_IN_USE:
+                if flags & FLAG_DIRECTORY:
+                    dirs += 1
+                else:
+                    files += 1
+                    total += self.size[record]
+        return files, dirs, total
+
+    def largest_files(self, top_n=50):
+        candidates = (record for record in range(FIRST_USER_RECORD, len(self.flags))
+                      if self.flags[record] & FLAG_IN_USE and not self.flags[record] & FLAG_DIRECTORY)
+        return [(self.path_of(record), self.size[record])
+                for record in heapq.nlargest(top_n, candidates, key=self.size.__getitem__)]
+
+    def save(self, path):
+        """
+        Định dạng: MAGIC | độ dài header (4 byte) | header JSON | các cột array | zlib(tên), giống chỉ mục của
+        core/disk_analyzer.py. Header giữ cả điểm mốc USN để chỉ mục và điểm mốc luôn khớp nhau.
+        """
+        extras = zlib.compress(json.dumps(self.names, ensure_ascii=False).encode("utf-8"))
+        header = json.dumps({
+            "version": INDEX_FORMAT_VERSION, "source": self.source, "count": len(self),
+            "journal_id": self.journal_id, "next_usn": self.next_usn,
+            "columns": [[name, code] for name, code, _ in _COLUMNS], "extras_bytes": len(extras),
+        }).encode("utf-8")
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for column, _, _ in _COLUMNS:
+                getattr(self, column).tofile(f)
+            f.write(extras)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Đọc chỉ mục đã lưu; trả về None nếu không có file hoặc sai định dạng/phiên bản."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    return None
+                header = json.loads(f.read(struct.unpack("<I", f.read(4))[0]).decode("utf-8"))
+                if header.get("version") != INDEX_FORMAT_VERSION or [[n, c] for n, c, _ in _COLUMNS] != header["columns"]:
+                    return None
+                index = cls(0, header["source"])
+                for column, typecode, _ in _COLUMNS:
+                    values = array(typecode)
+                    values.fromfile(f, header["count"])
+                    setattr(index, column, values)
+                index.names = json.loads(zlib.decompress(f.read(header["extras_bytes"])).decode("utf-8"))
+        except (OSError, ValueError, EOFError, KeyError, struct.error, zlib.error) as e:
+            logging.warning(f"Không thể đọc chỉ mục MFT {path}: {e}")
+            return None
+        index.journal_id = header.get("journal_id")
+        index.next_usn = header.get("next_usn")
+        return index
+
+
+class MftReader:
+    """Đọc MFT từ một nguồn (đường dẫn volume thô hoặc file ảnh); volume_offset cho ảnh có bảng phân vùng."""
+    def __init__(self, source, volume_offset=0, read_bytes=DEFAULT_READ_BYTES):
+        self.source = source
+        self.volume_offset = volume_offset
+        self.read_bytes = read_bytes
+        self.boot = None
+
+    def _read_at(self, handle, offset, size):
+        handle.seek(self.volume_offset + offset)
+        data = handle.read(size)
+        if len(data) < size:
+            raise NtfsError(f"Đọc thiếu dữ liệu tại offset {offset} ({len(data)}/{size} byte).")
+        return data
+
+    def _mft_runs(self, handle):
+        """Runlist của chính $MFT (bản ghi 0); MFT có thể bị phân mảnh thành nhiều vùng."""
+        boot = self.boot
+        first = bytearray(self._read_at(handle, boot.mft_lcn * boot.cluster_size, max(boot.record_size, boot.bytes_per_sector)))
+        if first[:4] != FILE_SIGNATURE or not apply_fixup(first, 0, boot.record_size, boot.bytes_per_sector):
+            raise NtfsError("Bản ghi $MFT không hợp lệ.")
+        _, _, _, _, data_size, runs = parse_record(first, 0, boot.record_size)
+        if not runs:
+            raise NtfsError("Không tìm thấy runlist của $MFT.")
+        return runs, data_size
+
+    def read(self, cancel_token=None, progress_callback=None):
+        started = time.perf_counter()
+        with open(self.source, "rb", buffering=0) as handle:
+            self.boot = boot = BootSector(self._read_at(handle, 0, BOOT_READ_BYTES))
+            runs, mft_size = self._mft_runs(handle)
+            record_size = boot.record_size
+            record_count = mft_size // record_size
+            index = MftIndex(record_count, self.source)
+            # Kích thước mỗi lần đọc: bội số của cả cluster lẫn bản ghi. Khi bản ghi lớn hơn cluster, một bản ghi
+            # có thể nằm vắt qua hai vùng của runlist: phần dư được giữ lại (carry) và ghép với lần đọc sau.
+            unit = max(boot.cluster_size, record_size)
+            chunk_size = max(unit, self.read_bytes // unit * unit)
+            buffer = bytearray(chunk_size + record_size)
+            view = memoryview(buffer)
+            carry = 0
+            record = 0
+            for lcn, clusters in runs:
+                run_bytes = clusters * boot.cluster_size
+                if lcn is None: # MFT không bao giờ sparse; phòng trường hợp hỏng
+                    record += (carry + run_bytes) // record_size
+                    carry = 0
+                    continue
+                position = 0
+                while position < run_bytes and record < record_count:
+                    check_cancelled(cancel_token)
+                    size = min(chunk_size, run_bytes - position)
+                    handle.seek(self.volume_offset + lcn * boot.cluster_size + position)
+                    got = handle.readinto(view[carry:carry + size])
+                    if not got:
+                        raise NtfsError("Đọc MFT bị cắt ngang (ảnh đĩa không đầy đủ?).")
+                    position += got
+                    available = carry + got
+                    for start in range(0, available - record_size + 1, record_size):
+                        if record >= record_count:
+                            break
+                        if buffer[start:start + 4] == FILE_SIGNATURE and apply_fixup(buffer, start, record_size, boot.bytes_per_sector):
+                            flags, sequence, base_record, names, data_size, _ = parse_record(buffer, start, record_size)
+                            if flags & RECORD_IN_USE:
+                                index.add_record(record, flags, sequence, base_record, names, data_size)
+                        record += 1
+                    carry = available % record_size
+                    if carry:
+                        buffer[:carry] = buffer[available - carry:available]
+                    report_progress(progress_callback, min(99.0, 100.0 * record / max(1, record_count)),
+                                    f"Đang đọc MFT... {record}/{record_count} bản ghi")
+            index.records_read = record
+        index.seconds = time.perf_counter() - started
+        logging.info(f"Đọc MFT {self.source}: {index.records_read} bản ghi trong {index.seconds:.2f}s")
+        return index
+
+
+def volume_device_path(volume):
+    """'C:' / 'C:\\' / 'C' -> '\\\\.\\C:' (đường dẫn volume thô trên Windows); đường dẫn khác giữ nguyên."""
+    stripped = volume.rstrip("\\/")
+    if len(stripped) == 1 and stripped.isalpha():
+        stripped += ":"
+    if len(stripped) == 2 and stripped[1] == ":":
+        return f"\\\\.\\{stripped.upper()}"
+    return volume
+
+
+def read_mft(source, volume_offset=0, cancel_token=None, progress_callback=None):
+    """
+    Đọc MFT của volume (ví dụ 'C:', cần quyền Administrator) hoặc file ảnh NTFS thô. Trả về MftIndex.
+    Ném NtfsError nếu nguồn không phải NTFS; OSError nếu không mở được nguồn.
+    """
+    if not os.path.isfile(source):
+        source = volume_device_path(source)
+    return MftReader(source, volume_offset).read(cancel_token, progress_callback)
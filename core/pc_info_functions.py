@@ -9,7 +9,6 @@ import win32com.client
 import os
 import pywintypes
 import logging
-import shutil # For file operations like temp file deletion
 import ctypes # For checking admin rightsimport platform # Ensure platform is imported for ping
 from datetime import datetime, timedelta # Thêm import datetime và timedelta
 import locale # For preferred encoding
@@ -19,55 +18,56 @@ import win32serviceutil, win32service # For optimizing windows services
 import json # Thêm import json cho phần if __name__ == "__main__":
 import winreg # Thêm import winreg để truy cập Registry
 import re # Thêm import re để sử dụng biểu thức chính quy
-
-# Try to import pynvml for NVIDIA GPU monitoring
-try:
-    import pynvml
-    HAS_PYNVML = True
-except ImportError:
-    HAS_PYNVML = False
-    logging.warning("pynvml not found. Real-time NVIDIA GPU monitoring will be unavailable. Install with 'pip install pynvml'.")
+import sqlite3 # Kho lưu trữ sự kiện (core/event_archive.py)
+from core.task_control import TaskCancelled, check_cancelled, report_progress, run_cancellable_subprocess # Hủy/tiến độ cho tác vụ dài
+
+# Số liệu GPU NVIDIA (pynvml) được quản lý bởi core/gpu_telemetry.py (phiên NVML dùng lâu dài)
+from core.gpu_telemetry import HAS_PYNVML, create_default_gpu_provider
+from core.health_rules import get_default_engine # Luật điểm sức khỏe dạng dữ liệu
+from core.benchmarks import DEFAULT_ITERATIONS as DEFAULT_BENCHMARK_ITERATIONS, run_cpu_benchmark_suite, format_benchmark_rows
+from core.memory_benchmark import run_memory_benchmark, format_memory_benchmark_rows
+from core.storage_benchmark import run_storage_benchmark, format_storage_rows, fit_file_size_mb
+from core.temp_cleanup import default_temp_targets, scan_cleanup_targets, execute_cleanup
+from core.disk_analyzer import build_disk_index
+from core.duplicate_finder import find_duplicates
+from core.leftover_detector import detect_leftovers
+from core.ntfs_mft import NtfsError, read_mft
+from core.usn_journal import build_volume_index
+from core.evtx_parser import LEVEL_NAMES, EvtxError, default_log_path, read_evtx
+from core.event_archive import DEFAULT_RETENTION_DAYS, EventArchive, format_event_data, sync_event_archive
+from core.crash_dump_scanner import DUMP_TYPE_NAMES, KIND_KERNEL, code_name, scan_crash_dumps
+import threading
+
+_gpu_provider = None
+_gpu_provider_lock = threading.Lock()
 
 def get_gpu_realtime_usage():
     """
-    Lấy thông tin sử dụng GPU theo thời gian thực (tải, bộ nhớ).
-    Ưu tiên NVIDIA (dùng pynvml).
-    Trả về dict {'load_percent', 'memory_used_mb', 'memory_total_mb'} hoặc None nếu không lấy được.
+    Lấy thông tin sử dụng GPU theo thời gian thực (tải, bộ nhớ) của GPU đầu tiên.
+    Ưu tiên NVIDIA (dùng pynvml). Phiên NVML được mở một lần và dùng lại cho các lần gọi sau;
+    giao diện dùng GpuSampler (core/gpu_telemetry.py) để lấy mẫu mọi GPU ở luồng nền.
+    Trả về dict {'load_percent', 'memory_used_mb', 'memory_total_mb', ...} hoặc None nếu không lấy được.
     """
-    if HAS_PYNVML:
+    global _gpu_provider
+    if not HAS_PYNVML:
+        return None # Không có pynvml
+    with _gpu_provider_lock:
         try:
-            pynvml.nvmlInit()
-            device_count = pynvml.nvmlDeviceGetCount()
-            if device_count > 0:
-                handle = pynvml.nvmlDeviceGetHandleByIndex(0) # Lấy GPU đầu tiên
-                utilization = pynvml.nvmlDeviceGetUtilizationRates(handle)
-                memory_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-                
-                gpu_load = utilization.gpu # GPU utilization in percent
-                mem_used_mb = memory_info.used // (1024 * 1024)
-                mem_total_mb = memory_info.total // (1024 * 1024)
-
-                return {
-                    'load_percent': gpu_load,
-                    'memory_used_mb': mem_used_mb,
-                    'memory_total_mb': mem_total_mb
-                }
-            else:
-                logging.debug("Không tìm thấy thiết bị NVIDIA nào.")
-                return None
-        except pynvml.NVMLError as error:
-            logging.warning(f"Lỗi NVML khi lấy thông tin GPU: {error}")
-            return None
+            if _gpu_provider is None:
+                provider = create_default_gpu_provider()
+                if not provider.open():
+                    provider.close()
+                    logging.debug("Không tìm thấy thiết bị NVIDIA nào.")
+                    return None
+                _gpu_provider = provider
+            samples = _gpu_provider.sample()
+            return dict(samples[0]) if samples else None
         except Exception as e:
-            logging.error(f"Lỗi không xác định khi lấy thông tin GPU (pynvml): {e}", exc_info=True)
+            logging.warning(f"Lỗi khi lấy thông tin GPU (pynvml): {e}")
+            if _gpu_provider is not None:
+                _gpu_provider.close()
+                _gpu_provider = None # Mở lại phiên ở lần gọi sau
             return None
-        finally:
-            try:
-                pynvml.nvmlShutdown()
-            except pynvml.NVMLError as error:
-                # This can happen if nvmlInit failed, no need to log again
-                pass
-    return None # Không có pynvml hoặc không tìm thấy GPU
 
 # --- Cấu hình Logging ---
 # Cấu hình cơ bản, có thể được ghi đè ở file chính
@@ -1105,7 +1105,7 @@ def _get_installed_software_from_registry(hive, key_path, flags=0):
         logging.error(f"Lỗi khi đọc software từ Registry path '{key_path}': {e}", exc_info=True)
     return software_list
 
-def get_installed_software_versions(wmi_service=None):
+def get_installed_software_versions(wmi_service=None, cancel_token=None, progress_callback=None):
     """Lấy danh sách phần mềm đã cài đặt và phiên bản của chúng (qua Registry và winget)."""
     software_list = []
     processed_names = set() # Để tránh trùng lặp từ các nguồn khác nhau
@@ -1118,7 +1118,9 @@ def get_installed_software_versions(wmi_service=None):
     # Trên hệ thống 64-bit, cũng kiểm tra view 32-bit của HKLM
     if platform.machine().endswith('64'):
         registry_paths.append((winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"))
-    for hive, path in registry_paths:
+    for index, (hive, path) in enumerate(registry_paths):
+        check_cancelled(cancel_token)
+        report_progress(progress_callback, index * 40 / len(registry_paths), "Đang đọc danh sách phần mềm từ Registry...")
         # Simplified flags: OS handles redirection for explicit WOW6432Node paths. Default access is sufficient.
         apps_from_reg = _get_installed_software_from_registry(hive, path, flags=0)
         for app in apps_from_reg:
@@ -1128,8 +1130,9 @@ def get_installed_software_versions(wmi_service=None):
     logging.info(f"Đã lấy {len(software_list)} ứng dụng từ Registry.")
 
     # --- Bổ sung/Cập nhật từ winget list ---
+    report_progress(progress_callback, None, "Đang chạy 'winget list'...") # Không biết trước thời gian chạy
     try:
-        process = subprocess.run(["winget", "list"], capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=60, creationflags=subprocess.CREATE_NO_WINDOW)
+        process = run_cancellable_subprocess(["winget", "list"], cancel_token=cancel_token, text=True, encoding='utf-8', errors='ignore', timeout=60, creationflags=subprocess.CREATE_NO_WINDOW)
         if process.returncode == 0:
             lines = process.stdout.strip().splitlines()
             if len(lines) > 2: # Header lines
@@ -1153,9 +1156,12 @@ def get_installed_software_versions(wmi_service=None):
             logging.warning(f"Lệnh 'winget list' thất bại hoặc không khả dụng. Code: {process.returncode}, Lỗi: {process.stderr}")
     except FileNotFoundError:
         logging.warning("'winget' không được tìm thấy. Không thể lấy danh sách phần mềm qua winget.")
+    except TaskCancelled:
+        raise
     except (subprocess.TimeoutExpired, Exception) as e:
         logging.error(f"Lỗi khi chạy 'winget list': {e}", exc_info=True)
 
+    report_progress(progress_callback, 100, "Đã lấy danh sách phần mềm.")
     if not software_list:
         return [{"Lỗi": "Không thể lấy danh sách phần mềm từ Registry hoặc winget."}]
     return sorted(software_list, key=lambda x: x['Tên'])
@@ -1232,10 +1238,95 @@ def generate_battery_report():
         logging.error(f"Lỗi nghiêm trọng khi tạo báo cáo pin: {e}", exc_info=True)
         return {"status": "error", "message": f"Lỗi: {e}"}
 
-def get_recent_event_logs(wmi_service, hours_ago=24, max_events_per_log=25):
+EVENT_LOG_NAMES = ("System", "Application")
+
+def _event_log_sources(log_paths=None):
+    """(tên log, đường dẫn .evtx): các file trong log_paths, hoặc System/Application của máy."""
+    if log_paths:
+        return [(os.path.splitext(os.path.basename(path))[0], path) for path in log_paths]
+    return [(name, default_log_path(name)) for name in EVENT_LOG_NAMES]
+
+def get_recent_event_logs(wmi_service=None, hours_ago=24, max_events_per_log=25, log_paths=None, cancel_token=None, progress_callback=None):
     """
     Lấy danh sách chi tiết các lỗi (Error) và cảnh báo (Warning) gần đây từ System và Application event logs.
+    Ưu tiên đọc trực tiếp file .evtx (core/evtx_parser.py, nhanh hơn nhiều và đọc được log đã xuất/sao chép
+    qua log_paths); chỉ dùng WMI (Win32_NTLogEvent) khi không đọc được file log của hệ thống.
+    """
+    events = _get_recent_event_logs_evtx(wmi_service, hours_ago, max_events_per_log, log_paths, cancel_token, progress_callback)
+    if events is not None:
+        return events
+    return _get_recent_event_logs_wmi(wmi_service, hours_ago, max_events_per_log, cancel_token, progress_callback)
+
+WMI_EVENT_LOOKUP_BATCH = 100 # Số bản ghi mỗi truy vấn WQL (giữ câu truy vấn ngắn)
+
+def _lookup_wmi_event_messages(wmi_service, log_name, records):
     """
+    Thông điệp đã định dạng theo ngôn ngữ hệ thống (Win32_NTLogEvent.Message) của các bản ghi trong log.
+    records: list (record id, event id); tra theo RecordNumber (= EventRecordID trong file .evtx) kèm EventCode để
+    không lấy nhầm bản ghi khác cùng số sau khi log bị xóa. Trả về {record id: thông điệp}; rỗng nếu không có WMI.
+    """
+    if not wmi_service or not records:
+        return {}
+    records = list(records)
+    messages = {}
+    try:
+        for start in range(0, len(records), WMI_EVENT_LOOKUP_BATCH):
+            conditions = " OR ".join(f"(RecordNumber = {int(record_id)} AND EventCode = {int(event_id)})"
+                                     for record_id, event_id in records[start:start + WMI_EVENT_LOOKUP_BATCH])
+            query = f"SELECT RecordNumber, Message FROM Win32_NTLogEvent WHERE Logfile = '{log_name}' AND ({conditions})"
+            messages.update((int(_get_wmi_property(event, "RecordNumber", 0)), _get_wmi_property(event, "Message", None))
+                            for event in wmi_service.ExecQuery(query))
+    except (pywintypes.com_error, Exception) as e: # type: ignore
+        logging.info(f"Không lấy được thông điệp Event Log '{log_name}' qua WMI: {e}")
+    return messages
+
+def _get_recent_event_logs_evtx(wmi_service, hours_ago, max_events_per_log, log_paths=None, cancel_token=None, progress_callback=None):
+    """
+    Đọc lỗi/cảnh báo từ file .evtx; trả về None nếu không đọc được log hệ thống (để dùng WMI thay thế).
+    Cột "Thông điệp" giữ văn bản đã định dạng của Windows (qua WMI) khi có; các cặp tên/giá trị EventData
+    thô nằm ở cột riêng "Dữ liệu sự kiện".
+    """
+    from datetime import timezone as dt_timezone
+    since = datetime.now(dt_timezone.utc) - timedelta(hours=hours_ago)
+    sources = _event_log_sources(log_paths)
+    collected = []
+    for log_index, (log_name, path) in enumerate(sources):
+        check_cancelled(cancel_token)
+        report_progress(progress_callback, log_index * 100 / len(sources), f"Đang đọc Event Log '{log_name}'...")
+        try:
+            events = read_evtx(path, levels=(1, 2, 3), since=since, limit=max_events_per_log, cancel_token=cancel_token)
+        except (OSError, EvtxError) as e:
+            if not log_paths:
+                logging.info(f"Không đọc trực tiếp được {path} ({e}); chuyển sang WMI.")
+                return None
+            return [{"Lỗi": f"Không thể đọc {path}: {e}"}]
+        collected.extend((log_name, event) for event in events)
+    report_progress(progress_callback, 100, "Đã quét xong Event Log.")
+    if not collected:
+        return [{"Thông tin": f"Không có lỗi hoặc cảnh báo nào được tìm thấy trong {'/'.join(name for name, _ in sources)} logs ({hours_ago} giờ qua)."}]
+    collected.sort(key=lambda item: item[1].timestamp, reverse=True)
+    collected = collected[:max_events_per_log]
+    messages = {}
+    if not log_paths: # File sao chép/xuất ra không khớp RecordNumber của log đang chạy
+        for log_name in {name for name, _ in collected}:
+            records = [(event.record_id, event.event_id) for name, event in collected if name == log_name]
+            messages[log_name] = _lookup_wmi_event_messages(wmi_service, log_name, records)
+    rows = []
+    for log_name, event in collected:
+        details = format_event_data(event)
+        message = messages.get(log_name, {}).get(event.record_id) or f"Event ID {event.event_id} (không có thông điệp đã định dạng)"
+        rows.append({
+            "Log": event.channel or log_name,
+            "Nguồn": event.provider or NOT_IDENTIFIED,
+            "Loại": event.level_name,
+            "Thời gian": event.timestamp.astimezone().strftime("%Y-%m-%d %H:%M:%S"),
+            "Thông điệp": f"{message[:200]}{'...' if len(message) > 200 else ''}",
+            "Dữ liệu sự kiện": f"{details[:200]}{'...' if len(details) > 200 else ''}",
+        })
+    return rows
+
+def _get_recent_event_logs_wmi(wmi_service, hours_ago=24, max_events_per_log=25, cancel_token=None, progress_callback=None):
+    """Phương án dự phòng: đọc qua WMI Win32_NTLogEvent (chậm, chỉ đọc được log đang hoạt động)."""
     if not wmi_service:
         return [{"Lỗi": ERROR_WMI_CONNECTION, "Chi tiết": "Không thể truy cập Event Logs."}]
 
@@ -1245,7 +1336,10 @@ def get_recent_event_logs(wmi_service, hours_ago=24, max_events_per_log=25):
         threshold_utc_dt = datetime.now(dt_timezone.utc) - timedelta(hours=hours_ago)
         event_type_map_display = {1: "Lỗi", 2: "Cảnh báo"}
 
-        for logfile_name in ["System", "Application"]:
+        logfile_names = ["System", "Application"]
+        for log_index, logfile_name in enumerate(logfile_names):
+            check_cancelled(cancel_token)
+            report_progress(progress_callback, log_index * 100 / len(logfile_names), f"Đang quét Event Log '{logfile_name}'...")
             # Modified Query: Remove TimeGenerated filter and ORDER BY from WQL
             query = (f"SELECT Logfile, SourceName, EventType, TimeGenerated, Message FROM Win32_NTLogEvent "
                      f"WHERE Logfile = '{logfile_name}' AND (EventType = 1 OR EventType = 2)")
@@ -1253,6 +1347,7 @@ def get_recent_event_logs(wmi_service, hours_ago=24, max_events_per_log=25):
             raw_events = wmi_service.ExecQuery(query)
             
             for event in raw_events:
+                check_cancelled(cancel_token)
                 time_generated_str = _get_wmi_property(event, "TimeGenerated", None)
                 event_time_pywintypes = None
                 if time_generated_str:
@@ -1306,6 +1401,7 @@ def get_recent_event_logs(wmi_service, hours_ago=24, max_events_per_log=25):
         # Limit to max_events_per_log (overall, not per log file as before)
         # Or, if you want per log, the limiting logic needs to be inside the logfile_name loop
         # For now, this is an overall limit after collecting from all specified logs.
+        report_progress(progress_callback, 100, "Đã quét xong Event Log.")
         final_event_list = []
         for event_data in sorted_events[:max_events_per_log]:
             del event_data["Thời gianObj"] # Remove helper object before returning
@@ -1320,10 +1416,93 @@ def get_recent_event_logs(wmi_service, hours_ago=24, max_events_per_log=25):
             return [{"Thông tin": f"Không có lỗi hoặc cảnh báo nào được tìm thấy trong System/Application logs ({hours_ago} giờ qua)."}]
         return final_event_list
 
+    except TaskCancelled:
+        raise
     except (pywintypes.com_error, Exception) as e: # type: ignore
         logging.error(f"Lỗi khi lấy chi tiết Event Log: {e}", exc_info=True)
         return [{"Lỗi": f"{ERROR_FETCHING_INFO} Event Logs: {str(e)}"}]
 
+def update_event_archive(log_paths=None, archive_path=None, cancel_token=None, progress_callback=None):
+    """
+    Nạp phần mới của System/Application (hoặc log_paths) vào kho lưu trữ sự kiện. GUI gọi định kỳ ở nền
+    (PRIORITY_BACKGROUND) để lịch sử được tích lũy giữa các lần tra cứu, kể cả khi log bị ghi đè vòng.
+    Trả về dict tóm tắt (số sự kiện mới, số bị xóa do quá hạn, lỗi đọc log).
+    """
+    try:
+        with EventArchive(archive_path) as archive:
+            summary = sync_event_archive(archive, _event_log_sources(log_paths),
+                                         cancel_token=cancel_token, progress_callback=progress_callback)
+    except sqlite3.Error as e:
+        logging.error(f"Lỗi kho lưu trữ sự kiện: {e}", exc_info=True)
+        return {"Lỗi": f"Không thể cập nhật kho lưu trữ sự kiện: {e}"}
+    logging.info(f"Kho lưu trữ sự kiện: nạp thêm {summary.total_added}, xóa {summary.pruned} quá hạn.")
+    result = {"Đã nạp": summary.total_added, "Đã xóa (quá hạn)": summary.pruned}
+    if summary.errors:
+        result["Lỗi"] = "; ".join(f"{name}: {error}" for name, error in summary.errors.items())
+    return result
+
+def _fill_archived_event_messages(archive, results):
+    """
+    Kho chỉ có EventData thô; với các kết quả chưa có thông điệp đã định dạng, tra qua WMI (chỉ log đang hoạt động
+    còn giữ bản ghi đó) rồi lưu lại vào kho để lần tra cứu sau không phải hỏi lại.
+    """
+    missing = {}
+    for item in results:
+        if not item["message"]:
+            missing.setdefault(item["log"], []).append(item)
+    if not missing:
+        return
+    wmi_service, com_initialized = _connect_wmi()
+    try:
+        for log_name, items in missing.items():
+            messages = _lookup_wmi_event_messages(wmi_service, log_name, [(item["record_id"], item["event_id"]) for item in items])
+            for item in items:
+                item["message"] = messages.get(item["record_id"])
+            archive.set_messages(log_name, [(item["record_id"], item["timestamp"], item["message"]) for item in items])
+    finally:
+        if com_initialized:
+            win32com.client.pythoncom.CoUninitialize()
+
+def search_event_archive(query=None, days=DEFAULT_RETENTION_DAYS, levels=None, providers=None, limit=500,
+                         log_paths=None, archive_path=None, cancel_token=None, progress_callback=None):
+    """
+    Tra cứu kho lưu trữ sự kiện cục bộ (core/event_archive.py): trước hết nạp phần mới của System/Application
+    (hoặc log_paths) vào kho, rồi tìm toàn văn query (vd. "disk", "0x80070005", tên driver) trong days ngày gần nhất.
+    Kho còn được nạp định kỳ ở nền (update_event_archive), nên lần nạp ở đây thường chỉ đọc vài bản ghi mới.
+    Thông điệp (văn bản Windows hiển thị, tra qua WMI khi log còn giữ bản ghi) và dữ liệu sự kiện (EventData thô)
+    được trả về đầy đủ, không cắt ngắn; bảng kết quả có thể lọc tiếp bằng ô tìm kiếm chung.
+    """
+    sources = _event_log_sources(log_paths)
+    try:
+        with EventArchive(archive_path) as archive:
+            summary = sync_event_archive(archive, sources, retention_days=max(days, DEFAULT_RETENTION_DAYS),
+                                         cancel_token=cancel_token, progress_callback=progress_callback)
+            since = datetime.now().astimezone() - timedelta(days=days)
+            results = archive.search(query, providers=providers, levels=levels, since=since, limit=limit)
+            if not log_paths: # File sao chép/xuất ra không khớp RecordNumber của log đang chạy
+                _fill_archived_event_messages(archive, results)
+            archived_count, oldest, _ = archive.stats()
+    except sqlite3.Error as e:
+        logging.error(f"Lỗi kho lưu trữ sự kiện: {e}", exc_info=True)
+        return [{"Lỗi": f"Không thể mở/tra cứu kho lưu trữ sự kiện: {e}"}]
+    rows = [{"Thời gian": item["timestamp"].astimezone().strftime("%Y-%m-%d %H:%M:%S"),
+             "Log": item["log"], "Nguồn": item["provider"] or NOT_IDENTIFIED,
+             "Loại": LEVEL_NAMES.get(item["level"], str(item["level"])), "Event ID": item["event_id"],
+             "Thông điệp": item["message"] or f"Event ID {item['event_id']} (không có thông điệp đã định dạng)",
+             "Dữ liệu sự kiện": item["event_data"] or ""}
+            for item in results]
+    errors = "; ".join(f"{name}: {error}" for name, error in summary.errors.items())
+    if not rows:
+        message = f"Không có sự kiện nào khớp '{query}'" if query else "Kho lưu trữ chưa có sự kiện nào"
+        return [{"Thông tin": f"{message} ({days} ngày qua, {archived_count} sự kiện trong kho).",
+                 **({"Lỗi": errors} if errors else {})}]
+    rows.append({"Thời gian": "Tổng cộng", "Log": f"{len(rows)} kết quả" + (f" (giới hạn {limit})" if len(rows) >= limit else ""),
+                 "Thông điệp": f"Kho có {archived_count} sự kiện"
+                               + (f" từ {oldest.astimezone().strftime('%Y-%m-%d')}" if oldest else "")
+                               + f"; lần này nạp thêm {summary.total_added}, xóa {summary.pruned} quá hạn"
+                               + (f"; lỗi đọc log: {errors}" if errors else "")})
+    return rows
+
 # --- Old code for get_recent_event_logs, for reference during merge/review ---
     # event_list = []
     # try:
@@ -1498,38 +1677,46 @@ def open_resource_monitor():
         logging.error(f"Lỗi khi mở Resource Monitor: {e}", exc_info=True)
         return {"status": "error", "message": f"Không thể mở Resource Monitor: {e}"}
 
-def clear_temporary_files():
-    """Xóa các file tạm, prefetch và dọn dẹp thùng rác."""
-    results = {"deleted_count": 0, "skipped_count": 0, "errors": [], "admin_rights": is_admin()}
+def preview_temporary_files(cancel_token=None, progress_callback=None):
+    """Dry run của clear_temporary_files: dung lượng thu hồi được theo nhóm, không xóa gì (FR-005)."""
+    plan = scan_cleanup_targets(default_temp_targets(), cancel_token=cancel_token, progress_callback=progress_callback)
+    check_cancelled(cancel_token)
+    if not plan.stats:
+        return [{"Thông báo": "Không tìm thấy thư mục tạm nào để dọn."}]
+    return plan.preview_rows()
 
-    if not results["admin_rights"]:
-        results["errors"].append("Một số file có thể không xóa được do thiếu quyền Administrator.")
+def clear_temporary_files(dry_run=False, cancel_token=None, progress_callback=None):
+    """
+    Xóa các file tạm và prefetch (xem core/temp_cleanup.py): quét song song để biết dung lượng sẽ thu hồi,
+    rồi xóa song song theo lô. dry_run=True chỉ quét và báo dung lượng. Có thể hủy giữa chừng qua cancel_token.
+    """
+    admin_rights = is_admin()
+    errors = []
+    if not admin_rights:
+        errors.append("Một số file có thể không xóa được do thiếu quyền Administrator.")
         logging.warning("clear_temporary_files: Chạy không có quyền Administrator.")
 
-    # Temp folders
-    temp_folders = [os.environ.get('TEMP'), os.path.join(os.environ.get('SystemRoot', 'C:\\Windows'), 'Temp')]
-    if os.name == 'nt': temp_folders.append(os.path.join(os.environ.get('SystemRoot', 'C:\\Windows'), 'Prefetch'))
-    
-    for folder in temp_folders:
-        if folder and os.path.isdir(folder):
-            for filename in os.listdir(folder):
-                file_path = os.path.join(folder, filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.unlink(file_path)
-                        results["deleted_count"] += 1
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                        results["deleted_count"] += 1 # Count folder as one item
-                except Exception as e:
-                    # Check for common errors like "in use" or "access denied"
-                    if isinstance(e, (PermissionError, OSError)) and (e.winerror == 32 or e.winerror == 5):
-                        results["skipped_count"] += 1
-                        logging.warning(f"Bỏ qua file đang sử dụng hoặc bị từ chối truy cập: {file_path} - {e}")
-                    else:
-                        results["errors"].append(f"Không thể xóa {file_path}: {e}")
-                        logging.warning(f"Không thể xóa {file_path}: {e}")
-                        
+    plan = scan_cleanup_targets(default_temp_targets(), cancel_token=cancel_token, progress_callback=progress_callback)
+    reclaimable_mb = round(plan.total_bytes / (1024 * 1024), 2)
+    if dry_run:
+        return {"status": "info", "message": f"Có thể giải phóng khoảng {reclaimable_mb} MB ({plan.total_files} file).",
+                "details": {"preview": plan.preview_rows(), "cancelled": plan.cancelled}}
+
+    cancelled = plan.cancelled
+    if not cancelled:
+        execute_cleanup(plan, cancel_token=cancel_token, progress_callback=progress_callback)
+        cancelled = plan.cancelled
+    if cancelled:
+        logging.info("clear_temporary_files: đã hủy giữa chừng.")
+
+    deleted = sum(stats.deleted_files + stats.deleted_dirs for stats in plan.stats.values())
+    skipped = sum(stats.skipped for stats in plan.stats.values())
+    freed_mb = round(sum(stats.freed_bytes for stats in plan.stats.values()) / (1024 * 1024), 2)
+    for stats in plan.stats.values():
+        errors.extend(stats.errors)
+        for error in stats.errors[:20]:
+            logging.warning(error)
+
     # Recycle Bin (requires winshell or similar, or complex native calls - this is a placeholder)
     # For simplicity, this example omits direct recycle bin emptying.
     # Consider using:
@@ -1542,13 +1729,154 @@ def clear_temporary_files():
     # except Exception as e:
     #   results["errors"].append(f"Lỗi dọn Thùng rác: {e}")
 
-    message = f"Đã xóa {results['deleted_count']} mục tạm."
-    if results["skipped_count"] > 0:
-        message += f" Đã bỏ qua {results['skipped_count']} mục đang sử dụng hoặc bị từ chối truy cập."
-    if results["errors"]: # Only count actual unexpected errors here
-        message += f" Gặp {len(results['errors'])} lỗi không mong muốn khác."
-    
-    return {"status": "success" if not results["errors"] and results["skipped_count"] == 0 else "warning", "message": message, "details": {"deleted": results["deleted_count"], "skipped": results["skipped_count"], "errors_list": results["errors"], "admin": results["admin_rights"]}}
+    message = f"Đã xóa {deleted} mục tạm, giải phóng {freed_mb} MB."
+    if cancelled:
+        message = f"Đã hủy giữa chừng. {message}"
+    if skipped > 0:
+        message += f" Đã bỏ qua {skipped} mục đang sử dụng hoặc bị từ chối truy cập."
+    if errors: # Only count actual unexpected errors here
+        message += f" Gặp {len(errors)} lỗi không mong muốn khác."
+
+    status = "success" if not errors and skipped == 0 and not cancelled else "warning"
+    return {"status": status, "message": message, "details": {"deleted": deleted, "freed_mb": freed_mb, "reclaimable_mb": reclaimable_mb, "skipped": skipped, "errors_list": errors, "admin": admin_rights, "cancelled": cancelled}}
+
+def analyze_disk_usage(root_path=None, top_n=30, full_rescan=False, cancel_token=None, progress_callback=None):
+    """
+    Phân tích dung lượng (FR-005, xem core/disk_analyzer.py): thư mục và file lớn nhất dưới root_path
+    (mặc định ổ hệ thống). Chỉ mục được lưu lại; các lần sau chỉ quét lại thư mục có thay đổi
+    (theo mtime, và theo USN journal của volume nếu có quyền đọc).
+    """
+    if root_path is None:
+        root_path = os.environ.get("SystemDrive", "C:") + "\\" if os.name == "nt" else os.path.expanduser("~")
+    if not os.path.isdir(root_path):
+        return [{"Lỗi": f"Không tìm thấy thư mục {root_path}"}]
+    index = build_disk_index(root_path, full=full_rescan, cancel_token=cancel_token, progress_callback=progress_callback)
+    root_total = index.total_bytes[0] or 1
+    rows = []
+    for path, size, files in index.largest_folders(top_n):
+        rows.append({"Loại": "Thư mục", "Đường dẫn": path, "Dung lượng (MB)": round(size / (1024 * 1024), 1),
+                     "Tỉ lệ (%)": round(100.0 * size / root_total, 2), "Số file": files})
+    for path, size in index.largest_files(top_n):
+        rows.append({"Loại": "File", "Đường dẫn": path, "Dung lượng (MB)": round(size / (1024 * 1024), 1),
+                     "Tỉ lệ (%)": round(100.0 * size / root_total, 2)})
+    rows.append({"Loại": "Tổng cộng", "Đường dẫn": index.root, "Dung lượng (MB)": round(index.total_bytes[0] / (1024 * 1024), 1),
+                 "Tỉ lệ (%)": 100.0, "Số file": index.total_files[0],
+                 "Ghi chú": f"{len(index)} thư mục, quét lại {index.rescanned_dirs} thư mục trong {index.scan_seconds:.1f}s"})
+    return rows
+
+def find_duplicate_files(root_paths=None, min_size_mb=1, top_groups=100, cancel_token=None, progress_callback=None):
+    """
+    Tìm file trùng lặp (xem core/duplicate_finder.py) dưới root_paths (mặc định thư mục người dùng).
+    Digest được cache theo (đường dẫn, kích thước, mtime, file id) nên các lần chạy sau gần như không phải đọc lại file.
+    """
+    if root_paths is None:
+        root_paths = [os.path.expanduser("~")]
+    root_paths = [path for path in root_paths if os.path.isdir(path)]
+    if not root_paths:
+        return [{"Lỗi": "Không tìm thấy thư mục cần quét."}]
+    report = find_duplicates(root_paths, min_size=int(min_size_mb * 1024 * 1024), cancel_token=cancel_token, progress_callback=progress_callback)
+    if not report.groups:
+        return [{"Thông báo": f"Không tìm thấy file trùng lặp ({report.files_scanned} file đã quét)."}]
+    rows = []
+    for number, (size, _, paths) in enumerate(report.groups[:top_groups], start=1):
+        for path in sorted(paths):
+            rows.append({"Nhóm": number, "Đường dẫn": path, "Kích thước (MB)": round(size / (1024 * 1024), 2),
+                         "Số bản sao": len(paths)})
+    rows.append({"Nhóm": "Tổng cộng", "Đường dẫn": f"{len(report.groups)} nhóm trùng",
+                 "Kích thước (MB)": round(report.wasted_bytes / (1024 * 1024), 1),
+                 "Ghi chú": f"Lãng phí; {report.files_scanned} file đã quét, {report.size_candidates} ứng viên, "
+                            f"băm {report.partial_hashed} một phần / {report.full_hashed} toàn bộ, "
+                            f"{report.cache_hits} lấy từ cache, {report.seconds:.1f}s"})
+    return rows
+
+def find_uninstall_leftovers(include_registry=True, cancel_token=None, progress_callback=None):
+    """
+    Phát hiện phần còn sót sau khi gỡ cài đặt (FR-005, xem core/leftover_detector.py): thư mục trong Program Files,
+    ProgramData, AppData và khóa Registry SOFTWARE không thuộc phần mềm nào đã cài. Chỉ liệt kê, không xóa.
+    """
+    report = detect_leftovers(include_registry=include_registry, cancel_token=cancel_token, progress_callback=progress_callback)
+    if not report.product_count:
+        return [{"Lỗi": "Không đọc được danh sách phần mềm đã cài; không thể phán đoán phần còn sót."}]
+    if not report.leftovers:
+        return [{"Thông báo": f"Không phát hiện phần còn sót ({report.checked_dirs} thư mục, {report.checked_keys} khóa đã kiểm tra)."}]
+    rows = [{"Loại": leftover.kind, "Vị trí": leftover.location, "Lý do": leftover.reason,
+             "Dung lượng (MB)": round(leftover.size_bytes / (1024 * 1024), 2) if leftover.size_bytes is not None else NOT_AVAILABLE}
+            for leftover in sorted(report.leftovers, key=lambda l: (l.kind, -(l.size_bytes or 0)))]
+    rows.append({"Loại": "Tổng cộng", "Vị trí": f"{len(report.leftovers)} mục",
+                 "Lý do": f"{report.product_count} phần mềm đã cài, {report.checked_dirs} thư mục, {report.checked_keys} khóa, {report.seconds:.1f}s"})
+    return rows
+
+def get_crash_dump_history(locations=None, top_n=100, cancel_token=None, progress_callback=None):
+    """
+    Lịch sử màn hình xanh / crash ứng dụng từ file dump (Minidump, MEMORY.DMP, LiveKernelReports, CrashDumps),
+    xem core/crash_dump_scanner.py: mỗi sự cố một dòng (mới nhất trước), sau đó là bảng tổng hợp theo mã lỗi và
+    theo driver/module gây lỗi. Chỉ đọc header của dump; kết quả được cache nên lần quét sau gần như tức thì.
+    """
+    report = scan_crash_dumps(locations, cancel_token=cancel_token, progress_callback=progress_callback)
+    if not report.dumps:
+        message = "Không tìm thấy file dump nào (máy chưa gặp sự cố màn hình xanh hoặc Windows không lưu dump)."
+        if report.access_errors:
+            return [{"Thông báo": message, "Lỗi": "Không có quyền đọc một số thư mục dump; hãy chạy với quyền Administrator."}]
+        return [{"Thông báo": message}]
+
+    format_code = lambda code: f"0x{code:08X}" if code is not None else NOT_AVAILABLE
+    rows = []
+    for dump in report.dumps[:top_n]:
+        if dump.error:
+            rows.append({"Thời gian": NOT_AVAILABLE, "File": dump.path, "Lỗi": dump.error})
+            continue
+        rows.append({
+            "Thời gian": dump.timestamp.astimezone().strftime("%Y-%m-%d %H:%M:%S") if dump.timestamp else NOT_AVAILABLE,
+            "Loại": "Màn hình xanh" if dump.kind == KIND_KERNEL else f"Crash ứng dụng ({dump.process_name or NOT_IDENTIFIED})",
+            "Mã lỗi": format_code(dump.code),
+            "Tên lỗi": dump.code_name or NOT_AVAILABLE,
+            "Tham số": ", ".join(f"0x{value:X}" for value in dump.parameters),
+            "Module gây lỗi": dump.faulting_module or NOT_IDENTIFIED,
+            "File": dump.path + (f" ({DUMP_TYPE_NAMES.get(dump.dump_type, dump.dump_type)})" if dump.dump_type is not None else ""),
+        })
+    for kind, code, count, last, modules in report.by_code():
+        top_modules = sorted(modules.items(), key=lambda item: -item[1])[:3]
+        rows.append({"Thời gian": "Tổng hợp theo mã lỗi", "Loại": "Màn hình xanh" if kind == KIND_KERNEL else "Crash ứng dụng",
+                     "Mã lỗi": format_code(code), "Tên lỗi": code_name(kind, code),
+                     "Số lần": count, "Lần gần nhất": last.astimezone().strftime("%Y-%m-%d %H:%M:%S") if last else NOT_AVAILABLE,
+                     "Module gây lỗi": ", ".join(f"{name} ({n})" for name, n in top_modules)})
+    for module, count, last, codes in report.by_module():
+        rows.append({"Thời gian": "Tổng hợp theo driver", "Module gây lỗi": module, "Số lần": count,
+                     "Lần gần nhất": last.astimezone().strftime("%Y-%m-%d %H:%M:%S") if last else NOT_AVAILABLE,
+                     "Mã lỗi": ", ".join(f"{format_code(code)} ({n})" for code, n in sorted(codes.items(), key=lambda item: -item[1]))})
+    rows.append({"Thời gian": "Tổng cộng", "Loại": f"{len(report.crashes)} sự cố",
+                 "File": f"{len(report.dumps)} file dump, {report.parsed} phân tích mới, {report.cache_hits} lấy từ cache, {report.seconds:.2f}s"
+                         + (f"; {len(report.access_errors)} thư mục không có quyền đọc" if report.access_errors else "")})
+    return rows
+
+def enumerate_ntfs_volume(volume=None, top_n=50, full_rescan=False, cancel_token=None, progress_callback=None):
+    """
+    Liệt kê nhanh một volume NTFS bằng cách đọc trực tiếp MFT (xem core/ntfs_mft.py) thay vì duyệt thư mục.
+    volume: ký tự ổ ('C:') hoặc file ảnh NTFS thô; mặc định ổ hệ thống. Đọc volume thô cần quyền Administrator.
+    Với volume thật, chỉ mục được lưu lại và các lần sau chỉ áp dụng thay đổi từ USN journal (core/usn_journal.py).
+    """
+    if volume is None:
+        volume = os.environ.get("SystemDrive", "C:")
+    if not os.path.isfile(volume) and not is_admin():
+        return [{"Lỗi": "Yêu cầu quyền Administrator để đọc trực tiếp MFT của volume."}]
+    try:
+        if os.path.isfile(volume):
+            index, changes = read_mft(volume, cancel_token=cancel_token, progress_callback=progress_callback), None
+        else:
+            index, changes = build_volume_index(volume, full=full_rescan, cancel_token=cancel_token, progress_callback=progress_callback)
+    except NtfsError as e:
+        return [{"Lỗi": f"{volume}: {e}"}]
+    except OSError as e:
+        logging.error(f"Không thể mở {volume} để đọc MFT: {e}")
+        return [{"Lỗi": f"Không thể mở {volume}: {e}"}]
+    files, dirs, total_bytes = index.totals()
+    root = volume.rstrip("\\/") if not os.path.isfile(volume) else os.path.basename(volume)
+    rows = [{"Đường dẫn": f"{root}\\{path}", "Dung lượng (MB)": round(size / (1024 * 1024), 1)}
+            for path, size in index.largest_files(top_n)]
+    rows.append({"Đường dẫn": "Tổng cộng", "Dung lượng (MB)": round(total_bytes / (1024 * 1024), 1),
+                 "Ghi chú": (f"{files} file, {dirs} thư mục; cập nhật {changes.records} thay đổi từ USN journal" if changes is not None
+                             else f"{files} file, {dirs} thư mục, {index.records_read} bản ghi MFT trong {index.seconds:.1f}s")})
+    return rows
 
 def reset_internet_connection():
     """Thực hiện các lệnh để reset cài đặt mạng. Yêu cầu quyền Admin."""
@@ -2117,46 +2445,16 @@ def list_upgradable_winget_packages():
         logging.error(f"Lỗi khi chạy 'winget upgrade' (để liệt kê): {e}", exc_info=True)
         return {"status": "error", "message": f"Lỗi khi liệt kê các gói cập nhật từ winget: {str(e)}"}
 
-def calculate_system_health_score(pc_info_dict):
+def calculate_system_health_score(pc_info_dict, snapshot=None, history=None):
     """
-    Tính toán điểm sức khỏe hệ thống dựa trên pc_info_dict.
-    Đây là một placeholder, cần logic chi tiết hơn.
+    Tính điểm sức khỏe hệ thống bằng bộ luật khai báo trong core.health_rules.
+    snapshot/history (tùy chọn) là snapshot mới nhất và hàm đọc lịch sử của MetricsSampler,
+    dùng cho các luật theo số liệu thời gian thực (CPU/RAM/ổ đĩa/GPU).
     """
-    score = 100
-    issues = []
-
-    if not pc_info_dict:
+    if not pc_info_dict and not snapshot:
         return {"score": 0, "issues": ["Không có dữ liệu PC để tính điểm."]}
-
-    # Ví dụ kiểm tra:
-    # 1. Trạng thái kích hoạt Windows
-    activation_status = pc_info_dict.get("SystemInformation", {}).get("PC", {}).get("Trạng thái kích hoạt Windows", "")
-    if activation_status != "Đã kích hoạt":
-        score -= 10
-        issues.append(f"Windows chưa được kích hoạt (Trạng thái: {activation_status}).")
-
-    # 2. Dung lượng ổ đĩa C: (ví dụ)
-    disk_usage = pc_info_dict.get("SystemCheckUtilities", {}).get("Dung lượng ổ đĩa", [])
-    for disk in disk_usage:
-        if disk.get("Ổ đĩa") == "C:":
-            percent_free = disk.get("Tỷ lệ trống (%)", 100)
-            if isinstance(percent_free, (int, float)) and percent_free < 10:
-                score -= 15
-                issues.append(f"Ổ C: còn dưới 10% dung lượng trống ({percent_free}%).")
-            elif isinstance(percent_free, (int, float)) and percent_free < 20:
-                score -= 5
-                issues.append(f"Ổ C: còn dưới 20% dung lượng trống ({percent_free}%).")
-            break
-
-    # 3. Lỗi Event Log (ví dụ)
-    event_summary = pc_info_dict.get("SystemCheckUtilities", {}).get("Tóm tắt Event Log gần đây", {})
-    system_errors = event_summary.get("System", {}).get("Errors", 0)
-    app_errors = event_summary.get("Application", {}).get("Errors", 0)
-    if system_errors > 10 or app_errors > 10: # Ngưỡng ví dụ
-        score -= 5
-        issues.append(f"Có nhiều lỗi trong Event Log (System: {system_errors}, Application: {app_errors}).")
-
-    return {"score": max(0, score), "issues": issues}
+    result = get_default_engine().evaluate(pc_info=pc_info_dict, snapshot=snapshot, history=history)
+    return {"score": result["score"], "issues": result["issues"]}
 
 def apply_gaming_mode(enable=True):
     """
@@ -2489,12 +2787,21 @@ def get_battery_details(wmi_service):
         logging.error(f"Lỗi khi lấy thông tin pin: {e}", exc_info=True)
         return [{"Lỗi": f"{ERROR_FETCHING_INFO} pin: {str(e)}"}]
 
-# --- Placeholder Functions for New Features ---
-def run_cpu_benchmark():
-    """Placeholder for CPU benchmarking."""
-    logging.info("Chức năng Đánh giá CPU được gọi (chưa triển khai đầy đủ).")
-    # A real benchmark might return scores like PassMark, Geekbench (synthetic), or time for specific tasks.
-    return {"status": "info", "message": "Chức năng Đánh giá CPU hiện chưa được triển khai đầy đủ. Một bài kiểm tra CPU thực tế có thể đo hiệu năng đơn nhân và đa nhân, ví dụ, bằng cách tính toán số Pi hoặc nén dữ liệu."}
+# --- Đánh giá hiệu năng (Benchmark): CPU, bộ nhớ, ổ đĩa (GPU vẫn là placeholder) ---
+def run_cpu_benchmark(iterations=DEFAULT_BENCHMARK_ITERATIONS, cancel_token=None, progress_callback=None):
+    """
+    Đánh giá CPU đơn nhân và đa nhân (xem core/benchmarks.py): số nguyên, số thực/NumPy, nén, băm.
+    Trả về list dict cho bảng kết quả; điểm chỉ so sánh được giữa các máy cùng phiên bản bộ đánh giá.
+    """
+    logging.info(f"Bắt đầu đánh giá CPU ({iterations} lần lặp mỗi bài).")
+    try:
+        result = run_cpu_benchmark_suite(iterations=iterations, cancel_token=cancel_token, progress_callback=progress_callback)
+    except TaskCancelled:
+        raise
+    except Exception as e:
+        logging.error(f"Lỗi khi đánh giá CPU: {e}", exc_info=True)
+        return [{"Lỗi": f"Không thể đánh giá CPU: {e}"}]
+    return format_benchmark_rows(result)
 
 def run_gpu_benchmark():
     """Placeholder for GPU benchmarking."""
@@ -2502,16 +2809,26 @@ def run_gpu_benchmark():
     # A real benchmark might render complex 3D scenes and report FPS.
     return {"status": "info", "message": "Chức năng Đánh giá GPU hiện chưa được triển khai đầy đủ. Một bài kiểm tra GPU thực tế thường bao gồm việc render đồ họa 3D để đo số khung hình mỗi giây (FPS)."}
 
-def run_memory_speed_test():
-    """Placeholder for Memory Speed Test."""
-    logging.info("Chức năng Kiểm tra Tốc độ Bộ nhớ được gọi (chưa triển khai đầy đủ).")
-    # A real test would measure read/write/copy speeds of RAM.
-    return {"status": "info", "message": "Chức năng Kiểm tra Tốc độ Bộ nhớ hiện chưa được triển khai đầy đủ. Một bài kiểm tra tốc độ bộ nhớ thực tế sẽ đo băng thông đọc, ghi và sao chép của RAM."}
+def run_memory_speed_test(cancel_token=None, progress_callback=None):
+    """
+    Kiểm tra bộ nhớ (xem core/memory_benchmark.py): băng thông STREAM Copy/Scale/Add/Triad với 1..N luồng (GB/s)
+    và độ trễ truy cập ngẫu nhiên theo kích thước vùng nhớ (ns). Trả về list dict cho bảng kết quả.
+    """
+    logging.info("Bắt đầu kiểm tra tốc độ bộ nhớ.")
+    try:
+        result = run_memory_benchmark(cancel_token=cancel_token, progress_callback=progress_callback)
+    except TaskCancelled:
+        raise
+    except Exception as e:
+        logging.error(f"Lỗi khi kiểm tra tốc độ bộ nhớ: {e}", exc_info=True)
+        return [{"Lỗi": f"Không thể kiểm tra tốc độ bộ nhớ: {e}"}]
+    return format_memory_benchmark_rows(result)
 
-def run_disk_speed_test(file_size_mb=100, block_size_kb=1024):
+def run_disk_speed_test(file_size_mb=100, block_size_kb=1024, cancel_token=None, progress_callback=None):
     """
     Performs a basic disk speed test for each local fixed drive.
     Returns a list of dictionaries, each representing a drive's test results.
+    Cancelling via cancel_token stops between blocks; the temporary file is always removed.
     """
     logging.info(f"Running basic disk speed test: file_size_MB={file_size_mb}, block_size_KB={block_size_kb}")
     results_list = []
@@ -2546,7 +2863,11 @@ def run_disk_speed_test(file_size_mb=100, block_size_kb=1024):
 
     temp_file_path = None # Initialize to ensure it's defined for finally
 
-    for drive_path in local_drives:
+    def _report_drive_progress(drive_index, phase_fraction, message):
+        report_progress(progress_callback, (drive_index + phase_fraction) * 100 / len(local_drives), message)
+
+    for drive_index, drive_path in enumerate(local_drives):
+        check_cancelled(cancel_token)
         temp_file_path = None
         drive_result = {
             "Ổ đĩa": drive_path,
@@ -2568,6 +2889,8 @@ def run_disk_speed_test(file_size_mb=100, block_size_kb=1024):
             bytes_written = 0
             with open(temp_file_path, "wb") as f:
                 while bytes_written < bytes_to_test:
+                    check_cancelled(cancel_token)
+                    _report_drive_progress(drive_index, 0.5 * bytes_written / bytes_to_test, f"Đang kiểm tra ghi {drive_path}...")
                     write_size = min(block_bytes, bytes_to_test - bytes_written)
                     # Adjust last block if smaller, or ensure data_block is used correctly
                     current_block_to_write = data_block[:write_size] if write_size < block_bytes else data_block
@@ -2585,6 +2908,8 @@ def run_disk_speed_test(file_size_mb=100, block_size_kb=1024):
             bytes_read = 0
             with open(temp_file_path, "rb") as f:
                 while True:
+                    check_cancelled(cancel_token)
+                    _report_drive_progress(drive_index, 0.5 + 0.5 * bytes_read / max(1, bytes_written), f"Đang kiểm tra đọc {drive_path}...")
                     chunk = f.read(block_bytes)
                     if not chunk:
                         break
@@ -2599,6 +2924,8 @@ def run_disk_speed_test(file_size_mb=100, block_size_kb=1024):
 
             logging.info(f"Disk speed test for {drive_path} completed: Write={write_speed_mbps} MB/s, Read={read_speed_mbps} MB/s")
 
+        except TaskCancelled:
+            raise # finally bên dưới vẫn xóa file tạm
         except Exception as e:
             logging.error(f"Error during disk speed test for {drive_path}: {e}", exc_info=True)
             drive_result["Tốc độ Ghi (MB/s)"] = NOT_AVAILABLE # Đảm bảo các trường tốc độ là NOT_AVAILABLE khi lỗi
@@ -2612,10 +2939,73 @@ def run_disk_speed_test(file_size_mb=100, block_size_kb=1024):
                 except Exception as e_del:
                     logging.error(f"Failed to delete temporary file {temp_file_path}: {e_del}")
         results_list.append(drive_result)
-        
+
+    report_progress(progress_callback, 100, "Đã kiểm tra xong tốc độ ổ đĩa.")
     return results_list # Trả về danh sách các dictionary
 
 
+def _storage_benchmark_targets():
+    """Các thư mục để đánh giá: mỗi phân vùng cục bộ ghi được một thư mục (ưu tiên thư mục TEMP nếu cùng phân vùng)."""
+    temp_dir = tempfile.gettempdir()
+    try:
+        temp_device = os.stat(temp_dir).st_dev
+    except OSError:
+        temp_device = None
+    targets = []
+    for partition in psutil.disk_partitions(all=False):
+        options = partition.opts.split(",")
+        if "cdrom" in options or "ro" in options or partition.fstype in ("", "squashfs", "iso9660", "udf"):
+            continue
+        if os.name == "nt" and "fixed" not in options:
+            continue
+        try:
+            same_device_as_temp = temp_device is not None and os.stat(partition.mountpoint).st_dev == temp_device
+        except OSError:
+            continue
+        targets.append(temp_dir if same_device_as_temp else partition.mountpoint)
+    return list(dict.fromkeys(targets))
+
+
+def run_storage_benchmark_test(target_paths=None, file_size_mb=256, duration_s=3.0, direct=True, fsync=True,
+                               mmap_read=False, cancel_token=None, progress_callback=None):
+    """
+    Đánh giá ổ lưu trữ chuyên sâu (xem core/storage_benchmark.py): SEQ1M/RND4K đọc-ghi với nhiều độ sâu hàng đợi,
+    bỏ qua cache, fsync và phân vị độ trễ. target_paths: list thư mục/mount point; None = mọi phân vùng cục bộ.
+    File thử được thu nhỏ cho vừa dung lượng trống; phân vùng quá đầy/quá nhỏ (ví dụ /boot/efi) bị bỏ qua và ghi chú trong bảng.
+    """
+    targets = list(target_paths) if target_paths else _storage_benchmark_targets()
+    if not targets:
+        return [{"Thông báo": "Không tìm thấy phân vùng cục bộ nào để đánh giá."}]
+    logging.info(f"Đánh giá ổ lưu trữ trên: {targets}")
+    rows = []
+    for index, target in enumerate(targets):
+        check_cancelled(cancel_token)
+        def _target_progress(percent, message, index=index, target=target):
+            report_progress(progress_callback, (index + (percent or 0) / 100.0) * 100 / len(targets), f"{target}: {message}")
+        try:
+            usage = psutil.disk_usage(target)
+            target_file_size_mb = fit_file_size_mb(file_size_mb, usage.free, usage.total)
+            if not target_file_size_mb:
+                logging.info(f"Bỏ qua đánh giá ổ lưu trữ {target}: chỉ còn {usage.free >> 20} MB trống.")
+                rows.append({"Ổ đĩa/Thư mục": target,
+                             "Thông báo": f"Bỏ qua: không đủ dung lượng trống ({usage.free >> 20} MB) cho file thử."})
+                continue
+            if target_file_size_mb < file_size_mb:
+                logging.info(f"Đánh giá ổ lưu trữ {target}: thu nhỏ file thử còn {target_file_size_mb} MB.")
+                rows.append({"Ổ đĩa/Thư mục": target,
+                             "Thông báo": f"File thử thu nhỏ từ {file_size_mb} MB còn {target_file_size_mb} MB do dung lượng trống ít."})
+            results = run_storage_benchmark(target, file_size_mb=target_file_size_mb, duration_s=duration_s, direct=direct,
+                                            fsync=fsync, mmap_read=mmap_read, cancel_token=cancel_token,
+                                            progress_callback=_target_progress)
+            rows.extend(format_storage_rows(target, results))
+        except TaskCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"Lỗi khi đánh giá ổ lưu trữ {target}: {e}", exc_info=True)
+            rows.append({"Ổ đĩa/Thư mục": target, "Lỗi": str(e)})
+    return rows
+
+
 def get_service_status_display(service_name):
     try:
         status = win32serviceutil.QueryServiceStatus(service_name)[1] # dwCurrentState
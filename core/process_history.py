@@ -0,0 +1,285 @@
+# core/process_history.py
+# Lịch sử tài nguyên theo tiến trình (CPU, RAM, IO) dạng ma trận cố định + báo cáo "tiến trình ngốn tài nguyên"
+# trong một khoảng thời gian bất kỳ đã qua
+import logging
+import sys
+import threading
+import time
+import warnings
+
+import psutil
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy not found. Per-process history will be unavailable. Install with 'pip install numpy'.")
+
+DEFAULT_SAMPLE_INTERVAL_S = 5.0
+DEFAULT_HISTORY_SAMPLES = 720   # 1 giờ với chu kỳ 5 giây
+DEFAULT_MAX_PROCESSES = 512     # Số tiến trình được theo dõi cùng lúc (mỗi tiến trình một hàng)
+IDLE_CPU_PERCENT = 0.5          # Dưới ngưỡng này (và không có IO) tiến trình được coi là nhàn rỗi
+IDLE_IO_BPS = 1024.0
+TRACK_RSS_MB = 256.0            # Tiến trình chiếm nhiều RAM luôn được theo dõi dù không dùng CPU
+
+METRIC_CPU = "cpu"
+METRIC_RSS = "rss"
+METRIC_IO = "io"
+_METRICS = (METRIC_CPU, METRIC_RSS, METRIC_IO)
+
+_PROCESS_ATTRS = ["pid", "name", "create_time", "cpu_times", "memory_info", "io_counters"]
+
+
+class ProcessHistory:
+    """
+    Lưu lịch sử của nhiều tiến trình trong các ma trận float32 (tiến_trình x mẫu) cấp phát một lần:
+    cột = vị trí trong vòng (chung cho mọi tiến trình, cùng một mảng timestamp), hàng = một tiến trình.
+    Bộ nhớ luôn bị chặn bởi max_processes x history_samples x 3 giá trị.
+
+    Tiến trình được định danh bằng (pid, create_time) để không nhầm khi PID được dùng lại; tên được intern.
+    Chỉ tiến trình có hoạt động (CPU/IO/RAM lớn) mới được cấp hàng; hàng được giải phóng khi lần hoạt động
+    cuối đã trôi ra khỏi vòng (tiến trình nhàn rỗi hoặc đã thoát), hoặc khi hết hàng thì loại tiến trình
+    hoạt động lâu nhất về trước.
+    """
+    def __init__(self, history_samples=DEFAULT_HISTORY_SAMPLES, max_processes=DEFAULT_MAX_PROCESSES):
+        if not HAS_NUMPY:
+            raise RuntimeError("Cần numpy để lưu lịch sử tiến trình.")
+        self.history_samples = history_samples
+        self.max_processes = max_processes
+        self._lock = threading.Lock()
+        self._timestamps = np.full(history_samples, np.nan)
+        self._data = {metric: np.full((max_processes, history_samples), np.nan, dtype=np.float32) for metric in _METRICS}
+        self._head = 0 # Cột sẽ ghi ở lần lấy mẫu kế tiếp
+        self._rows = {} # (pid, create_time) -> hàng
+        self._free_rows = list(range(max_processes - 1, -1, -1))
+        self._row_pid = np.full(max_processes, -1, dtype=np.int64)
+        self._row_name = [None] * max_processes
+        self._row_last_active = np.zeros(max_processes)
+        self._row_last_seen = np.zeros(max_processes)
+        self._previous = {} # (pid, create_time) -> (timestamp, cpu_seconds, io_bytes)
+        self.last_sample_cost_s = 0.0
+
+    # --- Ghi ---
+    def _allocate_row(self, key, name, now):
+        if not self._free_rows:
+            self._evict_least_recent()
+            if not self._free_rows:
+                return None
+        row = self._free_rows.pop()
+        self._rows[key] = row
+        self._row_pid[row] = key[0]
+        self._row_name[row] = sys.intern(name or "?")
+        self._row_last_active[row] = now
+        self._row_last_seen[row] = now
+        for matrix in self._data.values():
+            matrix[row, :] = np.nan
+        return row
+
+    def _release_row(self, key):
+        row = self._rows.pop(key)
+        self._previous.pop(key, None)
+        self._row_pid[row] = -1
+        self._row_name[row] = None
+        for matrix in self._data.values():
+            matrix[row, :] = np.nan
+        self._free_rows.append(row)
+
+    def _evict_least_recent(self):
+        if not self._rows:
+            return
+        key = min(self._rows, key=lambda k: self._row_last_active[self._rows[k]])
+        self._release_row(key)
+
+    def record(self, now, samples):
+        """
+        Ghi một lần lấy mẫu. samples: iterable (pid, create_time, name, cpu_seconds, rss_bytes, io_bytes);
+        io_bytes có thể None. Tốc độ CPU/IO được tính từ hiệu với lần ghi trước của cùng tiến trình.
+        """
+        cpu_count = psutil.cpu_count(logical=True) or 1
+        with self._lock:
+            column = self._head
+            self._timestamps[column] = now
+            for matrix in self._data.values():
+                matrix[:, column] = np.nan
+            seen = set()
+            for pid, create_time, name, cpu_seconds, rss_bytes, io_bytes in samples:
+                key = (pid, create_time)
+                seen.add(key)
+                previous = self._previous.get(key)
+                self._previous[key] = (now, cpu_seconds, io_bytes)
+                if previous is None:
+                    continue # Mẫu đầu tiên của tiến trình chỉ dùng làm mốc
+                elapsed = now - previous[0]
+                if elapsed <= 0:
+                    continue
+                cpu_percent = max(0.0, (cpu_seconds - previous[1]) / elapsed * 100.0 / cpu_count)
+                io_bps = None
+                if io_bytes is not None and previous[2] is not None:
+                    io_bps = max(0.0, (io_bytes - previous[2]) / elapsed)
+                rss_mb = rss_bytes / (1024 * 1024)
+                active = cpu_percent >= IDLE_CPU_PERCENT or (io_bps or 0.0) >= IDLE_IO_BPS or rss_mb >= TRACK_RSS_MB
+                row = self._rows.get(key)
+                if row is None:
+                    if not active:
+                        continue # Chỉ cấp hàng cho tiến trình có hoạt động
+                    row = self._allocate_row(key, name, now)
+                    if row is None:
+                        continue
+                self._data[METRIC_CPU][row, column] = cpu_percent
+                self._data[METRIC_RSS][row, column] = rss_mb
+                self._data[METRIC_IO][row, column] = np.nan if io_bps is None else io_bps
+                self._row_last_seen[row] = now
+                if active:
+                    self._row_last_active[row] = now
+
+            # Tiến trình đã thoát: bỏ mốc; hàng được giữ đến khi hoạt động cuối trôi ra khỏi vòng
+            for key in [k for k in self._previous if k not in seen]:
+                del self._previous[key]
+            oldest = np.nanmin(self._timestamps)
+            for key, row in list(self._rows.items()):
+                if self._row_last_active[row] < oldest:
+                    self._release_row(key)
+            self._head = (self._head + 1) % self.history_samples
+
+    def sample_once(self):
+        """Đọc mọi tiến trình bằng psutil và ghi vào lịch sử."""
+        cost_start = time.thread_time() if hasattr(time, "thread_time") else time.process_time()
+        samples = []
+        for proc in psutil.process_iter(_PROCESS_ATTRS):
+            info = proc.info
+            cpu_times = info.get("cpu_times")
+            memory_info = info.get("memory_info")
+            if cpu_times is None or memory_info is None:
+                continue # Không đủ quyền đọc (tiến trình hệ thống)
+            io_counters = info.get("io_counters")
+            io_bytes = (io_counters.read_bytes + io_counters.write_bytes) if io_counters is not None else None
+            samples.append((info["pid"], info.get("create_time") or 0.0, info.get("name"),
+                            cpu_times.user + cpu_times.system, memory_info.rss, io_bytes))
+        self.record(time.time(), samples)
+        cost_end = time.thread_time() if hasattr(time, "thread_time") else time.process_time()
+        self.last_sample_cost_s = cost_end - cost_start
+
+    # --- Đọc ---
+    def tracked_count(self):
+        with self._lock:
+            return len(self._rows)
+
+    def memory_bytes(self):
+        return self._timestamps.nbytes + sum(matrix.nbytes for matrix in self._data.values())
+
+    def top_offenders(self, start_ts, end_ts=None, metric=METRIC_CPU, n=10):
+        """
+        N tiến trình dùng nhiều tài nguyên nhất trong [start_ts, end_ts] theo metric (cpu/rss/io, xếp theo
+        giá trị trung bình). Mỗi phần tử: dict pid, name, cpu_avg, cpu_peak, rss_avg_mb, rss_peak_mb,
+        io_avg_bps, samples.
+        """
+        if metric not in _METRICS:
+            raise ValueError(f"metric không hợp lệ: {metric}")
+        end_ts = end_ts if end_ts is not None else time.time()
+        with self._lock:
+            with np.errstate(invalid="ignore"):
+                columns = np.flatnonzero((self._timestamps >= start_ts) & (self._timestamps <= end_ts))
+            if len(columns) == 0 or not self._rows:
+                return []
+            rows = np.fromiter(self._rows.values(), dtype=np.int64)
+            blocks = {m: self._data[m][np.ix_(rows, columns)] for m in _METRICS}
+            names = [self._row_name[row] for row in rows]
+            pids = self._row_pid[rows].copy()
+
+        with warnings.catch_warnings(): # Hàng toàn NaN (tiến trình không hoạt động trong khoảng) -> NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            averages = {m: np.nanmean(block, axis=1) for m, block in blocks.items()}
+            peaks = {m: np.nanmax(block, axis=1) for m, block in blocks.items()}
+        sample_counts = np.sum(~np.isnan(blocks[METRIC_CPU]), axis=1)
+        ranking = np.where(np.isnan(averages[metric]), -np.inf, averages[metric])
+        n = min(n, len(rows))
+        top = np.argpartition(-ranking, n - 1)[:n] if n < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-ranking[top], kind="stable")]
+
+        def _value(array, index, scale=1.0):
+            value = array[index]
+            return None if np.isnan(value) else round(float(value) * scale, 2)
+
+        report = []
+        for index in top:
+            if not np.isfinite(ranking[index]):
+                continue
+            report.append({
+                "pid": int(pids[index]),
+                "name": names[index],
+                "cpu_avg": _value(averages[METRIC_CPU], index),
+                "cpu_peak": _value(peaks[METRIC_CPU], index),
+                "rss_avg_mb": _value(averages[METRIC_RSS], index),
+                "rss_peak_mb": _value(peaks[METRIC_RSS], index),
+                "io_avg_bps": _value(averages[METRIC_IO], index),
+                "samples": int(sample_counts[index]),
+            })
+        return report
+
+
+class ProcessHistorySampler:
+    """Luồng nền gọi ProcessHistory.sample_once() theo chu kỳ; hỗ trợ pause/resume như MetricsSampler."""
+    def __init__(self, history=None, interval=DEFAULT_SAMPLE_INTERVAL_S):
+        self.history = history or ProcessHistory()
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._paused = False
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ProcessHistorySampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def set_interval(self, interval):
+        interval = max(1.0, float(interval))
+        shorter = interval < self.interval
+        self.interval = interval
+        if shorter:
+            self._wake_event.set()
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if not self._paused:
+                try:
+                    self.history.sample_once()
+                except Exception as e:
+                    logging.error(f"ProcessHistorySampler: lỗi khi lấy mẫu: {e}", exc_info=True)
+            self._wake_event.wait(None if self._paused else self.interval)
+            self._wake_event.clear()
+
+    def top_offenders_report(self, window_s=3600, metric=METRIC_CPU, n=15):
+        """Báo cáo dạng bảng (list dict, khóa tiếng Việt) cho khoảng window_s giây gần nhất."""
+        now = time.time()
+        offenders = self.history.top_offenders(now - window_s, now, metric=metric, n=n)
+        if not offenders:
+            return [{"Thông tin": "Chưa có đủ dữ liệu lịch sử tiến trình cho khoảng thời gian này."}]
+        return [{
+            "PID": item["pid"],
+            "Tên tiến trình": item["name"],
+            "CPU TB (%)": item["cpu_avg"],
+            "CPU đỉnh (%)": item["cpu_peak"],
+            "RAM TB (MB)": item["rss_avg_mb"],
+            "RAM đỉnh (MB)": item["rss_peak_mb"],
+            "IO TB (KB/s)": round(item["io_avg_bps"] / 1024, 1) if item["io_avg_bps"] is not None else None,
+            "Số mẫu": item["samples"],
+        } for item in offenders]
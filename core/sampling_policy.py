@@ -0,0 +1,85 @@
+# core/sampling_policy.py
+# Chính sách lấy mẫu thích ứng: giảm/tạm dừng thu thập số liệu khi không ai xem, để giữ CPU nền < 5% (NFR-001)
+import logging
+
+import psutil
+
+FULL_INTERVAL_S = 2.0             # Dashboard đang hiển thị
+BACKGROUND_INTERVAL_S = 10.0      # Cửa sổ hiển thị nhưng đang ở trang khác / không được focus
+HIDDEN_INTERVAL_S = 30.0          # Cửa sổ thu nhỏ hoặc bị ẩn
+HIDDEN_ON_BATTERY_INTERVAL_S = 60.0
+LOW_BATTERY_PERCENT = 20          # Dưới ngưỡng này (đang dùng pin) và cửa sổ ẩn: tạm dừng hẳn
+
+# Tỷ lệ CPU (của một lõi) tối đa mà riêng việc lấy mẫu được dùng
+FOREGROUND_CPU_BUDGET = 0.02
+BACKGROUND_CPU_BUDGET = 0.005
+
+MODE_FULL = "full"
+MODE_BACKGROUND = "background"
+MODE_HIDDEN = "hidden"
+MODE_PAUSED = "paused"
+
+
+def get_power_state():
+    """Trả về (đang_dùng_pin, phần_trăm_pin hoặc None). Máy không có pin: (False, None)."""
+    try:
+        battery = psutil.sensors_battery()
+    except Exception as e: # Một số driver ACPI trả lỗi
+        logging.debug(f"Không đọc được trạng thái pin: {e}")
+        return False, None
+    if battery is None:
+        return False, None
+    return (not battery.power_plugged), battery.percent
+
+
+class AdaptiveSamplingPolicy:
+    """
+    Quyết định chu kỳ lấy mẫu từ trạng thái hiển thị của cửa sổ, trang đang mở, nguồn điện
+    và chi phí đo được của chính luồng lấy mẫu.
+
+    decide() trả về dict:
+      - "mode": full / background / hidden / paused
+      - "metrics_interval": chu kỳ (giây) của MetricsSampler, None = tạm dừng
+      - "gpu_interval": chu kỳ của GpuSampler, None = tạm dừng
+      - "ui_refresh": có cần cập nhật thẻ trên dashboard hay không
+      - "reason": mô tả ngắn (dùng cho log)
+    """
+    def __init__(self, full_interval=FULL_INTERVAL_S, background_interval=BACKGROUND_INTERVAL_S,
+                 hidden_interval=HIDDEN_INTERVAL_S, hidden_on_battery_interval=HIDDEN_ON_BATTERY_INTERVAL_S,
+                 low_battery_percent=LOW_BATTERY_PERCENT,
+                 foreground_cpu_budget=FOREGROUND_CPU_BUDGET, background_cpu_budget=BACKGROUND_CPU_BUDGET):
+        self.full_interval = full_interval
+        self.background_interval = background_interval
+        self.hidden_interval = hidden_interval
+        self.hidden_on_battery_interval = hidden_on_battery_interval
+        self.low_battery_percent = low_battery_percent
+        self.foreground_cpu_budget = foreground_cpu_budget
+        self.background_cpu_budget = background_cpu_budget
+
+    def _apply_cost_budget(self, interval, sample_cost_s, budget):
+        # Chi phí trung bình mỗi giây = cost / interval; giãn chu kỳ đến khi nằm trong ngân sách
+        if sample_cost_s and budget > 0:
+            return max(interval, sample_cost_s / budget)
+        return interval
+
+    def decide(self, window_visible, window_active, dashboard_visible,
+               on_battery=False, battery_percent=None, sample_cost_s=0.0):
+        if not window_visible:
+            if on_battery and battery_percent is not None and battery_percent < self.low_battery_percent:
+                return {"mode": MODE_PAUSED, "metrics_interval": None, "gpu_interval": None,
+                        "ui_refresh": False, "reason": f"ẩn, pin yếu ({battery_percent}%)"}
+            interval = self.hidden_on_battery_interval if on_battery else self.hidden_interval
+            interval = self._apply_cost_budget(interval, sample_cost_s, self.background_cpu_budget)
+            return {"mode": MODE_HIDDEN, "metrics_interval": interval,
+                    "gpu_interval": None if on_battery else interval, # Không đánh thức GPU khi chạy pin
+                    "ui_refresh": False, "reason": "cửa sổ ẩn/thu nhỏ" + (" (dùng pin)" if on_battery else "")}
+
+        if dashboard_visible and window_active:
+            interval = self._apply_cost_budget(self.full_interval, sample_cost_s, self.foreground_cpu_budget)
+            return {"mode": MODE_FULL, "metrics_interval": interval, "gpu_interval": interval,
+                    "ui_refresh": True, "reason": "dashboard đang hiển thị"}
+
+        interval = self._apply_cost_budget(self.background_interval, sample_cost_s, self.background_cpu_budget)
+        return {"mode": MODE_BACKGROUND, "metrics_interval": interval, "gpu_interval": interval,
+                "ui_refresh": dashboard_visible, # Dashboard hiển thị nhưng không focus: vẫn cập nhật, thưa hơn
+                "reason": "dashboard không được focus" if dashboard_visible else "đang ở trang khác"}
@@ -0,0 +1,451 @@
+# core/storage_benchmark.py
+# Đánh giá ổ lưu trữ: tuần tự và ngẫu nhiên 4K, độ sâu hàng đợi (queue depth) bằng nhiều luồng,
+# bỏ qua page cache (O_DIRECT / FILE_FLAG_NO_BUFFERING với bộ đệm căn lề), fsync, chế độ đọc mmap
+# và phân vị độ trễ p50/p99/p99.9. Chạy được trên mọi thư mục/mount point (Windows, Linux, macOS).
+import ctypes
+import logging
+import mmap
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from core.task_control import check_cancelled, report_progress
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+IS_WINDOWS = sys.platform == "win32"
+
+DEFAULT_FILE_SIZE_MB = 256
+MIN_FILE_SIZE_MB = 32        # File nhỏ hơn thì kết quả tuần tự/ngẫu nhiên không còn ý nghĩa
+FREE_SPACE_RESERVE_MB = 256  # Luôn chừa lại trên phân vùng (tối thiểu), ngoài file thử và vùng dữ liệu ngẫu nhiên
+FREE_SPACE_RESERVE_RATIO = 0.05
+DEFAULT_DURATION_S = 3.0     # Thời gian tối đa của mỗi bài (trừ bài ghi tuần tự tạo file)
+SEQ_BLOCK_BYTES = 1 << 20
+RANDOM_BLOCK_BYTES = 4096
+IO_ALIGNMENT = 4096          # Căn lề offset/độ dài/bộ đệm cho I/O không qua cache
+RANDOM_DATA_POOL_BYTES = 16 << 20 # Dữ liệu ngẫu nhiên (không nén/khử trùng lặp được) dùng để ghi
+LATENCY_PERCENTILES = (50.0, 99.0, 99.9)
+
+PATTERN_SEQUENTIAL = "seq"
+PATTERN_RANDOM = "random"
+OP_READ = "read"
+OP_WRITE = "write"
+
+CACHE_BYPASS_DIRECT = "direct"
+CACHE_BYPASS_DROP = "drop"
+CACHE_BYPASS_NONE = "none"
+CACHE_WRITE_FSYNC = "fsync"
+
+# (tên bài, kiểu truy cập, thao tác, kích thước khối, độ sâu hàng đợi) — tương tự bộ bài của CrystalDiskMark
+DEFAULT_TESTS = (
+    ("SEQ1M Q8 Đọc", PATTERN_SEQUENTIAL, OP_READ, SEQ_BLOCK_BYTES, 8),
+    ("SEQ1M Q1 Đọc", PATTERN_SEQUENTIAL, OP_READ, SEQ_BLOCK_BYTES, 1),
+    ("RND4K Q32 Đọc", PATTERN_RANDOM, OP_READ, RANDOM_BLOCK_BYTES, 32),
+    ("RND4K Q1 Đọc", PATTERN_RANDOM, OP_READ, RANDOM_BLOCK_BYTES, 1),
+    ("RND4K Q32 Ghi", PATTERN_RANDOM, OP_WRITE, RANDOM_BLOCK_BYTES, 32),
+    ("RND4K Q1 Ghi", PATTERN_RANDOM, OP_WRITE, RANDOM_BLOCK_BYTES, 1),
+)
+
+
+def fit_file_size_mb(requested_mb, free_bytes, total_bytes):
+    """
+    Kích thước file thử (MB) vừa với dung lượng trống, chừa lại max(FREE_SPACE_RESERVE_MB, 5% dung lượng phân vùng).
+    Trả về requested_mb nếu đủ chỗ, số nhỏ hơn nếu phải thu nhỏ, 0 nếu không đủ cho MIN_FILE_SIZE_MB.
+    """
+    reserve = max(FREE_SPACE_RESERVE_MB << 20, int(total_bytes * FREE_SPACE_RESERVE_RATIO))
+    available_mb = int((free_bytes - reserve) // (1 << 20))
+    if available_mb >= requested_mb:
+        return requested_mb
+    return available_mb if available_mb >= MIN_FILE_SIZE_MB else 0
+
+
+def _aligned_buffer(size):
+    """Bộ đệm ẩn danh từ mmap: luôn căn theo trang (>= 4096 byte), đủ cho I/O không qua cache."""
+    return mmap.mmap(-1, max(size, mmap.PAGESIZE))
+
+
+class _PosixFile:
+    """File mở bằng os.open; I/O theo vị trí (pread/pwrite) để nhiều luồng dùng chung không cần khóa."""
+    def __init__(self, path, direct):
+        flags = os.O_RDWR | getattr(os, "O_BINARY", 0)
+        self.direct = False
+        if direct and hasattr(os, "O_DIRECT"):
+            try:
+                self.fd = os.open(path, flags | os.O_DIRECT)
+                self.direct = True
+                return
+            except OSError as e: # Ví dụ tmpfs không hỗ trợ O_DIRECT
+                logging.info(f"Không mở được {path} với O_DIRECT ({e}); dùng I/O có cache.")
+        self.fd = os.open(path, flags)
+        if direct and sys.platform == "darwin":
+            import fcntl
+            if hasattr(fcntl, "F_NOCACHE"):
+                fcntl.fcntl(self.fd, fcntl.F_NOCACHE, 1)
+                self.direct = True
+
+    def read_into(self, buffer, length, offset):
+        if hasattr(os, "preadv"):
+            return os.preadv(self.fd, [memoryview(buffer)[:length]], offset)
+        data = os.pread(self.fd, length, offset)
+        return len(data)
+
+    def write_from(self, buffer, length, offset):
+        return os.pwrite(self.fd, memoryview(buffer)[:length], offset)
+
+    def sync(self):
+        os.fsync(self.fd)
+
+    def drop_cache(self):
+        """Bỏ các trang của file khỏi page cache (Linux). Trả về True nếu làm được."""
+        if not hasattr(os, "posix_fadvise"):
+            return False
+        os.fsync(self.fd)
+        os.posix_fadvise(self.fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _OVERLAPPED(ctypes.Structure):
+    _fields_ = [("Internal", ctypes.c_size_t), ("InternalHigh", ctypes.c_size_t),
+                ("Offset", ctypes.c_uint32), ("OffsetHigh", ctypes.c_uint32), ("hEvent", ctypes.c_void_p)]
+
+
+class _WindowsFile:
+    """
+    File mở bằng CreateFileW qua ctypes để dùng FILE_FLAG_NO_BUFFERING | FILE_FLAG_WRITE_THROUGH
+    (Python không có O_DIRECT trên Windows). ReadFile/WriteFile với OVERLAPPED.Offset = I/O theo vị trí;
+    mỗi luồng mở handle riêng vì I/O trên một handle đồng bộ bị Windows tuần tự hóa.
+    """
+    GENERIC_READ = 0x80000000
+    GENERIC_WRITE = 0x40000000
+    FILE_SHARE_READ_WRITE = 0x1 | 0x2
+    OPEN_EXISTING = 3
+    FILE_ATTRIBUTE_NORMAL = 0x80
+    FILE_FLAG_NO_BUFFERING = 0x20000000
+    FILE_FLAG_WRITE_THROUGH = 0x80000000
+    INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+    def __init__(self, path, direct):
+        self.kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self.kernel32.CreateFileW.restype = ctypes.c_void_p
+        flags = self.FILE_ATTRIBUTE_NORMAL
+        if direct:
+            flags |= self.FILE_FLAG_NO_BUFFERING | self.FILE_FLAG_WRITE_THROUGH
+        self.handle = self.kernel32.CreateFileW(ctypes.c_wchar_p(path), self.GENERIC_READ | self.GENERIC_WRITE,
+                                                self.FILE_SHARE_READ_WRITE, None, self.OPEN_EXISTING, flags, None)
+        if self.handle in (None, self.INVALID_HANDLE_VALUE):
+            raise ctypes.WinError(ctypes.get_last_error())
+        self.direct = direct
+        self._buffer = None
+        self._c_buffer = None
+
+    def _io(self, func, buffer, length, offset):
+        if buffer is not self._buffer: # Mỗi luồng dùng một bộ đệm: tạo view ctypes một lần
+            self._buffer, self._c_buffer = buffer, (ctypes.c_char * len(buffer)).from_buffer(buffer)
+        overlapped = _OVERLAPPED(0, 0, offset & 0xFFFFFFFF, offset >> 32, None)
+        transferred = ctypes.c_uint32(0)
+        if not func(ctypes.c_void_p(self.handle), self._c_buffer, length, ctypes.byref(transferred), ctypes.byref(overlapped)):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return transferred.value
+
+    def read_into(self, buffer, length, offset):
+        return self._io(self.kernel32.ReadFile, buffer, length, offset)
+
+    def write_from(self, buffer, length, offset):
+        return self._io(self.kernel32.WriteFile, buffer, length, offset)
+
+    def sync(self):
+        if not self.kernel32.FlushFileBuffers(ctypes.c_void_p(self.handle)):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def drop_cache(self):
+        return False # Windows không có API bỏ cache theo file; dùng direct=True để bỏ qua cache
+
+    def close(self):
+        self._buffer = self._c_buffer = None # Nhả view ctypes để bộ đệm mmap đóng được
+        self.kernel32.CloseHandle(ctypes.c_void_p(self.handle))
+
+
+def _open_test_file(path, direct):
+    return _WindowsFile(path, direct) if IS_WINDOWS else _PosixFile(path, direct)
+
+
+def latency_percentiles(latencies_ns, percentiles=LATENCY_PERCENTILES):
+    """Phân vị độ trễ (micro giây) từ danh sách độ trễ nano giây."""
+    if not latencies_ns:
+        return {p: None for p in percentiles}
+    if HAS_NUMPY:
+        values = np.percentile(np.asarray(latencies_ns, dtype=np.float64), percentiles)
+        return {p: float(v) / 1000.0 for p, v in zip(percentiles, values)}
+    ordered = sorted(latencies_ns)
+    last = len(ordered) - 1
+    return {p: ordered[min(last, int(round(p / 100.0 * last)))] / 1000.0 for p in percentiles}
+
+
+class _RandomData:
+    """Vùng dữ liệu ngẫu nhiên dùng chung; mỗi lần ghi lấy một đoạn ở vị trí khác để ổ không nén/khử trùng lặp được."""
+    def __init__(self, size=RANDOM_DATA_POOL_BYTES):
+        self.pool = _aligned_buffer(size)
+        self.pool.write(os.urandom(size))
+        self.size = size
+
+    def fill(self, buffer, length, rng):
+        start = rng.randrange(0, (self.size - length) // IO_ALIGNMENT + 1) * IO_ALIGNMENT
+        buffer[:length] = self.pool[start:start + length]
+
+    def close(self):
+        self.pool.close()
+
+
+class StorageBenchmark:
+    """
+    Một lần đánh giá trên file tạm trong target_dir. Mỗi bài chạy `queue_depth` luồng, mỗi luồng có handle và
+    bộ đệm căn lề riêng và phát I/O đồng bộ liên tục cho tới hết thời gian: số I/O đang chờ thiết bị ~ queue_depth.
+    Lưu ý: vòng lặp Python giới hạn khoảng vài trăm nghìn IOPS, nên số liệu RND4K Q32 của NVMe rất nhanh có thể thấp hơn thực tế.
+    """
+    def __init__(self, target_dir, file_size_mb=DEFAULT_FILE_SIZE_MB, duration_s=DEFAULT_DURATION_S,
+                 direct=True, fsync=True, mmap_read=False, tests=DEFAULT_TESTS, seed=None):
+        self.target_dir = target_dir
+        self.file_size = max(SEQ_BLOCK_BYTES, int(file_size_mb) * (1 << 20) // SEQ_BLOCK_BYTES * SEQ_BLOCK_BYTES)
+        self.duration_s = duration_s
+        self.direct = direct
+        self.fsync = fsync
+        self.mmap_read = mmap_read
+        self.tests = tests
+        self.seed = seed if seed is not None else int(time.time())
+        self.path = None
+        self.direct_effective = False # direct I/O thực sự dùng được trên hệ thống file này
+        self.cache_bypass = CACHE_BYPASS_NONE
+        self._data = None
+
+    # --- Chuẩn bị/dọn dẹp ---
+    def _create_file(self):
+        descriptor, self.path = tempfile.mkstemp(suffix=".tmp", prefix="storage_bench_", dir=self.target_dir)
+        os.close(descriptor)
+        probe = _open_test_file(self.path, self.direct)
+        self.direct_effective = probe.direct
+        probe.close()
+        logging.info(f"Storage benchmark: file tạm {self.path}, {self.file_size >> 20} MB")
+
+    def cleanup(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        if self.path and os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                logging.error(f"Không xóa được file tạm {self.path}: {e}")
+        self.path = None
+
+    def _prepare_reads(self, buffered=False):
+        """
+        Đảm bảo bài đọc không lấy dữ liệu từ page cache (nếu có cách).
+        buffered=True cho bài đọc qua mmap: direct I/O không áp dụng cho mmap nên luôn phải xóa cache.
+        """
+        if self.direct_effective and not buffered:
+            self.cache_bypass = CACHE_BYPASS_DIRECT
+            return
+        handle = _open_test_file(self.path, False)
+        try:
+            if handle.drop_cache():
+                self.cache_bypass = CACHE_BYPASS_DROP
+            else:
+                self.cache_bypass = CACHE_BYPASS_NONE
+        finally:
+            handle.close()
+
+    # --- Chạy bài ---
+    def _run_threads(self, name, pattern, op, block, queue_depth, deadline, total_bytes, cancel_token):
+        """Chạy một bài; trả về (số byte, thời gian, list độ trễ ns)."""
+        block_count = self.file_size // block
+        next_block = [0] # Bộ đếm dùng chung cho truy cập tuần tự
+        counter_lock = threading.Lock()
+        per_thread_latencies = [[] for _ in range(queue_depth)]
+        per_thread_bytes = [0] * queue_depth
+        errors = []
+        barrier = threading.Barrier(queue_depth + 1)
+
+        def worker(index):
+            rng = random.Random(self.seed * 1000 + index)
+            latencies = per_thread_latencies[index]
+            buffer = _aligned_buffer(block)
+            try:
+                handle = _open_test_file(self.path, self.direct)
+            except Exception as e:
+                errors.append(e)
+                buffer.close()
+                barrier.abort()
+                return
+            try:
+                barrier.wait()
+                is_write = op == OP_WRITE
+                while True:
+                    if pattern == PATTERN_SEQUENTIAL:
+                        with counter_lock:
+                            block_index = next_block[0]
+                            next_block[0] += 1
+                        if block_index * block >= total_bytes:
+                            break
+                        block_index %= block_count
+                    else:
+                        if time.perf_counter() >= deadline or (cancel_token is not None and cancel_token.is_cancelled):
+                            break
+                        block_index = rng.randrange(block_count)
+                    if is_write:
+                        self._data.fill(buffer, block, rng)
+                    start = time.perf_counter_ns()
+                    if is_write:
+                        handle.write_from(buffer, block, block_index * block)
+                    else:
+                        handle.read_into(buffer, block, block_index * block)
+                    latencies.append(time.perf_counter_ns() - start)
+                    per_thread_bytes[index] += block
+                    if pattern == PATTERN_SEQUENTIAL and (time.perf_counter() >= deadline or (cancel_token is not None and cancel_token.is_cancelled)):
+                        break
+                if is_write and self.fsync:
+                    handle.sync() # Tính vào thời gian: dữ liệu phải thực sự xuống thiết bị
+            except threading.BrokenBarrierError:
+                pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                handle.close()
+                buffer.close()
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True, name=f"storage-bench-{i}") for i in range(queue_depth)]
+        for thread in threads:
+            thread.start()
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+        check_cancelled(cancel_token)
+        latencies = [value for thread_latencies in per_thread_latencies for value in thread_latencies]
+        return sum(per_thread_bytes), elapsed, latencies
+
+    def _run_mmap_read(self, deadline, cancel_token):
+        """Đọc ngẫu nhiên 4K qua mmap (mỗi lần chạm một trang -> lỗi trang và đọc từ ổ nếu không có trong cache)."""
+        rng = random.Random(self.seed)
+        latencies = []
+        pages = self.file_size // RANDOM_BLOCK_BYTES
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start_all = time.perf_counter()
+            while time.perf_counter() < deadline:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    break
+                offset = rng.randrange(pages) * RANDOM_BLOCK_BYTES
+                start = time.perf_counter_ns()
+                mapped[offset:offset + RANDOM_BLOCK_BYTES]
+                latencies.append(time.perf_counter_ns() - start)
+            elapsed = time.perf_counter() - start_all
+        check_cancelled(cancel_token)
+        return len(latencies) * RANDOM_BLOCK_BYTES, elapsed, latencies
+
+    def _write_cache_note(self):
+        if self.direct_effective:
+            return CACHE_BYPASS_DIRECT
+        return CACHE_WRITE_FSYNC if self.fsync else CACHE_BYPASS_NONE
+
+    @staticmethod
+    def _summarize(name, block, queue_depth, total_bytes, elapsed, latencies, cache_note):
+        percentiles = latency_percentiles(latencies)
+        ops = len(latencies)
+        return {
+            "name": name,
+            "block_bytes": block,
+            "queue_depth": queue_depth,
+            "bytes": total_bytes,
+            "seconds": elapsed,
+            "mb_per_s": total_bytes / (1 << 20) / elapsed if elapsed > 0 else 0.0,
+            "iops": ops / elapsed if elapsed > 0 else 0.0,
+            "ops": ops,
+            "latency_us": percentiles,
+            "cache": cache_note,
+        }
+
+    def run(self, cancel_token=None, progress_callback=None):
+        """Chạy toàn bộ các bài; trả về list kết quả (dict). File tạm luôn được xóa."""
+        results = []
+        total_steps = len(self.tests) + 1 + (1 if self.mmap_read else 0)
+        try:
+            self._create_file()
+            self._data = _RandomData()
+            # Bài ghi tuần tự đồng thời tạo nội dung file cho các bài đọc
+            report_progress(progress_callback, 0, f"Ghi tuần tự {self.file_size >> 20} MB...")
+            bytes_done, elapsed, latencies = self._run_threads("SEQ1M Q1 Ghi", PATTERN_SEQUENTIAL, OP_WRITE, SEQ_BLOCK_BYTES, 1,
+                                                               float("inf"), self.file_size, cancel_token)
+            results.append(self._summarize("SEQ1M Q1 Ghi", SEQ_BLOCK_BYTES, 1, bytes_done, elapsed, latencies, self._write_cache_note()))
+            for step, (name, pattern, op, block, queue_depth) in enumerate(self.tests, start=1):
+                check_cancelled(cancel_token)
+                report_progress(progress_callback, 100.0 * step / total_steps, f"Đang chạy {name}...")
+                if op == OP_READ:
+                    self._prepare_reads()
+                deadline = time.perf_counter() + self.duration_s
+                limit = self.file_size if pattern == PATTERN_SEQUENTIAL else float("inf")
+                bytes_done, elapsed, latencies = self._run_threads(name, pattern, op, block, queue_depth, deadline, limit, cancel_token)
+                cache_note = self.cache_bypass if op == OP_READ else self._write_cache_note()
+                results.append(self._summarize(name, block, queue_depth, bytes_done, elapsed, latencies, cache_note))
+            if self.mmap_read:
+                check_cancelled(cancel_token)
+                report_progress(progress_callback, 100.0 * (total_steps - 1) / total_steps, "Đang chạy RND4K mmap Đọc...")
+                self._prepare_reads(buffered=True)
+                if self.cache_bypass == CACHE_BYPASS_DROP:
+                    bytes_done, elapsed, latencies = self._run_mmap_read(time.perf_counter() + self.duration_s, cancel_token)
+                    results.append(self._summarize("RND4K mmap Đọc", RANDOM_BLOCK_BYTES, 1, bytes_done, elapsed, latencies, CACHE_BYPASS_DROP))
+                else:
+                    # Không xóa được cache (ví dụ Windows): mmap sẽ đọc từ page cache, không phải tốc độ ổ đĩa
+                    logging.info("Storage benchmark: bỏ qua bài đọc mmap vì không xóa được page cache của file thử.")
+        finally:
+            self.cleanup()
+        report_progress(progress_callback, 100, "Đã đánh giá xong ổ lưu trữ.")
+        return results
+
+
+CACHE_NOTES = {
+    CACHE_BYPASS_DIRECT: "Không qua cache (direct I/O)",
+    CACHE_BYPASS_DROP: "Đã xóa cache trước khi đọc",
+    CACHE_BYPASS_NONE: "Có thể đọc từ cache",
+    CACHE_WRITE_FSYNC: "Ghi qua cache, có fsync",
+}
+
+
+def format_storage_rows(target_dir, results):
+    """Dòng bảng (key tiếng Việt) cho một thư mục/ổ đĩa."""
+    rows = []
+    for item in results:
+        latency = item["latency_us"]
+        rows.append({
+            "Ổ đĩa/Thư mục": target_dir,
+            "Bài kiểm tra": item["name"],
+            "Tốc độ (MB/s)": round(item["mb_per_s"], 1),
+            "IOPS": round(item["iops"]),
+            "p50 (µs)": round(latency[50.0], 1) if latency[50.0] is not None else None,
+            "p99 (µs)": round(latency[99.0], 1) if latency[99.0] is not None else None,
+            "p99.9 (µs)": round(latency[99.9], 1) if latency[99.9] is not None else None,
+            "Số I/O": item["ops"],
+            "Cache": CACHE_NOTES.get(item["cache"], item["cache"]),
+        })
+    return rows
+
+
+def run_storage_benchmark(target_dir, file_size_mb=DEFAULT_FILE_SIZE_MB, duration_s=DEFAULT_DURATION_S, direct=True,
+                          fsync=True, mmap_read=False, tests=DEFAULT_TESTS, cancel_token=None, progress_callback=None):
+    """Tiện ích: chạy StorageBenchmark trên target_dir và trả về list kết quả."""
+    benchmark = StorageBenchmark(target_dir, file_size_mb, duration_s, direct, fsync, mmap_read, tests)
+    return benchmark.run(cancel_token=cancel_token, progress_callback=progress_callback)
@@ -0,0 +1,115 @@
+# core/task_control.py
+# Giao thức hủy hợp tác (cooperative cancellation) và báo tiến độ cho các tác vụ chạy lâu
+import inspect
+import logging
+import subprocess
+import threading
+import time
+
+# Tên tham số mà các hàm core dùng để nhận token hủy và hàm báo tiến độ
+CANCEL_TOKEN_PARAM = "cancel_token"
+PROGRESS_CALLBACK_PARAM = "progress_callback"
+
+
+class TaskCancelled(Exception):
+    """Tác vụ dừng sớm vì đã nhận yêu cầu hủy."""
+
+
+class CancellationToken:
+    """
+    Cờ hủy dùng chung giữa luồng gọi (GUI/scheduler) và hàm đang chạy.
+    Hàm core kiểm tra token ở các điểm an toàn (giữa các file, các ổ đĩa, các bản ghi...)
+    rồi tự dọn dẹp và dừng, thay vì bị buộc dừng giữa chừng.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="Đã hủy"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TaskCancelled(self.reason or "Đã hủy")
+
+    def wait(self, timeout):
+        """Ngủ tối đa timeout giây nhưng thức dậy ngay khi bị hủy. Trả về True nếu đã bị hủy."""
+        return self._event.wait(timeout)
+
+
+def check_cancelled(cancel_token):
+    """Ném TaskCancelled nếu token đã bị hủy; bỏ qua khi không có token."""
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+def report_progress(progress_callback, percent=None, message=""):
+    """
+    Gửi tiến độ (0-100, hoặc None nếu không xác định) kèm thông điệp.
+    Lỗi trong callback không được làm hỏng tác vụ.
+    """
+    if progress_callback is None:
+        return
+    try:
+        if percent is not None:
+            percent = max(0.0, min(100.0, float(percent)))
+        progress_callback(percent, message)
+    except Exception as e:
+        logging.debug(f"Lỗi khi báo tiến độ: {e}")
+
+
+class StepProgress:
+    """Tiến độ của tác vụ gồm một số bước biết trước: mỗi step() quy đổi số bước đã xong thành phần trăm."""
+    def __init__(self, progress_callback, total_steps):
+        self.progress_callback = progress_callback
+        self.total_steps = max(1, total_steps)
+        self.done = 0
+
+    def step(self, message):
+        self.done += 1
+        report_progress(self.progress_callback, 100.0 * self.done / self.total_steps, message)
+
+
+def accepts_task_control(func):
+    """Trả về (nhận_cancel_token, nhận_progress_callback) dựa trên chữ ký của hàm."""
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False, False
+    has_var_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values())
+    if has_var_kwargs and not (CANCEL_TOKEN_PARAM in parameters or PROGRESS_CALLBACK_PARAM in parameters):
+        return False, False # **kwargs chung chung không có nghĩa là hàm hiểu giao thức này
+    return CANCEL_TOKEN_PARAM in parameters, PROGRESS_CALLBACK_PARAM in parameters
+
+
+def run_cancellable_subprocess(args, cancel_token=None, timeout=None, poll_interval=0.25, **popen_kwargs):
+    """
+    Tương tự subprocess.run(capture_output=True) nhưng kiểm tra token hủy định kỳ;
+    khi bị hủy, tiến trình con bị kill và TaskCancelled được ném ra.
+    """
+    popen_kwargs.setdefault("stdout", subprocess.PIPE)
+    popen_kwargs.setdefault("stderr", subprocess.PIPE)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with subprocess.Popen(args, **popen_kwargs) as process:
+        while True:
+            wait_for = poll_interval
+            if deadline is not None:
+                wait_for = min(wait_for, max(0.0, deadline - time.monotonic()))
+            try:
+                stdout, stderr = process.communicate(timeout=wait_for)
+                return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+            except subprocess.TimeoutExpired:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    process.kill()
+                    process.communicate()
+                    raise TaskCancelled(cancel_token.reason or "Đã hủy")
+                if deadline is not None and time.monotonic() >= deadline:
+                    process.kill()
+                    stdout, stderr = process.communicate()
+                    raise subprocess.TimeoutExpired(args, timeout, output=stdout, stderr=stderr)
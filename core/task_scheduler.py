@@ -0,0 +1,417 @@
+# core/task_scheduler.py
+# Bộ lập lịch tác vụ dùng một nhóm luồng cố định (không phụ thuộc Qt)
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from core.task_control import ( # type: ignore
+    CancellationToken, TaskCancelled, accepts_task_control, CANCEL_TOKEN_PARAM, PROGRESS_CALLBACK_PARAM
+)
+
+# Độ ưu tiên: số nhỏ hơn được chạy trước
+PRIORITY_INTERACTIVE = 0   # Tác vụ do người dùng bấm nút
+PRIORITY_BACKGROUND = 10   # Tác vụ nền (kiểm tra trạng thái, làm mới định kỳ)
+
+DEFAULT_TASK_TYPE = "default"
+
+# Khoảng cách tối thiểu giữa hai lần chuyển tiến độ cho callback (giây); 0% và 100% luôn được chuyển
+PROGRESS_MIN_INTERVAL = 0.1
+
+# Trạng thái của một tác vụ
+TASK_PENDING = "pending"
+TASK_RUNNING = "running"
+TASK_DONE = "done"
+TASK_FAILED = "failed"
+TASK_CANCELLED = "cancelled"
+
+
+class SchedulerShutdownError(RuntimeError):
+    """Gửi tác vụ sau khi scheduler đã dừng."""
+
+
+def _freeze(value):
+    """Chuyển tham số về dạng hashable (list -> tuple, dict -> tuple đã sắp xếp) để làm khóa gộp tác vụ."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return tuple(sorted(repr(item) for item in value))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def make_task_key(func, args=(), kwargs=None, *extra):
+    """Khóa single-flight: cùng hàm + cùng tham số (+ phần phân biệt thêm như namespace WMI) thì cùng khóa."""
+    return (getattr(func, "__module__", None), getattr(func, "__qualname__", repr(func)),
+            _freeze(tuple(args)), _freeze(kwargs or {}), _freeze(extra))
+
+
+class TaskHandle:
+    """
+    Kết quả tương lai (future) của một tác vụ đã gửi vào TaskScheduler.
+    Callback đăng ký bằng add_done_callback chạy trên luồng worker (hoặc ngay lập tức nếu tác vụ đã xong).
+    Mỗi handle có một CancellationToken; hàm tác vụ khai báo tham số cancel_token/progress_callback
+    sẽ nhận token này và hàm báo tiến độ (xem core/task_control.py).
+    """
+    def __init__(self, task_id, name, func, args, kwargs, task_type, priority):
+        self.task_id = task_id
+        self.name = name
+        self.task_type = task_type
+        self.priority = priority
+        self.state = TASK_PENDING
+        self.result = None
+        self.error = None
+        self.coalesce_key = None
+        self.cancel_token = CancellationToken()
+        self.progress = None          # (percent, message) gần nhất
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._done_event = threading.Event()
+        self._callbacks = []
+        self._progress_callbacks = []
+        self._last_progress_emit = 0.0
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._done_event.is_set()
+
+    def wait(self, timeout=None):
+        """Chờ tác vụ kết thúc. Trả về True nếu đã xong trong thời gian chờ."""
+        return self._done_event.wait(timeout)
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._done_event.is_set():
+                self._callbacks.append(callback)
+                return
+        self._invoke_callback(callback)
+
+    def add_progress_callback(self, callback):
+        """callback(handle, percent, message) được gọi trên luồng worker mỗi khi tác vụ báo tiến độ."""
+        with self._lock:
+            self._progress_callbacks.append(callback)
+
+    def cancel(self, reason="Đã hủy"):
+        """Yêu cầu hủy; tác vụ đang chạy sẽ dừng ở điểm kiểm tra kế tiếp."""
+        self.cancel_token.cancel(reason)
+
+    def _report_progress(self, percent, message=""):
+        self.progress = (percent, message)
+        now = time.monotonic()
+        if percent not in (0, 100, None) and now - self._last_progress_emit < PROGRESS_MIN_INTERVAL:
+            return # Giới hạn tần suất để không làm ngập hàng đợi sự kiện của GUI
+        self._last_progress_emit = now
+        with self._lock:
+            callbacks = list(self._progress_callbacks)
+        for callback in callbacks:
+            try:
+                callback(self, percent, message)
+            except Exception:
+                logging.exception(f"Lỗi trong callback tiến độ của tác vụ {self.name}:")
+
+    def _invoke_callback(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            logging.exception(f"Lỗi trong callback của tác vụ {self.name}:")
+
+    def _finish(self, state, result=None, error=None):
+        with self._lock:
+            if self._done_event.is_set():
+                return
+            self.state = state
+            self.result = result
+            self.error = error
+            self.finished_at = time.monotonic()
+            self._done_event.set()
+            callbacks, self._callbacks = self._callbacks, []
+            self._progress_callbacks = []
+        for callback in callbacks:
+            self._invoke_callback(callback)
+
+    def __repr__(self):
+        return f"<TaskHandle #{self.task_id} {self.name} [{self.task_type}] {self.state}>"
+
+
+class TaskScheduler:
+    """
+    Nhóm luồng cố định với hàng đợi ưu tiên và giới hạn số tác vụ đồng thời theo loại.
+
+    - max_workers: số luồng worker (tạo một lần, tái sử dụng cho mọi tác vụ).
+    - type_limits: dict {task_type: số tác vụ tối đa chạy cùng lúc}; loại không có trong dict chỉ bị giới hạn bởi max_workers.
+    - worker_initializer / worker_finalizer: gọi một lần ở đầu/cuối mỗi luồng worker
+      (ví dụ CoInitialize/CoUninitialize), thay vì cho từng tác vụ.
+    Tác vụ đã xong được bỏ khỏi sổ theo dõi ngay, chỉ còn lại số liệu thống kê.
+
+    Single-flight: khi gửi kèm coalesce_key, nếu đã có tác vụ cùng khóa đang chờ hoặc đang chạy
+    thì trả về chính TaskHandle đó (người gọi sau nhận cùng kết quả) thay vì chạy lại.
+    """
+    def __init__(self, max_workers=4, type_limits=None, worker_initializer=None, worker_finalizer=None, name="TaskScheduler"):
+        if max_workers < 1:
+            raise ValueError("max_workers phải >= 1")
+        self.max_workers = max_workers
+        self.type_limits = dict(type_limits or {})
+        self.name = name
+        self._worker_initializer = worker_initializer
+        self._worker_finalizer = worker_finalizer
+
+        self._condition = threading.Condition()
+        self._queue = []             # heap (priority, seq, handle) các tác vụ sẵn sàng chạy
+        self._deferred = {}          # task_type -> list handle đang chờ vì loại đó đã đủ giới hạn
+        self._running = {}           # task_id -> handle
+        self._running_by_type = {}   # task_type -> số tác vụ đang chạy
+        self._inflight = {}          # coalesce_key -> handle chưa kết thúc
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._shutdown = False
+
+        # Số liệu thống kê
+        self._stats = {
+            "submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "coalesced": 0,
+            "max_queue_depth": 0, "executed": 0, "total_wait_time": 0.0, "total_run_time": 0.0,
+        }
+
+        self._workers = []
+        for index in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"{name}-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    # --- Gửi tác vụ ---
+    def submit(self, func, *args, task_name=None, task_type=DEFAULT_TASK_TYPE, priority=PRIORITY_INTERACTIVE,
+               coalesce_key=None, **kwargs):
+        """Đưa một tác vụ vào hàng đợi, trả về TaskHandle (có thể là handle đang chạy nếu trùng coalesce_key)."""
+        with self._condition:
+            if self._shutdown:
+                raise SchedulerShutdownError(f"{self.name} đã dừng, không nhận thêm tác vụ.")
+            if coalesce_key is not None:
+                existing = self._inflight.get(coalesce_key)
+                if existing is not None and not existing.done() and not existing.cancel_token.is_cancelled:
+                    self._stats["coalesced"] += 1
+                    if existing.state == TASK_PENDING and priority < existing.priority:
+                        self._raise_priority_locked(existing, priority)
+                    logging.debug(f"{self.name}: gộp yêu cầu '{task_name}' vào {existing!r}")
+                    return existing
+            handle = TaskHandle(next(self._ids), task_name or getattr(func, "__name__", "task"),
+                                func, args, kwargs, task_type, priority)
+            if coalesce_key is not None:
+                handle.coalesce_key = coalesce_key
+                self._inflight[coalesce_key] = handle
+            heapq.heappush(self._queue, (priority, next(self._seq), handle))
+            self._stats["submitted"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue_depth_locked())
+            self._condition.notify()
+        logging.debug(f"{self.name}: đã nhận {handle!r} (hàng đợi: {self.queue_depth()})")
+        return handle
+
+    def _raise_priority_locked(self, handle, priority):
+        # Yêu cầu tương tác gộp vào tác vụ nền đang chờ: tác vụ được nâng độ ưu tiên
+        handle.priority = priority
+        for index, entry in enumerate(self._queue):
+            if entry[2] is handle:
+                self._queue[index] = (priority, entry[1], handle)
+                heapq.heapify(self._queue)
+                break
+
+    def _forget_inflight_locked(self, handle):
+        key = getattr(handle, "coalesce_key", None)
+        if key is not None and self._inflight.get(key) is handle:
+            del self._inflight[key]
+
+    def cancel(self, handle, reason="Đã hủy"):
+        """
+        Hủy tác vụ: tác vụ đang chờ bị bỏ khỏi hàng đợi; tác vụ đang chạy được báo hủy qua token
+        và dừng ở điểm kiểm tra kế tiếp. Trả về True nếu yêu cầu hủy có hiệu lực.
+        """
+        with self._condition:
+            if handle.state == TASK_RUNNING:
+                handle.cancel(reason)
+                self._forget_inflight_locked(handle) # Yêu cầu mới không được gắn vào lần chạy sẽ kết thúc "đã hủy"
+                return True
+            if handle.state != TASK_PENDING:
+                return False
+            removed = self._remove_pending_locked(handle)
+            if removed:
+                self._forget_inflight_locked(handle)
+                self._stats["cancelled"] += 1
+        if removed:
+            handle._finish(TASK_CANCELLED)
+        return removed
+
+    def _remove_pending_locked(self, handle):
+        for index, entry in enumerate(self._queue):
+            if entry[2] is handle:
+                self._queue.pop(index)
+                heapq.heapify(self._queue)
+                return True
+        deferred = self._deferred.get(handle.task_type)
+        if deferred and handle in deferred:
+            deferred.remove(handle)
+            return True
+        return False
+
+    # --- Vòng lặp worker ---
+    def _worker_loop(self):
+        if self._worker_initializer:
+            try:
+                self._worker_initializer()
+            except Exception:
+                logging.exception(f"{self.name}: lỗi khởi tạo luồng worker.")
+        try:
+            while True:
+                handle = self._next_task()
+                if handle is None:
+                    return
+                self._execute(handle)
+        finally:
+            if self._worker_finalizer:
+                try:
+                    self._worker_finalizer()
+                except Exception:
+                    logging.exception(f"{self.name}: lỗi dọn dẹp luồng worker.")
+
+    def _next_task(self):
+        """Lấy tác vụ ưu tiên cao nhất mà loại của nó chưa đạt giới hạn; None khi scheduler dừng."""
+        with self._condition:
+            while True:
+                if self._shutdown and not self._queue:
+                    return None
+                while self._queue:
+                    _, _, handle = heapq.heappop(self._queue)
+                    limit = self.type_limits.get(handle.task_type)
+                    if limit is not None and self._running_by_type.get(handle.task_type, 0) >= limit:
+                        # Tạm giữ lại; sẽ được đưa về hàng đợi khi một tác vụ cùng loại kết thúc
+                        self._deferred.setdefault(handle.task_type, []).append(handle)
+                        continue
+                    handle.state = TASK_RUNNING
+                    handle.started_at = time.monotonic()
+                    self._running[handle.task_id] = handle
+                    self._running_by_type[handle.task_type] = self._running_by_type.get(handle.task_type, 0) + 1
+                    self._stats["total_wait_time"] += handle.started_at - handle.submitted_at
+                    return handle
+                self._condition.wait()
+
+    def _execute(self, handle):
+        try:
+            handle.cancel_token.raise_if_cancelled() # Bị hủy trong lúc còn chờ nhưng đã được lấy ra
+            kwargs = dict(handle._kwargs)
+            wants_token, wants_progress = accepts_task_control(handle._func)
+            if wants_token:
+                kwargs.setdefault(CANCEL_TOKEN_PARAM, handle.cancel_token)
+            if wants_progress:
+                kwargs.setdefault(PROGRESS_CALLBACK_PARAM, handle._report_progress)
+            result = handle._func(*handle._args, **kwargs)
+        except TaskCancelled as e:
+            self._release(handle, failed=False, cancelled=True)
+            handle._finish(TASK_CANCELLED, error=e)
+        except BaseException as e:
+            self._release(handle, failed=True)
+            handle._finish(TASK_FAILED, error=e)
+        else:
+            self._release(handle, failed=False)
+            handle._finish(TASK_DONE, result=result)
+        finally:
+            handle._func = handle._args = handle._kwargs = None # Không giữ tham chiếu tới dữ liệu của tác vụ đã xong
+
+    def _release(self, handle, failed, cancelled=False):
+        with self._condition:
+            self._running.pop(handle.task_id, None)
+            self._forget_inflight_locked(handle)
+            remaining = self._running_by_type.get(handle.task_type, 1) - 1
+            if remaining > 0:
+                self._running_by_type[handle.task_type] = remaining
+            else:
+                self._running_by_type.pop(handle.task_type, None)
+            deferred = self._deferred.pop(handle.task_type, None)
+            if deferred:
+                for waiting in deferred:
+                    heapq.heappush(self._queue, (waiting.priority, next(self._seq), waiting))
+            self._stats["cancelled" if cancelled else "failed" if failed else "completed"] += 1
+            self._stats["executed"] += 1
+            self._stats["total_run_time"] += time.monotonic() - handle.started_at
+            self._condition.notify_all()
+
+    # --- Thống kê ---
+    def _queue_depth_locked(self):
+        return len(self._queue) + sum(len(items) for items in self._deferred.values())
+
+    def queue_depth(self):
+        with self._condition:
+            return self._queue_depth_locked()
+
+    def active_count(self):
+        """Số tác vụ đang chạy hoặc đang chờ."""
+        with self._condition:
+            return len(self._running) + self._queue_depth_locked()
+
+    def running_tasks(self):
+        with self._condition:
+            return list(self._running.values())
+
+    def get_metrics(self):
+        """Trả về dict số liệu: độ sâu hàng đợi, số tác vụ đang chạy (theo loại), tổng đã xong/lỗi/hủy, thời gian chờ trung bình."""
+        with self._condition:
+            finished = self._stats["executed"]
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self._queue_depth_locked(),
+                "deferred_by_type": {k: len(v) for k, v in self._deferred.items() if v},
+                "running": len(self._running),
+                "running_by_type": dict(self._running_by_type),
+                "submitted": self._stats["submitted"],
+                "completed": self._stats["completed"],
+                "failed": self._stats["failed"],
+                "cancelled": self._stats["cancelled"],
+                "coalesced": self._stats["coalesced"],
+                "max_queue_depth": self._stats["max_queue_depth"],
+                "avg_wait_s": round(self._stats["total_wait_time"] / finished, 4) if finished else 0.0,
+                "avg_run_s": round(self._stats["total_run_time"] / finished, 4) if finished else 0.0,
+            }
+
+    # --- Dừng ---
+    def shutdown(self, wait=True, timeout=None, cancel_pending=True):
+        """
+        Dừng nhận tác vụ mới. Nếu cancel_pending, các tác vụ chưa chạy bị hủy
+        và các tác vụ đang chạy nhận yêu cầu hủy qua token.
+        Khi wait=True, chờ các luồng worker kết thúc (tối đa timeout giây tổng cộng).
+        Trả về True nếu mọi luồng worker đã dừng.
+        """
+        cancelled = []
+        with self._condition:
+            self._shutdown = True
+            if cancel_pending:
+                cancelled = [entry[2] for entry in self._queue]
+                for items in self._deferred.values():
+                    cancelled.extend(items)
+                self._queue = []
+                self._deferred = {}
+                for handle in cancelled:
+                    self._forget_inflight_locked(handle)
+                self._stats["cancelled"] += len(cancelled)
+                for handle in self._running.values():
+                    handle.cancel("Ứng dụng đang thoát")
+                    self._forget_inflight_locked(handle)
+            self._condition.notify_all()
+        for handle in cancelled:
+            handle._finish(TASK_CANCELLED)
+
+        if not wait:
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self._workers:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            worker.join(remaining)
+        alive = [w.name for w in self._workers if w.is_alive()]
+        if alive:
+            logging.warning(f"{self.name}: {len(alive)} luồng worker chưa dừng sau {timeout}s: {alive}")
+        return not alive
@@ -0,0 +1,264 @@
+# core/temp_cleanup.py
+# Dọn file tạm hai pha: quét song song bằng os.scandir (dùng lại stat có sẵn trong entry) để xem trước
+# dung lượng thu hồi được theo nhóm (dry run), rồi xóa song song theo lô và báo tiến độ liên tục.
+# Làm việc trên cây thư mục bất kỳ, không phụ thuộc Windows.
+import logging
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from core.task_control import TaskCancelled, check_cancelled, report_progress
+
+DEFAULT_BATCH_SIZE = 256        # Số file mỗi lô xóa
+DEFAULT_MAX_WORKERS = 8
+WINERROR_SHARING_VIOLATION = 32 # File đang được tiến trình khác mở
+WINERROR_ACCESS_DENIED = 5
+
+CATEGORY_USER_TEMP = "Thư mục TEMP người dùng"
+CATEGORY_WINDOWS_TEMP = "Windows Temp"
+CATEGORY_PREFETCH = "Prefetch"
+
+
+class CleanupTarget:
+    """Một thư mục gốc cần dọn (chỉ xóa nội dung, không xóa chính thư mục)."""
+    def __init__(self, category, path, min_age_s=0):
+        self.category = category
+        self.path = path
+        self.min_age_s = min_age_s # Bỏ qua file sửa đổi gần đây hơn khoảng này (thường đang được dùng)
+
+    def __repr__(self):
+        return f"CleanupTarget({self.category!r}, {self.path!r})"
+
+
+def default_temp_targets(min_age_s=0):
+    """TEMP của người dùng, %SystemRoot%\\Temp và (trên Windows) Prefetch."""
+    system_root = os.environ.get("SystemRoot", "C:\\Windows")
+    targets = [CleanupTarget(CATEGORY_USER_TEMP, os.environ.get("TEMP"), min_age_s),
+               CleanupTarget(CATEGORY_WINDOWS_TEMP, os.path.join(system_root, "Temp"), min_age_s)]
+    if os.name == "nt":
+        targets.append(CleanupTarget(CATEGORY_PREFETCH, os.path.join(system_root, "Prefetch"), min_age_s))
+    return [t for t in targets if t.path]
+
+
+class CategoryStats:
+    """Thống kê của một nhóm: quét (files/dirs/bytes) và xóa (deleted/freed/skipped/errors)."""
+    def __init__(self, category):
+        self.category = category
+        self.files = 0
+        self.dirs = 0
+        self.bytes = 0
+        self.recent_skipped = 0
+        self.scan_errors = 0
+        self.deleted_files = 0
+        self.deleted_dirs = 0
+        self.freed_bytes = 0
+        self.skipped = 0 # Đang dùng / bị từ chối truy cập
+        self.errors = []
+
+
+class CleanupPlan:
+    """
+    Kết quả pha quét (dry run): danh sách file (path, size, category) và thư mục con (path, depth, category)
+    cùng thống kê theo nhóm. Không có gì bị xóa cho tới khi gọi execute_cleanup().
+    """
+    def __init__(self):
+        self.files = []
+        self.dirs = []
+        self.stats = {}
+        self.scan_seconds = 0.0
+        self.cancelled = False
+
+    @property
+    def total_bytes(self):
+        return sum(s.bytes for s in self.stats.values())
+
+    @property
+    def total_files(self):
+        return sum(s.files for s in self.stats.values())
+
+    def preview_rows(self):
+        """Dòng bảng xem trước dung lượng thu hồi được theo nhóm (key tiếng Việt)."""
+        rows = [{
+            "Nhóm": stats.category,
+            "Số file": stats.files,
+            "Số thư mục": stats.dirs,
+            "Dung lượng (MB)": round(stats.bytes / (1024 * 1024), 2),
+            "Bỏ qua (mới sửa)": stats.recent_skipped,
+            "Lỗi khi quét": stats.scan_errors,
+        } for stats in self.stats.values()]
+        rows.append({
+            "Nhóm": "Tổng cộng",
+            "Số file": self.total_files,
+            "Số thư mục": sum(s.dirs for s in self.stats.values()),
+            "Dung lượng (MB)": round(self.total_bytes / (1024 * 1024), 2),
+            "Bỏ qua (mới sửa)": sum(s.recent_skipped for s in self.stats.values()),
+            "Lỗi khi quét": sum(s.scan_errors for s in self.stats.values()),
+        })
+        return rows
+
+
+def _scan_target(target, cancel_token, counter):
+    """
+    Duyệt cây thư mục của một target bằng ngăn xếp + os.scandir. entry.stat(follow_symlinks=False)
+    dùng dữ liệu đã có từ lần liệt kê thư mục trên Windows (không tốn thêm lời gọi hệ thống).
+    Liên kết tượng trưng/junction không được đi theo (chỉ xóa chính liên kết).
+    """
+    stats = CategoryStats(target.category)
+    files, dirs = [], []
+    cutoff = time.time() - target.min_age_s if target.min_age_s else None
+    stack = [(target.path, 0)]
+    while stack:
+        check_cancelled(cancel_token)
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                for entry in iterator:
+                    counter[0] += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False) and not _is_junction(entry):
+                            dirs.append((entry.path, depth + 1, target.category))
+                            stats.dirs += 1
+                            stack.append((entry.path, depth + 1))
+                            continue
+                        info = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        stats.scan_errors += 1
+                        continue
+                    if cutoff is not None and info.st_mtime > cutoff:
+                        stats.recent_skipped += 1
+                        continue
+                    size = info.st_size if stat.S_ISREG(info.st_mode) else 0
+                    files.append((entry.path, size, target.category))
+                    stats.files += 1
+                    stats.bytes += size
+        except OSError as e:
+            stats.scan_errors += 1
+            logging.debug(f"Không thể quét {directory}: {e}")
+    return stats, files, dirs
+
+
+def _is_junction(entry):
+    is_junction = getattr(entry, "is_junction", None) # Python 3.12+
+    if is_junction is not None:
+        return is_junction()
+    try:
+        attributes = getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+    except OSError:
+        return False
+    return bool(attributes & getattr(stat, "FILE_ATTRIBUTE_REPARSE_POINT", 0))
+
+
+def _unique_targets(targets):
+    """
+    Các target tồn tại, sau khi bỏ target trùng (giữ target đầu tiên) và target nằm bên trong target khác
+    (vd. TEMP trỏ vào Windows\\Temp\\...), để một file không bị đếm và xóa hai lần.
+    """
+    resolved = [(target, os.path.normcase(os.path.realpath(target.path)))
+                for target in targets if target.path and os.path.isdir(target.path)]
+    unique = []
+    for index, (target, real_path) in enumerate(resolved):
+        covered = any((other == real_path and other_index < index) or real_path.startswith(os.path.join(other, ""))
+                      for other_index, (_, other) in enumerate(resolved) if other_index != index)
+        if not covered:
+            unique.append(target)
+    return unique
+
+
+def scan_cleanup_targets(targets, max_workers=DEFAULT_MAX_WORKERS, cancel_token=None, progress_callback=None):
+    """
+    Pha dry run: quét đồng thời mọi target (mỗi target một luồng). Target không tồn tại, trùng nhau hoặc nằm bên
+    trong target khác bị bỏ qua (xem _unique_targets). Trả về CleanupPlan; nếu bị hủy, plan.cancelled = True và
+    chỉ chứa các target đã quét xong.
+    """
+    plan = CleanupPlan()
+    unique_targets = _unique_targets(targets)
+    for target in unique_targets:
+        plan.stats.setdefault(target.category, CategoryStats(target.category))
+
+    started = time.perf_counter()
+    counter = [0] # Số mục đã quét (chỉ để báo tiến độ; cộng không khóa là chấp nhận được)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_targets) or 1)), thread_name_prefix="temp-scan") as executor:
+        futures = {executor.submit(_scan_target, target, cancel_token, counter): target for target in unique_targets}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2)
+            report_progress(progress_callback, None, f"Đang quét... {counter[0]} mục")
+            for future in done:
+                try:
+                    stats, files, dirs = future.result()
+                except TaskCancelled:
+                    plan.cancelled = True
+                    continue
+                merged = plan.stats[stats.category]
+                for field in ("files", "dirs", "bytes", "recent_skipped", "scan_errors"):
+                    setattr(merged, field, getattr(merged, field) + getattr(stats, field))
+                plan.files.extend(files)
+                plan.dirs.extend(dirs)
+    plan.scan_seconds = time.perf_counter() - started
+    logging.info(f"Quét dọn dẹp: {plan.total_files} file, {plan.total_bytes / (1024 * 1024):.1f} MB trong {plan.scan_seconds:.2f}s")
+    return plan
+
+
+def _is_in_use_error(error):
+    return isinstance(error, PermissionError) or getattr(error, "winerror", None) in (WINERROR_SHARING_VIOLATION, WINERROR_ACCESS_DENIED)
+
+
+def _delete_batch(batch, cancel_token):
+    """Xóa một lô file; trả về {category: [deleted, freed_bytes, skipped, errors]}."""
+    outcome = {}
+    for path, size, category in batch:
+        if cancel_token is not None and cancel_token.is_cancelled:
+            break
+        counts = outcome.setdefault(category, [0, 0, 0, []])
+        try:
+            os.unlink(path)
+            counts[0] += 1
+            counts[1] += size
+        except FileNotFoundError:
+            pass # Đã bị chương trình khác xóa
+        except OSError as e:
+            if _is_in_use_error(e):
+                counts[2] += 1
+            else:
+                counts[3].append(f"Không thể xóa {path}: {e}")
+    return outcome
+
+
+def execute_cleanup(plan, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                    cancel_token=None, progress_callback=None):
+    """
+    Xóa theo plan: các lô file chạy song song, tiến độ (theo byte) được báo mỗi khi một lô xong; sau đó xóa các
+    thư mục con đã rỗng từ sâu nhất lên. Khi bị hủy, các lô chưa chạy bị bỏ và plan.cancelled = True.
+    """
+    total_bytes = plan.total_bytes or 1
+    freed = 0
+    batches = [plan.files[i:i + batch_size] for i in range(0, len(plan.files), batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="temp-delete") as executor:
+        futures = [executor.submit(_delete_batch, batch, cancel_token) for batch in batches]
+        try:
+            for future in as_completed(futures):
+                for category, (deleted, freed_bytes, skipped, errors) in future.result().items():
+                    stats = plan.stats[category]
+                    stats.deleted_files += deleted
+                    stats.freed_bytes += freed_bytes
+                    stats.skipped += skipped
+                    stats.errors.extend(errors)
+                    freed += freed_bytes
+                report_progress(progress_callback, min(99.0, freed * 100 / total_bytes),
+                                f"Đã giải phóng {freed / (1024 * 1024):.1f} MB")
+                check_cancelled(cancel_token)
+        except TaskCancelled:
+            plan.cancelled = True
+            for future in futures:
+                future.cancel()
+
+    if not plan.cancelled:
+        for path, _, category in sorted(plan.dirs, key=lambda d: d[1], reverse=True):
+            try:
+                os.rmdir(path)
+                plan.stats[category].deleted_dirs += 1
+            except OSError:
+                pass # Còn file đang dùng hoặc file mới sửa bị bỏ qua: giữ thư mục
+    report_progress(progress_callback, 100, f"Đã giải phóng {freed / (1024 * 1024):.1f} MB")
+    return plan
@@ -0,0 +1,463 @@
+# core/usn_journal.py
+# Theo dõi thay đổi qua USN change journal của NTFS: đọc bản ghi USN từ điểm mốc đã lưu và áp dụng
+# tạo / xóa / đổi tên / thay đổi kích thước vào chỉ mục file, thay vì quét lại toàn bộ.
+# Nguồn journal và bộ phân tích bản ghi có thể thay thế: volume thật (Windows, DeviceIoControl) hoặc
+# file dump đã ghi lại (phát lại được trên mọi hệ điều hành).
+import ctypes
+import logging
+import os
+import struct
+
+from core.app_paths import get_app_data_dir
+from core.ntfs_mft import MftIndex, read_mft
+from core.task_control import check_cancelled, report_progress
+
+DUMP_MAGIC = b"IPCUSN01"
+DEFAULT_READ_BUFFER_BYTES = 1024 * 1024
+
+# Cờ Reason của USN_RECORD (winioctl.h)
+USN_REASON_DATA_OVERWRITE = 0x00000001
+USN_REASON_DATA_EXTEND = 0x00000002
+USN_REASON_DATA_TRUNCATION = 0x00000004
+USN_REASON_FILE_CREATE = 0x00000100
+USN_REASON_FILE_DELETE = 0x00000200
+USN_REASON_RENAME_OLD_NAME = 0x00001000
+USN_REASON_RENAME_NEW_NAME = 0x00002000
+USN_REASON_HARD_LINK_CHANGE = 0x00010000
+USN_REASON_CLOSE = 0x80000000
+REASON_SIZE_CHANGE = USN_REASON_DATA_OVERWRITE | USN_REASON_DATA_EXTEND | USN_REASON_DATA_TRUNCATION
+REASON_NAME_CHANGE = USN_REASON_FILE_CREATE | USN_REASON_RENAME_NEW_NAME | USN_REASON_HARD_LINK_CHANGE
+REASON_TRACKED = REASON_SIZE_CHANGE | REASON_NAME_CHANGE | USN_REASON_FILE_DELETE
+
+FILE_ATTRIBUTE_DIRECTORY = 0x10
+REFERENCE_MASK = 0x0000FFFFFFFFFFFF
+
+FSCTL_QUERY_USN_JOURNAL = 0x000900F4
+FSCTL_READ_USN_JOURNAL = 0x000900BB
+ERROR_JOURNAL_NOT_ACTIVE = 1179
+ERROR_JOURNAL_DELETE_IN_PROGRESS = 1178
+ERROR_JOURNAL_ENTRY_DELETED = 1181
+
+
+class JournalResetRequired(Exception):
+    """Điểm mốc không còn dùng được (journal bị tạo lại hoặc bản ghi đã bị ghi đè): cần quét lại toàn bộ."""
+
+
+class UsnRecord:
+    __slots__ = ("usn", "file_reference", "parent_reference", "reason", "attributes", "name", "timestamp")
+
+    def __init__(self, usn, file_reference, parent_reference, reason, attributes, name, timestamp):
+        self.usn = usn
+        self.file_reference = file_reference
+        self.parent_reference = parent_reference
+        self.reason = reason
+        self.attributes = attributes
+        self.name = name
+        self.timestamp = timestamp # FILETIME (100ns từ 1601-01-01)
+
+    @property
+    def record_number(self):
+        return self.file_reference & REFERENCE_MASK
+
+    @property
+    def sequence(self):
+        return self.file_reference >> 48
+
+    @property
+    def is_directory(self):
+        return bool(self.attributes & FILE_ATTRIBUTE_DIRECTORY)
+
+    def __repr__(self):
+        return f"UsnRecord(usn={self.usn}, ref={self.file_reference:#x}, reason={self.reason:#x}, name={self.name!r})"
+
+
+def _parse_v2(buffer, offset, length):
+    """USN_RECORD_V2: tham chiếu file 64-bit."""
+    (file_reference, parent_reference, usn, timestamp, reason, _, _, attributes,
+     name_length, name_offset) = struct.unpack_from("<QQqqIIIIHH", buffer, offset + 8)
+    name = bytes(buffer[offset + name_offset:offset + name_offset + name_length]).decode("utf-16-le", "replace")
+    return UsnRecord(usn, file_reference, parent_reference, reason, attributes, name, timestamp)
+
+
+def _parse_v3(buffer, offset, length):
+    """USN_RECORD_V3: FILE_ID_128; trên NTFS 64 bit thấp chính là tham chiếu MFT."""
+    (file_low, _, parent_low, _, usn, timestamp, reason, _, _, attributes,
+     name_length, name_offset) = struct.unpack_from("<QQQQqqIIIIHH", buffer, offset + 8)
+    name = bytes(buffer[offset + name_offset:offset + name_offset + name_length]).decode("utf-16-le", "replace")
+    return UsnRecord(usn, file_low, parent_low, reason, attributes, name, timestamp)
+
+
+# Bộ phân tích theo MajorVersion; đăng ký thêm bằng register_record_parser()
+RECORD_PARSERS = {2: _parse_v2, 3: _parse_v3}
+
+
+def register_record_parser(major_version, parser):
+    """parser(buffer, offset, record_length) -> UsnRecord hoặc None (bỏ qua bản ghi)."""
+    RECORD_PARSERS[major_version] = parser
+
+
+def parse_usn_records(buffer, offset=0, end=None, parsers=None):
+    """Sinh UsnRecord từ một vùng bản ghi USN liên tiếp (căn 8 byte). Phiên bản không hỗ trợ bị bỏ qua."""
+    parsers = RECORD_PARSERS if parsers is None else parsers
+    end = len(buffer) if end is None else end
+    while offset + 8 <= end:
+        length, major = struct.unpack_from("<IH", buffer, offset)
+        if length < 8 or offset + length > end:
+            break
+        parser = parsers.get(major)
+        if parser is not None:
+            record = parser(buffer, offset, length)
+            if record is not None:
+                yield record
+        else:
+            logging.debug(f"Bỏ qua bản ghi USN phiên bản {major}")
+        offset += length
+
+
+class JournalInfo:
+    def __init__(self, journal_id, first_usn, next_usn, lowest_valid_usn):
+        self.journal_id = journal_id
+        self.first_usn = first_usn
+        self.next_usn = next_usn
+        self.lowest_valid_usn = lowest_valid_usn
+
+
+class DumpJournalSource:
+    """
+    Journal đã ghi ra file bởi capture_journal(): MAGIC | journal_id, first_usn, next_usn, lowest_valid_usn
+    (4 x int64) | các khối (độ dài uint32 + bộ đệm FSCTL_READ_USN_JOURNAL: USN kế tiếp int64 + bản ghi).
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(DUMP_MAGIC)) != DUMP_MAGIC:
+                raise ValueError(f"{path} không phải file dump USN journal.")
+            self._info = JournalInfo(*struct.unpack("<qqqq", f.read(32)))
+            self._data_offset = f.tell()
+
+    def query(self):
+        return self._info
+
+    def read_chunks(self, start_usn, buffer_bytes=DEFAULT_READ_BUFFER_BYTES):
+        with open(self.path, "rb") as f:
+            f.seek(self._data_offset)
+            while True:
+                header = f.read(4)
+                if len(header) < 4:
+                    return
+                chunk = f.read(struct.unpack("<I", header)[0])
+                if struct.unpack_from("<q", chunk)[0] > start_usn: # Khối có bản ghi mới hơn điểm mốc
+                    yield chunk
+
+
+class VolumeJournalSource:
+    """Journal của một volume NTFS qua DeviceIoControl (Windows, cần quyền Administrator)."""
+    GENERIC_READ = 0x80000000
+    FILE_SHARE_READ_WRITE = 0x00000001 | 0x00000002
+    OPEN_EXISTING = 3
+
+    def __init__(self, volume):
+        if os.name != "nt":
+            raise OSError("USN journal của volume chỉ đọc được trên Windows.")
+        self.volume = volume
+        self.kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self.kernel32.CreateFileW.restype = ctypes.c_void_p
+
+    def _open(self):
+        path = f"\\\\.\\{self.volume.rstrip(chr(92) + '/')}"
+        handle = self.kernel32.CreateFileW(ctypes.c_wchar_p(path), self.GENERIC_READ, self.FILE_SHARE_READ_WRITE,
+                                           None, self.OPEN_EXISTING, 0, None)
+        if handle in (None, ctypes.c_void_p(-1).value):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return handle
+
+    def _ioctl(self, handle, code, in_bytes, out_size):
+        out_buffer = ctypes.create_string_buffer(out_size)
+        returned = ctypes.c_uint32(0)
+        in_buffer = ctypes.create_string_buffer(in_bytes, len(in_bytes)) if in_bytes else None
+        if not self.kernel32.DeviceIoControl(ctypes.c_void_p(handle), code, in_buffer, len(in_bytes or b""),
+                                             out_buffer, out_size, ctypes.byref(returned), None):
+            error = ctypes.get_last_error()
+            if error in (ERROR_JOURNAL_NOT_ACTIVE, ERROR_JOURNAL_DELETE_IN_PROGRESS, ERROR_JOURNAL_ENTRY_DELETED):
+                raise JournalResetRequired(f"USN journal của {self.volume} không khả dụng (mã {error}).")
+            raise ctypes.WinError(error)
+        return out_buffer.raw[:returned.value]
+
+    def query(self):
+        handle = self._open()
+        try:
+            # USN_JOURNAL_DATA_V0: UsnJournalID, FirstUsn, NextUsn, LowestValidUsn, MaxUsn, MaximumSize, AllocationDelta
+            data = self._ioctl(handle, FSCTL_QUERY_USN_JOURNAL, None, 56)
+        finally:
+            self.kernel32.CloseHandle(ctypes.c_void_p(handle))
+        journal_id, first_usn, next_usn, lowest_valid_usn = struct.unpack_from("<Qqqq", data)
+        return JournalInfo(journal_id, first_usn, next_usn, lowest_valid_usn)
+
+    def read_chunks(self, start_usn, buffer_bytes=DEFAULT_READ_BUFFER_BYTES):
+        info = self.query()
+        handle = self._open()
+        try:
+            usn = start_usn
+            while usn < info.next_usn:
+                # READ_USN_JOURNAL_DATA_V0: StartUsn, ReasonMask, ReturnOnlyOnClose, Timeout, BytesToWaitFor, UsnJournalID
+                request = struct.pack("<qIIQQQ", usn, REASON_TRACKED, 0, 0, 0, info.journal_id)
+                chunk = self._ioctl(handle, FSCTL_READ_USN_JOURNAL, request, buffer_bytes)
+                next_usn = struct.unpack_from("<q", chunk)[0]
+                if len(chunk) <= 8 or next_usn <= usn:
+                    break
+                yield chunk
+                usn = next_usn
+        finally:
+            self.kernel32.CloseHandle(ctypes.c_void_p(handle))
+
+
+def capture_journal(source, path, start_usn=0):
+    """Ghi journal của source ra file dump để phân tích/phát lại sau (ví dụ trên máy khác)."""
+    info = source.query()
+    with open(path, "wb") as f:
+        f.write(DUMP_MAGIC)
+        f.write(struct.pack("<qqqq", info.journal_id, info.first_usn, info.next_usn, info.lowest_valid_usn))
+        for chunk in source.read_chunks(start_usn):
+            f.write(struct.pack("<I", len(chunk)))
+            f.write(chunk)
+
+
+class MftIndexSink:
+    """
+    Áp dụng thay đổi vào core.ntfs_mft.MftIndex (đánh chỉ số theo số bản ghi MFT). Bản ghi USN không mang kích
+    thước, nên file có thay đổi dữ liệu được stat lại một lần ở cuối lô qua size_lookup(đường dẫn tương đối).
+    Chỉ mục khác dùng lớp riêng với cùng các phương thức create/delete/rename/touch/flush (xem ParentDirectorySink).
+    """
+    def __init__(self, index, volume_root):
+        self.index = index
+        self.volume_root = volume_root
+        self._dirty = set()
+
+    def size_lookup(self, relative_path):
+        try:
+            return os.stat(os.path.join(self.volume_root, relative_path.replace("\\", os.sep))).st_size
+        except OSError:
+            return None
+
+    def create(self, record):
+        self.rename(record)
+        self._dirty.add(record.record_number)
+
+    def rename(self, record):
+        parent = record.parent_reference
+        self.index.set_entry(record.record_number, record.sequence, parent & REFERENCE_MASK, parent >> 48,
+                             record.name, record.is_directory)
+
+    def delete(self, record):
+        self._dirty.discard(record.record_number)
+        return self.index.remove(record.record_number)
+
+    def touch(self, record):
+        self._dirty.add(record.record_number)
+
+    def flush(self):
+        for number in self._dirty:
+            if self.index.is_in_use(number) and not self.index.is_directory(number):
+                size = self.size_lookup(self.index.path_of(number))
+                if size is not None:
+                    self.index.size[number] = size
+        self._dirty.clear()
+
+
+class ParentDirectorySink:
+    """
+    Chỉ ghi nhận tham chiếu MFT (file reference 64 bit, gồm cả sequence) của các thư mục có nội dung thay đổi.
+    Dùng cho chỉ mục theo đường dẫn như core/disk_analyzer.py: thư mục có trong dirty được quét lại kể cả khi
+    mtime của nó không đổi (sửa nội dung file không cập nhật mtime thư mục chứa nó).
+    """
+    def __init__(self):
+        self.dirty = set()
+
+    def create(self, record):
+        self.dirty.add(record.parent_reference)
+
+    def rename(self, record):
+        self.dirty.add(record.parent_reference)
+
+    def delete(self, record):
+        self.dirty.add(record.parent_reference)
+        return True
+
+    def touch(self, record):
+        self.dirty.add(record.parent_reference)
+
+    def flush(self):
+        pass
+
+
+# Loại thay đổi đã được đếm cho một file trong lô (bitmask theo file reference)
+_COUNTED_CREATE = 0x1
+_COUNTED_DELETE = 0x2
+_COUNTED_RENAME = 0x4
+_COUNTED_MODIFY = 0x8
+
+
+class ChangeSummary:
+    """
+    Số file (không phải số bản ghi USN) được tạo/xóa/đổi tên/sửa trong một lô. Cờ Reason được cộng dồn trên mọi
+    bản ghi của file cho tới khi đóng (CREATE, CREATE|DATA_EXTEND, CREATE|DATA_EXTEND|CLOSE), nên mỗi file chỉ
+    được đếm một lần cho mỗi loại; file vừa tạo vừa xóa trong cùng lô không được đếm.
+    """
+    def __init__(self):
+        self.records = 0
+        self.created = 0
+        self.deleted = 0
+        self.renamed = 0
+        self.modified = 0
+        self.start_usn = None
+        self.next_usn = None
+        self._counted = {} # file_reference -> bitmask _COUNTED_*
+
+
+class UsnChangeTracker:
+    """Đọc journal từ điểm mốc (journal_id, next_usn) và đẩy từng thay đổi vào sink."""
+    def __init__(self, source, sink, parsers=None):
+        self.source = source
+        self.sink = sink
+        self.parsers = parsers
+
+    def _apply(self, record, summary):
+        reason = record.reason
+        counted = summary._counted.get(record.file_reference, 0)
+        if reason & USN_REASON_FILE_DELETE: # Xóa thắng mọi cờ khác (file tạm tạo rồi xóa trong cùng lô)
+            removed = self.sink.delete(record)
+            if counted & _COUNTED_CREATE:
+                summary.created -= 1
+                counted &= ~_COUNTED_CREATE
+            elif removed and not counted & _COUNTED_DELETE:
+                summary.deleted += 1
+                counted |= _COUNTED_DELETE
+            summary._counted[record.file_reference] = counted
+            return
+        if reason & USN_REASON_FILE_CREATE:
+            self.sink.create(record)
+            if not counted & _COUNTED_CREATE:
+                summary.created += 1
+                counted |= _COUNTED_CREATE
+        elif reason & (USN_REASON_RENAME_NEW_NAME | USN_REASON_HARD_LINK_CHANGE):
+            self.sink.rename(record)
+            if not counted & _COUNTED_RENAME:
+                summary.renamed += 1
+                counted |= _COUNTED_RENAME
+        if reason & REASON_SIZE_CHANGE:
+            self.sink.touch(record)
+            if not counted & (_COUNTED_MODIFY | _COUNTED_CREATE): # Ghi dữ liệu lúc tạo file không tính là sửa
+                summary.modified += 1
+                counted |= _COUNTED_MODIFY
+        summary._counted[record.file_reference] = counted
+
+    def catch_up(self, journal_id, start_usn, cancel_token=None, progress_callback=None):
+        """
+        Áp dụng mọi bản ghi có USN >= start_usn. Ném JournalResetRequired nếu journal đã bị tạo lại
+        hoặc điểm mốc nằm trước LowestValidUsn. Trả về ChangeSummary (next_usn là điểm mốc mới).
+        """
+        info = self.source.query()
+        if journal_id is None or start_usn is None:
+            raise JournalResetRequired("Chưa có điểm mốc USN.")
+        if info.journal_id != journal_id:
+            raise JournalResetRequired("USN journal đã bị tạo lại kể từ lần quét trước.")
+        if start_usn < info.lowest_valid_usn:
+            raise JournalResetRequired("Điểm mốc USN đã bị ghi đè trong journal.")
+        summary = ChangeSummary()
+        summary.start_usn = summary.next_usn = start_usn
+        span = max(1, info.next_usn - start_usn)
+        for chunk in self.source.read_chunks(start_usn):
+            check_cancelled(cancel_token)
+            for record in parse_usn_records(chunk, 8, parsers=self.parsers):
+                if record.usn < start_usn:
+                    continue
+                summary.records += 1
+                self._apply(record, summary)
+            summary.next_usn = max(summary.next_usn, struct.unpack_from("<q", chunk)[0])
+            report_progress(progress_callback, min(99.0, 100.0 * (summary.next_usn - start_usn) / span),
+                            f"Đã áp dụng {summary.records} thay đổi từ USN journal...")
+        self.sink.flush()
+        summary._counted.clear()
+        summary.next_usn = max(summary.next_usn, info.next_usn)
+        logging.info(f"USN journal: {summary.records} bản ghi, +{summary.created} / -{summary.deleted} / "
+                     f"đổi tên {summary.renamed} / sửa {summary.modified}")
+        return summary
+
+
+def update_mft_index(index, source, volume_root, cancel_token=None, progress_callback=None):
+    """Cập nhật MftIndex đã lưu bằng journal từ điểm mốc của nó; cập nhật luôn điểm mốc. Trả về ChangeSummary."""
+    tracker = UsnChangeTracker(source, MftIndexSink(index, volume_root))
+    summary = tracker.catch_up(index.journal_id, index.next_usn, cancel_token, progress_callback)
+    index.next_usn = summary.next_usn
+    return summary
+
+
+def open_volume_journal(path):
+    """VolumeJournalSource cho volume chứa path (Windows); None nếu không dùng được (hệ điều hành khác, không có quyền...)."""
+    drive = os.path.splitdrive(os.path.abspath(path))[0]
+    if not drive:
+        return None
+    try:
+        source = VolumeJournalSource(drive)
+        source.query()
+    except (JournalResetRequired, OSError) as e:
+        logging.info(f"Không dùng được USN journal của {drive}: {e}")
+        return None
+    return source
+
+
+def collect_changed_directories(source, journal_id, start_usn, cancel_token=None, progress_callback=None):
+    """
+    Tham chiếu MFT của các thư mục có thay đổi kể từ điểm mốc (journal_id, start_usn).
+    Trả về (set tham chiếu, ChangeSummary); ném JournalResetRequired nếu điểm mốc không còn dùng được.
+    """
+    sink = ParentDirectorySink()
+    summary = UsnChangeTracker(source, sink).catch_up(journal_id, start_usn, cancel_token, progress_callback)
+    return sink.dirty, summary
+
+
+def default_volume_index_path(volume):
+    """File chỉ mục MFT của một volume ('C:' -> .../mft_index/C.mftidx)."""
+    return os.path.join(get_app_data_dir("mft_index"), f"{volume.rstrip(chr(92) + '/:').upper()}.mftidx")
+
+
+def build_volume_index(volume, index_path=None, full=False, source=None, cancel_token=None, progress_callback=None):
+    """
+    Chỉ mục MFT của volume, được lưu lại giữa các lần chạy. Nếu có chỉ mục cũ với điểm mốc USN còn hợp lệ thì
+    chỉ áp dụng các thay đổi trong journal; ngược lại đọc lại toàn bộ MFT (điểm mốc được lấy TRƯỚC khi đọc
+    để thay đổi xảy ra trong lúc đọc được áp dụng ở lần sau). Trả về (MftIndex, ChangeSummary hoặc None).
+    """
+    index_path = index_path or default_volume_index_path(volume)
+    volume_root = volume.rstrip("\\/") + os.sep
+    try:
+        source = source or VolumeJournalSource(volume)
+    except OSError as e:
+        logging.info(f"Không dùng được USN journal của {volume}: {e}")
+        source = None
+    index = None if full or source is None else MftIndex.load(index_path)
+    if index is not None:
+        try:
+            summary = update_mft_index(index, source, volume_root, cancel_token, progress_callback)
+            _save_volume_index(index, index_path)
+            report_progress(progress_callback, 100, f"Đã cập nhật {summary.records} thay đổi từ USN journal.")
+            return index, summary
+        except (JournalResetRequired, OSError) as e:
+            logging.info(f"Đọc lại toàn bộ MFT của {volume}: {e}")
+    info = None
+    if source is not None:
+        try:
+            info = source.query()
+        except (JournalResetRequired, OSError) as e:
+            logging.info(f"USN journal của {volume} không khả dụng: {e}")
+    index = read_mft(volume, cancel_token=cancel_token, progress_callback=progress_callback)
+    if info is not None:
+        index.journal_id, index.next_usn = info.journal_id, info.next_usn
+        _save_volume_index(index, index_path)
+    return index, None
+
+
+def _save_volume_index(index, index_path):
+    try:
+        index.save(index_path)
+    except OSError as e:
+        logging.warning(f"Không lưu được chỉ mục MFT {index_path}: {e}")
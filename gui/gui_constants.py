@@ -8,6 +8,9 @@ H2_FONT_SIZE = 12
 BODY_FONT_SIZE = 10
 MONOSPACE_FONT_SIZE = 9
 
+# --- Dashboard ---
+HEALTH_REFRESH_INTERVAL_S = 30 # Chu kỳ đánh giá lại điểm sức khỏe theo số liệu thời gian thực
+
 APP_VERSION = "2.1.1" # Cập nhật phiên bản
 APP_AUTHOR = "VKhoối"
 APP_CONTACT_EMAIL = "vankhoai690@gmail.com"
@@ -1,5 +1,6 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QScrollArea, QGridLayout, QLabel, QProgressBar, QPushButton, QFrame, QSpacerItem, QSizePolicy
+    QWidget, QVBoxLayout, QHBoxLayout, QScrollArea, QGridLayout, QLabel, QProgressBar, QPushButton, QFrame, QSpacerItem, QSizePolicy,
+    QComboBox, QListWidget
 )
 from PyQt5.QtCore import Qt
 # Bạn có thể cần import thêm các hằng số hoặc hàm helper nếu chúng được sử dụng trực tiếp
@@ -7,6 +8,16 @@ from PyQt5.QtCore import Qt
 # Ví dụ: from .gui_qt import DEFAULT_FONT_FAMILY, H1_FONT_SIZE, BODY_FONT_SIZE (nếu cần)
 from PyQt5.QtGui import QFont, QColor, QIcon
 
+from .gui_trend_chart import TrendChartWidget
+
+# (nhãn, khoảng thời gian giây) cho biểu đồ xu hướng
+TREND_RANGES = [
+    ("1 giờ", 3600),
+    ("24 giờ", 24 * 3600),
+    ("7 ngày", 7 * 24 * 3600),
+    ("30 ngày", 30 * 24 * 3600),
+]
+
 class PerformanceCard(QFrame):
     def __init__(self, icon_char, title, object_name_prefix=""):
         super().__init__()
@@ -129,6 +140,41 @@ def create_dashboard_tab_content(parent_app):
     info_cards_grid_layout.addWidget(parent_app.gpu_card, 1, 1)
     dashboard_content_layout.addLayout(info_cards_grid_layout)
 
+    # --- Phần 2: Biểu đồ xu hướng CPU (lịch sử từ MetricsStore + mẫu trực tiếp) ---
+    trend_widget = QWidget()
+    trend_widget.setObjectName("TrendWidget")
+    trend_layout = QVBoxLayout(trend_widget)
+    trend_header_layout = QHBoxLayout()
+    trend_title = QLabel("📈 Xu Hướng CPU & Sức Khỏe")
+    trend_title.setObjectName("QuickActionsTitle")
+    trend_header_layout.addWidget(trend_title)
+    trend_header_layout.addStretch(1)
+    parent_app.trend_range_combo = QComboBox()
+    for label, seconds in TREND_RANGES:
+        parent_app.trend_range_combo.addItem(label, seconds)
+    parent_app.trend_range_combo.currentIndexChanged.connect(parent_app.on_trend_range_changed)
+    trend_header_layout.addWidget(parent_app.trend_range_combo)
+    trend_layout.addLayout(trend_header_layout)
+    parent_app.cpu_trend_chart = TrendChartWidget("CPU", unit="%", y_range=(0.0, 100.0))
+    trend_layout.addWidget(parent_app.cpu_trend_chart)
+    parent_app.health_trend_chart = TrendChartWidget("Điểm sức khỏe", unit="", y_range=(0.0, 100.0), color="#1abc9c")
+    trend_layout.addWidget(parent_app.health_trend_chart)
+    dashboard_content_layout.addWidget(trend_widget)
+
+    # --- Phần 3: Cảnh báo hệ thống (AnomalyDetector chạy trên luồng lấy mẫu) ---
+    alerts_widget = QWidget()
+    alerts_widget.setObjectName("AlertsWidget")
+    alerts_layout = QVBoxLayout(alerts_widget)
+    alerts_title = QLabel("🚨 Cảnh Báo Hệ Thống")
+    alerts_title.setObjectName("QuickActionsTitle")
+    alerts_layout.addWidget(alerts_title)
+    parent_app.alerts_list_widget = QListWidget()
+    parent_app.alerts_list_widget.setObjectName("AlertsList")
+    parent_app.alerts_list_widget.setMaximumHeight(120)
+    parent_app.alerts_list_widget.addItem("✅ Không có cảnh báo.")
+    alerts_layout.addWidget(parent_app.alerts_list_widget)
+    dashboard_content_layout.addWidget(alerts_widget)
+
     # Phần "Tối ưu nhanh"
     quick_actions_widget = QWidget()
     quick_actions_widget.setObjectName("QuickActionsWidget")
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QSplitter, QScrollArea, QGroupBox,
-    QStackedWidget, QTextEdit, QTableWidget
+    QStackedWidget, QTextEdit
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QTextOption
@@ -35,11 +35,11 @@ def create_network_tab_content(parent_app):
     group_network = QGroupBox("Công cụ Mạng")
     group_network.setFont(parent_app.h2_font)
     net_layout = QVBoxLayout(group_network)
-    parent_app._add_utility_button(net_layout, "Kiểm Tra Kết Nối Wifi", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, get_wifi_connection_info, "network_wifi_info"))
-    parent_app._add_utility_button(net_layout, "Xem Cấu Hình Mạng Chi Tiết", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, get_network_configuration_details, "network_config", needs_wmi=True, result_type="table"))
+    parent_app._add_utility_button(net_layout, "Kiểm Tra Kết Nối Wifi", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, get_wifi_connection_info, "network_wifi_info", coalesce=True))
+    parent_app._add_utility_button(net_layout, "Xem Cấu Hình Mạng Chi Tiết", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, get_network_configuration_details, "network_config", needs_wmi=True, result_type="table", coalesce=True))
     parent_app._add_utility_button(net_layout, "Ping Google", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, run_ping_test, "network_ping_google", task_args=["google.com", 4]))
     parent_app._add_utility_button(net_layout, "Phân giải IP tên miền", parent_app.run_domain_ip_resolution_qt)
-    parent_app._add_utility_button(net_layout, "Kết Nối Mạng Đang Hoạt Động", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, get_active_network_connections, "network_active_connections", result_type="table"))
+    parent_app._add_utility_button(net_layout, "Kết Nối Mạng Đang Hoạt Động", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, get_active_network_connections, "network_active_connections", result_type="table", coalesce=True))
     parent_app._add_utility_button(net_layout, "Cấu hình DNS", parent_app.run_set_dns_config_qt)
     parent_app._add_utility_button(net_layout, "Xóa Cache DNS", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, flush_dns_cache, "network_flush_dns"))
     parent_app._add_utility_button(net_layout, "Reset Kết Nối Internet", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_network, reset_internet_connection, "network_reset_net"))
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QSplitter, QScrollArea, QGroupBox, QPushButton,
-    QStackedWidget, QTextEdit, QTableWidget, QFrame, QHBoxLayout
+    QStackedWidget, QTextEdit, QFrame, QHBoxLayout
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QTextOption
@@ -8,11 +8,14 @@ from PyQt5.QtGui import QTextOption
 # Giả sử các hàm core và hằng số cần thiết sẽ được truy cập qua parent_app
 # hoặc được import trực tiếp nếu chúng là hằng số toàn cục.
 from core.pc_info_functions import ( # type: ignore
-    clear_temporary_files, open_resource_monitor, get_startup_programs,
+    clear_temporary_files, preview_temporary_files, analyze_disk_usage, open_resource_monitor, get_startup_programs,
+    find_duplicate_files, find_uninstall_leftovers, enumerate_ntfs_volume, get_crash_dump_history,
     run_sfc_scan, create_system_restore_point, update_all_winget_packages,
     optimize_windows_services, clean_registry_with_backup, list_printers,
-    remove_printer, clear_print_queue, restart_print_spooler_service
+    remove_printer, clear_print_queue, restart_print_spooler_service,
+    run_cpu_benchmark, run_memory_speed_test, run_storage_benchmark_test
 )
+from core.process_history import METRIC_CPU, METRIC_RSS # type: ignore
 
 def create_optimize_tab_content(parent_app):
     """
@@ -56,14 +59,23 @@ def create_optimize_tab_content(parent_app):
     group_cleanup = QGroupBox("Dọn dẹp & Tối ưu Cơ Bản")
     group_cleanup.setFont(parent_app.h2_font)
     cleanup_layout = QVBoxLayout(group_cleanup)
+    parent_app._add_utility_button(cleanup_layout, "Xem Trước Dung Lượng Dọn Dẹp", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, preview_temporary_files, "optimize_preview_temp", result_type="table", coalesce=True))
+    parent_app._add_utility_button(cleanup_layout, "Phân Tích Dung Lượng Ổ Đĩa", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, analyze_disk_usage, "optimize_disk_usage", result_type="table", coalesce=True))
+    parent_app._add_utility_button(cleanup_layout, "Tìm File Trùng Lặp", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, find_duplicate_files, "optimize_duplicate_files", result_type="table", coalesce=True))
+    parent_app._add_utility_button(cleanup_layout, "Tìm Phần Còn Sót Sau Gỡ Cài Đặt", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, find_uninstall_leftovers, "optimize_uninstall_leftovers", result_type="table", coalesce=True))
+    parent_app._add_utility_button(cleanup_layout, "Liệt Kê Nhanh Ổ Hệ Thống (MFT)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, enumerate_ntfs_volume, "optimize_ntfs_mft", result_type="table", coalesce=True))
     parent_app._add_utility_button(cleanup_layout, "Xóa File Tạm & Dọn Dẹp", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, clear_temporary_files, "optimize_clear_temp"))
     parent_app._add_utility_button(cleanup_layout, "Mở Resource Monitor", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, open_resource_monitor, "optimize_resmon"))
     parent_app._add_utility_button(cleanup_layout, "Quản Lý Ứng Dụng Khởi Động", parent_app.on_manage_startup_programs_clicked)
+    parent_app._add_utility_button(cleanup_layout, "Tiến Trình Ngốn CPU (1 giờ qua)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, parent_app.get_process_offenders_report, "optimize_top_cpu_processes", task_args=(3600, METRIC_CPU), result_type="table", coalesce=True))
+    parent_app._add_utility_button(cleanup_layout, "Tiến Trình Ngốn RAM (1 giờ qua)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, parent_app.get_process_offenders_report, "optimize_top_ram_processes", task_args=(3600, METRIC_RSS), result_type="table", coalesce=True))
     parent_app.optimize_actions_layout.addWidget(group_cleanup)
 
     group_fix_update = QGroupBox("Sửa lỗi & Cập nhật")
     group_fix_update.setFont(parent_app.h2_font)
     fix_update_layout = QVBoxLayout(group_fix_update)
+    parent_app._add_utility_button(fix_update_layout, "Tra Cứu Nhật Ký Sự Kiện (Lưu Trữ)", parent_app.run_event_archive_search_qt)
+    parent_app._add_utility_button(fix_update_layout, "Lịch Sử Màn Hình Xanh (Crash Dump)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, get_crash_dump_history, "optimize_crash_dumps", result_type="table", coalesce=True))
     parent_app._add_utility_button(fix_update_layout, "Chạy SFC Scan", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, run_sfc_scan, "optimize_sfc_scan"))
     parent_app._add_utility_button(fix_update_layout, "Tạo Điểm Khôi Phục Hệ Thống", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, create_system_restore_point, "optimize_create_restore_point"))
     parent_app._add_utility_button(fix_update_layout, "Cập Nhật Phần Mềm (Winget)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, update_all_winget_packages, "optimize_winget_update"))
@@ -76,10 +88,18 @@ def create_optimize_tab_content(parent_app):
     parent_app._add_utility_button(advanced_opt_layout, "Dọn Dẹp Registry (Có Sao Lưu)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, clean_registry_with_backup, "optimize_clean_registry"))
     parent_app.optimize_actions_layout.addWidget(group_advanced_optimization)
 
+    group_benchmark = QGroupBox("Đánh giá Hiệu năng")
+    group_benchmark.setFont(parent_app.h2_font)
+    benchmark_layout = QVBoxLayout(group_benchmark)
+    parent_app._add_utility_button(benchmark_layout, "Đánh Giá CPU (Đơn & Đa Nhân)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, run_cpu_benchmark, "optimize_cpu_benchmark", result_type="table"))
+    parent_app._add_utility_button(benchmark_layout, "Kiểm Tra Băng Thông & Độ Trễ RAM", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, run_memory_speed_test, "optimize_memory_speed_test", result_type="table"))
+    parent_app._add_utility_button(benchmark_layout, "Đánh Giá Ổ Lưu Trữ (SEQ/RND4K, Độ Trễ)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, run_storage_benchmark_test, "optimize_storage_benchmark", result_type="table"))
+    parent_app.optimize_actions_layout.addWidget(group_benchmark)
+
     group_printer_management = QGroupBox("Quản lý Máy In")
     group_printer_management.setFont(parent_app.h2_font)
     printer_mgmt_layout = QVBoxLayout(group_printer_management)
-    parent_app._add_utility_button(printer_mgmt_layout, "Liệt kê Máy In", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, list_printers, "optimize_list_printers", needs_wmi=True, result_type="table"))
+    parent_app._add_utility_button(printer_mgmt_layout, "Liệt kê Máy In", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, list_printers, "optimize_list_printers", needs_wmi=True, result_type="table", coalesce=True))
     parent_app._add_utility_button(printer_mgmt_layout, "Gỡ Máy In Lỗi", parent_app.run_remove_printer_qt)
     parent_app._add_utility_button(printer_mgmt_layout, "Xóa Lệnh In (Tất cả)", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_optimize, clear_print_queue, "optimize_clear_all_print_queues", needs_wmi=False))
     parent_app._add_utility_button(printer_mgmt_layout, "Xóa Lệnh In (Chọn Máy In)", parent_app.run_clear_specific_print_queue_qt)
@@ -3,20 +3,19 @@
 import sys
 import os
 import logging
+import time
 import html # Thêm import html để escape nội dung
-import csv # Import the csv module
 from datetime import datetime
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QTextEdit, QLineEdit, QComboBox, QStackedWidget, QListWidget, QListWidgetItem, QSplitter, QDialog, QFormLayout, QDialogButtonBox, QProgressBar, QSizePolicy,
-    QGroupBox, QScrollArea, QMessageBox, QFileDialog, QGridLayout, QFrame, QStackedWidget, QTableWidget, QTableWidgetItem, QHeaderView, QInputDialog,
+    QGroupBox, QScrollArea, QMessageBox, QFileDialog, QGridLayout, QFrame, QStackedWidget, QHeaderView, QInputDialog,
     QCheckBox
 )
 from PyQt5.QtGui import QFont, QPixmap, QIcon, QTextOption, QColor, QTextCharFormat, QTextCursor
-from PyQt5.QtCore import Qt, QTimer, QSize # Import QSize, QThread, pyqtSignal removed
+from PyQt5.QtCore import Qt, QTimer, QSize, QEvent # Import QSize, QThread, pyqtSignal removed
 
-import psutil # Import psutil for real-time usage
 import win32com.client # For CoInitialize/CoUninitialize in threads
 
 # Import các hàm cần thiết từ core
@@ -25,7 +24,8 @@ import win32com.client # For CoInitialize/CoUninitialize in threads
 from core.pc_info_functions import ( # type: ignore
     get_detailed_system_information, NOT_AVAILABLE, ERROR_WMI_CONNECTION, NOT_FOUND,
     get_disk_partitions_usage, generate_battery_report, check_windows_activation_status,
-    open_resource_monitor, clear_temporary_files, get_recent_event_logs,
+    open_resource_monitor, clear_temporary_files, get_recent_event_logs, search_event_archive,
+    update_event_archive,
     get_installed_software_versions, get_wifi_connection_info, get_system_temperatures,
     get_running_processes, reset_internet_connection, run_sfc_scan,
     update_all_winget_packages, run_windows_defender_scan,
@@ -55,9 +55,17 @@ from core.pc_info_manager import (
     format_pc_info_to_string, format_system_details_to_string,
     format_user_info_for_display # Import hàm này
 )
-# Import WorkerThread từ file mới
-from core.pc_info_functions import get_gpu_realtime_usage # Import hàm lấy GPU real-time
-from .gui_worker import WorkerThread
+# Import nhóm luồng tác vụ dùng chung
+from core.gpu_telemetry import GpuSampler # Lấy mẫu GPU real-time ở luồng nền (phiên NVML dùng lâu dài)
+from core.metrics_sampler import MetricsSampler # Lấy mẫu CPU/RAM/IO ở luồng nền + lịch sử ring buffer
+from core.metrics_store import MetricsStore # Lịch sử số liệu lưu trên đĩa (raw/1 phút/1 giờ)
+from core.sampling_policy import AdaptiveSamplingPolicy, get_power_state # Giảm tần suất lấy mẫu khi không hiển thị
+from core.process_history import ProcessHistorySampler, METRIC_CPU, DEFAULT_SAMPLE_INTERVAL_S as PROCESS_SAMPLE_INTERVAL_S # Lịch sử theo tiến trình
+from core.health_rules import get_default_engine # Luật điểm sức khỏe (đánh giá hiện tại + xu hướng)
+from core.anomaly_detector import AnomalyDetector, EVENT_RAISED, SEVERITY_CRITICAL, SEVERITY_WARNING # Cảnh báo hệ thống theo thời gian thực
+from core.task_scheduler import PRIORITY_BACKGROUND # type: ignore
+from .gui_worker import TaskRunner, TASK_TYPE_SYSTEM_INFO, TASK_TYPE_BACKGROUND
+from .gui_table_model import ResultsTableView # Model/View cho các bảng kết quả
 # Import các hàm tạo giao diện tab từ các file riêng
 from .gui_dashboard_tab import create_dashboard_tab_content # type: ignore
 # Thêm import cho các file tab khác khi bạn tạo chúng:
@@ -216,12 +224,35 @@ class PcInfoAppQt(QMainWindow):
         self.nav_panel_is_collapsed = False
         self.nav_is_collapsed = False # State for navigation panel
 
-        self.threads = [] # List để giữ các QThread đang chạy
+        self.task_runner = TaskRunner(self) # Nhóm luồng cố định cho mọi tác vụ nền
+        self.gpu_sampler = GpuSampler() # Lấy mẫu mọi GPU ở luồng nền, timer GUI chỉ đọc mẫu mới nhất
+        self.gpu_sampler.start()
+        self.metrics_sampler = MetricsSampler(gpu_sampler=self.gpu_sampler) # Nguồn dữ liệu cho dashboard và biểu đồ xu hướng
+        self.metrics_store = None
+        try:
+            self.metrics_store = MetricsStore() # Xu hướng 24h/7 ngày/30 ngày giữa các phiên
+            self.metrics_sampler.add_snapshot_listener(self.metrics_store.append_snapshot)
+        except (OSError, ValueError) as e:
+            logging.error(f"Không thể mở kho lịch sử số liệu: {e}")
+        self.anomaly_detector = AnomalyDetector() # Chạy trên luồng lấy mẫu, GUI chỉ đọc sự kiện/cảnh báo
+        self.metrics_sampler.add_snapshot_listener(self.anomaly_detector.process)
+        self._displayed_alert_ids = None
+        self._last_health_refresh = 0.0
+        self.metrics_sampler.start()
+        self.process_history_sampler = None
+        try:
+            self.process_history_sampler = ProcessHistorySampler() # "Tiến trình nào ngốn CPU 1 giờ trước?"
+            self.process_history_sampler.start()
+        except RuntimeError as e: # Thiếu numpy
+            logging.warning(f"Không bật lịch sử tiến trình: {e}")
+        self.sampling_policy = AdaptiveSamplingPolicy()
+        self._sampling_decision = None # Quyết định đang áp dụng (để chỉ đổi khi cần)
 
         self._load_logo()
         self._init_timers() # Khởi tạo các QTimer cho debouncing
         self._create_widgets()
         self._apply_styles()
+        self._load_trend_history() # Biểu đồ xu hướng: nạp lịch sử đã lưu trước khi nhận mẫu trực tiếp
         self.toast_notifier = ToastNotification(self) # Khởi tạo toast notifier
         self._start_realtime_update_timer() # Bắt đầu timer cập nhật liên tục
         self.fetch_pc_info_threaded()
@@ -251,6 +282,15 @@ class PcInfoAppQt(QMainWindow):
         # Timer cho cập nhật phần trăm sử dụng liên tục
         self.realtime_update_timer = QTimer(self)
         self.realtime_update_timer.timeout.connect(self._update_realtime_usage)
+        # Timer thưa để đánh giá lại chính sách lấy mẫu (trạng thái pin, chi phí lấy mẫu)
+        self.sampling_policy_timer = QTimer(self)
+        self.sampling_policy_timer.timeout.connect(self._apply_sampling_policy)
+        self.sampling_policy_timer.start(30000)
+        # Timer nạp định kỳ Event Log vào kho lưu trữ (lần đầu sau khi khởi động 1 phút, sau đó mỗi 30 phút)
+        self.event_archive_timer = QTimer(self)
+        self.event_archive_timer.timeout.connect(self._sync_event_archive_in_background)
+        self.event_archive_timer.start(30 * 60 * 1000)
+        QTimer.singleShot(60 * 1000, self._sync_event_archive_in_background)
 
 
     def _create_widgets(self):
@@ -356,6 +396,26 @@ class PcInfoAppQt(QMainWindow):
         global_buttons_layout = QHBoxLayout(global_buttons_frame)
         global_buttons_layout.setContentsMargins(0, 5, 0, 0) # No horizontal margins, top margin
 
+        # --- Tiến độ tác vụ nền (ẩn khi không có tác vụ) ---
+        self.task_status_label = QLabel("")
+        self.task_status_label.setFont(self.body_font)
+        self.task_status_label.setVisible(False)
+        global_buttons_layout.addWidget(self.task_status_label)
+        self.task_progress_bar = QProgressBar()
+        self.task_progress_bar.setObjectName("taskProgress")
+        self.task_progress_bar.setFixedWidth(200)
+        self.task_progress_bar.setRange(0, 0) # Chưa có tiến độ: chế độ không xác định
+        self.task_progress_bar.setVisible(False)
+        global_buttons_layout.addWidget(self.task_progress_bar)
+        self.button_cancel_tasks = QPushButton("Hủy tác vụ")
+        self.button_cancel_tasks.setFont(self.body_font)
+        self.button_cancel_tasks.setCursor(Qt.PointingHandCursor)
+        self.button_cancel_tasks.clicked.connect(self.on_cancel_tasks_clicked)
+        self.button_cancel_tasks.setVisible(False)
+        global_buttons_layout.addWidget(self.button_cancel_tasks)
+        self.task_runner.task_progress.connect(self._on_task_progress)
+        self.task_runner.active_count_changed.connect(self._on_active_task_count_changed)
+
         global_buttons_layout.addStretch(1) # Stretch sẽ đẩy các nút sau nó sang phải
 
         # --- Nút Làm mới Dashboard (sẽ được hiển thị/ẩn tùy theo tab) ---
@@ -524,7 +584,7 @@ class PcInfoAppQt(QMainWindow):
         self._add_utility_button(sec_layout, "Quét Virus Nhanh", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_security, run_windows_defender_scan, "security_defender_quick_scan", needs_wmi=False, task_args=["QuickScan"]))
         self._add_utility_button(sec_layout, "Quét Virus Toàn Bộ", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_security, run_windows_defender_scan, "security_defender_full_scan", needs_wmi=False, task_args=["FullScan"]))
         self._add_utility_button(sec_layout, "Cập Nhật Định Nghĩa Virus", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_security, update_windows_defender_definitions, "security_defender_update", needs_wmi=False))
-        self._add_utility_button(sec_layout, "Kiểm Tra Trạng Thái Tường Lửa", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_security, get_firewall_status, "security_firewall_status", needs_wmi=False))
+        self._add_utility_button(sec_layout, "Kiểm Tra Trạng Thái Tường Lửa", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_security, get_firewall_status, "security_firewall_status", needs_wmi=False, coalesce=True))
         self._add_utility_button(sec_layout, "Bật Tường Lửa (Tất cả Profile)", self.enable_firewall_qt, object_name="WarningButton") # Example of specific style
         self._add_utility_button(sec_layout, "Tắt Tường Lửa (Tất cả Profile)", self.disable_firewall_qt, object_name="DangerButton")
         self.security_actions_layout.addWidget(group_security)
@@ -542,7 +602,7 @@ class PcInfoAppQt(QMainWindow):
         self.utilities_results_main_layout = QVBoxLayout(results_container_widget) # Lưu layout này
         self.utilities_results_main_layout.setContentsMargins(0,0,0,0)
 
-        # QStackedWidget for switching between QTextEdit and QTableWidget
+        # QStackedWidget for switching between QTextEdit and ResultsTableView
         self.stacked_widget_results_security = QStackedWidget() # Đổi tên
         
         # Page 0: QTextEdit for general results
@@ -558,8 +618,8 @@ class PcInfoAppQt(QMainWindow):
         self._update_display_widget(self.text_security_results_qt, "Kết quả của tác vụ bảo mật sẽ hiển thị ở đây.")
         self.stacked_widget_results_security.addWidget(results_group)
 
-        # Page 1: QTableWidget for table results
-        self.table_security_results_qt = QTableWidget() # Đổi tên
+        # Page 1: ResultsTableView for table results
+        self.table_security_results_qt = ResultsTableView() # Đổi tên
         self._setup_results_table(self.table_security_results_qt) # Sử dụng hàm helper
         self.stacked_widget_results_security.addWidget(self.table_security_results_qt)
 
@@ -637,7 +697,7 @@ class PcInfoAppQt(QMainWindow):
         group_printer_management = QGroupBox("Quản lý Máy In")
         group_printer_management.setFont(self.h2_font)
         printer_mgmt_layout = QVBoxLayout(group_printer_management)
-        self._add_utility_button(printer_mgmt_layout, "Liệt kê Máy In", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_optimize, list_printers, "optimize_list_printers", needs_wmi=True, result_type="table"))
+        self._add_utility_button(printer_mgmt_layout, "Liệt kê Máy In", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_optimize, list_printers, "optimize_list_printers", needs_wmi=True, result_type="table", coalesce=True))
         self._add_utility_button(printer_mgmt_layout, "Gỡ Máy In Lỗi", self.run_remove_printer_qt)
         self._add_utility_button(printer_mgmt_layout, "Xóa Lệnh In (Tất cả)", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_optimize, clear_print_queue, "optimize_clear_all_print_queues", needs_wmi=False)) # False for WMI as it restarts spooler
         self._add_utility_button(printer_mgmt_layout, "Xóa Lệnh In (Chọn Máy In)", self.run_clear_specific_print_queue_qt)
@@ -706,11 +766,11 @@ class PcInfoAppQt(QMainWindow):
         group_network = QGroupBox("Công cụ Mạng")
         group_network.setFont(self.h2_font)
         net_layout = QVBoxLayout(group_network)
-        self._add_utility_button(net_layout, "Kiểm Tra Kết Nối Wifi", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, get_wifi_connection_info, "network_wifi_info"))
-        self._add_utility_button(net_layout, "Xem Cấu Hình Mạng Chi Tiết", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, get_network_configuration_details, "network_config", needs_wmi=True, result_type="table"))
+        self._add_utility_button(net_layout, "Kiểm Tra Kết Nối Wifi", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, get_wifi_connection_info, "network_wifi_info", coalesce=True))
+        self._add_utility_button(net_layout, "Xem Cấu Hình Mạng Chi Tiết", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, get_network_configuration_details, "network_config", needs_wmi=True, result_type="table", coalesce=True))
         self._add_utility_button(net_layout, "Ping Google", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, run_ping_test, "network_ping_google", task_args=["google.com", 4]))
         self._add_utility_button(net_layout, "Phân giải IP tên miền", self.run_domain_ip_resolution_qt) # Sẽ cần cập nhật target_stacked_widget
-        self._add_utility_button(net_layout, "Kết Nối Mạng Đang Hoạt Động", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, get_active_network_connections, "network_active_connections", result_type="table"))
+        self._add_utility_button(net_layout, "Kết Nối Mạng Đang Hoạt Động", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, get_active_network_connections, "network_active_connections", result_type="table", coalesce=True))
         self._add_utility_button(net_layout, "Cấu hình DNS", self.run_set_dns_config_qt) # Sẽ cần cập nhật target_stacked_widget
         self._add_utility_button(net_layout, "Xóa Cache DNS", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, flush_dns_cache, "network_flush_dns"))
         self._add_utility_button(net_layout, "Reset Kết Nối Internet", lambda btn: self._run_task_in_thread_qt(btn, self.stacked_widget_results_network, reset_internet_connection, "network_reset_net"))
@@ -739,7 +799,7 @@ class PcInfoAppQt(QMainWindow):
         self._update_display_widget(self.text_network_results_qt, "Kết quả của tác vụ mạng sẽ hiển thị ở đây.")
         self.stacked_widget_results_network.addWidget(results_group)
 
-        self.table_network_results_qt = QTableWidget()
+        self.table_network_results_qt = ResultsTableView()
         self._setup_results_table(self.table_network_results_qt)
         self.stacked_widget_results_network.addWidget(self.table_network_results_qt)
 
@@ -776,7 +836,7 @@ class PcInfoAppQt(QMainWindow):
         winget_layout = QVBoxLayout(group_winget)
 
         btn_list_winget = QPushButton("Liệt kê ứng dụng có thể cập nhật")
-        btn_list_winget.clicked.connect(lambda: self._run_task_in_thread_qt(btn_list_winget, self.stacked_widget_results_update_center, list_upgradable_winget_packages, "update_winget_list", result_type="text")) # Hiển thị kết quả ở text_update_results_qt
+        btn_list_winget.clicked.connect(lambda: self._run_task_in_thread_qt(btn_list_winget, self.stacked_widget_results_update_center, list_upgradable_winget_packages, "update_winget_list", result_type="text", coalesce=True)) # Hiển thị kết quả ở text_update_results_qt
         winget_layout.addWidget(btn_list_winget)
 
         btn_update_all_winget = QPushButton("Cập nhật tất cả ứng dụng qua Winget")
@@ -840,6 +900,11 @@ class PcInfoAppQt(QMainWindow):
         # elif current_page_widget == self.page_system_info:
         elif current_page_widget == self.page_update_center: # Search for Update Center
             self._filter_action_buttons(search_term, self.page_update_center.layout()) # Assuming buttons are directly in layout or in groups
+
+        # Lọc các dòng của bảng kết quả (qua QSortFilterProxyModel) theo cùng từ khóa
+        results_stacked_widget = self._get_active_results_stacked_widget()
+        if results_stacked_widget and isinstance(results_stacked_widget.widget(1), ResultsTableView):
+            results_stacked_widget.widget(1).set_filter_text(search_term)
             
             # Example: if system_info tab has a QTextEdit for detailed logs or similar
             # text_edit_system = self.page_system_info.findChild(QTextEdit, "SystemInfoTextDisplay")
@@ -851,7 +916,7 @@ class PcInfoAppQt(QMainWindow):
     #     pass
 
     def _create_results_display_area(self, group_title, text_edit_object_name, table_widget_object_name):
-        """Helper to create a QStackedWidget with a QTextEdit and QTableWidget for results."""
+        """Helper to create a QStackedWidget with a QTextEdit and a ResultsTableView for results."""
         stacked_widget = QStackedWidget()
 
         # Page 0: QTextEdit for general results
@@ -867,8 +932,8 @@ class PcInfoAppQt(QMainWindow):
         self._update_display_widget(text_edit_results, "Kết quả sẽ hiển thị ở đây.")
         stacked_widget.addWidget(results_group_text)
 
-        # Page 1: QTableWidget for table results
-        table_results = QTableWidget()
+        # Page 1: ResultsTableView (model/view) for table results
+        table_results = ResultsTableView()
         self._setup_results_table(table_results) # Use common setup
         table_results.setObjectName(table_widget_object_name)
         stacked_widget.addWidget(table_results)
@@ -1200,7 +1265,7 @@ class PcInfoAppQt(QMainWindow):
                 color: {STAT_CARD_DETAILS_COLOR};
                 margin-top: 8px;
             }}
-            /* Styles for result display QTextEdit and QTableWidget widgets */
+            /* Styles for result display QTextEdit and ResultsTableView widgets */
             QTextEdit#ResultTextEdit, QTextEdit#SecurityResultTextEdit, QTextEdit#OptimizeResultTextEdit, QTextEdit#NetworkResultTextEdit, QTextEdit#FixesResultTextEdit, QTextEdit#text_update_results_qt {{ 
                  font-family: "{MONOSPACE_FONT_FAMILY}";
                  font-size: {MONOSPACE_FONT_SIZE}pt;
@@ -1208,7 +1273,7 @@ class PcInfoAppQt(QMainWindow):
                  border: 1px solid {BORDER_COLOR_LIGHT}; /* Viền nhẹ cho ô text kết quả */
                  border-radius: 5px; /* Bo góc */
             }} 
-            QTableWidget#ResultTableWidget {{ 
+            QTableView#ResultTableWidget {{ 
                 font-family: "{DEFAULT_FONT_FAMILY}";
                 font-size: {BODY_FONT_SIZE-1}pt; /* Slightly smaller for table data */
                 alternate-background-color: #F5F5F5; /* Light grey for alternate rows */
@@ -1216,7 +1281,7 @@ class PcInfoAppQt(QMainWindow):
                 border: 1px solid {BORDER_COLOR_LIGHT}; /* Viền nhẹ cho bảng */
                 border-radius: 5px; /* Bo góc */
             }}
-            QTableWidget#ResultTableWidget::item:hover {{
+            QTableView#ResultTableWidget::item:hover {{
                 background-color: {ACCENT_COLOR_HOVER};
                 color: white; 
             }}
@@ -1580,16 +1645,41 @@ class PcInfoAppQt(QMainWindow):
         if self.realtime_update_timer.isActive():
             self.realtime_update_timer.stop()
 
-        # Pass the refresh button to the thread
-        thread = WorkerThread(get_detailed_system_information, "fetch_pc_info", needs_wmi=False,
-                                button_to_manage=self.button_refresh_dashboard_qt,
-                                original_button_text=self.button_refresh_dashboard_qt.text())
-        thread.task_completed.connect(self._on_fetch_pc_info_completed)
-        thread.task_error.connect(self._on_task_error)
-        self.threads.append(thread)
+        # Pass the refresh button to the task runner
         self._update_status_bar("Đang lấy thông tin hệ thống...", "info")
-        
-        thread.start()
+        self.task_runner.submit(get_detailed_system_information, "fetch_pc_info",
+                                task_type=TASK_TYPE_SYSTEM_INFO, coalesce=True,
+                                button_to_manage=self.button_refresh_dashboard_qt,
+                                on_completed=self._on_fetch_pc_info_completed,
+                                on_error=self._on_task_error)
+
+    def _on_task_progress(self, task_name, percent, message):
+        """Hiển thị tiến độ do tác vụ nền báo về (chạy trên luồng GUI)."""
+        if percent is None:
+            self.task_progress_bar.setRange(0, 0)
+        else:
+            if self.task_progress_bar.maximum() == 0:
+                self.task_progress_bar.setRange(0, 100)
+            self.task_progress_bar.setValue(int(percent))
+        if message:
+            self.task_status_label.setText(message)
+
+    def _on_active_task_count_changed(self, active_count):
+        busy = active_count > 0
+        self.task_status_label.setVisible(busy)
+        self.task_progress_bar.setVisible(busy)
+        self.button_cancel_tasks.setVisible(busy)
+        if busy:
+            self.button_cancel_tasks.setToolTip(f"{active_count} tác vụ đang chạy/chờ")
+        else:
+            self.task_status_label.setText("")
+            self.task_progress_bar.setRange(0, 0)
+
+    def on_cancel_tasks_clicked(self):
+        cancelled_count = self.task_runner.cancel_all()
+        if cancelled_count:
+            self.task_status_label.setText("Đang hủy tác vụ...")
+            self._update_status_bar(f"Đã yêu cầu hủy {cancelled_count} tác vụ.", "warning")
 
     def _populate_card(self, card_groupbox, data_dict, keys_map):
         # This function is now primarily for the System Info tab
@@ -1626,7 +1716,8 @@ class PcInfoAppQt(QMainWindow):
             temps_data = self.pc_info_dict.get("SystemCheckUtilities", {}).get("SystemTemperatures", {})
 
             # Calculate System Health Score
-            health_score_info = calculate_system_health_score(self.pc_info_dict)
+            health_score_info = calculate_system_health_score(self.pc_info_dict, snapshot=self.metrics_sampler.latest_snapshot(),
+                                                              history=self.metrics_sampler.history_between)
 
             # --- Cập nhật thông tin tĩnh trên Dashboard Tab ---
             if hasattr(self, 'cpu_card'):
@@ -1671,13 +1762,7 @@ class PcInfoAppQt(QMainWindow):
                 else:
                     self.gpu_card.update_details(f"{NOT_AVAILABLE}")
                 # Update System Health Score on Dashboard
-                score_val = health_score_info.get('score', 'N/A')
-                self.health_score_label.setText(f"🎯 Điểm Sức Khỏe: <b>{score_val}</b>/100")
-                issues_list = health_score_info.get('issues', [])
-                if issues_list:
-                    self.health_score_label.setToolTip("Các vấn đề ảnh hưởng điểm:\n- " + "\n- ".join(issues_list))
-                else:
-                    self.health_score_label.setToolTip("Không có vấn đề nghiêm trọng nào được phát hiện.")
+                self._show_health_score(health_score_info)
                 # Bắt đầu timer cập nhật liên tục sau khi thông tin tĩnh đã được tải
                 self._start_realtime_update_timer()
 
@@ -1829,32 +1914,29 @@ class PcInfoAppQt(QMainWindow):
             self._update_status_bar(f"Lỗi khi xuất báo cáo PC: {str(e)[:100]}...", "error")
 
 
-    def _get_table_content_as_text(self, table_widget):
-        if not table_widget: return ""
-        header = [table_widget.horizontalHeaderItem(c).text() for c in range(table_widget.columnCount())]
-        lines = [",".join(header)]
-        for r in range(table_widget.rowCount()):
-            row_data = []
-            for c in range(table_widget.columnCount()):
-                item = table_widget.item(r, c)
-                row_data.append(item.text() if item else "")
-            lines.append(",".join(row_data))
-        return "\n".join(lines)
+    def _get_table_content_as_text(self, table_view):
+        if not table_view: return ""
+        return table_view.to_csv_text() # Đọc trực tiếp từ model, không qua item của widget
+
+    def _get_active_results_stacked_widget(self):
+        """Trả về QStackedWidget kết quả của tab hiện tại (hoặc None)."""
+        current_page_widget = self.pages_stack.currentWidget()
+        if current_page_widget == self.page_security and hasattr(self, 'stacked_widget_results_security'):
+            return self.stacked_widget_results_security
+        if current_page_widget == self.page_optimize and hasattr(self, 'stacked_widget_results_optimize'):
+            return self.stacked_widget_results_optimize
+        if current_page_widget == self.page_network and hasattr(self, 'stacked_widget_results_network'):
+            return self.stacked_widget_results_network
+        if current_page_widget == self.page_update_center and hasattr(self, 'stacked_widget_results_update_center'):
+            return self.stacked_widget_results_update_center
+        return None
 
     def on_export_csv_qt(self):
-        current_tab_widget = self.notebook.currentWidget()
-        # This needs to be updated to reflect new tab structure and stacked widgets
         table_to_export = None
-        if current_tab_widget == self.page_security and self.stacked_widget_results_security.currentIndex() == 1:
-            table_to_export = self.table_security_results_qt
-        elif current_tab_widget == self.page_optimize and self.stacked_widget_results_optimize.currentIndex() == 1:
-            table_to_export = self.table_optimize_results_qt
-        elif current_tab_widget == self.page_network and self.stacked_widget_results_network.currentIndex() == 1:
-            table_to_export = self.table_network_results_qt
-        # Add elif for self.page_system_info if it has tables to export
-        # elif current_tab_widget == self.page_system_info and self.stacked_widget_results_system.currentIndex() == 1:
-        #     table_to_export = self.table_system_results_qt
-        if not table_to_export or table_to_export.rowCount() == 0:
+        stacked_widget = self._get_active_results_stacked_widget()
+        if stacked_widget and stacked_widget.currentIndex() == 1:
+            table_to_export = stacked_widget.widget(1)
+        if not isinstance(table_to_export, ResultsTableView) or table_to_export.row_count() == 0:
             QMessageBox.warning(self, "Không có dữ liệu", "Không có dữ liệu bảng để xuất CSV.")
             return
 
@@ -1867,12 +1949,7 @@ class PcInfoAppQt(QMainWindow):
         if file_path:
             try:
                 with open(file_path, 'w', newline='', encoding='utf-8-sig') as csvfile: # utf-8-sig for Excel compatibility
-                    writer = csv.writer(csvfile)
-                    header = [table_to_export.horizontalHeaderItem(c).text() for c in range(table_to_export.columnCount())]
-                    writer.writerow(header)
-                    for r in range(table_to_export.rowCount()):
-                        row_data = [table_to_export.item(r, c).text() if table_to_export.item(r, c) else "" for c in range(table_to_export.columnCount())]
-                        writer.writerow(row_data)
+                    table_to_export.write_csv(csvfile) # Ghi theo thứ tự sắp xếp/lọc hiện tại, đọc từ model
                 QMessageBox.information(self, "Xuất CSV Thành Công", f"Dữ liệu bảng đã được xuất ra:\n{file_path}")
                 self._update_status_bar(f"Xuất CSV thành công: {os.path.basename(file_path)}", "success")
             
@@ -1882,7 +1959,7 @@ class PcInfoAppQt(QMainWindow):
                 self._update_status_bar(f"Lỗi xuất CSV: {str(e)[:100]}...", "error")
 
 
-    def _run_task_in_thread_qt(self, button_clicked, target_stacked_widget, task_function, task_name_prefix, needs_wmi=False, wmi_namespace="root\\CIMV2", task_args=None, result_type="text"):
+    def _run_task_in_thread_qt(self, button_clicked, target_stacked_widget, task_function, task_name_prefix, needs_wmi=False, wmi_namespace="root\\CIMV2", task_args=None, result_type="text", coalesce=False):
         task_name = f"{task_name_prefix}_{task_function.__name__}_{datetime.now().strftime('%H%M%S%f')}" # Unique task name
         
         if target_stacked_widget: # Only interact with target_stacked_widget if it's provided
@@ -1921,47 +1998,23 @@ class PcInfoAppQt(QMainWindow):
             actual_args_for_thread_tuple = (task_args,)
         else: # It's already a list or tuple
             actual_args_for_thread_tuple = tuple(task_args)
-        thread = WorkerThread(task_function, task_name, needs_wmi, wmi_namespace,
-                                *actual_args_for_thread_tuple,
+        self.task_runner.submit(task_function, task_name, needs_wmi=needs_wmi, wmi_namespace=wmi_namespace,
+                                args=actual_args_for_thread_tuple, coalesce=coalesce,
                                 button_to_manage=button_clicked,
-                                original_button_text=button_clicked.text())
-        thread.task_completed.connect(lambda name, data: self._on_generic_task_completed(name, data, target_stacked_widget, result_type))
-        thread.task_error.connect(self._on_task_error)
-        self.threads.append(thread)
-        thread.start()
-
-    def _populate_table_widget(self, table_widget, data_list):
-        table_widget.clearContents()
-        table_widget.setRowCount(0)
-        self.current_table_data = None # Clear previous table data for CSV export
-
-        if not data_list or not isinstance(data_list, list) or not isinstance(data_list[0], dict):
-            # If data is not suitable for table, show message in text view
-            # This case should ideally be handled by result_type="text"
-            table_widget.setColumnCount(1)
-            table_widget.setHorizontalHeaderLabels(["Thông báo"])
-            table_widget.setRowCount(1)
-            table_widget.setItem(0,0, QTableWidgetItem("Dữ liệu không phù hợp cho bảng hoặc không có dữ liệu."))
-            return
+                                on_completed=lambda name, data: self._on_generic_task_completed(name, data, target_stacked_widget, result_type),
+                                on_error=self._on_task_error)
 
-        headers = list(data_list[0].keys())
-        table_widget.setColumnCount(len(headers))
-        table_widget.setHorizontalHeaderLabels(headers)
-        table_widget.setRowCount(len(data_list))
-
-        for row_idx, row_data in enumerate(data_list):
-            for col_idx, header in enumerate(headers):
-                item_value = str(row_data.get(header, ""))
-                table_widget.setItem(row_idx, col_idx, QTableWidgetItem(item_value))
-        
-        table_widget.resizeColumnsToContents()
-        self.current_table_data = data_list # Store for CSV export
+    def _populate_table_widget(self, table_view, data_list):
+        # Model giữ nguyên list dict gốc; ô chỉ được định dạng khi hiển thị (xem gui_table_model.py)
+        table_view.set_rows(data_list)
+        # Dữ liệu không phù hợp (không phải list dict) sẽ hiện một dòng "Thông báo" do model tạo ra
+        self.current_table_data = data_list if table_view.row_count() else None # Store for CSV export
 
     def _on_generic_task_completed(self, task_name, data, target_stacked_widget, result_type="text"):
         if target_stacked_widget: # Only if we have a target display
             if result_type == "table" and isinstance(data, list) and data and isinstance(data[0], dict):
                 table_widget_target = target_stacked_widget.widget(1) # Assuming table is at index 1
-                if isinstance(table_widget_target, QTableWidget):
+                if isinstance(table_widget_target, ResultsTableView):
                     self._populate_table_widget(table_widget_target, data)
                     target_stacked_widget.setCurrentIndex(1) # Switch to table view
                 else: # Fallback to text if widget at index 1 is not a table
@@ -2107,7 +2160,7 @@ class PcInfoAppQt(QMainWindow):
             # Assuming this button is on the network tab:
             self._run_task_in_thread_qt(button_clicked, self.stacked_widget_results_network, 
                                         lookup_dns_address, "network_resolve_domain_ip", 
-                                        needs_wmi=False, task_args=[domain_name.strip()])
+                                        needs_wmi=False, task_args=[domain_name.strip()], coalesce=True)
         elif ok: # Người dùng nhấn OK nhưng không nhập gì
             QMessageBox.warning(self, "Đầu vào trống", "Bạn chưa nhập tên miền.")
 
@@ -2136,7 +2189,7 @@ class PcInfoAppQt(QMainWindow):
         if ok and domain_name.strip():
             self._run_task_in_thread_qt(button_clicked, self.stacked_widget_results_network, 
                                         lookup_dns_address, "utility_resolve_domain_ip", # This task_name_prefix needs to match the tab
-                                        needs_wmi=False, task_args=[domain_name.strip()])
+                                        needs_wmi=False, task_args=[domain_name.strip()], coalesce=True)
         elif ok: # Người dùng nhấn OK nhưng không nhập gì
             QMessageBox.warning(self, "Đầu vào trống", "Bạn chưa nhập tên miền.")
 
@@ -2157,26 +2210,39 @@ class PcInfoAppQt(QMainWindow):
                 return
             self._run_task_in_thread_qt(button_clicked, self.stacked_widget_results_network, set_dns_servers, "network_set_dns", needs_wmi=True, task_args=[primary_dns, secondary_dns])
     def closeEvent(self, event): # type: ignore
-        # Dọn dẹp luồng khi đóng ứng dụng
-        active_threads = [t for t in self.threads if t.isRunning()]
-        if active_threads:
+        # Dọn dẹp nhóm luồng khi đóng ứng dụng
+        active_count = self.task_runner.active_count()
+        if active_count:
             reply = QMessageBox.question(self, 'Thoát Ứng Dụng',
-                                         f"Có {len(active_threads)} tác vụ đang chạy. Bạn có chắc muốn thoát?",
+                                         f"Có {active_count} tác vụ đang chạy. Bạn có chắc muốn thoát?",
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                for thread in active_threads:
-                    logging.info(f"Requesting thread {thread.task_name} to quit...")
-                    thread.quit() # Yêu cầu luồng dừng một cách nhẹ nhàng
-                    if not thread.wait(1000): # Đợi tối đa 1 giây
-                        logging.warning(f"Thread {thread.task_name} did not finish gracefully, terminating.")
-                        thread.terminate() # Buộc dừng nếu không phản hồi
+                logging.info(f"Shutting down task runner, running: {self.task_runner.running_task_names()}")
+                # Tác vụ đang chạy nhận yêu cầu hủy và tự dừng ở điểm kiểm tra kế tiếp (có giới hạn thời gian chờ)
+                self.task_status_label.setText("Đang dừng các tác vụ...")
+                QApplication.processEvents()
+                if not self.task_runner.shutdown():
+                    logging.warning("Some tasks did not finish before exit.")
+                self._stop_metrics_collection()
                 event.accept()
             else:
                 event.ignore()
-        elif event.isAccepted(): # Ensure super is called if event is accepted by this path too
-             super().closeEvent(event)
+        else:
+            self.task_runner.shutdown()
+            self._stop_metrics_collection()
+            if event.isAccepted(): # Ensure super is called if event is accepted by this path too
+                super().closeEvent(event)
         # If event was not accepted by this logic, it might be handled by base class or ignored.
  
+    def _stop_metrics_collection(self):
+        """Dừng các luồng lấy mẫu rồi đóng kho lịch sử (ghi nốt các bucket dở dang)."""
+        self.metrics_sampler.stop()
+        self.gpu_sampler.stop()
+        if self.process_history_sampler is not None:
+            self.process_history_sampler.stop()
+        if self.metrics_store is not None:
+            self.metrics_store.close()
+
     def _on_navigation_changed(self, index):
         """Clears search inputs and highlights when tab changes."""
         self.pages_stack.setCurrentIndex(index) # Ensure stack is synchronized
@@ -2184,6 +2250,7 @@ class PcInfoAppQt(QMainWindow):
         # Update page title label
         nav_item = self.nav_list_widget.item(index)
         self.page_title_label.setText(nav_item.data(Qt.UserRole) or nav_item.text()) # Use stored full text or current text
+        self._apply_sampling_policy() # Dashboard ẩn/hiện: đổi tần suất lấy mẫu
 
 
         # Show/hide global search bar based on the current tab
@@ -2224,12 +2291,11 @@ class PcInfoAppQt(QMainWindow):
         self._update_active_save_button_state()
 
     def _setup_results_table(self, table_widget):
-        """Helper function to setup common properties for results QTableWidget."""
+        """Helper function to setup common properties for results ResultsTableView."""
         table_widget.setFont(self.body_font)
         table_widget.setAlternatingRowColors(True)
-        table_widget.setSortingEnabled(True)
+        table_widget.setSortingEnabled(True) # Sắp xếp qua QSortFilterProxyModel
         table_widget.horizontalHeader().setStretchLastSection(True)
-        table_widget.setEditTriggers(QTableWidget.NoEditTriggers) # Read-only
         table_widget.setObjectName("ResultTableWidget") # For QSS styling
 
 
@@ -2292,9 +2358,9 @@ class PcInfoAppQt(QMainWindow):
             text_edit = current_widget_on_stack.findChild(QTextEdit)
             if text_edit:
                 content_to_check = text_edit.toPlainText().strip()
-        elif isinstance(current_widget_on_stack, QTableWidget): # QTableWidget page
+        elif isinstance(current_widget_on_stack, ResultsTableView): # Table page
             table_widget = current_widget_on_stack
-            if table_widget.rowCount() > 0:
+            if table_widget.row_count() > 0:
                 content_to_check = "has_table_data" # Chỉ cần một giá trị không rỗng
 
         if not content_to_check or \
@@ -2375,7 +2441,7 @@ class PcInfoAppQt(QMainWindow):
             text_edit = current_widget.findChild(QTextEdit)
             if text_edit:
                 content_to_save = text_edit.toPlainText().strip()
-        elif isinstance(current_widget, QTableWidget): # It's the QTableWidget page
+        elif isinstance(current_widget, ResultsTableView): # It's the table page
             table_widget = current_widget
             content_to_save = self._get_table_content_as_text(table_widget)
 
@@ -2440,16 +2506,16 @@ class PcInfoAppQt(QMainWindow):
         self.startup_manager_buttons_frame.setVisible(True) # Hiện các nút Bật/Tắt
         self._run_task_in_thread_qt(button_clicked, self.stacked_widget_results_optimize,
                                     get_startup_programs, "optimize_startup_list",
-                                    needs_wmi=True, result_type="table")
+                                    needs_wmi=True, result_type="table", coalesce=True)
 
     def on_manage_selected_startup_item(self, action): # action: "enable", "disable", "delete"
         current_table = self.stacked_widget_results_optimize.widget(1)
-        if not isinstance(current_table, QTableWidget) or self.stacked_widget_results_optimize.currentIndex() != 1:
+        if not isinstance(current_table, ResultsTableView) or self.stacked_widget_results_optimize.currentIndex() != 1:
             QMessageBox.warning(self, "Lỗi", "Không tìm thấy bảng quản lý khởi động hoặc bảng không được hiển thị.")
             return
 
-        selected_items = current_table.selectedItems()
-        if not selected_items:
+        selected_rows = current_table.selected_row_dicts()
+        if not selected_rows:
             QMessageBox.information(self, "Chưa chọn", "Vui lòng chọn một mục trong danh sách khởi động.")
             return
 
@@ -2457,8 +2523,8 @@ class PcInfoAppQt(QMainWindow):
         # Và cần thêm thông tin về 'path' hoặc 'key' để hàm core xử lý
         # Hàm get_startup_programs cần trả về đủ thông tin này.
         # Đây là ví dụ, bạn cần điều chỉnh dựa trên dữ liệu thực tế từ get_startup_programs
-        selected_row = selected_items[0].row()
-        item_name = current_table.item(selected_row, 0).text() # Giả sử cột 0 là tên
+        headers = current_table.table_model.headers
+        item_name = str(selected_rows[0].get(headers[0], "")) if headers else "" # Giả sử cột 0 là tên
         # item_path_or_key = current_table.item(selected_row, X).text() # Cần cột chứa path/key
 
         # Placeholder: Cần hàm core `manage_startup_item(name, path_or_key, action)`
@@ -2482,8 +2548,7 @@ class PcInfoAppQt(QMainWindow):
 
         # Lấy và hiển thị trạng thái (ngay cả khi chỉ fetch_only)
         # Giả sử get_windows_update_status trả về một dict {'status': 'Up to date', 'last_checked': '...'}
-        # Cần một WorkerThread để không block GUI nếu get_windows_update_status chậm
-        thread_wu_status = WorkerThread(get_windows_update_status, "update_wu_status_check")
+        # Chạy nền qua task runner để không block GUI nếu get_windows_update_status chậm
         def _on_wu_status_complete(task_name, data):
             if task_name == "update_wu_status_check" and hasattr(self, 'label_windows_update_status'):
                 status_text = data.get('status', 'Không xác định')
@@ -2492,10 +2557,9 @@ class PcInfoAppQt(QMainWindow):
         def _on_wu_status_error(task_name, error_msg):
              if hasattr(self, 'label_windows_update_status'):
                 self.label_windows_update_status.setText(f"Trạng thái Windows Update: Lỗi khi kiểm tra ({error_msg[:50]}...)")
-        thread_wu_status.task_completed.connect(_on_wu_status_complete)
-        thread_wu_status.task_error.connect(_on_wu_status_error)
-        self.threads.append(thread_wu_status)
-        thread_wu_status.start()
+        self.task_runner.submit(get_windows_update_status, "update_wu_status_check",
+                                task_type=TASK_TYPE_BACKGROUND, priority=PRIORITY_BACKGROUND, coalesce=True,
+                                on_completed=_on_wu_status_complete, on_error=_on_wu_status_error)
 
     def run_remove_printer_qt(self, button_clicked):
         printer_name, ok = QInputDialog.getText(self, "Gỡ Máy In", "Nhập tên chính xác của máy in cần gỡ:")
@@ -2506,6 +2570,15 @@ class PcInfoAppQt(QMainWindow):
         elif ok:
             QMessageBox.warning(self, "Tên trống", "Bạn chưa nhập tên máy in.")
 
+    def run_event_archive_search_qt(self, button_clicked):
+        """Hỏi từ khóa rồi tra cứu kho lưu trữ Event Log (để trống = các sự kiện mới nhất)."""
+        query, ok = QInputDialog.getText(self, "Tra Cứu Nhật Ký Sự Kiện",
+                                         "Nhập từ khóa (ví dụ: disk, 0x80070005, nvlddmkm; để trống để xem sự kiện mới nhất):")
+        if ok:
+            self._run_task_in_thread_qt(button_clicked, self.stacked_widget_results_optimize,
+                                        search_event_archive, "optimize_event_archive_search",
+                                        task_args=[query.strip() or None], result_type="table", coalesce=True)
+
     def run_clear_specific_print_queue_qt(self, button_clicked):
         # Lấy danh sách máy in để người dùng chọn (nếu có thể)
         # Hoặc đơn giản là yêu cầu nhập tên
@@ -2564,43 +2637,235 @@ class PcInfoAppQt(QMainWindow):
             self.toast_notifier.show_toast(f"Lỗi: Không thể mở cài đặt Windows Update tự động.", parent_widget=self, toast_type='error')
         # Nếu nhấn Cancel (ok=False), không làm gì cả
     def _start_realtime_update_timer(self):
-        """Bắt đầu timer để cập nhật phần trăm sử dụng CPU, RAM, SSD, GPU liên tục."""
+        """Bắt đầu timer để cập nhật phần trăm sử dụng CPU, RAM, SSD, GPU liên tục (chỉ khi dashboard cần cập nhật)."""
+        decision = self._sampling_decision
+        if decision is not None and not decision["ui_refresh"]:
+            return # Chính sách lấy mẫu sẽ bật lại timer khi dashboard hiển thị
+        interval_ms = int((decision["metrics_interval"] if decision else 2.0) * 1000)
         # Đảm bảo timer không chạy nếu đã chạy
         if not self.realtime_update_timer.isActive():
-            self.realtime_update_timer.start(2000) # Cập nhật mỗi 2 giây
+            self.realtime_update_timer.start(interval_ms)
             logging.info("Timer cập nhật phần trăm sử dụng thời gian thực đã bắt đầu.")
+        elif self.realtime_update_timer.interval() != interval_ms:
+            self.realtime_update_timer.setInterval(interval_ms)
+
+    def _sync_event_archive_in_background(self):
+        """Nạp phần mới của System/Application vào kho lưu trữ sự kiện để lịch sử tích lũy giữa các lần tra cứu."""
+        def _on_sync_error(task_name, error_msg):
+            logging.warning(f"Không thể cập nhật kho lưu trữ sự kiện: {error_msg}")
+        self.task_runner.submit(update_event_archive, "event_archive_sync",
+                                task_type=TASK_TYPE_BACKGROUND, priority=PRIORITY_BACKGROUND, coalesce=True,
+                                on_error=_on_sync_error)
+
+    def _apply_sampling_policy(self):
+        """Điều chỉnh chu kỳ lấy mẫu theo độ hiển thị của cửa sổ, trang hiện tại, nguồn điện và chi phí lấy mẫu."""
+        if not hasattr(self, 'pages_stack') or not hasattr(self, 'metrics_sampler'):
+            return # Chưa khởi tạo xong giao diện
+        window_visible = self.isVisible() and not self.isMinimized()
+        on_battery, battery_percent = get_power_state()
+        decision = self.sampling_policy.decide(
+            window_visible=window_visible,
+            window_active=self.isActiveWindow(),
+            dashboard_visible=window_visible and self.pages_stack.currentWidget() is self.page_dashboard,
+            on_battery=on_battery,
+            battery_percent=battery_percent,
+            sample_cost_s=self.metrics_sampler.last_sample_cost_s,
+        )
+        previous = self._sampling_decision
+        if previous is not None and all(previous[k] == decision[k] for k in ("metrics_interval", "gpu_interval", "ui_refresh")):
+            return
+        self._sampling_decision = decision
+        logging.info(f"Chính sách lấy mẫu: {decision['mode']} ({decision['reason']}), chu kỳ={decision['metrics_interval']}")
+
+        samplers = [(self.metrics_sampler, decision["metrics_interval"]), (self.gpu_sampler, decision["gpu_interval"])]
+        if self.process_history_sampler is not None: # Lịch sử tiến trình: không dày hơn chu kỳ mặc định 5 giây
+            process_interval = decision["metrics_interval"]
+            samplers.append((self.process_history_sampler,
+                             None if process_interval is None else max(PROCESS_SAMPLE_INTERVAL_S, process_interval)))
+        for sampler, interval in samplers:
+            if interval is None:
+                sampler.pause()
+            else:
+                sampler.set_interval(interval)
+                sampler.resume()
+
+        if decision["ui_refresh"]:
+            if self.pc_info_dict is not None: # Timer chỉ chạy sau khi thông tin tĩnh đã tải xong
+                self._start_realtime_update_timer()
+                self._update_realtime_usage() # Cập nhật ngay khi quay lại dashboard
+        elif self.realtime_update_timer.isActive():
+            self.realtime_update_timer.stop()
+
+    def changeEvent(self, event): # type: ignore
+        super().changeEvent(event)
+        if event.type() in (QEvent.WindowStateChange, QEvent.ActivationChange):
+            self._apply_sampling_policy()
+
+    def showEvent(self, event): # type: ignore
+        super().showEvent(event)
+        self._apply_sampling_policy()
+
+    def hideEvent(self, event): # type: ignore
+        super().hideEvent(event)
+        self._apply_sampling_policy()
+
+    @staticmethod
+    def _format_gpu_samples_details(gpu_samples):
+        """Một dòng cho mỗi GPU: VRAM, nhiệt độ, công suất (bỏ qua trường driver không hỗ trợ)."""
+        lines = []
+        for sample in gpu_samples:
+            parts = []
+            if sample.get('memory_total_mb'):
+                parts.append(f"VRAM: {sample.get('memory_used_mb', 0)} MB / {sample['memory_total_mb']} MB")
+            if sample.get('temperature_c') is not None:
+                parts.append(f"{sample['temperature_c']}°C")
+            if sample.get('power_w') is not None:
+                parts.append(f"{sample['power_w']} W")
+            prefix = f"GPU{sample.get('index', 0)}: " if len(gpu_samples) > 1 else ""
+            lines.append(prefix + " | ".join(parts))
+        return "\n".join(lines)
+
+    def get_process_offenders_report(self, window_s=3600, metric=METRIC_CPU):
+        """Top tiến trình dùng nhiều tài nguyên trong window_s giây qua (chạy trong task runner)."""
+        if self.process_history_sampler is None:
+            return [{"Thông tin": "Lịch sử tiến trình không khả dụng (cần cài numpy)."}]
+        return self.process_history_sampler.top_offenders_report(window_s, metric=metric)
+
+    def _show_health_score(self, health_score_info):
+        score_val = health_score_info.get('score', 'N/A')
+        self.health_score_label.setText(f"🎯 Điểm Sức Khỏe: <b>{score_val}</b>/100")
+        issues_list = health_score_info.get('issues', [])
+        if issues_list:
+            self.health_score_label.setToolTip("Các vấn đề ảnh hưởng điểm:\n- " + "\n- ".join(issues_list))
+        else:
+            self.health_score_label.setToolTip("Không có vấn đề nghiêm trọng nào được phát hiện.")
+
+    def _refresh_health_score(self, snapshot):
+        """Đánh giá lại điểm sức khỏe theo số liệu thời gian thực (tối đa mỗi HEALTH_REFRESH_INTERVAL_S giây)."""
+        now = snapshot["timestamp"]
+        if now - self._last_health_refresh < HEALTH_REFRESH_INTERVAL_S:
+            return
+        self._last_health_refresh = now
+        engine = get_default_engine()
+        if self.pc_info_dict is not None:
+            self._show_health_score(calculate_system_health_score(self.pc_info_dict, snapshot=snapshot,
+                                                                  history=self.metrics_sampler.history_between))
+        # Xu hướng chỉ gồm các luật theo số liệu (luật từ pc_info không có lịch sử)
+        metrics_only = engine.evaluate(snapshot=snapshot, history=self.metrics_sampler.history_between, now=now)
+        self.health_trend_chart.append(now, metrics_only["score"])
+
+    def on_trend_range_changed(self, index):
+        self._load_trend_history()
+
+    def _load_trend_history(self):
+        """Nạp lịch sử CPU cho khoảng thời gian đang chọn (MetricsStore tự chọn mức raw/1 phút/1 giờ)."""
+        window_s = self.trend_range_combo.currentData() or 3600
+        self.cpu_trend_chart.set_time_window(window_s)
+        if self.metrics_store is None:
+            return
+        try:
+            history = self.metrics_store.query("cpu_percent", time.time() - window_s)
+            self.cpu_trend_chart.set_data(history["timestamps"], history["avg"])
+        except Exception as e:
+            logging.error(f"Lỗi khi nạp lịch sử xu hướng CPU: {e}")
+
+        # Điểm sức khỏe tại ~720 mốc trên khoảng đang xem, tính vector hóa trên lịch sử lưu trữ
+        self.health_trend_chart.set_time_window(window_s)
+        try:
+            now = time.time()
+            timestamps, scores = get_default_engine().score_history(
+                self.metrics_store.query, now - window_s, now, step_s=max(10.0, window_s / 720))
+            self.health_trend_chart.set_data(timestamps, scores)
+        except Exception as e:
+            logging.error(f"Lỗi khi tính xu hướng điểm sức khỏe: {e}")
+
+    def _refresh_system_alerts(self):
+        """Hiện toast cho cảnh báo mới và cập nhật danh sách cảnh báo đang hoạt động trên dashboard."""
+        for event_type, alert in self.anomaly_detector.drain_events():
+            if event_type == EVENT_RAISED:
+                toast_type = 'error' if alert["severity"] == SEVERITY_CRITICAL else 'info'
+                self.toast_notifier.show_toast(f"⚠️ {alert['message']}", parent_widget=self, toast_type=toast_type)
+        alerts = self.anomaly_detector.active_alerts()
+        alert_ids = [(alert["id"], alert["message"]) for alert in alerts]
+        if alert_ids == self._displayed_alert_ids:
+            return # Không đổi: không vẽ lại danh sách
+        self._displayed_alert_ids = alert_ids
+        self.alerts_list_widget.clear()
+        if not alerts:
+            self.alerts_list_widget.addItem("✅ Không có cảnh báo.")
+            return
+        icons = {SEVERITY_CRITICAL: "🔴", SEVERITY_WARNING: "🟠"}
+        for alert in alerts:
+            started = time.strftime("%H:%M:%S", time.localtime(alert["started_at"]))
+            self.alerts_list_widget.addItem(f"{icons.get(alert['severity'], '🔵')} {alert['message']} (từ {started})")
+
+    @staticmethod
+    def _format_rate(bytes_per_second):
+        if bytes_per_second is None:
+            return "N/A"
+        for unit in ("B/s", "KB/s", "MB/s"):
+            if bytes_per_second < 1024:
+                return f"{bytes_per_second:.0f} {unit}" if unit == "B/s" else f"{bytes_per_second:.1f} {unit}"
+            bytes_per_second /= 1024
+        return f"{bytes_per_second:.1f} GB/s"
+
+    @classmethod
+    def _format_cpu_cores_tooltip(cls, per_core, cores_per_line=8):
+        """Phần trăm từng lõi, mỗi dòng cores_per_line lõi (gọn cả với máy 128 luồng)."""
+        lines = []
+        for start in range(0, len(per_core), cores_per_line):
+            chunk = per_core[start:start + cores_per_line]
+            lines.append("  ".join(f"#{start + i}: {value:.0f}%" for i, value in enumerate(chunk)))
+        return "\n".join(lines)
+
+    @classmethod
+    def _format_io_tooltip(cls, disks, nics):
+        """Thông lượng từng ổ đĩa vật lý (đọc/ghi, IOPS) và từng card mạng."""
+        lines = []
+        for name, rates in sorted(disks.items()):
+            iops = (rates.get("read_iops") or 0) + (rates.get("write_iops") or 0)
+            lines.append(f"💾 {name}: đọc {cls._format_rate(rates.get('read_bps'))}, ghi {cls._format_rate(rates.get('write_bps'))}, {iops:.0f} IOPS")
+        for name, rates in sorted(nics.items()):
+            lines.append(f"🌐 {name}: ↑ {cls._format_rate(rates.get('sent_bps'))}, ↓ {cls._format_rate(rates.get('recv_bps'))}")
+        return "\n".join(lines)
 
     def _update_realtime_usage(self):
-        """Lấy và cập nhật phần trăm sử dụng CPU, RAM, SSD, GPU."""
+        """Cập nhật phần trăm sử dụng CPU, RAM, SSD, GPU từ snapshot mới nhất của MetricsSampler (không gọi psutil trên luồng GUI)."""
         try:
+            snapshot = self.metrics_sampler.latest_snapshot()
+            if snapshot is None:
+                return # Luồng lấy mẫu chưa có mẫu đầu tiên
+
             # CPU Usage
-            cpu_percent = psutil.cpu_percent(interval=None) # Non-blocking call
+            cpu_percent = snapshot["cpu_percent"]
             self.cpu_card.update_value(f"{int(cpu_percent)}%")
             self.cpu_card.update_progress(int(cpu_percent))
+            self.cpu_trend_chart.append(snapshot["timestamp"], cpu_percent) # Điểm cũ hơn điểm cuối sẽ bị bỏ qua
+            if snapshot["cpu_per_core"]:
+                self.cpu_card.setToolTip(self._format_cpu_cores_tooltip(snapshot["cpu_per_core"]))
 
             # RAM Usage
-            ram_info = psutil.virtual_memory()
-            ram_percent = ram_info.percent
+            ram_percent = snapshot["ram_percent"]
             self.ram_card.update_value(f"{int(ram_percent)}%")
             self.ram_card.update_progress(int(ram_percent))
 
-            # SSD Usage (for C: drive)
-            # psutil.disk_usage('/') is for the root partition, which is C: on Windows
-            disk_info = psutil.disk_usage('/')
-            disk_percent = disk_info.percent
-            self.ssd_card.update_value(f"{int(disk_percent)}%")
-            self.ssd_card.update_progress(int(disk_percent))
+            # SSD Usage (ổ hệ thống)
+            disk_percent = snapshot["disk_usage_percent"]
+            if disk_percent is not None:
+                self.ssd_card.update_value(f"{int(disk_percent)}%")
+                self.ssd_card.update_progress(int(disk_percent))
+            self.ssd_card.setToolTip(self._format_io_tooltip(snapshot.get("disks", {}), snapshot.get("nics", {})))
+            self._refresh_system_alerts()
+            self._refresh_health_score(snapshot)
             
-            # GPU Usage (Real-time)
-            gpu_realtime_data = get_gpu_realtime_usage()
-            if gpu_realtime_data:
-                gpu_load = gpu_realtime_data.get('load_percent', 0)
-                mem_used = gpu_realtime_data.get('memory_used_mb', 0)
-                mem_total = gpu_realtime_data.get('memory_total_mb', 0)
-                
+            # GPU Usage (Real-time) - mẫu GPU do GpuSampler lấy ở luồng nền
+            gpu_samples = snapshot["gpus"]
+            if gpu_samples:
+                primary = gpu_samples[0]
+                gpu_load = primary.get('load_percent') or 0
                 self.gpu_card.update_value(f"{int(gpu_load)}%")
                 self.gpu_card.update_progress(int(gpu_load))
-                self.gpu_card.update_details(f"VRAM: {mem_used} MB / {mem_total} MB")
+                self.gpu_card.update_details(self._format_gpu_samples_details(gpu_samples))
             else:
                 # Fallback if real-time data is not available (e.g., non-NVIDIA GPU or pynvml not installed)
                 self.gpu_card.update_value("N/A")
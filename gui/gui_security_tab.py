@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QSplitter, QScrollArea, QGroupBox,
-    QStackedWidget, QTextEdit, QTableWidget
+    QStackedWidget, QTextEdit
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QTextOption
@@ -41,7 +41,7 @@ def create_security_tab_content(parent_app):
     parent_app._add_utility_button(sec_layout, "Quét Virus Nhanh", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_security, run_windows_defender_scan, "security_defender_quick_scan", needs_wmi=False, task_args=["QuickScan"]))
     parent_app._add_utility_button(sec_layout, "Quét Virus Toàn Bộ", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_security, run_windows_defender_scan, "security_defender_full_scan", needs_wmi=False, task_args=["FullScan"]))
     parent_app._add_utility_button(sec_layout, "Cập Nhật Định Nghĩa Virus", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_security, update_windows_defender_definitions, "security_defender_update", needs_wmi=False))
-    parent_app._add_utility_button(sec_layout, "Kiểm Tra Trạng Thái Tường Lửa", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_security, get_firewall_status, "security_firewall_status", needs_wmi=False))
+    parent_app._add_utility_button(sec_layout, "Kiểm Tra Trạng Thái Tường Lửa", lambda btn: parent_app._run_task_in_thread_qt(btn, parent_app.stacked_widget_results_security, get_firewall_status, "security_firewall_status", needs_wmi=False, coalesce=True))
     parent_app._add_utility_button(sec_layout, "Bật Tường Lửa (Tất cả Profile)", parent_app.enable_firewall_qt, object_name="WarningButton")
     parent_app._add_utility_button(sec_layout, "Tắt Tường Lửa (Tất cả Profile)", parent_app.disable_firewall_qt, object_name="DangerButton")
     parent_app.security_actions_layout.addWidget(group_security)
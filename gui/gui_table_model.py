@@ -0,0 +1,268 @@
+# gui/gui_table_model.py
+# Model/View dùng chung cho các bảng kết quả (thay cho QTableWidget + QTableWidgetItem)
+import csv
+import io
+
+from PyQt5.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+EMPTY_TABLE_MESSAGE = "Dữ liệu không phù hợp cho bảng hoặc không có dữ liệu."
+
+# Thông số ước lượng độ rộng cột bằng cách lấy mẫu
+WIDTH_SAMPLE_HEAD_ROWS = 50   # Luôn lấy các dòng đầu (người dùng nhìn thấy đầu tiên)
+WIDTH_SAMPLE_MAX_ROWS = 200   # Tổng số dòng mẫu tối đa cho mỗi cột
+MIN_COLUMN_WIDTH = 60
+MAX_COLUMN_WIDTH = 420
+COLUMN_WIDTH_PADDING = 24
+
+
+def format_cell_value(value):
+    """Định dạng giá trị của một ô thành chuỗi hiển thị (chỉ gọi khi ô thực sự được vẽ/xuất)."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:g}" if abs(value) < 1e15 else str(value)
+    return str(value)
+
+
+def _sort_key(value):
+    """Khóa sắp xếp: số so sánh theo giá trị và đứng trước chuỗi; chuỗi so sánh không phân biệt hoa thường."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, float(value), "")
+    text = format_cell_value(value)
+    try:
+        return (0, float(text), "")
+    except ValueError:
+        return (1, 0.0, text.lower())
+
+
+class DictListTableModel(QAbstractTableModel):
+    """
+    Model chỉ đọc, giữ nguyên list các dict gốc (không tạo item cho từng ô).
+    Chuỗi hiển thị được tạo lười khi view yêu cầu, nên chi phí chỉ tỉ lệ với số ô đang hiển thị.
+    Sắp xếp được thực hiện một lần bằng sorted() trên khóa tính sẵn (hoán vị _order),
+    thay vì để proxy gọi data() cho mỗi phép so sánh.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._headers = []
+        self._order = []             # dòng hiển thị -> chỉ số trong _rows
+        self._search_text_cache = {} # chỉ số trong _rows -> chuỗi chữ thường của cả dòng (dùng cho lọc)
+
+    def set_rows(self, data_list, headers=None):
+        self.beginResetModel()
+        self._search_text_cache = {}
+        if not data_list or not isinstance(data_list, list) or not isinstance(data_list[0], dict):
+            self._headers = ["Thông báo"]
+            self._rows = [{"Thông báo": EMPTY_TABLE_MESSAGE}]
+        else:
+            self._rows = data_list
+            self._headers = list(headers) if headers else self._collect_headers(data_list)
+        self._order = list(range(len(self._rows)))
+        self.endResetModel()
+
+    @staticmethod
+    def _collect_headers(data_list):
+        # Hợp các khóa theo thứ tự xuất hiện; dict giữ thứ tự chèn nên chỉ tốn O(số ô)
+        seen = {}
+        for row in data_list:
+            if isinstance(row, dict):
+                for key in row:
+                    seen.setdefault(key, None)
+        return list(seen)
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._headers = []
+        self._order = []
+        self._search_text_cache = {}
+        self.endResetModel()
+
+    # --- QAbstractTableModel API ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return format_cell_value(self.raw_value(index.row(), index.column()))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section] if 0 <= section < len(self._headers) else None
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not (0 <= column < len(self._headers)) or not self._rows:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_persistent = self.persistentIndexList()
+        old_data_rows = [self._order[index.row()] for index in old_persistent]
+
+        header = self._headers[column]
+        keys = [_sort_key(row.get(header, "") if isinstance(row, dict) else row) for row in self._rows]
+        self._order.sort(key=keys.__getitem__, reverse=(order == Qt.DescendingOrder))
+
+        # Cập nhật các persistent index (vùng chọn, dòng hiện tại) theo vị trí mới
+        position = {data_row: view_row for view_row, data_row in enumerate(self._order)}
+        self.changePersistentIndexList(
+            old_persistent,
+            [self.index(position[data_row], index.column()) for data_row, index in zip(old_data_rows, old_persistent)]
+        )
+        self.layoutChanged.emit()
+
+    # --- Truy cập dữ liệu gốc ---
+    @property
+    def headers(self):
+        return list(self._headers)
+
+    def raw_value(self, row, column):
+        row_data = self._rows[self._order[row]]
+        if not isinstance(row_data, dict):
+            return row_data if column == 0 else None
+        return row_data.get(self._headers[column], "")
+
+    def display_text(self, row, column):
+        return format_cell_value(self.raw_value(row, column))
+
+    def row_dict(self, row):
+        return self._rows[self._order[row]]
+
+    def row_search_text(self, row):
+        data_row = self._order[row]
+        text = self._search_text_cache.get(data_row)
+        if text is None:
+            text = "\x1f".join(self.display_text(row, c) for c in range(len(self._headers))).lower()
+            self._search_text_cache[data_row] = text
+        return text
+
+    def has_data_rows(self):
+        return bool(self._rows) and self._headers != ["Thông báo"]
+
+
+class ResultsFilterProxyModel(QSortFilterProxyModel):
+    """
+    Proxy lọc toàn dòng (không phân biệt hoa thường). Yêu cầu sắp xếp từ header
+    được chuyển xuống model nguồn (sắp xếp theo khóa tính sẵn), proxy giữ thứ tự đó khi lọc.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._needle = ""
+        self.setDynamicSortFilter(False) # Dữ liệu chỉ đổi qua reset/sort của model nguồn
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        source = self.sourceModel()
+        if source is not None:
+            source.sort(column, order)
+
+    def set_filter_text(self, text):
+        needle = (text or "").strip().lower()
+        if needle == self._needle:
+            return
+        self._needle = needle
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._needle:
+            return True
+        model = self.sourceModel()
+        return self._needle in model.row_search_text(source_row)
+
+
+def estimate_column_widths(model, font_metrics, head_rows=WIDTH_SAMPLE_HEAD_ROWS, max_rows=WIDTH_SAMPLE_MAX_ROWS):
+    """
+    Ước lượng độ rộng cột từ một mẫu dòng (các dòng đầu + các dòng cách đều),
+    thay cho resizeColumnsToContents() vốn phải đo mọi ô.
+    """
+    row_count = model.rowCount()
+    sample_rows = list(range(min(head_rows, row_count)))
+    remaining = max_rows - len(sample_rows)
+    if row_count > len(sample_rows) and remaining > 0:
+        step = max(1, (row_count - len(sample_rows)) // remaining)
+        sample_rows.extend(range(len(sample_rows), row_count, step)[:remaining])
+
+    widths = []
+    for column in range(model.columnCount()):
+        header_text = str(model.headerData(column, Qt.Horizontal) or "")
+        widest = font_metrics.horizontalAdvance(header_text)
+        for row in sample_rows:
+            text = model.display_text(row, column)
+            if text:
+                # Chỉ đo dòng đầu tiên của ô nhiều dòng; giới hạn độ dài để không đo chuỗi rất dài
+                widest = max(widest, font_metrics.horizontalAdvance(text.split("\n", 1)[0][:200]))
+        widths.append(max(MIN_COLUMN_WIDTH, min(MAX_COLUMN_WIDTH, widest + COLUMN_WIDTH_PADDING)))
+    return widths
+
+
+class ResultsTableView(QTableView):
+    """QTableView dùng chung cho các bảng kết quả: model list-of-dict + proxy sắp xếp/lọc."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table_model = DictListTableModel(self)
+        self.proxy_model = ResultsFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.table_model)
+        self.setModel(self.proxy_model)
+
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers) # Read-only
+        self.setWordWrap(False)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        # Chiều cao dòng cố định: view không phải đo từng dòng khi cuộn
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 8)
+
+    def set_rows(self, data_list, headers=None):
+        self.setSortingEnabled(False) # Tránh sắp xếp lại trong lúc reset model
+        self.proxy_model.set_filter_text("")
+        self.table_model.set_rows(data_list, headers) # Thứ tự gốc của dữ liệu
+        self.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.setSortingEnabled(True)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 8) # Font có thể đã đổi sau khi khởi tạo
+        self._apply_estimated_column_widths()
+
+    def clear_rows(self):
+        self.table_model.clear()
+
+    def _apply_estimated_column_widths(self):
+        widths = estimate_column_widths(self.table_model, self.fontMetrics())
+        header = self.horizontalHeader()
+        for column, width in enumerate(widths):
+            header.resizeSection(column, width)
+
+    def set_filter_text(self, text):
+        self.proxy_model.set_filter_text(text)
+
+    def row_count(self):
+        """Số dòng dữ liệu thật (không tính dòng thông báo khi bảng trống)."""
+        return self.table_model.rowCount() if self.table_model.has_data_rows() else 0
+
+    def selected_row_dicts(self):
+        rows = sorted({self.proxy_model.mapToSource(index).row() for index in self.selectionModel().selectedRows()})
+        return [self.table_model.row_dict(r) for r in rows]
+
+    def iter_export_rows(self):
+        """Sinh header rồi từng dòng (theo thứ tự sắp xếp/lọc hiện tại) đọc trực tiếp từ model."""
+        column_count = self.table_model.columnCount()
+        yield self.table_model.headers
+        for proxy_row in range(self.proxy_model.rowCount()):
+            source_row = self.proxy_model.mapToSource(self.proxy_model.index(proxy_row, 0)).row()
+            yield [self.table_model.display_text(source_row, c) for c in range(column_count)]
+
+    def write_csv(self, file_obj):
+        writer = csv.writer(file_obj)
+        for row in self.iter_export_rows():
+            writer.writerow(row)
+
+    def to_csv_text(self):
+        buffer = io.StringIO()
+        self.write_csv(buffer)
+        return buffer.getvalue()
@@ -0,0 +1,193 @@
+# gui/gui_trend_chart.py
+# Biểu đồ xu hướng cho dashboard: vẽ trực tiếp bằng QPainter, dữ liệu được giảm điểm theo độ rộng pixel
+import time
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF, QFont
+
+from core.decimation import DecimatedSeries, METHOD_MINMAX # type: ignore
+
+DEFAULT_TIME_WINDOW_S = 3600
+MIN_TIME_WINDOW_S = 60
+ZOOM_STEP = 1.25
+CHART_MARGINS = (44, 24, 12, 22) # trái, trên, phải, dưới (pixel)
+GRID_LINES = 4
+
+
+def _format_time_label(timestamp, span):
+    fmt = "%H:%M:%S" if span <= 600 else ("%H:%M" if span <= 2 * 86400 else "%d/%m %H:%M")
+    return time.strftime(fmt, time.localtime(timestamp))
+
+
+class TrendChartWidget(QWidget):
+    """
+    Biểu đồ đường cho một chuỗi thời gian dài (hàng triệu điểm).
+
+    Mỗi lần vẽ chỉ lấy khoảng 1-2 điểm cho mỗi pixel từ DecimatedSeries (bao min/max hoặc LTTB),
+    nên chi phí vẽ không phụ thuộc độ dài lịch sử. Ở chế độ "live", khung nhìn bám theo điểm mới nhất;
+    lăn chuột để zoom, kéo để di chuyển, nhấp đúp để quay lại chế độ live.
+    """
+    def __init__(self, title="", unit="%", y_range=(0.0, 100.0), color="#3498db",
+                 method=METHOD_MINMAX, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.unit = unit
+        self.y_range = y_range # (min, max); None = tự co giãn theo dữ liệu trong khung nhìn
+        self.color = QColor(color)
+        self.method = method
+        self.series = DecimatedSeries()
+        self.time_window = DEFAULT_TIME_WINDOW_S
+        self.live = True
+        self._view_end = None # Mép phải khung nhìn khi không ở chế độ live
+        self._drag_origin = None
+        self.setMinimumHeight(160)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        self.setMouseTracking(False)
+        self.setToolTip("Lăn chuột để phóng to/thu nhỏ, kéo để di chuyển, nhấp đúp để xem thời gian thực.")
+
+    # --- Dữ liệu ---
+    def set_data(self, timestamps, values):
+        self.series.set_data(timestamps, values)
+        self.update()
+
+    def append(self, timestamp, value):
+        """Thêm điểm mới (giảm điểm chỉ xử lý phần đuôi); lịch sử không bị tính lại."""
+        self.series.append(timestamp, value)
+        if self.live:
+            self.update() # Qt gộp nhiều lần update() thành một lần vẽ
+
+    def set_time_window(self, seconds):
+        self.time_window = max(MIN_TIME_WINDOW_S, float(seconds))
+        self.live = True
+        self._view_end = None
+        self.update()
+
+    def view_range(self):
+        """(x_start, x_end) của khung nhìn hiện tại."""
+        data_range = self.series.range()
+        if self.live or self._view_end is None:
+            end = data_range[1] if data_range else time.time()
+        else:
+            end = self._view_end
+        return end - self.time_window, end
+
+    # --- Tương tác ---
+    def wheelEvent(self, event): # type: ignore
+        start, end = self.view_range()
+        factor = 1 / ZOOM_STEP if event.angleDelta().y() > 0 else ZOOM_STEP
+        plot = self._plot_rect()
+        # Giữ nguyên thời điểm dưới con trỏ chuột khi zoom
+        ratio = min(1.0, max(0.0, (event.pos().x() - plot.left()) / max(1.0, plot.width())))
+        anchor = start + ratio * (end - start)
+        new_window = max(MIN_TIME_WINDOW_S, self.time_window * factor)
+        new_end = anchor + (1 - ratio) * new_window
+        data_range = self.series.range()
+        self.live = bool(data_range) and new_end >= data_range[1]
+        self._view_end = None if self.live else new_end
+        self.time_window = new_window
+        self.update()
+        event.accept()
+
+    def mousePressEvent(self, event): # type: ignore
+        if event.button() == Qt.LeftButton:
+            self._drag_origin = (event.pos().x(), self.view_range()[1])
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event): # type: ignore
+        if self._drag_origin is not None:
+            origin_x, origin_end = self._drag_origin
+            seconds_per_pixel = self.time_window / max(1.0, self._plot_rect().width())
+            new_end = origin_end - (event.pos().x() - origin_x) * seconds_per_pixel
+            data_range = self.series.range()
+            self.live = bool(data_range) and new_end >= data_range[1]
+            self._view_end = None if self.live else new_end
+            self.update()
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event): # type: ignore
+        self._drag_origin = None
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event): # type: ignore
+        self.live = True
+        self._view_end = None
+        self.update()
+        super().mouseDoubleClickEvent(event)
+
+    # --- Vẽ ---
+    def _plot_rect(self):
+        left, top, right, bottom = CHART_MARGINS
+        return QRectF(left, top, max(1, self.width() - left - right), max(1, self.height() - top - bottom))
+
+    def paintEvent(self, event): # type: ignore
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing, False) # Đường dày đặc: tắt khử răng cưa để vẽ nhanh
+        plot = self._plot_rect()
+        text_color = self.palette().color(self.foregroundRole())
+        grid_color = QColor(text_color)
+        grid_color.setAlpha(40)
+
+        x_start, x_end = self.view_range()
+        xs, ys = self.series.view(x_start, x_end, int(plot.width()), self.method)
+        y_min, y_max = self._y_bounds(ys)
+
+        small_font = QFont(self.font())
+        small_font.setPointSizeF(max(7.0, small_font.pointSizeF() * 0.85))
+        painter.setFont(small_font)
+
+        # Lưới ngang + nhãn trục y
+        for i in range(GRID_LINES + 1):
+            fraction = i / GRID_LINES
+            y = plot.bottom() - fraction * plot.height()
+            painter.setPen(QPen(grid_color, 1))
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            painter.setPen(text_color)
+            value = y_min + fraction * (y_max - y_min)
+            painter.drawText(QRectF(0, y - 8, plot.left() - 4, 16), Qt.AlignRight | Qt.AlignVCenter, f"{value:.0f}")
+
+        # Nhãn thời gian ở hai mép
+        span = x_end - x_start
+        label_rect = QRectF(plot.left(), plot.bottom() + 2, plot.width(), CHART_MARGINS[3] - 2)
+        painter.drawText(label_rect, Qt.AlignLeft | Qt.AlignVCenter, _format_time_label(x_start, span))
+        painter.drawText(label_rect, Qt.AlignRight | Qt.AlignVCenter, _format_time_label(x_end, span) if not self.live else "Hiện tại")
+
+        # Tiêu đề + giá trị mới nhất
+        header = self.title
+        if len(self.series):
+            latest = float(self.series.y[-1])
+            if latest == latest: # Bỏ qua NaN
+                header += f"  —  {latest:.1f}{self.unit}"
+        painter.drawText(QRectF(plot.left(), 0, plot.width(), CHART_MARGINS[1]), Qt.AlignLeft | Qt.AlignVCenter, header)
+
+        if len(xs) >= 2:
+            pen = QPen(self.color, 0) # Bút cosmetic 1 pixel: nhanh hơn nhiều so với bút có độ dày thực
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.setClipRect(plot)
+            x_scale = plot.width() / span if span > 0 else 0.0
+            y_scale = plot.height() / (y_max - y_min) if y_max > y_min else 0.0
+            if hasattr(xs, "tolist"): # Mảng numpy -> list: duyệt nhanh hơn trong Python
+                xs, ys = xs.tolist(), ys.tolist()
+            polygon = QPolygonF()
+            for x, y in zip(xs, ys):
+                if y != y: # NaN: ngắt đường
+                    if polygon.size() > 1:
+                        painter.drawPolyline(polygon)
+                    polygon = QPolygonF()
+                    continue
+                polygon.append(QPointF(plot.left() + (x - x_start) * x_scale, plot.bottom() - (y - y_min) * y_scale))
+            if polygon.size() > 1:
+                painter.drawPolyline(polygon)
+        painter.end()
+
+    def _y_bounds(self, ys):
+        if self.y_range is not None:
+            return self.y_range
+        finite = [v for v in ys if v == v]
+        if not finite:
+            return 0.0, 1.0
+        low, high = min(finite), max(finite)
+        if high <= low:
+            high = low + 1.0
+        return low, high
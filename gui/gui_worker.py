@@ -1,61 +1,219 @@
 import logging
+import threading
 import win32com.client
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QObject, pyqtSignal
 
 # Import hằng số lỗi từ core (nếu cần thiết cho thông báo lỗi cụ thể)
 # Hoặc có thể truyền thông báo lỗi như một tham số
 from core.pc_info_functions import ERROR_WMI_CONNECTION # type: ignore
+from core.task_scheduler import ( # type: ignore
+    TaskScheduler, make_task_key, PRIORITY_INTERACTIVE, DEFAULT_TASK_TYPE, TASK_DONE, TASK_CANCELLED
+)
+
+# Cấu hình nhóm luồng dùng chung cho toàn ứng dụng
+DEFAULT_MAX_WORKERS = 4
+SHUTDOWN_TIMEOUT_S = 3.0              # Thời gian tối đa chờ tác vụ dừng khi thoát ứng dụng
+TASK_TYPE_WMI = "wmi"                 # Tác vụ truy vấn WMI
+TASK_TYPE_SYSTEM_INFO = "system_info" # Thu thập toàn bộ thông tin hệ thống (nặng)
+TASK_TYPE_BACKGROUND = "background"   # Kiểm tra trạng thái chạy nền
+DEFAULT_TYPE_LIMITS = {
+    TASK_TYPE_WMI: 2,
+    TASK_TYPE_SYSTEM_INFO: 1,
+    TASK_TYPE_BACKGROUND: 1,
+}
+
+# --- COM/WMI theo luồng worker: khởi tạo một lần cho mỗi luồng, dùng lại cho mọi tác vụ ---
+_thread_state = threading.local()
+
+def _init_worker_com():
+    try:
+        win32com.client.pythoncom.CoInitialize()
+        _thread_state.com_initialized = True
+    except Exception as e:
+        _thread_state.com_initialized = False
+        logging.error(f"CoInitialize thất bại trong luồng {threading.current_thread().name}: {e}")
+    _thread_state.wmi_services = {}
+
+def _release_worker_com():
+    services = getattr(_thread_state, "wmi_services", None)
+    if services:
+        services.clear() # Giải phóng đối tượng COM trước khi CoUninitialize
+    if getattr(_thread_state, "com_initialized", False):
+        try:
+            win32com.client.pythoncom.CoUninitialize()
+            logging.info(f"COM uninitialized in worker thread {threading.current_thread().name}")
+        except Exception as com_e:
+            logging.error(f"Error uninitializing COM in worker thread: {com_e}")
+        _thread_state.com_initialized = False
+
+def get_thread_wmi_service(wmi_namespace="root\\CIMV2"):
+    """Trả về kết nối WMI của luồng hiện tại cho namespace (tạo và lưu lại ở lần gọi đầu)."""
+    services = getattr(_thread_state, "wmi_services", None)
+    if services is None:
+        _init_worker_com()
+        services = _thread_state.wmi_services
+    service = services.get(wmi_namespace)
+    if service is None:
+        wmi_locator = win32com.client.Dispatch("WbemScripting.SWbemLocator")
+        service = wmi_locator.ConnectServer(".", wmi_namespace)
+        if service: # Chỉ lưu kết nối thành công
+            services[wmi_namespace] = service
+            logging.info(f"WMI connected to {wmi_namespace} in worker thread {threading.current_thread().name}")
+    return service
 
-class WorkerThread(QThread):
-    task_completed = pyqtSignal(str, object) # task_name, result_data
-    task_error = pyqtSignal(str, str)       # task_name, error_message
 
-    def __init__(self, task_function, task_name, needs_wmi=False, wmi_namespace="root\\CIMV2", *args, **kwargs):
-        super().__init__()
+class _WmiTaskCall:
+    """Gọi task_function với kết nối WMI của luồng worker làm tham số đầu tiên."""
+    def __init__(self, task_function, task_name, wmi_namespace):
         self.task_function = task_function
         self.task_name = task_name
-        self.needs_wmi = needs_wmi
-        self.button_to_manage = kwargs.pop('button_to_manage', None) # Get the button
-        self.original_button_text = kwargs.pop('original_button_text', "")
-        self.wmi_namespace = wmi_namespace # Namespace WMI cần thiết cho tác vụ
-        self.args = args
-        self.kwargs = kwargs
-        self.wmi_service_local = None
-        self.com_initialized_local = False
-
-    def run(self):
-        if self.button_to_manage:
-            self.button_to_manage.setEnabled(False)
-            self.button_to_manage.setText("Đang xử lý...")
-
-        result_data = None
-        try:
-            if self.needs_wmi:
-                win32com.client.pythoncom.CoInitialize()
-                self.com_initialized_local = True
-                wmi_locator = win32com.client.Dispatch("WbemScripting.SWbemLocator")
-                self.wmi_service_local = wmi_locator.ConnectServer(".", self.wmi_namespace)
-                logging.info(f"WMI connected to {self.wmi_namespace} in thread for task: {self.task_name}")
-
-                if not self.wmi_service_local:
-                    self.task_error.emit(self.task_name, f"{ERROR_WMI_CONNECTION} for task {self.task_name}")
-                    return
-                result_data = self.task_function(self.wmi_service_local, *self.args, **self.kwargs)
-            else:
-                result_data = self.task_function(*self.args, **self.kwargs)
-
-            self.task_completed.emit(self.task_name, result_data)
-
-        except Exception as e:
-            logging.exception(f"Error in worker thread for task {self.task_name}:")
-            self.task_error.emit(self.task_name, str(e))
-        finally:
-            if self.com_initialized_local:
+        self.wmi_namespace = wmi_namespace
+        self.__name__ = getattr(task_function, "__name__", task_name)
+        self.__wrapped__ = task_function # inspect.signature đọc chữ ký hàm gốc (nhận biết cancel_token/progress_callback)
+
+    def __call__(self, *args, **kwargs):
+        wmi_service = get_thread_wmi_service(self.wmi_namespace)
+        if not wmi_service:
+            raise RuntimeError(f"{ERROR_WMI_CONNECTION} for task {self.task_name}")
+        return self.task_function(wmi_service, *args, **kwargs)
+
+
+class TaskRunner(QObject):
+    """
+    Cầu nối giữa TaskScheduler (luồng Python) và giao diện Qt.
+    Kết quả được chuyển về luồng GUI qua tín hiệu (queued connection), nên các callback
+    on_completed/on_error và việc bật/tắt nút đều chạy trên luồng GUI.
+    Với coalesce=True, yêu cầu trùng hàm + tham số với một tác vụ chưa xong sẽ gắn vào tác vụ đó (single-flight):
+    mỗi người gọi vẫn nhận callback riêng với task_name của mình.
+    Tiến độ do hàm core báo (progress_callback) được chuyển thành tín hiệu task_progress.
+    """
+    task_completed = pyqtSignal(str, object) # task_name, result_data
+    task_error = pyqtSignal(str, str)       # task_name, error_message
+    task_progress = pyqtSignal(str, object, str) # task_name, percent (None = không xác định), message
+    active_count_changed = pyqtSignal(int)  # Số tác vụ đang chạy/chờ
+    _task_finished = pyqtSignal(object)     # TaskHandle (phát từ luồng worker)
+    _task_progress = pyqtSignal(object, object, str) # TaskHandle, percent, message (phát từ luồng worker)
+
+    def __init__(self, parent=None, max_workers=DEFAULT_MAX_WORKERS, type_limits=None):
+        super().__init__(parent)
+        self.scheduler = TaskScheduler(
+            max_workers=max_workers,
+            type_limits=DEFAULT_TYPE_LIMITS if type_limits is None else type_limits,
+            worker_initializer=_init_worker_com,
+            worker_finalizer=_release_worker_com,
+            name="PcInfoTasks",
+        )
+        self._pending = {} # task_id -> list (task_name, on_completed, on_error, button, original_button_text) của mọi người gọi
+        self._handles = {} # task_id -> TaskHandle chưa kết thúc
+        self._task_finished.connect(self._dispatch_finished)
+        self._task_progress.connect(self._dispatch_progress)
+
+    def submit(self, task_function, task_name, needs_wmi=False, wmi_namespace="root\\CIMV2", args=(), kwargs=None,
+               task_type=None, priority=PRIORITY_INTERACTIVE, button_to_manage=None, original_button_text="",
+               on_completed=None, on_error=None, coalesce=False):
+        """
+        Gửi tác vụ vào nhóm luồng. Phải gọi từ luồng GUI. Trả về TaskHandle.
+        coalesce=True chỉ dùng cho truy vấn chỉ đọc: yêu cầu trùng sẽ gắn vào lần chạy đang dở.
+        Tác vụ có tác dụng phụ (dọn dẹp, SFC, winget, điểm khôi phục...) giữ mặc định để mỗi lần bấm là một lần chạy.
+        """
+        if task_type is None:
+            task_type = TASK_TYPE_WMI if needs_wmi else DEFAULT_TASK_TYPE
+        call = _WmiTaskCall(task_function, task_name, wmi_namespace) if needs_wmi else task_function
+        coalesce_key = make_task_key(task_function, args, kwargs, needs_wmi and wmi_namespace) if coalesce else None
+
+        handle = self.scheduler.submit(call, *tuple(args), task_name=task_name, task_type=task_type,
+                                       priority=priority, coalesce_key=coalesce_key, **(kwargs or {}))
+        subscribers = self._pending.get(handle.task_id)
+        is_new_task = subscribers is None
+        if is_new_task:
+            subscribers = self._pending[handle.task_id] = []
+            self._handles[handle.task_id] = handle
+        else:
+            logging.info(f"Task '{task_name}' attached to in-flight task '{handle.name}'")
+            if any(entry[3] is button_to_manage for entry in subscribers):
+                button_to_manage = None # Nút đã được tác vụ đang chạy quản lý
+
+        if button_to_manage:
+            original_button_text = original_button_text or button_to_manage.text()
+            button_to_manage.setEnabled(False)
+            button_to_manage.setText("Đang xử lý...")
+        subscribers.append((task_name, on_completed, on_error, button_to_manage, original_button_text))
+
+        if is_new_task:
+            # Gắn callback sau khi đã ghi người gọi: nếu tác vụ đã xong, callback chạy ngay trên luồng GUI
+            # (tín hiệu AutoConnection gọi trực tiếp _dispatch_finished) và phải thấy người gọi này.
+            handle.add_progress_callback(self._task_progress.emit)
+            handle.add_done_callback(self._task_finished.emit)
+
+        metrics = self.scheduler.get_metrics()
+        if metrics["queue_depth"]:
+            logging.debug(f"Task '{task_name}' queued: depth={metrics['queue_depth']}, running={metrics['running_by_type']}")
+        self.active_count_changed.emit(len(self._handles))
+        return handle
+
+    def _dispatch_progress(self, handle, percent, message):
+        for task_name, _, _, button, _ in self._pending.get(handle.task_id, ()):
+            if button and percent is not None:
                 try:
-                    win32com.client.pythoncom.CoUninitialize()
-                    logging.info(f"COM uninitialized in thread for task: {self.task_name}")
-                except Exception as com_e:
-                    logging.error(f"Error uninitializing COM in thread for {self.task_name}: {com_e}")
-            if self.button_to_manage:
-                self.button_to_manage.setText(self.original_button_text)
-                self.button_to_manage.setEnabled(True)
\ No newline at end of file
+                    button.setText(f"Đang xử lý... {int(percent)}%")
+                except RuntimeError:
+                    pass
+            self.task_progress.emit(task_name, percent, message)
+
+    def _dispatch_finished(self, handle):
+        subscribers = self._pending.pop(handle.task_id, None) # Dọn tác vụ đã xong khỏi sổ theo dõi
+        self._handles.pop(handle.task_id, None)
+        self.active_count_changed.emit(len(self._handles))
+        if not subscribers:
+            return
+
+        error_message = None
+        if handle.state == TASK_CANCELLED:
+            error_message = "Tác vụ đã bị hủy."
+        elif handle.state != TASK_DONE:
+            error = handle.error
+            logging.error(f"Error in worker for task {handle.name}: {error!r}", exc_info=(type(error), error, error.__traceback__))
+            error_message = str(error)
+
+        for task_name, on_completed, on_error, button, original_button_text in subscribers:
+            if button:
+                try:
+                    button.setText(original_button_text)
+                    button.setEnabled(True)
+                except RuntimeError: # Nút đã bị hủy cùng widget cha
+                    pass
+            try:
+                if error_message is None:
+                    if on_completed:
+                        on_completed(task_name, handle.result)
+                    self.task_completed.emit(task_name, handle.result)
+                else:
+                    if on_error:
+                        on_error(task_name, error_message)
+                    self.task_error.emit(task_name, error_message)
+            except Exception:
+                logging.exception(f"Lỗi khi xử lý kết quả của tác vụ {task_name}:")
+
+    def active_count(self):
+        return self.scheduler.active_count()
+
+    def running_task_names(self):
+        return [handle.name for handle in self.scheduler.running_tasks()]
+
+    def get_metrics(self):
+        return self.scheduler.get_metrics()
+
+    def cancel_all(self, reason="Người dùng hủy"):
+        """Hủy mọi tác vụ đang chờ/đang chạy (tác vụ đang chạy dừng ở điểm kiểm tra kế tiếp)."""
+        handles = list(self._handles.values())
+        for handle in handles:
+            self.scheduler.cancel(handle, reason)
+        return len(handles)
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT_S):
+        """
+        Hủy tác vụ đang chờ, báo hủy cho tác vụ đang chạy và chờ các worker dừng tối đa timeout giây.
+        Worker là luồng daemon nên tác vụ không hỗ trợ hủy cũng không giữ tiến trình lại sau thời hạn này.
+        """
+        logging.info(f"Task scheduler metrics at shutdown: {self.scheduler.get_metrics()}")
+        return self.scheduler.shutdown(wait=True, timeout=timeout, cancel_pending=True)
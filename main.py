@@ -3,6 +3,7 @@ import sys
 import os
 import logging
 import atexit
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
 
@@ -44,6 +45,7 @@ def cleanup_log_file_on_exit():
 from gui.gui_qt import PcInfoAppQt, resource_path # Import từ file gui_qt.py
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Cần cho process pool (đánh giá CPU) khi đóng gói bằng PyInstaller
     app = QApplication(sys.argv)
 
     # Đặt icon cho ứng dụng (tùy chọn)
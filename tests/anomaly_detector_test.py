@@ -0,0 +1,98 @@
+# tests/anomaly_detector_test.py
+# Kiểm thử các luật phát hiện bất thường trên chuỗi số liệu tổng hợp (spike, drift, flat)
+import unittest
+
+from core.anomaly_detector import (
+    AlertRule, AnomalyDetector, DeviationRule, RateOfChangeRule, ThresholdRule,
+    EVENT_CLEARED, EVENT_RAISED,
+)
+
+
+def _feed(detector, field, values, start=0.0, step=1.0):
+    """Đưa chuỗi giá trị vào detector (mỗi mẫu cách nhau step giây); trả về list (timestamp, event, rule_id)."""
+    fired = []
+    for index, value in enumerate(values):
+        timestamp = start + index * step
+        for event, alert in detector.process({"timestamp": timestamp, field: value}):
+            fired.append((timestamp, event, alert["id"]))
+    return fired
+
+
+class AlertRuleTest(unittest.TestCase):
+    def test_rule_without_evaluate_cannot_be_created(self):
+        class IncompleteRule(AlertRule):
+            pass
+        with self.assertRaises(TypeError):
+            IncompleteRule("incomplete", "cpu_percent", "msg")
+
+    def test_threshold_clear_must_not_exceed_raise(self):
+        with self.assertRaises(ValueError):
+            ThresholdRule("bad", "cpu_percent", 80.0, 90.0, "msg")
+
+
+class SyntheticSeriesTest(unittest.TestCase):
+    def _rules(self):
+        return [
+            ThresholdRule("cpu_pegged", "value", 95.0, 80.0, "CPU {value:.0f}%", min_duration_s=3.0),
+            DeviationRule("spike", "value", sigma=4.0, floor=50.0, message="spike {value:.0f}", warmup=10),
+            RateOfChangeRule("ramp", "value", rate_per_s=10.0, floor=50.0, message="ramp {value:.0f}"),
+        ]
+
+    def test_flat_series_raises_nothing(self):
+        detector = AnomalyDetector(self._rules())
+        self.assertEqual(_feed(detector, "value", [40.0] * 120), [])
+        self.assertEqual(detector.active_alerts(), [])
+
+    def test_spike_fires_deviation_and_rate_but_not_short_threshold(self):
+        detector = AnomalyDetector(self._rules())
+        series = [40.0] * 30 + [99.0] + [40.0] * 10
+        fired = _feed(detector, "value", series)
+        raised = {rule_id for _, event, rule_id in fired if event == EVENT_RAISED}
+        cleared = {rule_id for _, event, rule_id in fired if event == EVENT_CLEARED}
+        self.assertEqual(raised, {"spike", "ramp"}) # Một mẫu 99% chưa đủ min_duration_s của cpu_pegged
+        self.assertEqual(cleared, {"spike", "ramp"})
+        self.assertEqual(detector.active_alerts(), [])
+
+    def test_slow_drift_is_not_a_spike(self):
+        detector = AnomalyDetector(self._rules())
+        series = [40.0 + 0.2 * i for i in range(200)] # 40% -> ~80%, tăng 0.2%/giây
+        self.assertEqual(_feed(detector, "value", series), [])
+
+    def test_sustained_load_raises_once_after_min_duration(self):
+        detector = AnomalyDetector(self._rules())
+        fired = _feed(detector, "value", [70.0] * 30 + [97.0] * 10)
+        pegged = [(t, event) for t, event, rule_id in fired if rule_id == "cpu_pegged"]
+        self.assertEqual(pegged, [(33.0, EVENT_RAISED)]) # Bắt đầu ở t=30, phát sau 3 giây, không lặp lại
+        alert = [a for a in detector.active_alerts() if a["id"] == "cpu_pegged"][0]
+        self.assertEqual(alert["count"], 7)
+        self.assertEqual(alert["message"], "CPU 97%")
+
+    def test_hysteresis_keeps_alert_between_clear_and_raise(self):
+        detector = AnomalyDetector([ThresholdRule("cpu_pegged", "value", 95.0, 80.0, "CPU")])
+        fired = _feed(detector, "value", [96.0, 90.0, 85.0, 81.0, 79.0])
+        self.assertEqual(fired, [(0.0, EVENT_RAISED, "cpu_pegged"), (4.0, EVENT_CLEARED, "cpu_pegged")])
+
+    def test_cooldown_suppresses_rearm_until_rearm_s(self):
+        detector = AnomalyDetector([ThresholdRule("cpu_pegged", "value", 95.0, 80.0, "CPU")], rearm_s=60.0)
+        fired = _feed(detector, "value", [99.0, 50.0] * 40) # Dao động mỗi giây trong 80 giây
+        raised_at = [t for t, event, _ in fired if event == EVENT_RAISED]
+        cleared_at = [t for t, event, _ in fired if event == EVENT_CLEARED]
+        self.assertEqual(raised_at, [0.0, 62.0]) # Xóa ở t=1, phát lại sớm nhất ở t >= 61 (mẫu cao kế tiếp: 62)
+        self.assertEqual(cleared_at, [1.0, 63.0])
+
+    def test_missing_and_nan_values_keep_state(self):
+        detector = AnomalyDetector([ThresholdRule("cpu_pegged", "value", 95.0, 80.0, "CPU")])
+        _feed(detector, "value", [99.0])
+        self.assertEqual(detector.process({"timestamp": 1.0}), [])
+        self.assertEqual(detector.process({"timestamp": 2.0, "value": float("nan")}), [])
+        self.assertEqual([a["id"] for a in detector.active_alerts()], ["cpu_pegged"])
+
+    def test_drain_events_returns_each_event_once(self):
+        detector = AnomalyDetector([ThresholdRule("cpu_pegged", "value", 95.0, 80.0, "CPU")])
+        _feed(detector, "value", [99.0, 50.0])
+        self.assertEqual([event for event, _ in detector.drain_events()], [EVENT_RAISED, EVENT_CLEARED])
+        self.assertEqual(detector.drain_events(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
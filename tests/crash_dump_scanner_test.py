@@ -0,0 +1,148 @@
+# tests/crash_dump_scanner_test.py
+# Kiểm thử phân tích dump trên các file mẫu (tests/fixtures/crash_dumps, tạo bởi make_crash_dump_fixture.py)
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import timedelta
+
+from core.crash_dump_scanner import (
+    DUMP_TYPE_TRIAGE, KIND_KERNEL, KIND_USER, PARSER_VERSION, parse_dump, scan_crash_dumps,
+)
+from tests.fixtures.make_crash_dump_fixture import (
+    BASE_TIME, NVLDDMKM_BASE, PLUGIN_BASE, build_kernel_dump, build_minidump,
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "crash_dumps")
+
+
+class CrashDumpTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="crash_dump_test_")
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.dump_root = os.path.join(self.temp_dir, "dumps")
+        for directory, _, files in os.walk(FIXTURE_DIR):
+            for name in files:
+                target_dir = os.path.join(self.dump_root, os.path.relpath(directory, FIXTURE_DIR))
+                os.makedirs(target_dir, exist_ok=True)
+                with open(os.path.join(directory, name), "rb") as f, \
+                        open(os.path.join(target_dir, name[:-len(".gz")]), "wb") as out:
+                    out.write(gzip.decompress(f.read()))
+        self.cache_path = os.path.join(self.temp_dir, "cache.sqlite3")
+
+    def _path(self, relative_path):
+        return os.path.join(self.dump_root, *relative_path.split("/"))
+
+    def _scan(self, **kwargs):
+        return scan_crash_dumps([self.dump_root], cache_path=self.cache_path, **kwargs)
+
+
+class ParseDumpTest(CrashDumpTestCase):
+    def test_kernel_triage_dump_64(self):
+        dump = parse_dump(self._path("Minidump/060124-01.dmp"))
+        self.assertIsNone(dump.error)
+        self.assertEqual((dump.kind, dump.code, dump.code_name), (KIND_KERNEL, 0xD1, "DRIVER_IRQL_NOT_LESS_OR_EQUAL"))
+        self.assertEqual(dump.parameters, (0x28, 2, 0, NVLDDMKM_BASE + 0x1234))
+        self.assertEqual((dump.dump_type, dump.timestamp), (DUMP_TYPE_TRIAGE, BASE_TIME))
+        # exception_address nằm trong ntoskrnl (module lõi): driver gây lỗi lấy từ tham số 4
+        self.assertEqual(dump.faulting_module, "nvlddmkm.sys")
+
+    def test_driver_entry_size_is_detected(self):
+        dump = parse_dump(self._path("Minidump/052524-02.dmp")) # Entry 0xA0 byte thay vì 0x90
+        self.assertEqual(dump.faulting_module, "nvlddmkm.sys")
+
+    def test_faulting_module_from_call_stack_skips_core_modules(self):
+        dump = parse_dump(self._path("Minidump/051524-03.dmp"))
+        self.assertEqual((dump.code, dump.fault_address, dump.faulting_module), (0x7F, None, "storport.sys"))
+
+    def test_kernel_triage_dump_32(self):
+        dump = parse_dump(self._path("Minidump/050124-04.dmp"))
+        self.assertEqual((dump.code, dump.parameters), (0x50, (0xDEAD0000, 0, 0x90001000, 0)))
+        self.assertEqual((dump.timestamp, dump.faulting_module), (BASE_TIME - timedelta(days=31), "usbport.sys"))
+
+    def test_full_kernel_dump_has_no_driver_list(self):
+        path = os.path.join(self.temp_dir, "MEMORY.DMP")
+        with open(path, "wb") as f:
+            f.write(build_kernel_dump(64, 0x133, (1, 0x1E00, 0, 0), BASE_TIME, [], dump_type=2))
+        dump = parse_dump(path)
+        self.assertEqual((dump.code, dump.dump_type, dump.faulting_module), (0x133, 2, None))
+
+    def test_user_minidump_with_exception(self):
+        dump = parse_dump(self._path("CrashDumps/app.exe.4242.dmp"))
+        self.assertEqual((dump.kind, dump.code, dump.code_name), (KIND_USER, 0xC0000005, "ACCESS_VIOLATION"))
+        self.assertEqual((dump.process_name, dump.faulting_module), ("app.exe", "badplugin.dll"))
+        self.assertEqual((dump.fault_address, dump.parameters), (PLUGIN_BASE + 0x321, (1, 0x10)))
+        self.assertEqual(dump.timestamp, BASE_TIME - timedelta(hours=1))
+
+    def test_user_minidump_without_exception(self):
+        dump = parse_dump(self._path("CrashDumps/app.exe.5151.dmp"))
+        self.assertIsNone(dump.error)
+        self.assertEqual((dump.kind, dump.code, dump.code_name, dump.faulting_module), (KIND_USER, None, None, None))
+        self.assertEqual(dump.process_name, "app.exe")
+
+    def test_truncated_and_unknown_files_report_errors(self):
+        truncated = os.path.join(self.temp_dir, "truncated.dmp")
+        with open(truncated, "wb") as f:
+            f.write(build_minidump(BASE_TIME, [("a.exe", 0x1000, 0x1000)])[:40])
+        unknown = os.path.join(self.temp_dir, "unknown.dmp")
+        with open(unknown, "wb") as f:
+            f.write(b"\x00" * 64)
+        self.assertIsNotNone(parse_dump(truncated).error)
+        self.assertIsNotNone(parse_dump(unknown).error)
+
+
+class ScanCrashDumpsTest(CrashDumpTestCase):
+    def test_report_sorted_newest_first(self):
+        report = self._scan(use_cache=False)
+        self.assertEqual([os.path.basename(dump.path) for dump in report.dumps],
+                         ["060124-01.dmp", "app.exe.4242.dmp", "app.exe.5151.dmp", "052524-02.dmp",
+                          "051524-03.dmp", "050124-04.dmp"])
+        self.assertEqual(len(report.crashes), 6)
+
+    def test_by_code_skips_dumps_without_exception(self):
+        groups = self._scan(use_cache=False).by_code()
+        self.assertEqual([(kind, code, count) for kind, code, count, _, _ in groups],
+                         [(KIND_KERNEL, 0xD1, 2), (KIND_USER, 0xC0000005, 1), (KIND_KERNEL, 0x7F, 1), (KIND_KERNEL, 0x50, 1)])
+        _, _, _, last, modules = groups[0]
+        self.assertEqual((last, modules), (BASE_TIME, {"nvlddmkm.sys": 2}))
+
+    def test_by_module(self):
+        groups = {module: (count, last, codes) for module, count, last, codes in self._scan(use_cache=False).by_module()}
+        self.assertEqual(groups["nvlddmkm.sys"], (2, BASE_TIME, {0xD1: 2}))
+        self.assertEqual(groups["storport.sys"][0], 1)
+        self.assertEqual(groups["badplugin.dll"][2], {0xC0000005: 1})
+        self.assertNotIn("app.exe", groups) # Dump treo không có module gây lỗi
+
+    def test_repeat_scan_uses_cache(self):
+        first = self._scan()
+        self.assertEqual((first.parsed, first.cache_hits), (6, 0))
+        second = self._scan()
+        self.assertEqual((second.parsed, second.cache_hits), (0, 6))
+        self.assertEqual([dump.to_dict() for dump in second.dumps], [dump.to_dict() for dump in first.dumps])
+
+    def test_cache_invalidated_by_mtime_and_parser_version(self):
+        self._scan()
+        changed = self._path("Minidump/051524-03.dmp")
+        stat_result = os.stat(changed)
+        os.utime(changed, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.execute("UPDATE dumps SET version = ? WHERE path = ?",
+                               (PARSER_VERSION - 1, self._path("CrashDumps/app.exe.4242.dmp")))
+        connection.close()
+        report = self._scan()
+        self.assertEqual((report.parsed, report.cache_hits), (2, 4))
+
+    def test_deleted_dumps_are_pruned_from_cache(self):
+        self._scan()
+        os.remove(self._path("Minidump/050124-04.dmp"))
+        self.assertEqual(len(self._scan().dumps), 5)
+        with sqlite3.connect(self.cache_path) as connection:
+            count = connection.execute("SELECT COUNT(*) FROM dumps").fetchone()[0]
+        connection.close()
+        self.assertEqual(count, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# tests/decimation_test.py
+# Kiểm thử giảm điểm chuỗi thời gian: LTTB và bao min/max giữ điểm đầu/cuối và cực trị toàn cục;
+# chuỗi không vượt ngưỡng được trả về nguyên vẹn
+import math
+import unittest
+
+from core.decimation import HAS_NUMPY, METHOD_LTTB, METHOD_MINMAX, DecimatedSeries, _lttb_python
+
+if HAS_NUMPY:
+    import numpy as np
+    from core.decimation import lttb, minmax_envelope
+
+N_POINTS = 5000
+SPIKE_INDEX, DIP_INDEX = 1234, 3210
+
+
+def _series():
+    """Hình sin cộng nhiễu giả xác định, với một đỉnh nhọn và một đáy nhọn ở giữa chuỗi."""
+    x = [float(i) for i in range(N_POINTS)]
+    y = [10.0 * math.sin(i / 50.0) + 0.5 * math.sin(i * 12.9898) for i in range(N_POINTS)]
+    y[SPIKE_INDEX] = 100.0
+    y[DIP_INDEX] = -100.0
+    return x, y
+
+
+class LttbPythonTest(unittest.TestCase):
+    def test_keeps_endpoints_and_extremes(self):
+        x, y = _series()
+        xs, ys = _lttb_python(x, y, 200)
+        self.assertEqual(len(xs), 200)
+        self.assertEqual((xs[0], ys[0], xs[-1], ys[-1]), (x[0], y[0], x[-1], y[-1]))
+        self.assertIn(float(SPIKE_INDEX), xs)
+        self.assertIn(float(DIP_INDEX), xs)
+        self.assertEqual(xs, sorted(xs))
+
+    def test_short_series_passes_through(self):
+        x, y = [0.0, 1.0, 2.0, 3.0], [5.0, float("nan"), 7.0, 8.0]
+        self.assertEqual(_lttb_python(x, y, 10), ([0.0, 2.0, 3.0], [5.0, 7.0, 8.0])) # Chỉ bỏ NaN
+        self.assertEqual(_lttb_python(x[:3], [1.0, 2.0, 3.0], 3), (x[:3], [1.0, 2.0, 3.0]))
+
+
+@unittest.skipUnless(HAS_NUMPY, "Cần numpy")
+class LttbTest(unittest.TestCase):
+    def test_keeps_endpoints_and_extremes(self):
+        x, y = map(np.asarray, _series())
+        xs, ys = lttb(x, y, 200)
+        self.assertEqual(len(xs), 200)
+        self.assertEqual((xs[0], ys[0], xs[-1], ys[-1]), (x[0], y[0], x[-1], y[-1]))
+        self.assertEqual((ys.max(), ys.min()), (100.0, -100.0))
+        self.assertTrue((np.diff(xs) > 0).all())
+
+    def test_matches_python_fallback(self):
+        x, y = _series()
+        xs, ys = lttb(x, y, 200)
+        self.assertEqual(xs.tolist(), _lttb_python(x, y, 200)[0])
+
+    def test_n_at_or_below_threshold_passes_through(self):
+        x, y = map(np.asarray, _series())
+        for n_out in (N_POINTS, N_POINTS + 1):
+            xs, ys = lttb(x, y, n_out)
+            self.assertTrue(np.array_equal(xs, x) and np.array_equal(ys, y))
+            self.assertIsNot(xs, x) # Bản sao: người gọi có thể sửa mà không ảnh hưởng dữ liệu gốc
+
+
+@unittest.skipUnless(HAS_NUMPY, "Cần numpy")
+class MinMaxTest(unittest.TestCase):
+    def test_envelope_matches_brute_force(self):
+        x, y = map(np.asarray, _series())
+        y = y.copy()
+        y[10] = np.nan # NaN bị bỏ qua
+        indices, mins, maxs = minmax_envelope(x, y, 64.0)
+        self.assertEqual((indices[0], indices[-1]), (0, (N_POINTS - 1) // 64))
+        for index, low, high in zip(indices, mins, maxs):
+            values = y[(x >= index * 64) & (x < (index + 1) * 64)]
+            self.assertEqual((low, high), (np.nanmin(values), np.nanmax(values)))
+
+    def test_view_keeps_range_and_extremes(self):
+        x, y = _series()
+        series = DecimatedSeries()
+        series.set_data(x[:N_POINTS // 2], y[:N_POINTS // 2])
+        series.view(x[0], x[-1], 100, method=METHOD_MINMAX) # Tạo level rồi mở rộng dần bằng dữ liệu mới
+        series.append(x[N_POINTS // 2:], y[N_POINTS // 2:])
+        xs, ys = series.view(x[0], x[-1], 100, method=METHOD_MINMAX)
+        self.assertLess(len(xs), 2 * 100 + 4)
+        width = DecimatedSeries.bucket_width_for(x[-1] - x[0], 100)
+        self.assertLessEqual(xs[0] - width / 2, x[0]) # Bucket đầu chứa điểm đầu, bucket cuối chứa điểm cuối
+        self.assertGreaterEqual(xs[-1] + width / 2, x[-1])
+        self.assertEqual((ys.max(), ys.min()), (100.0, -100.0))
+        last_start = int(x[-1] // width * width)
+        self.assertEqual((ys[0], ys[1]), (min(y[:int(width)]), max(y[:int(width)])))
+        self.assertEqual((ys[-2], ys[-1]), (min(y[last_start:]), max(y[last_start:])))
+
+    def test_view_with_few_points_passes_through(self):
+        series = DecimatedSeries()
+        series.set_data([1.0, 2.0, 3.0], [4.0, 5.0, 6.0])
+        for method in (METHOD_MINMAX, METHOD_LTTB):
+            xs, ys = series.view(0.0, 10.0, 100, method=method)
+            self.assertEqual((xs.tolist(), ys.tolist()), ([1.0, 2.0, 3.0], [4.0, 5.0, 6.0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# tests/duplicate_finder_test.py
+# Kiểm thử tìm file trùng: gộp hard link, file id 128-bit / bằng 0 và cache digest bền vững
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from core import duplicate_finder
+from core.duplicate_finder import CACHE_SCHEMA_VERSION, HashCache, find_duplicates
+
+WIDE_FILE_ID = (1 << 100) + 7 # File id ReFS 128-bit
+
+
+class DuplicateFinderTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="duplicate_finder_test_")
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.cache_path = os.path.join(self.root, "cache.sqlite3")
+        self.data = os.path.join(self.root, "data")
+        os.makedirs(self.data)
+        for name, content in [("a.bin", b"x" * 5000), ("b.bin", b"x" * 5000), ("c.bin", b"y" * 5000)]:
+            with open(os.path.join(self.data, name), "wb") as f:
+                f.write(content)
+
+    def _path(self, name):
+        return os.path.join(self.data, name)
+
+    def _find(self, **kwargs):
+        return find_duplicates([self.data], cache_path=self.cache_path, max_workers=2, **kwargs)
+
+    def _walk_with_ids(self, file_ids):
+        """Thay _walk: trả về các file thật nhưng với file id (và ổ) tự chọn."""
+        def walk(roots, min_size, cancel_token):
+            for name, file_id in file_ids.items():
+                info = os.stat(self._path(name))
+                yield self._path(name), info.st_size, info.st_mtime_ns, str(file_id), "1"
+        return mock.patch.object(duplicate_finder, "_walk", walk)
+
+    def test_finds_duplicates_and_uses_cache(self):
+        report = self._find()
+        self.assertEqual([sorted(paths) for _, _, paths in report.groups], [[self._path("a.bin"), self._path("b.bin")]])
+        self.assertEqual((report.files_scanned, report.size_candidates, report.wasted_bytes), (3, 3, 5000))
+        second = self._find()
+        self.assertEqual((second.partial_hashed, second.cache_hits), (0, 3))
+
+    @unittest.skipUnless(hasattr(os, "link"), "Không hỗ trợ hard link")
+    def test_hard_links_are_counted_once(self):
+        os.remove(self._path("b.bin"))
+        os.link(self._path("a.bin"), self._path("b.bin"))
+        report = self._find(use_cache=False)
+        self.assertEqual((report.size_candidates, report.groups), (2, []))
+
+    def test_wide_file_ids_are_stored(self):
+        with self._walk_with_ids({"a.bin": WIDE_FILE_ID, "b.bin": WIDE_FILE_ID + 1, "c.bin": WIDE_FILE_ID + 2}):
+            report = self._find()
+            self.assertEqual(len(report.groups), 1)
+            self.assertEqual(self._find().cache_hits, 3)
+
+        # Cùng file id 128-bit trên cùng ổ: là hard link, chỉ giữ một
+        with self._walk_with_ids({"a.bin": WIDE_FILE_ID, "b.bin": WIDE_FILE_ID, "c.bin": WIDE_FILE_ID + 2}):
+            self.assertEqual(self._find().groups, [])
+
+    def test_zero_file_id_is_not_treated_as_hard_link(self):
+        with self._walk_with_ids({"a.bin": 0, "b.bin": 0, "c.bin": 0}):
+            report = self._find(use_cache=False)
+        self.assertEqual(report.size_candidates, 3)
+        self.assertEqual([sorted(paths) for _, _, paths in report.groups], [[self._path("a.bin"), self._path("b.bin")]])
+
+    def test_old_cache_schema_is_replaced(self):
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.execute("CREATE TABLE hashes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                               "file_id INTEGER, partial BLOB, full BLOB, last_seen REAL)")
+            connection.execute("INSERT INTO hashes VALUES ('x', 1, 1, 1, NULL, NULL, 0)")
+        connection.close()
+        cache = HashCache(self.cache_path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.connection.execute("PRAGMA user_version").fetchone()[0], CACHE_SCHEMA_VERSION)
+        self.assertEqual(cache.connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0], 0)
+        self.assertEqual([row[2] for row in cache.connection.execute("PRAGMA table_info(hashes)")
+                          if row[1] == "file_id"], ["TEXT"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# tests/event_archive_test.py
+# Kiểm thử nạp dần file .evtx (tests/fixtures/evtx_small.evtx.gz) vào kho lưu trữ sự kiện và tra cứu toàn văn
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from core.event_archive import EventArchive, sync_event_archive, to_fts_query
+from tests.evtx_parser_test import EvtxFileTestCase
+
+RETENTION_DAYS = 365 * 100 # Fixture có mốc thời gian cố định (2024)
+
+
+def _event(record_id, age_days, text, event_id=1):
+    """Sự kiện giả có các thuộc tính mà EventArchive.ingest dùng (thay cho EvtxEvent)."""
+    return SimpleNamespace(record_id=record_id, timestamp=datetime.now(timezone.utc) - timedelta(days=age_days),
+                           provider="test", level=2, event_id=event_id, computer="WS-01",
+                           data=lambda: [("Text", text)])
+
+
+class SyncEventArchiveTest(EvtxFileTestCase):
+    def setUp(self):
+        self.archive = EventArchive(os.path.join(self.temp_dir, f"{self._testMethodName}.sqlite3"))
+        self.addCleanup(self.archive.close)
+
+    def _sync(self):
+        return sync_event_archive(self.archive, [("System", self.evtx_path)], retention_days=RETENTION_DAYS)
+
+    def test_repeated_sync_only_adds_new_events(self):
+        first = self._sync()
+        self.assertEqual((first.added, first.errors), ({"System": 3}, {}))
+        second = self._sync()
+        self.assertEqual(second.total_added, 0)
+        self.assertEqual(self.archive.stats()[0], 3)
+        self.assertEqual(self.archive.sync_state("System")[1], 3)
+
+    def test_full_text_search_on_event_data(self):
+        self._sync()
+        results = self.archive.search("0xc000000e")
+        self.assertEqual([(item["provider"], item["event_id"]) for item in results], [("disk", 7)])
+        self.assertEqual([item["record_id"] for item in self.archive.search("he thong")], [3]) # Bỏ dấu tiếng Việt
+        self.assertEqual([item["record_id"] for item in self.archive.search(levels=[2, 3])], [3, 1])
+        self.assertEqual(results[0]["event_data"], "DeviceName: \\Device\\Harddisk1\\DR1; Status: 0xc000000e")
+        self.assertIsNone(results[0]["message"]) # Chưa tra thông điệp đã định dạng
+
+    def test_formatted_messages_are_stored_and_searchable(self):
+        self._sync()
+        disk = self.archive.search("0xc000000e")[0]
+        message = "Thiết bị \\Device\\Harddisk1\\DR1 có khối hỏng."
+        self.assertEqual(self.archive.set_messages("System", [(1, disk["timestamp"], message),
+                                                              (2, disk["timestamp"], "Sai thời điểm")]), 1)
+        self.assertEqual([item["record_id"] for item in self.archive.search("khoi hong")], [1])
+        self.assertEqual(self.archive.search("0xc000000e")[0]["message"], message)
+        self.assertEqual(self.archive.set_messages("System", [(1, disk["timestamp"], "Ghi đè")]), 0) # Đã có thì giữ nguyên
+
+    def test_unreadable_log_does_not_stop_others(self):
+        summary = sync_event_archive(self.archive, [("Missing", os.path.join(self.temp_dir, "missing.evtx")),
+                                                    ("System", self.evtx_path)], retention_days=RETENTION_DAYS)
+        self.assertIn("Missing", summary.errors)
+        self.assertEqual(summary.added, {"System": 3})
+
+
+class PruneTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp(prefix="event_archive_test_")
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        self.path = os.path.join(temp_dir, "archive.sqlite3")
+        self.archive = EventArchive(self.path)
+        self.addCleanup(self.archive.close)
+
+    def _fts_rowids(self, term):
+        """Tra trực tiếp chỉ mục FTS (không join với events): phát hiện mục chỉ mục còn sót của sự kiện đã xóa."""
+        return [row[0] for row in self.archive.connection.execute(
+            "SELECT rowid FROM events_fts WHERE events_fts MATCH ?", (to_fts_query(term),))]
+
+    def test_prune_enforces_retention_and_max_events(self):
+        self.archive.ingest("System", [_event(1, 30, "alpha"), _event(2, 10, "bravo"), _event(3, 3, "charlie"),
+                                       _event(4, 2, "delta"), _event(5, 1, "echo")])
+        alpha = self.archive.search("alpha")[0]
+        self.archive.set_messages("System", [(1, alpha["timestamp"], "formatted alpha")])
+        # alpha, bravo quá 7 ngày; còn 3 > 2 nên charlie (cũ nhất) cũng bị xóa
+        self.assertEqual(self.archive.prune(retention_days=7, max_events=2), 3)
+        self.assertEqual([item["record_id"] for item in self.archive.search()], [5, 4])
+        for term in ("alpha", "formatted", "bravo", "charlie"):
+            self.assertEqual(self._fts_rowids(term), [], term)
+        self.assertEqual(len(self._fts_rowids("delta")), 1)
+        self.archive.connection.execute("INSERT INTO events_fts (events_fts) VALUES ('integrity-check')")
+        self.assertEqual(self.archive.prune(retention_days=7, max_events=None), 0)
+
+    def test_version_1_archive_is_upgraded(self):
+        self.archive.close()
+        os.remove(self.path)
+        with sqlite3.connect(self.path) as connection:
+            connection.executescript(
+                "CREATE TABLE events (id INTEGER PRIMARY KEY, log TEXT NOT NULL, record_id INTEGER NOT NULL, "
+                "ts REAL NOT NULL, provider TEXT, level INTEGER, event_id INTEGER, computer TEXT, message TEXT, "
+                "UNIQUE (log, record_id, ts));"
+                "CREATE VIRTUAL TABLE events_fts USING fts5(message, provider, content='events', content_rowid='id');"
+                "INSERT INTO events (log, record_id, ts, provider, level, event_id, message) "
+                "VALUES ('System', 1, 0, 'disk', 2, 7, 'Status: 0xc000000e');"
+                "PRAGMA user_version=1;")
+        connection.close()
+        self.archive = EventArchive(self.path)
+        self.addCleanup(self.archive.close)
+        (item,) = self.archive.search("0xc000000e")
+        self.assertEqual((item["event_data"], item["message"]), ("Status: 0xc000000e", None))
+
+
+class FtsQueryTest(unittest.TestCase):
+    def test_quotes_each_term(self):
+        self.assertEqual(to_fts_query('nvlddmkm.sys "x" disk*'), '"nvlddmkm.sys" """x""" "disk"*')
+        self.assertEqual(to_fts_query("  "), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
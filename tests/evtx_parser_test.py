@@ -0,0 +1,80 @@
+# tests/evtx_parser_test.py
+# Kiểm thử trình đọc .evtx trên file tối giản (tests/fixtures/evtx_small.evtx.gz, tạo bởi make_evtx_fixture.py)
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+
+from core.evtx_parser import EvtxError, EvtxFile, read_evtx
+from tests.fixtures.make_evtx_fixture import BASE_TIME
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "evtx_small.evtx.gz")
+
+
+class EvtxFileTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp(prefix="evtx_parser_test_")
+        cls.evtx_path = os.path.join(cls.temp_dir, "System.evtx")
+        with open(FIXTURE, "rb") as f, open(cls.evtx_path, "wb") as out:
+            out.write(gzip.decompress(f.read()))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+
+class ReadEvtxTest(EvtxFileTestCase):
+    def test_system_fields_from_substitutions(self):
+        events = read_evtx(self.evtx_path)
+        self.assertEqual([event.record_id for event in events], [3, 2, 1]) # Mới nhất trước
+        disk = events[2]
+        self.assertEqual((disk.provider, disk.event_id, disk.level, disk.channel, disk.computer),
+                         ("disk", 7, 2, "System", "WS-01"))
+        self.assertEqual(disk.level_name, "Lỗi")
+        self.assertEqual(disk.timestamp, BASE_TIME)
+        self.assertIsNone(events[0].computer) # Substitution tùy chọn không có giá trị
+
+    def test_event_data_names_and_values(self):
+        newest, _, disk = read_evtx(self.evtx_path)
+        self.assertEqual(disk.data(), [("DeviceName", "\\Device\\Harddisk1\\DR1"), ("Status", "0xc000000e")])
+        self.assertEqual(newest.data(), [("DeviceName", "Ổ đĩa hệ thống"), ("Status", "0x80070005")])
+
+    def test_xml_rendering(self):
+        disk = read_evtx(self.evtx_path, event_ids=[7])[0]
+        xml = disk.xml()
+        self.assertIn('<Provider Name="disk"/>', xml)
+        self.assertIn('<TimeCreated SystemTime="2024-05-01T08:00:00.000000Z"/>', xml)
+        self.assertIn('<Data Name="DeviceName">\\Device\\Harddisk1\\DR1</Data>', xml)
+
+    def test_filters(self):
+        ids = lambda **kwargs: [event.record_id for event in read_evtx(self.evtx_path, **kwargs)]
+        self.assertEqual(ids(levels=(1, 2, 3)), [3, 1])
+        self.assertEqual(ids(providers=["SERVICE CONTROL MANAGER"]), [2])
+        self.assertEqual(ids(since=BASE_TIME + timedelta(minutes=30)), [3, 2])
+        self.assertEqual(ids(until=BASE_TIME + timedelta(minutes=30)), [1])
+        self.assertEqual(ids(limit=1), [3])
+        self.assertEqual(ids(newest_first=False), [1, 2, 3])
+
+    def test_template_compiled_once(self):
+        cache = {}
+        self.assertEqual(len(read_evtx(self.evtx_path, template_cache=cache)), 3)
+        self.assertEqual(len(cache), 1) # Ba bản ghi dùng chung một template
+
+    def test_events_usable_after_close(self):
+        with EvtxFile(self.evtx_path, template_cache={}) as evtx:
+            events = list(evtx.events())
+        self.assertEqual(events[0].data()[0], ("DeviceName", "\\Device\\Harddisk1\\DR1"))
+
+    def test_rejects_non_evtx_file(self):
+        path = os.path.join(self.temp_dir, "not_evtx.bin")
+        with open(path, "wb") as f:
+            f.write(b"\x00" * 4096)
+        with self.assertRaises(EvtxError):
+            read_evtx(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# tests/fixtures/make_crash_dump_fixture.py
+# Tạo các file dump tối giản cho tests/crash_dump_scanner_test.py: kernel minidump PAGEDU64/PAGEDUMP (TRIAGE_DUMP
+# với danh sách driver và call stack) và minidump ứng dụng MDMP (có / không có exception stream).
+# Chạy lại: python tests/fixtures/make_crash_dump_fixture.py  (ghi đè crash_dumps/*.gz)
+import gzip
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+
+TRIAGE_FIELD_COUNT = 18
+# Bố cục giống core/crash_dump_scanner._KERNEL_LAYOUTS
+KERNEL_LAYOUTS = {
+    64: {"valid": b"DU64", "bugcheck": 0x38, "params": 0x40, "word": "Q", "exception_address": 0xF10,
+         "dump_type": 0xF98, "system_time": 0xFA8, "triage": 0x2000, "driver_base": 0x38, "driver_size": 0x48,
+         "driver_stride": 0x90},
+    32: {"valid": b"DUMP", "bugcheck": 0x28, "params": 0x2C, "word": "I", "exception_address": 0x7DC,
+         "dump_type": 0xF88, "system_time": 0xFC0, "triage": 0x1000, "driver_base": 0x1C, "driver_size": 0x24,
+         "driver_stride": 0x4C},
+}
+DUMP_TYPE_TRIAGE, DUMP_TYPE_KERNEL = 4, 2
+MINIDUMP_MODULE_SIZE = 108
+
+NTOSKRNL_BASE = 0xFFFFF80000000000
+NVLDDMKM_BASE = 0xFFFFF80100000000
+STORPORT_BASE = 0xFFFFF80200000000
+KERNEL_DRIVERS = [("ntoskrnl.exe", NTOSKRNL_BASE, 0x1000000), ("nvlddmkm.sys", NVLDDMKM_BASE, 0x200000),
+                  ("storport.sys", STORPORT_BASE, 0x100000)]
+DRIVERS_32 = [("ntkrnlpa.exe", 0x80000000, 0x400000), ("usbport.sys", 0x90000000, 0x20000)]
+
+APP_BASE, PLUGIN_BASE, NTDLL_BASE = 0x140000000, 0x7FF800000000, 0x7FFA00000000
+APP_MODULES = [("C:\\Program Files\\App\\app.exe", APP_BASE, 0x100000),
+               ("C:\\Program Files\\App\\badplugin.dll", PLUGIN_BASE, 0x40000),
+               ("C:\\Windows\\System32\\ntdll.dll", NTDLL_BASE, 0x200000)]
+
+BASE_TIME = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+_FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+def filetime(value):
+    return int((value - _FILETIME_EPOCH) / timedelta(microseconds=1)) * 10
+
+
+def build_kernel_dump(bits, bugcheck, params, timestamp, drivers, exception_address=0, call_stack=(),
+                      dump_type=DUMP_TYPE_TRIAGE, driver_stride=None):
+    """DUMP_HEADER32/64 + TRIAGE_DUMP: bảng driver (DUMP_DRIVER_ENTRY), string pool tên driver, call stack."""
+    layout = KERNEL_LAYOUTS[bits]
+    word = layout["word"]
+    stride = driver_stride or layout["driver_stride"]
+    triage = layout["triage"]
+    data = bytearray(triage + 0x1000)
+    data[0:8] = b"PAGE" + layout["valid"]
+    struct.pack_into("<I", data, layout["bugcheck"], bugcheck)
+    struct.pack_into(f"<4{word}", data, layout["params"], *params)
+    struct.pack_into(f"<{word}", data, layout["exception_address"], exception_address)
+    struct.pack_into("<I", data, layout["dump_type"], dump_type)
+    struct.pack_into("<Q", data, layout["system_time"], filetime(timestamp))
+
+    driver_list = triage + 4 * TRIAGE_FIELD_COUNT
+    string_pool = driver_list + stride * len(drivers)
+    pool = bytearray()
+    for index, (name, base, size) in enumerate(drivers):
+        entry = driver_list + index * stride
+        struct.pack_into("<I", data, entry, string_pool + len(pool))
+        struct.pack_into(f"<{word}", data, entry + layout["driver_base"], base)
+        struct.pack_into("<I", data, entry + layout["driver_size"], size)
+        pool += struct.pack("<I", len(name)) + name.encode("utf-16-le") + b"\x00\x00"
+    data[string_pool:string_pool + len(pool)] = pool
+    call_stack_offset = string_pool + len(pool)
+    call_stack_bytes = struct.pack(f"<{len(call_stack)}{word}", *call_stack)
+    data[call_stack_offset:call_stack_offset + len(call_stack_bytes)] = call_stack_bytes
+
+    fields = [0] * TRIAGE_FIELD_COUNT
+    fields[1] = len(data)
+    fields[10], fields[11] = call_stack_offset, len(call_stack_bytes)
+    fields[12], fields[13] = driver_list, len(drivers)
+    fields[14], fields[15] = string_pool, len(pool)
+    struct.pack_into(f"<{TRIAGE_FIELD_COUNT}I", data, triage, *fields)
+    return bytes(data)
+
+
+def build_minidump(timestamp, modules, exception=None):
+    """
+    MINIDUMP_HEADER + stream directory + ModuleListStream (+ ExceptionStream nếu exception = (code, address,
+    params)). Dump treo / tạo thủ công không có exception stream.
+    """
+    streams = [4] + ([6] if exception else [])
+    directory_rva = 32
+    data = bytearray(directory_rva + 12 * len(streams))
+    struct.pack_into("<4sIIIIIQ", data, 0, b"MDMP", 0xA793, len(streams), directory_rva, 0,
+                     int(timestamp.timestamp()), 0)
+    entries = []
+
+    names = []
+    module_list = bytearray(struct.pack("<I", len(modules)) + bytes(MINIDUMP_MODULE_SIZE * len(modules)))
+    module_list_rva = len(data)
+    names_rva = module_list_rva + len(module_list)
+    name_bytes = bytearray()
+    for index, (name, base, size) in enumerate(modules):
+        encoded = name.encode("utf-16-le")
+        struct.pack_into("<QIIII", module_list, 4 + index * MINIDUMP_MODULE_SIZE, base, size, 0, 0,
+                         names_rva + len(name_bytes))
+        name_bytes += struct.pack("<I", len(encoded)) + encoded + b"\x00\x00"
+        names.append(name)
+    data += module_list + name_bytes
+    entries.append((4, len(module_list), module_list_rva))
+
+    if exception:
+        code, address, params = exception
+        record = struct.pack("<IIIIQQII", 1234, 0, code, 0, 0, address, len(params), 0)
+        record += struct.pack("<15Q", *(list(params) + [0] * (15 - len(params))))
+        record += struct.pack("<II", 0, 0) # ThreadContext (MINIDUMP_LOCATION_DESCRIPTOR)
+        entries.append((6, len(record), len(data)))
+        data += record
+    for index, entry in enumerate(entries):
+        struct.pack_into("<III", data, directory_rva + index * 12, *entry)
+    return bytes(data)
+
+
+# Tên file -> nội dung (mới nhất trước theo thời gian)
+def build_fixtures():
+    return {
+        # 0xD1: tham số 4 là địa chỉ lệnh trong nvlddmkm.sys; exception_address trong ntoskrnl (module lõi)
+        "Minidump/060124-01.dmp": build_kernel_dump(
+            64, 0xD1, (0x28, 2, 0, NVLDDMKM_BASE + 0x1234), BASE_TIME, KERNEL_DRIVERS,
+            exception_address=NTOSKRNL_BASE + 0x500, call_stack=(NTOSKRNL_BASE + 0x600, STORPORT_BASE + 0x10)),
+        # Cùng mã lỗi, entry driver 0xA0 byte (phiên bản Windows khác): bộ phân tích phải tự nhận ra
+        "Minidump/052524-02.dmp": build_kernel_dump(
+            64, 0xD1, (0x30, 2, 0, NVLDDMKM_BASE + 0x2000), BASE_TIME - timedelta(days=7), KERNEL_DRIVERS,
+            driver_stride=0xA0),
+        # 0x7F: không có tham số địa chỉ -> module lấy từ call stack (bỏ qua ntoskrnl)
+        "Minidump/051524-03.dmp": build_kernel_dump(
+            64, 0x7F, (8, 0, 0, 0), BASE_TIME - timedelta(days=17), KERNEL_DRIVERS,
+            call_stack=(NTOSKRNL_BASE + 0x10, STORPORT_BASE + 0x80, NVLDDMKM_BASE + 0x10)),
+        "Minidump/050124-04.dmp": build_kernel_dump(
+            32, 0x50, (0xDEAD0000, 0, 0x90001000, 0), BASE_TIME - timedelta(days=31), DRIVERS_32),
+        "CrashDumps/app.exe.4242.dmp": build_minidump(
+            BASE_TIME - timedelta(hours=1), APP_MODULES,
+            exception=(0xC0000005, PLUGIN_BASE + 0x321, (1, 0x10))),
+        # Dump treo (procdump -h / Task Manager): chỉ có danh sách module
+        "CrashDumps/app.exe.5151.dmp": build_minidump(BASE_TIME - timedelta(hours=2), APP_MODULES),
+    }
+
+
+if __name__ == "__main__":
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crash_dumps")
+    for relative_path, content in build_fixtures().items():
+        path = os.path.join(root, relative_path + ".gz")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(gzip.compress(content, mtime=0))
+        print(f"Đã ghi {path}")
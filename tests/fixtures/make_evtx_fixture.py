@@ -0,0 +1,167 @@
+# tests/fixtures/make_evtx_fixture.py
+# Tạo file .evtx tối giản (file header + 1 chunk, 3 bản ghi BinXML dùng chung một template có substitution)
+# cho tests/evtx_parser_test.py. Chạy lại: python tests/fixtures/make_evtx_fixture.py  (ghi đè evtx_small.evtx.gz)
+import gzip
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+
+FILE_HEADER_SIZE = 4096
+CHUNK_SIZE = 64 * 1024
+CHUNK_HEADER_SIZE = 512
+TEMPLATE_GUID = bytes(range(0x10, 0x20))
+
+# Kiểu giá trị BinXML
+STRING, UINT8, UINT16, UINT64, FILETIME, HEX_INT32, NULL = 0x01, 0x04, 0x06, 0x0A, 0x11, 0x14, 0x00
+
+BASE_TIME = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+_FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+def filetime(value):
+    return int((value - _FILETIME_EPOCH) / timedelta(microseconds=1)) * 10
+
+
+def sub(index, optional=False):
+    """Chỗ trống thứ index trong template (kiểu được ghi ở bảng giá trị của bản ghi)."""
+    return ("sub", index, optional)
+
+
+# <Event><System>...</System><EventData><Data Name="DeviceName">..</Data><Data Name="Status">..</Data></EventData></Event>
+# Giá trị: 0 Provider, 1 EventID, 2 Level, 3 TimeCreated, 4 EventRecordID, 5 Channel, 6 Computer (tùy chọn),
+# 7 DeviceName, 8 Status
+TEMPLATE = ("Event", [], [
+    ("System", [], [
+        ("Provider", [("Name", [sub(0)])], []),
+        ("EventID", [], [sub(1)]),
+        ("Level", [], [sub(2)]),
+        ("TimeCreated", [("SystemTime", [sub(3)])], []),
+        ("EventRecordID", [], [sub(4)]),
+        ("Channel", [], [sub(5)]),
+        ("Computer", [], [sub(6, optional=True)]),
+    ]),
+    ("EventData", [], [
+        ("Data", [("Name", ["DeviceName"])], [sub(7)]),
+        ("Data", [("Name", ["Status"])], [sub(8)]),
+    ]),
+])
+
+# (record id, thời gian, provider, event id, level, computer | None, device, status)
+FIXTURE_RECORDS = [
+    (1, BASE_TIME, "disk", 7, 2, "WS-01", "\\Device\\Harddisk1\\DR1", 0xC000000E),
+    (2, BASE_TIME + timedelta(hours=1), "Service Control Manager", 7036, 4, "WS-01", "Print Spooler", 0),
+    (3, BASE_TIME + timedelta(hours=2), "Microsoft-Windows-Kernel-Power", 41, 3, None, "Ổ đĩa hệ thống", 0x80070005),
+]
+
+
+class ChunkWriter:
+    """Ghi bản ghi vào một chunk; offset tên/template tính từ đầu chunk, định nghĩa inline ở lần dùng đầu."""
+    def __init__(self):
+        self.data = bytearray(CHUNK_HEADER_SIZE)
+        self.names = {}
+        self.template_offset = None
+        self.last_record_offset = 0
+
+    def _name(self, name):
+        offset = self.names.get(name)
+        if offset is not None:
+            self.data += struct.pack("<I", offset)
+            return
+        offset = len(self.data) + 4
+        self.names[name] = offset
+        encoded = name.encode("utf-16-le")
+        self.data += struct.pack("<IIHH", offset, 0, 0, len(name)) + encoded + b"\x00\x00"
+
+    def _content(self, part):
+        if isinstance(part, tuple):
+            _, index, optional = part
+            self.data += struct.pack("<BHB", 0x0E if optional else 0x0D, index, 0) # Kiểu thật nằm ở bảng giá trị
+        else:
+            self.data += struct.pack("<BBH", 0x05, STRING, len(part)) + part.encode("utf-16-le")
+
+    def _element(self, element):
+        name, attributes, children = element
+        self.data += struct.pack("<BH", 0x41 if attributes else 0x01, 0xFFFF)
+        size_pos = len(self.data)
+        self.data += b"\x00" * 4
+        self._name(name)
+        if attributes:
+            list_pos = len(self.data)
+            self.data += b"\x00" * 4
+            for attribute_name, parts in attributes:
+                self.data.append(0x06)
+                self._name(attribute_name)
+                for part in parts:
+                    self._content(part)
+            struct.pack_into("<I", self.data, list_pos, len(self.data) - list_pos - 4)
+        if not children:
+            self.data.append(0x03)
+        else:
+            self.data.append(0x02)
+            for child in children:
+                if isinstance(child, tuple) and child[0] != "sub":
+                    self._element(child)
+                else:
+                    self._content(child)
+            self.data.append(0x04)
+        struct.pack_into("<I", self.data, size_pos, len(self.data) - size_pos - 4)
+
+    def _template_instance(self, values):
+        self.data += struct.pack("<BBI", 0x0C, 0x01, 1)
+        if self.template_offset is not None:
+            self.data += struct.pack("<I", self.template_offset)
+        else:
+            self.template_offset = len(self.data) + 4
+            self.data += struct.pack("<I", self.template_offset)
+            self.data += struct.pack("<I", 0) + TEMPLATE_GUID
+            size_pos = len(self.data)
+            self.data += b"\x00" * 4
+            self.data += bytes((0x0F, 0x01, 0x01, 0x00))
+            self._element(TEMPLATE)
+            self.data.append(0x00)
+            struct.pack_into("<I", self.data, size_pos, len(self.data) - size_pos - 4)
+        self.data += struct.pack("<I", len(values))
+        for value_type, encoded in values:
+            self.data += struct.pack("<HBB", len(encoded), value_type, 0)
+        for _, encoded in values:
+            self.data += encoded
+
+    def add_record(self, record_id, timestamp, provider, event_id, level, computer, device, status):
+        text = lambda value: (STRING, value.encode("utf-16-le"))
+        values = [
+            text(provider), (UINT16, struct.pack("<H", event_id)), (UINT8, struct.pack("<B", level)),
+            (FILETIME, struct.pack("<Q", filetime(timestamp))), (UINT64, struct.pack("<Q", record_id)),
+            text("System"), text(computer) if computer else (NULL, b""),
+            text(device), (HEX_INT32, struct.pack("<I", status)),
+        ]
+        start = self.last_record_offset = len(self.data)
+        self.data += b"\x2a\x2a\x00\x00" + b"\x00" * 4 + struct.pack("<QQ", record_id, filetime(timestamp))
+        self.data += bytes((0x0F, 0x01, 0x01, 0x00))
+        self._template_instance(values)
+        self.data.append(0x00) # EOF
+        size = len(self.data) - start + 4
+        struct.pack_into("<I", self.data, start + 4, size)
+        self.data += struct.pack("<I", size)
+
+    def finish(self, first_record, last_record):
+        free_space = len(self.data)
+        header = struct.pack("<8sQQQQIII", b"ElfChnk\x00", first_record, last_record, first_record, last_record,
+                             128, self.last_record_offset, free_space)
+        self.data[:len(header)] = header
+        return bytes(self.data) + bytes(CHUNK_SIZE - len(self.data))
+
+
+def build_evtx(records=FIXTURE_RECORDS):
+    chunk = ChunkWriter()
+    for record in records:
+        chunk.add_record(*record)
+    first, last = records[0][0], records[-1][0]
+    header = struct.pack("<8sQQQIHHHH", b"ElfFile\x00", 0, 0, last + 1, 128, 1, 3, FILE_HEADER_SIZE, 1)
+    return header + bytes(FILE_HEADER_SIZE - len(header)) + chunk.finish(first, last)
+
+
+if __name__ == "__main__":
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "evtx_small.evtx.gz")
+    with open(path, "wb") as f:
+        f.write(gzip.compress(build_evtx(), mtime=0))
+    print(f"Đã ghi {path}")
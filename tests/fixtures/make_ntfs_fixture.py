@@ -0,0 +1,162 @@
+# tests/fixtures/make_ntfs_fixture.py
+# Tạo ảnh NTFS tối giản (boot sector + $MFT phân mảnh) cho tests/ntfs_mft_test.py.
+# Chạy lại: python tests/fixtures/make_ntfs_fixture.py  (ghi đè ntfs_small.img.gz)
+import gzip
+import os
+import struct
+
+SECTOR = 512
+CLUSTER = 512            # 1 sector/cluster: bản ghi 1024 byte nằm vắt qua hai cluster (và qua ranh giới run)
+RECORD = 1024
+RECORD_COUNT = 32
+IMAGE_CLUSTERS = 96
+# Runlist của $MFT: 3 cluster tại LCN 8 rồi 61 cluster tại LCN 20 -> bản ghi 1 vắt qua hai run
+MFT_RUNS = ((8, 3), (20, 61))
+
+NS_POSIX, NS_WIN32, NS_DOS, NS_WIN32_AND_DOS = 0, 1, 2, 3
+IN_USE, DIRECTORY = 0x01, 0x02
+
+
+def encode_runs(runs):
+    """runs: list (lcn hoặc None nếu sparse, số cluster) -> runlist NTFS (offset tương đối, có dấu)."""
+    out = bytearray()
+    previous = 0
+    for lcn, length in runs:
+        length_bytes = length.to_bytes((length.bit_length() + 7) // 8 or 1, "little")
+        if lcn is None:
+            out += bytes([len(length_bytes)]) + length_bytes
+            continue
+        delta = lcn - previous
+        size = 1
+        while not -(1 << (8 * size - 1)) <= delta < (1 << (8 * size - 1)):
+            size += 1
+        out += bytes([(size << 4) | len(length_bytes)]) + length_bytes + delta.to_bytes(size, "little", signed=True)
+        previous = lcn
+    return bytes(out + b"\x00")
+
+
+def _attribute(attr_type, body, non_resident=False, name=""):
+    name_bytes = name.encode("utf-16-le")
+    header_size = 0x40 if non_resident else 0x18
+    name_offset = header_size
+    content_offset = (header_size + len(name_bytes) + 7) & ~7
+    length = (content_offset + len(body) + 7) & ~7
+    attr = bytearray(length)
+    struct.pack_into("<IIBBHHH", attr, 0, attr_type, length, int(non_resident), len(name), name_offset, 0, 0)
+    attr[name_offset:name_offset + len(name_bytes)] = name_bytes
+    return attr, content_offset
+
+
+def resident(attr_type, value, name=""):
+    attr, value_offset = _attribute(attr_type, value, name=name)
+    struct.pack_into("<IH", attr, 0x10, len(value), value_offset)
+    attr[value_offset:value_offset + len(value)] = value
+    return bytes(attr)
+
+
+def non_resident_data(runs, real_size, starting_vcn=0, name=""):
+    encoded = encode_runs(runs)
+    attr, runs_offset = _attribute(0x80, encoded, non_resident=True, name=name)
+    clusters = sum(length for _, length in runs)
+    struct.pack_into("<QQHH", attr, 0x10, starting_vcn, starting_vcn + clusters - 1, runs_offset, 0)
+    struct.pack_into("<QQQ", attr, 0x28, clusters * CLUSTER, real_size, real_size)
+    attr[runs_offset:runs_offset + len(encoded)] = encoded
+    return bytes(attr)
+
+
+def file_name(parent, parent_sequence, name, namespace):
+    encoded = name.encode("utf-16-le")
+    value = bytearray(0x42 + len(encoded))
+    struct.pack_into("<Q", value, 0, parent | (parent_sequence << 48))
+    value[0x40] = len(encoded) // 2
+    value[0x41] = namespace
+    value[0x42:] = encoded
+    return resident(0x30, bytes(value))
+
+
+def resident_data(size, name=""):
+    return resident(0x80, b"x" * size, name=name)
+
+
+def record(number, sequence, flags, attributes, base=0, torn=False):
+    buffer = bytearray(RECORD)
+    usa_offset, usa_count = 0x30, RECORD // SECTOR + 1
+    attributes_offset = (usa_offset + 2 * usa_count + 7) & ~7
+    body = b"".join(attributes) + struct.pack("<I", 0xFFFFFFFF)
+    buffer[0:4] = b"FILE"
+    struct.pack_into("<HHQHHHHII", buffer, 4, usa_offset, usa_count, 0, sequence, 1, attributes_offset, flags,
+                     attributes_offset + len(body), RECORD)
+    struct.pack_into("<QHHI", buffer, 0x20, base, 0, 0, number)
+    buffer[attributes_offset:attributes_offset + len(body)] = body
+    usn = struct.pack("<H", 0x0101 + number)
+    buffer[usa_offset:usa_offset + 2] = usn
+    for index in range(1, usa_count):
+        end = index * SECTOR
+        entry = usa_offset + 2 * index
+        buffer[entry:entry + 2] = buffer[end - 2:end]
+        buffer[end - 2:end] = usn
+    if torn: # Ghi dở: sector thứ hai còn giá trị cũ thay vì USN
+        buffer[2 * SECTOR - 2:2 * SECTOR] = b"\xEE\xEE"
+    return bytes(buffer)
+
+
+def build_records():
+    mft_runs = list(MFT_RUNS)
+    records = {
+        0: record(0, 1, IN_USE, [file_name(5, 5, "$MFT", NS_WIN32_AND_DOS), non_resident_data(mft_runs, RECORD_COUNT * RECORD)]),
+        5: record(5, 5, IN_USE | DIRECTORY, [file_name(5, 5, ".", NS_WIN32_AND_DOS)]),
+        # Thư mục có tên 8.3 đứng trước tên dài: phải chọn tên dài
+        16: record(16, 1, IN_USE | DIRECTORY, [file_name(5, 5, "DOCUME~1", NS_DOS), file_name(5, 5, "Documents", NS_WIN32)]),
+        17: record(17, 1, IN_USE, [file_name(16, 1, "report.txt", NS_WIN32_AND_DOS), resident_data(123)]),
+        # $DATA non-resident: kích thước thật lấy từ header, runlist có run sparse và offset âm
+        18: record(18, 2, IN_USE, [file_name(16, 1, "big.bin", NS_POSIX),
+                                   non_resident_data([(100, 5), (None, 10), (50, 3)], 10_000_000)]),
+        # File có bản ghi mở rộng (như khi có $ATTRIBUTE_LIST): $DATA nằm ở bản ghi 20 và 21
+        19: record(19, 1, IN_USE, [file_name(16, 1, "split.vhd", NS_WIN32)]),
+        20: record(20, 1, IN_USE, [non_resident_data([(200, 40)], 5_555_000)], base=19 | (1 << 48)),
+        21: record(21, 1, IN_USE, [non_resident_data([(300, 8)], 1, starting_vcn=40)], base=19 | (1 << 48)),
+        22: record(22, 3, 0, [file_name(5, 5, "deleted.tmp", NS_WIN32_AND_DOS), resident_data(10)]), # Đã xóa
+        # Cha (bản ghi 24) đã được tái sử dụng với sequence 3: file 23 thành mồ côi
+        23: record(23, 1, IN_USE, [file_name(24, 2, "stale.log", NS_WIN32_AND_DOS), resident_data(7)]),
+        24: record(24, 3, IN_USE | DIRECTORY, [file_name(5, 5, "Old", NS_WIN32_AND_DOS)]),
+        25: record(25, 1, IN_USE, [file_name(5, 5, "torn.dat", NS_WIN32_AND_DOS), resident_data(9)], torn=True),
+        # Hard link: hai tên Win32 ở hai thư mục, giữ tên đầu tiên
+        26: record(26, 1, IN_USE, [file_name(16, 1, "link-a.txt", NS_WIN32), file_name(5, 5, "link-b.txt", NS_WIN32),
+                                   resident_data(44)]),
+        # Luồng dữ liệu phụ (ADS) không được tính vào kích thước
+        27: record(27, 1, IN_USE, [file_name(5, 5, "download.zip", NS_WIN32_AND_DOS),
+                                   resident_data(26, name="Zone.Identifier"), resident_data(77)]),
+        28: record(28, 1, IN_USE, [file_name(16, 1, "Tiếng Việt.txt", NS_WIN32_AND_DOS), resident_data(5)]),
+    }
+    return records
+
+
+def build_image():
+    image = bytearray(IMAGE_CLUSTERS * CLUSTER)
+    boot = bytearray(SECTOR)
+    boot[0:3] = b"\xEB\x52\x90"
+    boot[3:11] = b"NTFS    "
+    struct.pack_into("<HB", boot, 0x0B, SECTOR, CLUSTER // SECTOR)
+    struct.pack_into("<QQQ", boot, 0x28, IMAGE_CLUSTERS * CLUSTER // SECTOR - 1, MFT_RUNS[0][0], 2)
+    struct.pack_into("<bxxxb", boot, 0x40, -10, 1) # 2^10 = 1024 byte mỗi bản ghi
+    boot[510:512] = b"\x55\xAA"
+    image[0:SECTOR] = boot
+    for cluster in range(11, 20): # Vùng giữa hai run của $MFT chứa rác: trình đọc phải đi theo runlist
+        image[cluster * CLUSTER:(cluster + 1) * CLUSTER] = b"FILE" + b"\xAB" * (CLUSTER - 4)
+
+    mft = bytearray(RECORD_COUNT * RECORD)
+    for number, data in build_records().items():
+        mft[number * RECORD:(number + 1) * RECORD] = data
+    position = 0
+    for lcn, clusters in MFT_RUNS:
+        size = clusters * CLUSTER
+        image[lcn * CLUSTER:lcn * CLUSTER + size] = mft[position:position + size]
+        position += size
+    return bytes(image)
+
+
+if __name__ == "__main__":
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ntfs_small.img.gz")
+    with open(path, "wb") as f:
+        f.write(gzip.compress(build_image(), mtime=0))
+    print(f"Đã ghi {path}")
@@ -0,0 +1,96 @@
+# tests/fixtures/make_usn_fixture.py
+# Tạo file dump USN journal (định dạng của core.usn_journal.capture_journal) cho tests/usn_journal_test.py.
+# Các bản ghi tham chiếu tới bản ghi MFT trong ntfs_small.img.gz (16 = Documents, 17 = report.txt, 18 = big.bin,
+# 24 = Old, 27 = download.zip). Chạy lại: python tests/fixtures/make_usn_fixture.py  (ghi đè usn_small.dump)
+import os
+import struct
+
+DUMP_MAGIC = b"IPCUSN01"
+JOURNAL_ID = 0x01D5A0B0C0D0E0F0
+FIRST_USN = 4096
+TIMESTAMP = 133_000_000_000_000_000 # FILETIME
+
+CREATE, DELETE, CLOSE = 0x100, 0x200, 0x80000000
+DATA_EXTEND, DATA_OVERWRITE = 0x2, 0x1
+RENAME_OLD, RENAME_NEW = 0x1000, 0x2000
+ATTRIBUTE_ARCHIVE, ATTRIBUTE_DIRECTORY = 0x20, 0x10
+
+
+def ref(record, sequence):
+    return record | (sequence << 48)
+
+
+def usn_record(version, usn, file_reference, parent_reference, reason, name, attributes=ATTRIBUTE_ARCHIVE):
+    """USN_RECORD_V2 (tham chiếu 64 bit) hoặc V3 (FILE_ID_128, 64 bit cao = 0); độ dài căn 8 byte."""
+    encoded = name.encode("utf-16-le")
+    if version == 2:
+        fixed = struct.pack("<QQqqIIIIHH", file_reference, parent_reference, usn, TIMESTAMP, reason, 0, 0,
+                            attributes, len(encoded), 60)
+    else:
+        fixed = struct.pack("<QQQQqqIIIIHH", file_reference, 0, parent_reference, 0, usn, TIMESTAMP, reason, 0, 0,
+                            attributes, len(encoded), 76)
+    length = (8 + len(fixed) + len(encoded) + 7) & ~7
+    body = struct.pack("<IHH", length, version, 0) + fixed + encoded
+    return body + bytes(length - len(body))
+
+
+def build_chunks(entries, first_usn=FIRST_USN):
+    """
+    entries: list các khối, mỗi khối là list (version, file_reference, parent_reference, reason, name[, attributes]).
+    USN được gán tăng dần theo vị trí bản ghi; trả về (list khối bytes, next_usn).
+    """
+    usn = first_usn
+    chunks = []
+    for block in entries:
+        records = b""
+        for version, file_reference, parent_reference, reason, name, *attributes in block:
+            record = usn_record(version, usn, file_reference, parent_reference, reason, name, *attributes)
+            records += record
+            usn += len(record)
+        chunks.append(struct.pack("<q", usn) + records)
+    return chunks, usn
+
+
+def write_dump(path, chunks, next_usn, journal_id=JOURNAL_ID, first_usn=FIRST_USN, lowest_valid_usn=FIRST_USN):
+    with open(path, "wb") as f:
+        f.write(DUMP_MAGIC)
+        f.write(struct.pack("<qqqq", journal_id, first_usn, next_usn, lowest_valid_usn))
+        for chunk in chunks:
+            f.write(struct.pack("<I", len(chunk)))
+            f.write(chunk)
+
+
+DOCUMENTS, ROOT, OLD = ref(16, 1), ref(5, 5), ref(24, 3)
+FIXTURE_ENTRIES = [
+    [ # Khối 1: bản ghi V2
+        # File mới: cờ CREATE lặp lại trên mọi bản ghi cho tới khi đóng -> chỉ là một lần tạo
+        (2, ref(29, 1), DOCUMENTS, CREATE, "notes.md"),
+        (2, ref(29, 1), DOCUMENTS, CREATE | DATA_EXTEND, "notes.md"),
+        (2, ref(29, 1), DOCUMENTS, CREATE | DATA_EXTEND | CLOSE, "notes.md"),
+        # File tạm tạo rồi xóa trong cùng lô: không được đếm
+        (2, ref(30, 1), ROOT, CREATE, "~tmp1.tmp"),
+        (2, ref(30, 1), ROOT, CREATE | DATA_EXTEND, "~tmp1.tmp"),
+        (2, ref(30, 1), ROOT, CREATE | DATA_EXTEND | DELETE | CLOSE, "~tmp1.tmp"),
+        # Sửa nội dung file có sẵn
+        (2, ref(17, 1), DOCUMENTS, DATA_EXTEND, "report.txt"),
+        (2, ref(17, 1), DOCUMENTS, DATA_EXTEND | DATA_OVERWRITE | CLOSE, "report.txt"),
+    ],
+    [ # Khối 2: bản ghi V3
+        # Chuyển big.bin sang thư mục Old và đổi tên
+        (3, ref(18, 2), DOCUMENTS, RENAME_OLD, "big.bin"),
+        (3, ref(18, 2), OLD, RENAME_NEW, "huge.bin"),
+        (3, ref(18, 2), OLD, RENAME_NEW | CLOSE, "huge.bin"),
+        (3, ref(27, 1), ROOT, DELETE | CLOSE, "download.zip"),
+        (3, ref(31, 1), ROOT, CREATE, "Projects", ATTRIBUTE_DIRECTORY),
+        (3, ref(31, 1), ROOT, CREATE | CLOSE, "Projects", ATTRIBUTE_DIRECTORY),
+        # Phiên bản 4 (chỉ có extent): không có bộ phân tích, bị bỏ qua
+        (4, ref(17, 1), DOCUMENTS, DATA_EXTEND, "report.txt"),
+    ],
+]
+
+
+if __name__ == "__main__":
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "usn_small.dump")
+    chunks, next_usn = build_chunks(FIXTURE_ENTRIES)
+    write_dump(path, chunks, next_usn)
+    print(f"Đã ghi {path}")
@@ -0,0 +1,112 @@
+# tests/gpu_telemetry_test.py
+# Kiểm thử GpuSampler với provider giả lập (không cần GPU/pynvml)
+import unittest
+
+from core.gpu_telemetry import GpuSampler, GpuTelemetryProvider, _empty_device_sample
+
+
+class MockGpuTelemetryProvider(GpuTelemetryProvider):
+    """
+    Provider giả lập: samples là list các list dict (mỗi phần tử cho một lần gọi sample()).
+    Phần tử là Exception sẽ được ném ra; phần tử cuối được lặp lại khi hết danh sách.
+    """
+    name = "mock"
+
+    def __init__(self, samples=None, device_count=1, fail_open=False):
+        self._samples = samples if samples is not None else []
+        self._device_count = device_count
+        self._fail_open = fail_open
+        self._call_index = 0
+        self.open_calls = 0
+        self.close_calls = 0
+
+    def open(self):
+        self.open_calls += 1
+        if self._fail_open:
+            raise RuntimeError("Mock provider open failure")
+        return self._device_count > 0
+
+    def device_count(self):
+        return self._device_count
+
+    def sample(self):
+        if not self._samples:
+            return [_empty_device_sample(i, f"Mock GPU {i}") for i in range(self._device_count)]
+        item = self._samples[min(self._call_index, len(self._samples) - 1)]
+        self._call_index += 1
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        self.close_calls += 1
+
+
+def _device(index, load):
+    device = _empty_device_sample(index, f"Mock GPU {index}")
+    device["load_percent"] = load
+    return device
+
+
+class GpuSamplerTest(unittest.TestCase):
+    def test_samples_all_devices_and_keeps_session_open(self):
+        received = []
+        provider = MockGpuTelemetryProvider([[_device(0, 10), _device(1, 20)], [_device(0, 30), _device(1, 40)]], device_count=2)
+        sampler = GpuSampler(provider, interval=1.0, on_sample=received.append)
+
+        self.assertTrue(sampler.sample_once())
+        self.assertTrue(sampler.sample_once())
+
+        samples, sampled_at = sampler.latest()
+        self.assertEqual([d["load_percent"] for d in samples], [30, 40])
+        self.assertIsNotNone(sampled_at)
+        self.assertEqual(sampler.latest_primary()["load_percent"], 30)
+        self.assertTrue(sampler.available)
+        self.assertEqual(provider.open_calls, 1) # Phiên được mở một lần và dùng lại
+        self.assertEqual(provider.close_calls, 0)
+        self.assertEqual(len(received), 2)
+
+    def test_no_device_backs_off_exponentially(self):
+        provider = MockGpuTelemetryProvider(device_count=0)
+        sampler = GpuSampler(provider, interval=1.0, max_backoff=5.0)
+
+        delays = []
+        for _ in range(4):
+            self.assertFalse(sampler.sample_once())
+            delays.append(sampler.next_delay())
+
+        self.assertEqual(delays, [2.0, 4.0, 5.0, 5.0])
+        self.assertFalse(sampler.available)
+        self.assertIsNone(sampler.latest_primary())
+
+    def test_sample_error_reopens_provider(self):
+        provider = MockGpuTelemetryProvider([[_device(0, 50)], RuntimeError("GPU is lost"), [_device(0, 60)]])
+        sampler = GpuSampler(provider, interval=1.0)
+
+        self.assertTrue(sampler.sample_once())
+        self.assertFalse(sampler.sample_once())
+        self.assertEqual(provider.close_calls, 1)
+        self.assertEqual(sampler.latest()[0], [])
+        self.assertEqual(sampler.next_delay(), 2.0)
+
+        self.assertTrue(sampler.sample_once())
+        self.assertEqual(provider.open_calls, 2)
+        self.assertEqual(sampler.latest_primary()["load_percent"], 60)
+        self.assertEqual(sampler.next_delay(), 1.0) # Lấy mẫu lại thành công: về chu kỳ bình thường
+
+    def test_open_failure_is_reported_as_unavailable(self):
+        sampler = GpuSampler(MockGpuTelemetryProvider(fail_open=True), interval=1.0)
+        self.assertFalse(sampler.sample_once())
+        self.assertFalse(sampler.available)
+
+    def test_on_sample_error_does_not_stop_sampling(self):
+        def broken_callback(samples):
+            raise ValueError("callback error")
+        sampler = GpuSampler(MockGpuTelemetryProvider(), interval=1.0, on_sample=broken_callback)
+        with self.assertLogs(level="ERROR"):
+            self.assertTrue(sampler.sample_once())
+        self.assertTrue(sampler.available)
+
+
+if __name__ == "__main__":
+    unittest.main()
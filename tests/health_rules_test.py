@@ -0,0 +1,92 @@
+# tests/health_rules_test.py
+# Kiểm thử bộ luật điểm sức khỏe: so với cách tính điểm cũ (các bậc loại trừ nhau) trên vài snapshot số liệu
+import unittest
+
+from core.health_rules import HAS_NUMPY, HealthRuleEngine
+
+NOW = 1_700_000_000.0
+CALM = {"cpu_percent": 20.0, "ram_percent": 40.0, "swap_percent": 5.0, "gpu_temperature_c": 50.0,
+        "gpu_memory_percent": 30.0}
+
+
+def legacy_score(disk_used_percent, system_errors=0, application_errors=0):
+    """Cách tính điểm trước khi có bộ luật (ổ C: và Event Log): các bậc dung lượng loại trừ nhau."""
+    score = 100
+    percent_free = 100 - disk_used_percent
+    if percent_free < 10:
+        score -= 15
+    elif percent_free < 20:
+        score -= 5
+    if system_errors > 10 or application_errors > 10:
+        score -= 5
+    return score
+
+
+def _pc_info(system_errors, application_errors):
+    return {"SystemCheckUtilities": {"Tóm tắt Event Log gần đây": {
+        "System": {"Errors": system_errors}, "Application": {"Errors": application_errors}}}}
+
+
+class EvaluateTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = HealthRuleEngine()
+
+    def test_matches_legacy_scoring(self):
+        cases = [(50, 0, 0), (80, 0, 0), (85, 0, 0), (90, 0, 0), (91, 0, 0), (99, 0, 0),
+                 (50, 11, 0), (85, 0, 30), (95, 20, 20)]
+        for disk, system_errors, application_errors in cases:
+            with self.subTest(disk=disk, system=system_errors, application=application_errors):
+                result = self.engine.evaluate(pc_info=_pc_info(system_errors, application_errors),
+                                              snapshot={**CALM, "disk_usage_percent": disk, "timestamp": NOW})
+                self.assertEqual(result["score"], legacy_score(disk, system_errors, application_errors))
+
+    def test_only_highest_tier_is_reported(self):
+        result = self.engine.evaluate(snapshot={**CALM, "disk_usage_percent": 95.0, "timestamp": NOW})
+        self.assertEqual(result["triggered"], ["system_disk_full"])
+        self.assertEqual(result["issues"], ["Ổ hệ thống đã dùng 95%"])
+        result = self.engine.evaluate(snapshot={**CALM, "disk_usage_percent": 85.0, "timestamp": NOW})
+        self.assertEqual(result["triggered"], ["system_disk_filling"])
+
+    def test_independent_rules_add_up(self):
+        history = lambda field, start, end: ([start, end], [97.0, 99.0] if field == "cpu_percent" else [10.0, 10.0])
+        result = self.engine.evaluate(snapshot={**CALM, "disk_usage_percent": 95.0, "timestamp": NOW}, history=history)
+        self.assertEqual(result["triggered"], ["cpu_sustained_load", "system_disk_full"])
+        self.assertEqual(result["score"], 100 - 10 - 15)
+
+    def test_custom_rules_and_validation(self):
+        engine = HealthRuleEngine([
+            {"id": "hot", "source": "metrics", "path": "t", "op": ">", "threshold": 70, "weight": 5},
+            {"id": "very_hot", "source": "metrics", "path": "t", "op": ">", "threshold": 90, "weight": 20},
+            {"id": "nic", "source": "info", "path": "Net/[Tên=eth0]/Lỗi", "op": ">", "threshold": 0, "weight": 3},
+        ])
+        result = engine.evaluate(pc_info={"Net": [{"Tên": "wlan0", "Lỗi": 9}, {"Tên": "eth0", "Lỗi": 2}]},
+                                 snapshot={"t": 95, "timestamp": NOW})
+        self.assertEqual((result["score"], result["triggered"]), (77, ["very_hot", "nic"]))
+        with self.assertRaises(ValueError):
+            HealthRuleEngine([{"id": "bad", "source": "metrics", "path": "t", "op": "~", "threshold": 1, "weight": 1}])
+
+
+@unittest.skipUnless(HAS_NUMPY, "Cần numpy")
+class ScoreHistoryTest(unittest.TestCase):
+    def test_history_matches_evaluate_and_legacy(self):
+        engine = HealthRuleEngine()
+        step = 60.0
+        disk_values = [50.0, 79.0, 81.0, 85.0, 90.0, 92.0, 99.0, 70.0]
+        timestamps = [NOW + (index + 1) * step - 1 for index in range(len(disk_values))]
+
+        def query(field, start, end):
+            values = disk_values if field == "disk_usage_percent" else [CALM[field]] * len(disk_values)
+            points = [(t, v) for t, v in zip(timestamps, values) if start < t <= end]
+            series = [v for _, v in points]
+            return {"timestamps": [t for t, _ in points], "avg": series, "max": series, "min": series}
+
+        grid, scores = engine.score_history(query, NOW, NOW + step * len(disk_values), step)
+        self.assertEqual(len(grid), len(disk_values))
+        self.assertEqual([int(score) for score in scores], [legacy_score(value) for value in disk_values])
+        for value, score in zip(disk_values, scores):
+            snapshot = {**CALM, "disk_usage_percent": value, "timestamp": NOW}
+            self.assertEqual(engine.evaluate(snapshot=snapshot)["score"], int(score))
+
+
+if __name__ == "__main__":
+    unittest.main()
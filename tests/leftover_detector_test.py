@@ -0,0 +1,73 @@
+# tests/leftover_detector_test.py
+# Kiểm thử phát hiện phần còn sót trên cây thư mục giả lập với danh sách phần mềm đã cài giả lập:
+# thư mục của phần mềm/nhà sản xuất còn cài không bị đánh dấu, sản phẩm đã gỡ thì bị đánh dấu
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.leftover_detector import KIND_DIRECTORY, SoftwareIndex, detect_leftovers, normalize_name
+
+
+class DetectLeftoversTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="leftover_detector_test_")
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.program_files = os.path.join(self.root, "Program Files")
+        self.app_data = os.path.join(self.root, "AppData")
+        for relative_path in ("Program Files/Mozilla Firefox/browser", "Program Files/Adobe/Acrobat DC",
+                              "Program Files/Adobe/Photoshop 2020", "Program Files/JetBrains/IntelliJ IDEA 2023",
+                              "Program Files/JetBrains/PyCharm 2021", "Program Files/Notepad++",
+                              "Program Files/Common Files/System", "Program Files/OldTool",
+                              "AppData/Mozilla/Firefox/Profiles", "AppData/SomeGoneApp", "AppData/{1234-ABCD}"):
+            os.makedirs(os.path.join(self.root, *relative_path.split("/")))
+        with open(os.path.join(self.program_files, "OldTool", "tool.exe"), "wb") as f:
+            f.write(b"x" * 1234)
+        self.products = [
+            {"name": "Mozilla Firefox (x64 en-US)", "publisher": "Mozilla",
+             "locations": [os.path.join(self.program_files, "Mozilla Firefox")]},
+            {"name": "Adobe Acrobat DC", "publisher": "Adobe Inc.",
+             "locations": [os.path.join(self.program_files, "Adobe", "Acrobat DC")]},
+            {"name": "IntelliJ IDEA 2023.2", "publisher": "JetBrains s.r.o.",
+             "locations": [os.path.join(self.program_files, "JetBrains", "IntelliJ IDEA 2023").upper()]},
+            {"name": "Notepad++ 8.6 (x64)", "publisher": "Notepad++ Team", "locations": []}, # Không có vị trí
+        ]
+
+    def _flagged(self, products=None):
+        report = detect_leftovers(self.products if products is None else products,
+                                  roots=[("Program Files", self.program_files), ("AppData", self.app_data)],
+                                  include_registry=False)
+        return report, {os.path.relpath(item.location, self.root).replace(os.sep, "/"): item for item in report.leftovers}
+
+    def test_installed_vendors_are_not_flagged(self):
+        report, flagged = self._flagged()
+        self.assertEqual(sorted(flagged), ["AppData/SomeGoneApp", "Program Files/Adobe/Photoshop 2020",
+                                           "Program Files/JetBrains/PyCharm 2021", "Program Files/OldTool"])
+        self.assertTrue(all(item.kind == KIND_DIRECTORY for item in report.leftovers))
+        self.assertEqual(flagged["Program Files/OldTool"].size_bytes, 1234)
+        self.assertIn("Adobe", flagged["Program Files/Adobe/Photoshop 2020"].reason)
+        self.assertEqual(report.product_count, 4)
+
+    def test_uninstalling_a_product_flags_its_folders(self):
+        _, flagged = self._flagged([product for product in self.products if product["publisher"] != "Mozilla"])
+        self.assertIn("Program Files/Mozilla Firefox", flagged)
+        self.assertIn("AppData/Mozilla", flagged)
+        _, flagged = self._flagged([])
+        self.assertIn("Program Files/Adobe", flagged) # Không còn sản phẩm nào của nhà sản xuất: cả thư mục
+        self.assertNotIn("Program Files/Common Files", flagged)
+        self.assertNotIn("AppData/{1234-ABCD}", flagged)
+
+
+class SoftwareIndexTest(unittest.TestCase):
+    def test_name_normalization_and_matching(self):
+        self.assertEqual(normalize_name("Notepad++ 8.6 (x64)"), "notepad")
+        self.assertEqual(normalize_name("Foo Co., Ltd."), "foo")
+        index = SoftwareIndex([{"name": "Mozilla Firefox", "publisher": "Mozilla Corporation", "locations": []}])
+        self.assertEqual(index.owner_of_name("Mozilla"), ["Mozilla Firefox"])
+        self.assertEqual(index.owner_of_name("MozillaFirefoxBackup"), ["Mozilla Firefox"])
+        self.assertIsNone(index.owner_of_name("Moz")) # Quá ngắn để so tiền tố
+        self.assertIsNone(index.owner_of_name("Thunderbird"))
+
+
+if __name__ == "__main__":
+    unittest.main()
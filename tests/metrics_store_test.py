@@ -0,0 +1,97 @@
+# tests/metrics_store_test.py
+# Kiểm thử kho số liệu ring buffer: ghi vòng khi đầy, tổng hợp min/avg/max qua ranh giới bucket, mở lại file cũ
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.metrics_store import MetricsStore, RingFile
+
+T0 = 1_700_000_040.0 # Đầu một phút
+FIELDS = ("cpu", "ram")
+TIERS = (("raw", 0, 24 * 3600, 5), ("1m", 60, 7 * 24 * 3600, 10))
+
+
+def _values(result, key):
+    return [None if math.isnan(value) else float(value) for value in result[key]]
+
+
+class MetricsStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="metrics_store_test_")
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.store = self._open()
+
+    def _open(self, fields=FIELDS):
+        store = MetricsStore(self.directory, fields=fields, tiers=TIERS)
+        self.addCleanup(store.close)
+        return store
+
+    def test_raw_ring_wraps_around_keeping_newest(self):
+        for i in range(8):
+            self.store.append(T0 + i, [float(i), 50.0])
+        result = self.store.query("cpu", T0, T0 + 100, tier="raw")
+        self.assertEqual([float(t) for t in result["timestamps"]], [T0 + i for i in range(3, 8)])
+        self.assertEqual(_values(result, "avg"), [3.0, 4.0, 5.0, 6.0, 7.0])
+        ring = self.store._tier("raw")[3]
+        self.assertEqual((ring.count, ring.start), (5, 3))
+        self.assertEqual(ring.index_at_or_after(T0 + 5.5), 3)
+
+    def test_rollup_across_bucket_boundary(self):
+        for offset, cpu, ram in [(0, 10.0, 1.0), (20, 30.0, None), (59, 20.0, 3.0), (60, 80.0, None), (90, 40.0, None)]:
+            self.store.append(T0 + offset, [cpu, ram])
+        cpu = self.store.query("cpu", T0, T0 + 120, tier="1m")
+        self.assertEqual([float(t) for t in cpu["timestamps"]], [T0, T0 + 60])
+        self.assertEqual((_values(cpu, "min"), _values(cpu, "avg"), _values(cpu, "max")),
+                         ([10.0, 40.0], [20.0, 60.0], [30.0, 80.0]))
+        ram = self.store.query("ram", T0, T0 + 120, tier="1m")
+        self.assertEqual(_values(ram, "avg"), [2.0, None]) # Bỏ qua giá trị thiếu; bucket toàn thiếu là NaN
+        # Truy vấn bắt đầu giữa bucket vẫn trả về bucket chứa thời điểm đó
+        self.assertEqual(len(self.store.query("cpu", T0 + 30, T0 + 45, tier="1m")["timestamps"]), 1)
+        # Bucket đang mở đã được ghi khi truy vấn nhưng vẫn tiếp tục tích lũy
+        self.store.append(T0 + 100, [90.0, None])
+        cpu = self.store.query("cpu", T0, T0 + 120, tier="1m")
+        self.assertEqual((_values(cpu, "avg")[-1], _values(cpu, "max")[-1]), (70.0, 90.0))
+        self.assertEqual(self.store._tier("1m")[3].count, 2)
+
+    def test_reopen_keeps_history_and_open_bucket(self):
+        self.store.append(T0, [10.0, 1.0])
+        self.store.append(T0 + 30, [20.0, 2.0])
+        self.store.close()
+
+        reopened = self._open()
+        raw = reopened.query("cpu", T0, T0 + 60, tier="raw")
+        self.assertEqual(_values(raw, "avg"), [10.0, 20.0])
+        reopened.append(T0 + 45, [60.0, 3.0]) # Cùng phút: cộng tiếp vào bucket đã lưu thay vì tạo bản ghi mới
+        rollup = reopened.query("cpu", T0, T0 + 60, tier="1m")
+        self.assertEqual((_values(rollup, "min"), _values(rollup, "avg"), _values(rollup, "max")),
+                         ([10.0], [30.0], [60.0]))
+        self.assertEqual(reopened._tier("1m")[3].count, 1)
+
+    def test_reopen_with_different_layout_starts_empty(self):
+        self.store.append(T0, [10.0, 1.0])
+        self.store.close()
+        reopened = self._open(fields=FIELDS + ("disk",))
+        self.assertEqual(len(reopened.query("cpu", T0, T0 + 60, tier="raw")["timestamps"]), 0)
+        self.assertEqual(os.path.getsize(os.path.join(self.directory, "metrics_raw.bin")),
+                         reopened._tier("raw")[3]._file_size())
+
+
+class RingFileTest(unittest.TestCase):
+    def test_drop_before_after_wraparound(self):
+        directory = tempfile.mkdtemp(prefix="metrics_store_test_")
+        self.addCleanup(shutil.rmtree, directory, True)
+        ring = RingFile(os.path.join(directory, "ring.bin"), 1, 4, 0, aggregated=False)
+        self.addCleanup(ring.close)
+        for i in range(6):
+            ring.append([float(i), float(i)])
+        self.assertEqual([ring.record_at(i)[0] for i in range(ring.count)], [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(ring.drop_before(4.0), 2)
+        self.assertEqual([ring.record_at(i)[0] for i in range(ring.count)], [4.0, 5.0])
+        ring.append([6.0, 6.0])
+        self.assertEqual(ring.last()[0], 6.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# tests/ntfs_mft_test.py
+# Kiểm thử trình đọc MFT trên ảnh NTFS tối giản (tests/fixtures/ntfs_small.img.gz, tạo bởi make_ntfs_fixture.py)
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.ntfs_mft import (
+    MftIndex, MftReader, NtfsError, ORPHAN_PREFIX, apply_fixup, decode_data_runs, read_mft,
+)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ntfs_small.img.gz")
+RECORD_SIZE = 1024
+SECTOR_SIZE = 512
+
+
+class NtfsImageTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp(prefix="ntfs_mft_test_")
+        with open(FIXTURE, "rb") as f:
+            cls.image_bytes = gzip.decompress(f.read())
+        cls.image_path = os.path.join(cls.temp_dir, "ntfs_small.img")
+        with open(cls.image_path, "wb") as f:
+            f.write(cls.image_bytes)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def _entries(self, index):
+        return {path: (size, is_directory) for _, path, size, is_directory in index.iter_entries()}
+
+
+class ReadMftTest(NtfsImageTestCase):
+    EXPECTED = {
+        "Documents": (0, True),
+        "Documents\\report.txt": (123, False),
+        "Documents\\big.bin": (10_000_000, False),
+        "Documents\\split.vhd": (5_555_000, False),
+        f"{ORPHAN_PREFIX}\\stale.log": (7, False),
+        "Old": (0, True),
+        "Documents\\link-a.txt": (44, False),
+        "download.zip": (77, False),
+        "Documents\\Tiếng Việt.txt": (5, False),
+    }
+
+    def test_read_mft_lists_user_records(self):
+        index = read_mft(self.image_path)
+        self.assertEqual(self._entries(index), self.EXPECTED)
+        self.assertEqual(index.records_read, 32)
+        self.assertEqual(index.totals(), (7, 2, 123 + 10_000_000 + 5_555_000 + 7 + 44 + 77 + 5))
+
+    def test_fragmented_mft_is_read_with_any_chunk_size(self):
+        # Bản ghi 1024 byte trên cluster 512 byte, $MFT chia hai run: bản ghi vắt qua ranh giới run/lần đọc
+        for read_bytes in (1024, 3 * 1024, 1 << 20):
+            with self.subTest(read_bytes=read_bytes):
+                index = MftReader(self.image_path, read_bytes=read_bytes).read()
+                self.assertEqual(self._entries(index), self.EXPECTED)
+
+    def test_metadata_records_and_mft_size(self):
+        index = read_mft(self.image_path)
+        metadata = {path: size for record, path, size, _ in index.iter_entries(include_metadata=True) if record < 16}
+        self.assertEqual(metadata, {"$MFT": 32 * RECORD_SIZE})
+
+    def test_file_name_namespace_selection(self):
+        index = read_mft(self.image_path)
+        self.assertEqual(index.names[16], "Documents") # Tên 8.3 DOCUME~1 đứng trước nhưng bị bỏ qua
+        self.assertEqual(index.names[18], "big.bin")   # Chỉ có tên POSIX
+        self.assertEqual(index.path_of(26), "Documents\\link-a.txt") # Hard link: giữ tên Win32 đầu tiên
+
+    def test_deleted_and_torn_records_are_skipped(self):
+        index = read_mft(self.image_path)
+        self.assertFalse(index.is_in_use(22)) # Cờ in-use đã xóa
+        self.assertFalse(index.is_in_use(25)) # Fixup không khớp (ghi dở)
+        self.assertNotIn("deleted.tmp", index.names)
+        self.assertNotIn("torn.dat", index.names)
+
+    def test_extension_records_merge_into_base(self):
+        index = read_mft(self.image_path)
+        self.assertEqual(index.size[19], 5_555_000) # Extent VCN 0 ở bản ghi 20; extent VCN 40 (bản ghi 21) không đổi kích thước
+        self.assertFalse(index.is_in_use(20))
+        self.assertFalse(index.is_in_use(21))
+
+    def test_largest_files(self):
+        index = read_mft(self.image_path)
+        self.assertEqual(index.largest_files(2), [("Documents\\big.bin", 10_000_000), ("Documents\\split.vhd", 5_555_000)])
+
+    def test_index_save_and_load_round_trip(self):
+        index = read_mft(self.image_path)
+        index.journal_id, index.next_usn = 0x1234, 987
+        path = os.path.join(self.temp_dir, "mft.idx")
+        index.save(path)
+        loaded = MftIndex.load(path)
+        self.assertEqual(self._entries(loaded), self.EXPECTED)
+        self.assertEqual((loaded.journal_id, loaded.next_usn), (0x1234, 987))
+
+    def test_truncated_image_raises(self):
+        path = os.path.join(self.temp_dir, "truncated.img")
+        with open(path, "wb") as f:
+            f.write(self.image_bytes[:30 * SECTOR_SIZE]) # Cắt giữa run thứ hai của $MFT
+        with self.assertRaises(NtfsError):
+            read_mft(path)
+
+    def test_non_ntfs_source_raises(self):
+        path = os.path.join(self.temp_dir, "fat.img")
+        with open(path, "wb") as f:
+            f.write(b"\xEB\x3C\x90MSDOS5.0" + bytes(8192))
+        with self.assertRaises(NtfsError):
+            read_mft(path)
+
+
+class RecordPrimitivesTest(NtfsImageTestCase):
+    def _mft_record(self, number):
+        # Bản ghi 16+ nằm trong run thứ hai của $MFT (LCN 20, cluster 512 byte), bắt đầu từ bản ghi 1.5
+        offset = 20 * 512 + (number * RECORD_SIZE - 3 * 512)
+        return bytearray(self.image_bytes[offset:offset + RECORD_SIZE])
+
+    def test_apply_fixup_restores_sector_trailers(self):
+        record = self._mft_record(17)
+        self.assertEqual(record[:4], b"FILE")
+        usn = bytes(record[0x30:0x32])
+        self.assertEqual(record[SECTOR_SIZE - 2:SECTOR_SIZE], usn)
+        self.assertTrue(apply_fixup(record, 0, RECORD_SIZE, SECTOR_SIZE))
+        self.assertNotEqual(record[SECTOR_SIZE - 2:SECTOR_SIZE], usn)
+
+    def test_apply_fixup_rejects_torn_record(self):
+        self.assertFalse(apply_fixup(self._mft_record(25), 0, RECORD_SIZE, SECTOR_SIZE))
+
+    def test_decode_data_runs(self):
+        # 3 cluster tại LCN 100; 10 cluster sparse; 5 cluster tại LCN 100 - 50 (offset âm); 2 cluster offset 2 byte
+        runs = bytes([0x11, 0x03, 0x64, 0x01, 0x0A, 0x11, 0x05, 0xCE, 0x21, 0x02, 0x00, 0x10, 0x00])
+        self.assertEqual(decode_data_runs(runs, 0), [(100, 3), (None, 10), (50, 5), (50 + 0x1000, 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
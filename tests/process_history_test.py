@@ -0,0 +1,84 @@
+# tests/process_history_test.py
+# Kiểm thử lịch sử tài nguyên theo tiến trình: xếp hạng tiến trình ngốn tài nguyên trong một khoảng thời gian
+# và giải phóng hàng của tiến trình đã thoát (mẫu giả lập, không đọc tiến trình thật)
+import unittest
+from unittest import mock
+
+from core.process_history import HAS_NUMPY, METRIC_RSS, ProcessHistory
+
+MB = 1024 * 1024
+
+
+class _Process:
+    """Tiến trình giả: cộng dồn thời gian CPU theo tỉ lệ phần trăm mỗi giây."""
+    def __init__(self, pid, name, rss_mb=10, create_time=100.0):
+        self.pid, self.name, self.rss_mb, self.create_time = pid, name, rss_mb, create_time
+        self.cpu_seconds = 0.0
+        self.io_bytes = 0
+
+    def sample(self, cpu_percent=0.0, io_bps=0):
+        self.cpu_seconds += cpu_percent / 100.0
+        self.io_bytes += io_bps
+        return self.pid, self.create_time, self.name, self.cpu_seconds, self.rss_mb * MB, self.io_bytes
+
+
+@unittest.skipUnless(HAS_NUMPY, "Cần numpy")
+class ProcessHistoryTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("core.process_history.psutil.cpu_count", return_value=1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_offenders_ranked_within_window(self):
+        history = ProcessHistory(history_samples=20, max_processes=8)
+        burst, steady = _Process(1, "burst.exe"), _Process(2, "steady.exe")
+        idle, hog = _Process(3, "idle.exe"), _Process(4, "hog.exe", rss_mb=512)
+        for t in range(11): # Mẫu đầu (t=0) chỉ làm mốc; burst.exe chạy 80% trong t=1..5 rồi nghỉ
+            history.record(float(t), [burst.sample(80.0 if 1 <= t <= 5 else 0.0), steady.sample(30.0),
+                                      idle.sample(), hog.sample(1.0)])
+        self.assertEqual(history.tracked_count(), 3) # idle.exe không bao giờ được cấp hàng
+
+        first = history.top_offenders(1.0, 5.0)
+        self.assertEqual([item["name"] for item in first], ["burst.exe", "steady.exe", "hog.exe"])
+        self.assertEqual((first[0]["cpu_avg"], first[0]["cpu_peak"], first[0]["samples"]), (80.0, 80.0, 5))
+        self.assertEqual([item["name"] for item in history.top_offenders(6.0, 10.0)],
+                         ["steady.exe", "hog.exe", "burst.exe"])
+        self.assertEqual(history.top_offenders(6.0, 10.0)[-1]["cpu_avg"], 0.0)
+        self.assertEqual([item["pid"] for item in history.top_offenders(1.0, 10.0, n=1)], [1]) # TB 40% so với 30%
+        self.assertEqual(history.top_offenders(1.0, 10.0, metric=METRIC_RSS)[0]["rss_avg_mb"], 512.0)
+        self.assertEqual(history.top_offenders(50.0, 60.0), [])
+
+    def test_exited_process_is_evicted_after_leaving_the_ring(self):
+        history = ProcessHistory(history_samples=4, max_processes=8)
+        gone, stays = _Process(1, "gone.exe"), _Process(2, "stays.exe")
+        history.record(0.0, [gone.sample(), stays.sample()])
+        history.record(1.0, [gone.sample(50.0), stays.sample(50.0)])
+        self.assertEqual(history.tracked_count(), 2)
+        for t in (2.0, 3.0, 4.0): # gone.exe đã thoát: hàng giữ lại khi mẫu t=1 còn trong vòng
+            history.record(t, [stays.sample(50.0)])
+            self.assertEqual(history.tracked_count(), 2)
+            self.assertIn("gone.exe", [item["name"] for item in history.top_offenders(0.0, t)])
+        history.record(5.0, [stays.sample(50.0)]) # Mẫu cũ nhất giờ là t=2
+        self.assertEqual(history.tracked_count(), 1)
+        self.assertEqual([item["name"] for item in history.top_offenders(0.0, 5.0)], ["stays.exe"])
+
+        # PID được dùng lại bởi tiến trình mới (create_time khác): mốc mới, không nối vào lịch sử cũ
+        reused = _Process(1, "new.exe", create_time=200.0)
+        reused.cpu_seconds = gone.cpu_seconds + 100.0
+        history.record(6.0, [stays.sample(50.0), reused.sample(60.0)])
+        history.record(7.0, [stays.sample(50.0), reused.sample(60.0)])
+        self.assertEqual([(item["name"], item["cpu_avg"]) for item in history.top_offenders(7.0, 7.0)],
+                         [("new.exe", 60.0), ("stays.exe", 50.0)])
+
+    def test_least_recently_active_row_is_reused_when_full(self):
+        history = ProcessHistory(history_samples=10, max_processes=2)
+        processes = [_Process(pid, f"p{pid}.exe") for pid in (1, 2, 3)]
+        history.record(0.0, [process.sample() for process in processes])
+        history.record(1.0, [processes[0].sample(50.0), processes[1].sample(50.0), processes[2].sample()])
+        history.record(2.0, [processes[0].sample(), processes[1].sample(50.0), processes[2].sample(50.0)])
+        self.assertEqual(history.tracked_count(), 2)
+        self.assertEqual(sorted(item["name"] for item in history.top_offenders(0.0, 2.0)), ["p2.exe", "p3.exe"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+# tests/storage_benchmark_test.py
+# Kiểm thử chọn kích thước file thử theo dung lượng trống và ghi chú cache của bài đọc mmap
+import tempfile
+import unittest
+
+from core.storage_benchmark import (
+    fit_file_size_mb, run_storage_benchmark, CACHE_BYPASS_DROP, PATTERN_RANDOM, OP_READ,
+)
+
+MB = 1 << 20
+GB = 1 << 30
+
+
+class FitFileSizeTest(unittest.TestCase):
+    def test_requested_size_when_space_is_plentiful(self):
+        self.assertEqual(fit_file_size_mb(256, 100 * GB, 500 * GB), 256)
+
+    def test_shrinks_to_free_space_minus_reserve(self):
+        self.assertEqual(fit_file_size_mb(256, 500 * MB, 512 * MB), 244) # Chừa 256 MB
+
+    def test_reserve_scales_with_partition_size(self):
+        self.assertEqual(fit_file_size_mb(256, 10 * GB + 100 * MB, 200 * GB), 100) # Chừa 5% = 10 GB
+
+    def test_skips_when_below_minimum(self):
+        self.assertEqual(fit_file_size_mb(256, 280 * MB, 300 * MB), 0)
+        self.assertEqual(fit_file_size_mb(256, 0, 0), 0)
+
+
+class MmapReadTest(unittest.TestCase):
+    def test_mmap_pass_only_reported_with_cold_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_storage_benchmark(directory, file_size_mb=4, duration_s=0.05, mmap_read=True,
+                                            tests=(("RND4K Q1 Đọc", PATTERN_RANDOM, OP_READ, 4096, 1),))
+        names = [item["name"] for item in results]
+        self.assertEqual(names[:2], ["SEQ1M Q1 Ghi", "RND4K Q1 Đọc"])
+        mmap_results = [item for item in results if item["name"] == "RND4K mmap Đọc"]
+        for item in mmap_results: # Không xóa được cache thì bài mmap bị bỏ qua
+            self.assertEqual(item["cache"], CACHE_BYPASS_DROP)
+
+
+if __name__ == "__main__":
+    unittest.main()
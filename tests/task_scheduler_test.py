@@ -0,0 +1,145 @@
+# tests/task_scheduler_test.py
+# Kiểm thử bộ lập lịch: thứ tự ưu tiên, giới hạn theo loại, gộp yêu cầu trùng và hủy tác vụ đang chờ.
+# Tác vụ "chặn" giữ worker cho đến khi test mở khóa, nên thứ tự chạy hoàn toàn xác định.
+import threading
+import time
+import unittest
+
+from core.task_scheduler import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, TASK_CANCELLED, TASK_DONE, TASK_PENDING, TASK_RUNNING, TaskScheduler,
+)
+
+TIMEOUT = 5
+
+
+class SchedulerTestCase(unittest.TestCase):
+    def _scheduler(self, **kwargs):
+        scheduler = TaskScheduler(**kwargs)
+        self.addCleanup(scheduler.shutdown, True, TIMEOUT)
+        return scheduler
+
+    def _blocker(self):
+        """(hàm chặn, sự kiện đã bắt đầu, sự kiện mở khóa). Khóa luôn được mở khi test kết thúc."""
+        started, release = threading.Event(), threading.Event()
+        self.addCleanup(release.set)
+
+        def block():
+            started.set()
+            release.wait(TIMEOUT)
+            return "blocked"
+        return block, started, release
+
+    def _record(self, order, name):
+        def task():
+            order.append(name)
+            return name
+        task.__name__ = name
+        return task
+
+
+class PriorityTest(SchedulerTestCase):
+    def test_interactive_runs_before_background_and_fifo_within_priority(self):
+        scheduler = self._scheduler(max_workers=1)
+        block, started, release = self._blocker()
+        scheduler.submit(block)
+        self.assertTrue(started.wait(TIMEOUT))
+        order = []
+        handles = [scheduler.submit(self._record(order, "nền 1"), priority=PRIORITY_BACKGROUND),
+                   scheduler.submit(self._record(order, "nền 2"), priority=PRIORITY_BACKGROUND),
+                   scheduler.submit(self._record(order, "người dùng"), priority=PRIORITY_INTERACTIVE)]
+        self.assertEqual(scheduler.queue_depth(), 3)
+        release.set()
+        for handle in handles:
+            self.assertTrue(handle.wait(TIMEOUT))
+        self.assertEqual(order, ["người dùng", "nền 1", "nền 2"])
+
+
+class TypeLimitTest(SchedulerTestCase):
+    def test_limited_type_waits_while_other_types_run(self):
+        scheduler = self._scheduler(max_workers=3, type_limits={"wmi": 1})
+        first_block, first_started, first_release = self._blocker()
+        second_block, second_started, _ = self._blocker()
+        other_block, other_started, _ = self._blocker()
+        first = scheduler.submit(first_block, task_type="wmi")
+        second = scheduler.submit(second_block, task_type="wmi")
+        other = scheduler.submit(other_block)
+        self.assertTrue(first_started.wait(TIMEOUT))
+        self.assertTrue(other_started.wait(TIMEOUT)) # Worker rảnh vẫn nhận loại khác
+        self.assertEqual((first.state, second.state, other.state), (TASK_RUNNING, TASK_PENDING, TASK_RUNNING))
+        self.assertEqual(scheduler.get_metrics()["running_by_type"], {"wmi": 1, "default": 1})
+
+        first_release.set()
+        self.assertTrue(second_started.wait(TIMEOUT))
+        self.assertEqual((first.state, first.result), (TASK_DONE, "blocked"))
+        self.assertEqual(second.state, TASK_RUNNING)
+
+
+class CoalesceTest(SchedulerTestCase):
+    def test_resubmit_returns_existing_handle(self):
+        scheduler = self._scheduler(max_workers=1)
+        block, started, release = self._blocker()
+        scheduler.submit(block)
+        self.assertTrue(started.wait(TIMEOUT))
+        order = []
+        queued = scheduler.submit(self._record(order, "làm mới"), coalesce_key="refresh", priority=PRIORITY_BACKGROUND)
+        again = scheduler.submit(self._record(order, "làm mới (lần 2)"), coalesce_key="refresh",
+                                 priority=PRIORITY_INTERACTIVE)
+        self.assertIs(again, queued)
+        self.assertEqual(queued.priority, PRIORITY_INTERACTIVE) # Yêu cầu tương tác nâng độ ưu tiên
+        self.assertEqual((scheduler.queue_depth(), scheduler.get_metrics()["coalesced"]), (1, 1))
+
+        release.set()
+        self.assertTrue(queued.wait(TIMEOUT))
+        self.assertEqual((order, queued.result), (["làm mới"], "làm mới"))
+        # Tác vụ đã xong: gửi lại cùng khóa sẽ chạy lần mới
+        fresh = scheduler.submit(self._record(order, "làm mới (lần 3)"), coalesce_key="refresh")
+        self.assertIsNot(fresh, queued)
+        self.assertTrue(fresh.wait(TIMEOUT))
+        self.assertEqual(order, ["làm mới", "làm mới (lần 3)"])
+
+
+class CancelTest(SchedulerTestCase):
+    def test_cancel_queued_task_never_runs(self):
+        scheduler = self._scheduler(max_workers=1)
+        block, started, release = self._blocker()
+        running = scheduler.submit(block)
+        self.assertTrue(started.wait(TIMEOUT))
+        order = []
+        cancelled = scheduler.submit(self._record(order, "bị hủy"), coalesce_key="key")
+        kept = scheduler.submit(self._record(order, "giữ lại"))
+        finished = []
+        cancelled.add_done_callback(finished.append)
+
+        self.assertTrue(scheduler.cancel(cancelled))
+        self.assertEqual((cancelled.state, finished), (TASK_CANCELLED, [cancelled]))
+        self.assertFalse(scheduler.cancel(cancelled)) # Đã kết thúc
+        self.assertEqual(scheduler.queue_depth(), 1)
+        self.assertIsNot(scheduler.submit(self._record(order, "gửi lại"), coalesce_key="key"), cancelled)
+
+        release.set()
+        self.assertTrue(kept.wait(TIMEOUT))
+        self.assertTrue(running.wait(TIMEOUT))
+        scheduler.shutdown(wait=True, timeout=TIMEOUT, cancel_pending=False)
+        self.assertEqual(order, ["giữ lại", "gửi lại"])
+        self.assertEqual(scheduler.get_metrics()["cancelled"], 1)
+
+    def test_cancel_deferred_task(self):
+        scheduler = self._scheduler(max_workers=2, type_limits={"wmi": 1})
+        block, started, release = self._blocker()
+        scheduler.submit(block, task_type="wmi")
+        self.assertTrue(started.wait(TIMEOUT))
+        order = []
+        waiting = scheduler.submit(self._record(order, "wmi chờ"), task_type="wmi")
+        deadline = time.monotonic() + TIMEOUT # Worker rảnh lấy tác vụ ra rồi tạm giữ vì loại đã đủ giới hạn
+        while scheduler.get_metrics()["deferred_by_type"] != {"wmi": 1} and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(scheduler.get_metrics()["deferred_by_type"], {"wmi": 1})
+        self.assertTrue(scheduler.cancel(waiting))
+        self.assertEqual(scheduler.queue_depth(), 0)
+        release.set()
+        scheduler.shutdown(wait=True, timeout=TIMEOUT, cancel_pending=False)
+        self.assertEqual((waiting.state, order), (TASK_CANCELLED, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
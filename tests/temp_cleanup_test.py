@@ -0,0 +1,109 @@
+# tests/temp_cleanup_test.py
+# Kiểm thử dọn file tạm hai pha (quét/xem trước rồi xóa) trên cây thư mục tạm
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from core.task_control import CancellationToken
+from core.temp_cleanup import CleanupTarget, execute_cleanup, scan_cleanup_targets
+
+OLD_MTIME = time.time() - 7 * 24 * 3600
+
+
+def _write(path, size, mtime=OLD_MTIME):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+class TempCleanupTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="temp_cleanup_test_")
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.temp = os.path.join(self.root, "Temp")
+        _write(os.path.join(self.temp, "a.tmp"), 1000)
+        _write(os.path.join(self.temp, "sub", "b.log"), 2000)
+        _write(os.path.join(self.temp, "sub", "deep", "c.bin"), 3000)
+        _write(os.path.join(self.temp, "fresh.tmp"), 500, mtime=time.time())
+        os.makedirs(os.path.join(self.temp, "empty"))
+        self.other = os.path.join(self.root, "Other")
+        _write(os.path.join(self.other, "d.tmp"), 4000)
+
+    def _remaining(self, directory):
+        return sorted(os.path.relpath(os.path.join(path, name), directory)
+                      for path, dirs, files in os.walk(directory) for name in files + dirs)
+
+    def test_preview_totals(self):
+        plan = scan_cleanup_targets([CleanupTarget("Temp", self.temp), CleanupTarget("Khác", self.other)])
+        self.assertFalse(plan.cancelled)
+        self.assertEqual((plan.total_files, plan.total_bytes), (5, 10500))
+        self.assertEqual((plan.stats["Temp"].files, plan.stats["Temp"].dirs, plan.stats["Temp"].bytes), (4, 3, 6500))
+        rows = plan.preview_rows()
+        self.assertEqual([row["Nhóm"] for row in rows], ["Temp", "Khác", "Tổng cộng"])
+        self.assertEqual(rows[-1]["Số file"], 5)
+        self.assertEqual(self._remaining(self.temp), ["a.tmp", "empty", "fresh.tmp", "sub", os.path.join("sub", "b.log"),
+                                                      os.path.join("sub", "deep"), os.path.join("sub", "deep", "c.bin")])
+
+    def test_min_age_skips_recent_files(self):
+        plan = scan_cleanup_targets([CleanupTarget("Temp", self.temp, min_age_s=3600)])
+        stats = plan.stats["Temp"]
+        self.assertEqual((stats.files, stats.bytes, stats.recent_skipped), (3, 6000, 1))
+        execute_cleanup(plan)
+        self.assertIn("fresh.tmp", self._remaining(self.temp))
+        self.assertEqual(self._remaining(self.temp), ["fresh.tmp"]) # Thư mục con đã rỗng được xóa
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "Không hỗ trợ symlink")
+    def test_symlinked_directory_is_not_followed(self):
+        try:
+            os.symlink(self.other, os.path.join(self.temp, "link"), target_is_directory=True)
+        except OSError as e: # Windows cần quyền tạo symlink
+            self.skipTest(f"Không tạo được symlink: {e}")
+        plan = scan_cleanup_targets([CleanupTarget("Temp", self.temp)])
+        self.assertNotIn(os.path.join(self.other, "d.tmp"), [path for path, _, _ in plan.files])
+        self.assertEqual(plan.stats["Temp"].bytes, 6500) # Liên kết tính 0 byte
+        execute_cleanup(plan)
+        self.assertEqual(self._remaining(self.other), ["d.tmp"]) # Thư mục đích còn nguyên
+        self.assertFalse(os.path.lexists(os.path.join(self.temp, "link"))) # Chỉ chính liên kết bị xóa
+
+    def test_overlapping_roots_counted_once(self):
+        plan = scan_cleanup_targets([
+            CleanupTarget("Con", os.path.join(self.temp, "sub")),
+            CleanupTarget("Temp", self.temp),
+            CleanupTarget("Temp (trùng)", self.temp + os.sep),
+            CleanupTarget("Không tồn tại", os.path.join(self.root, "missing")),
+        ])
+        self.assertEqual(list(plan.stats), ["Temp"])
+        paths = [path for path, _, _ in plan.files]
+        self.assertEqual(len(paths), len(set(paths)))
+        self.assertEqual((plan.total_files, plan.total_bytes), (4, 6500))
+
+    def test_cancelled_scan_and_cleanup(self):
+        token = CancellationToken()
+        token.cancel()
+        plan = scan_cleanup_targets([CleanupTarget("Temp", self.temp)], cancel_token=token)
+        self.assertTrue(plan.cancelled)
+        self.assertEqual(plan.files, [])
+
+        plan = scan_cleanup_targets([CleanupTarget("Temp", self.temp)])
+        execute_cleanup(plan, batch_size=1, max_workers=1, cancel_token=token)
+        self.assertTrue(plan.cancelled)
+        self.assertEqual(sum(stats.deleted_files for stats in plan.stats.values()), 0)
+        self.assertEqual(len(self._remaining(self.temp)), 7)
+
+    def test_execute_deletes_only_previewed_files(self):
+        plan = scan_cleanup_targets([CleanupTarget("Temp", self.temp)])
+        _write(os.path.join(self.temp, "sub", "new.tmp"), 10) # Tạo sau khi xem trước
+        progress = []
+        execute_cleanup(plan, batch_size=2, progress_callback=lambda percent, message: progress.append(percent))
+        stats = plan.stats["Temp"]
+        self.assertEqual((stats.deleted_files, stats.freed_bytes, stats.skipped, stats.errors), (4, 6500, 0, []))
+        self.assertEqual(stats.deleted_dirs, 2) # "deep" và "empty"; "sub" còn new.tmp
+        self.assertEqual(self._remaining(self.temp), ["sub", os.path.join("sub", "new.tmp")])
+        self.assertEqual(progress[-1], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
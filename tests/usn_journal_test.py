@@ -0,0 +1,176 @@
+# tests/usn_journal_test.py
+# Phát lại USN journal đã ghi (tests/fixtures/usn_small.dump) lên chỉ mục MFT của ảnh NTFS mẫu,
+# và kiểm thử chỉ mục dung lượng quét lại thư mục có file bị sửa theo journal
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from core.disk_analyzer import build_disk_index
+from core.ntfs_mft import read_mft
+from core.usn_journal import (
+    DumpJournalSource, JournalResetRequired, MftIndexSink, ParentDirectorySink, UsnChangeTracker, parse_usn_records,
+    update_mft_index,
+)
+from tests.fixtures.make_usn_fixture import (
+    CLOSE, DATA_EXTEND, FIRST_USN, JOURNAL_ID, build_chunks, ref, write_dump,
+)
+from tests.ntfs_mft_test import NtfsImageTestCase
+
+DUMP_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "usn_small.dump")
+
+
+class _FakeSizeSink(MftIndexSink):
+    """Kích thước file lấy từ dict thay vì stat trên volume thật."""
+    def __init__(self, index, sizes):
+        super().__init__(index, volume_root="")
+        self.sizes = sizes
+        self.lookups = []
+
+    def size_lookup(self, relative_path):
+        self.lookups.append(relative_path)
+        return self.sizes.get(relative_path)
+
+
+class UsnReplayTest(NtfsImageTestCase):
+    def setUp(self):
+        self.source = DumpJournalSource(DUMP_FIXTURE)
+        self.index = read_mft(self.image_path)
+
+    def test_dump_header(self):
+        info = self.source.query()
+        self.assertEqual(info.journal_id, JOURNAL_ID)
+        self.assertEqual(info.lowest_valid_usn, FIRST_USN)
+
+    def test_parse_v2_and_v3_records(self):
+        records = [record for chunk in self.source.read_chunks(0) for record in parse_usn_records(chunk, 8)]
+        self.assertEqual(len(records), 14) # Bản ghi phiên bản 4 bị bỏ qua
+        self.assertEqual(records[0].name, "notes.md")
+        self.assertEqual((records[0].record_number, records[0].sequence), (29, 1))
+        moved = records[9]
+        self.assertEqual((moved.name, moved.parent_reference), ("huge.bin", ref(24, 3)))
+        self.assertTrue(records[12].is_directory)
+        self.assertEqual([r.usn for r in records], sorted(r.usn for r in records))
+
+    def test_replay_updates_mft_index(self):
+        sink = _FakeSizeSink(self.index, {"Documents\\notes.md": 2048, "Documents\\report.txt": 500})
+        summary = UsnChangeTracker(self.source, sink).catch_up(JOURNAL_ID, FIRST_USN)
+        entries = {path: size for _, path, size, _ in self.index.iter_entries()}
+        self.assertEqual(entries["Documents\\notes.md"], 2048)
+        self.assertEqual(entries["Documents\\report.txt"], 500)
+        self.assertEqual(entries["Old\\huge.bin"], 10_000_000)
+        self.assertEqual(entries["Projects"], 0)
+        self.assertTrue(self.index.is_directory(31))
+        for gone in ("Documents\\big.bin", "download.zip", "~tmp1.tmp"):
+            self.assertNotIn(gone, entries)
+        self.assertEqual(sorted(sink.lookups), ["Documents\\notes.md", "Documents\\report.txt"]) # Stat một lần mỗi file
+        self.assertEqual(summary.next_usn, self.source.query().next_usn)
+
+    def test_summary_counts_each_file_once(self):
+        summary = UsnChangeTracker(self.source, _FakeSizeSink(self.index, {})).catch_up(JOURNAL_ID, FIRST_USN)
+        self.assertEqual(summary.records, 14)
+        # notes.md + Projects (cờ CREATE lặp lại trên nhiều bản ghi); ~tmp1.tmp tạo rồi xóa không được tính
+        self.assertEqual(summary.created, 2)
+        self.assertEqual(summary.deleted, 1)
+        self.assertEqual(summary.renamed, 1)
+        self.assertEqual(summary.modified, 1)
+
+    def test_resume_from_checkpoint_skips_older_records(self):
+        records = [record for chunk in self.source.read_chunks(0) for record in parse_usn_records(chunk, 8)]
+        summary = UsnChangeTracker(self.source, _FakeSizeSink(self.index, {})).catch_up(JOURNAL_ID, records[8].usn)
+        self.assertEqual(summary.records, 6) # Chỉ khối 2
+        self.assertEqual((summary.created, summary.deleted, summary.renamed, summary.modified), (1, 1, 1, 0))
+
+    def test_update_mft_index_advances_checkpoint(self):
+        self.index.journal_id, self.index.next_usn = JOURNAL_ID, FIRST_USN
+        update_mft_index(self.index, self.source, volume_root=self.temp_dir)
+        self.assertEqual(self.index.next_usn, self.source.query().next_usn)
+
+    def test_invalid_checkpoint_requires_full_rescan(self):
+        tracker = UsnChangeTracker(self.source, _FakeSizeSink(self.index, {}))
+        with self.assertRaises(JournalResetRequired):
+            tracker.catch_up(JOURNAL_ID + 1, FIRST_USN) # Journal đã bị tạo lại
+        with self.assertRaises(JournalResetRequired):
+            tracker.catch_up(JOURNAL_ID, 0) # Điểm mốc trước LowestValidUsn
+        with self.assertRaises(JournalResetRequired):
+            tracker.catch_up(None, None)
+
+    def test_parent_directory_sink_collects_changed_directories(self):
+        sink = ParentDirectorySink()
+        UsnChangeTracker(self.source, sink).catch_up(JOURNAL_ID, FIRST_USN)
+        self.assertEqual(sink.dirty, {ref(16, 1), ref(5, 5), ref(24, 3)})
+
+
+class DiskIndexJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="usn_disk_test_")
+        self.root = os.path.join(self.temp_dir, "root")
+        self.folder = os.path.join(self.root, "folder")
+        os.makedirs(self.folder)
+        self.file_path = os.path.join(self.folder, "data.bin")
+        with open(self.file_path, "wb") as f:
+            f.write(b"a" * 1000)
+        self.index_path = os.path.join(self.temp_dir, "disk.idx")
+        self.dump_path = os.path.join(self.temp_dir, "journal.dump")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _journal(self, entries):
+        chunks, next_usn = build_chunks(entries)
+        write_dump(self.dump_path, chunks, next_usn)
+        return DumpJournalSource(self.dump_path)
+
+    def _grow_file_keeping_folder_mtime(self):
+        folder_stat = os.stat(self.folder)
+        with open(self.file_path, "r+b") as f: # Sửa nội dung tại chỗ: mtime thư mục không đổi
+            f.seek(0, os.SEEK_END)
+            f.write(b"b" * 4000)
+        os.utime(self.folder, ns=(folder_stat.st_atime_ns, folder_stat.st_mtime_ns))
+
+    def _folder_bytes(self, index):
+        return {path: size for path, size, _ in index.largest_folders(10)}[self.folder]
+
+    def test_journal_forces_rescan_of_directory_with_modified_file(self):
+        empty = self._journal([[]])
+        first = build_disk_index(self.root, self.index_path, journal_source=empty)
+        self.assertEqual(self._folder_bytes(first), 1000)
+        self.assertEqual(first.journal_id, JOURNAL_ID)
+
+        self._grow_file_keeping_folder_mtime()
+        folder_ref = os.stat(self.folder).st_ino
+        file_ref = os.stat(self.file_path).st_ino
+        journal = self._journal([[(2, file_ref, folder_ref, DATA_EXTEND | CLOSE, "data.bin")]])
+        refreshed = build_disk_index(self.root, self.index_path, journal_source=journal)
+        self.assertEqual(self._folder_bytes(refreshed), 5000)
+        self.assertEqual(refreshed.rescanned_dirs, 1)
+        self.assertEqual(refreshed.next_usn, journal.query().next_usn)
+
+    def test_without_journal_changes_unchanged_directories_are_reused(self):
+        build_disk_index(self.root, self.index_path, journal_source=self._journal([[]]))
+        time.sleep(0.01)
+        self._grow_file_keeping_folder_mtime()
+        refreshed = build_disk_index(self.root, self.index_path, journal_source=self._journal([[]]))
+        self.assertEqual(self._folder_bytes(refreshed), 1000) # Không có bản ghi USN: giữ số liệu cũ
+        self.assertEqual(refreshed.rescanned_dirs, 0)
+
+    def test_wide_file_ids_are_truncated_to_64_bits(self):
+        real_stat = os.stat
+
+        def wide_stat(path, *args, **kwargs): # File id 128 bit như ReFS/Dev Drive
+            result = real_stat(path, *args, **kwargs)
+            fields = list(result)
+            fields[1] = result.st_ino | (0xABCD << 64)
+            return os.stat_result(fields, {"st_mtime": result.st_mtime, "st_mtime_ns": result.st_mtime_ns})
+
+        with mock.patch("os.stat", wide_stat):
+            build_disk_index(self.root, self.index_path, journal_source=self._journal([[]]))
+            index = build_disk_index(self.root, self.index_path, journal_source=self._journal([[]]))
+        self.assertEqual(list(index.file_id), [real_stat(self.root).st_ino, real_stat(self.folder).st_ino])
+        self.assertEqual(self._folder_bytes(index), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()